@@ -2,9 +2,12 @@ from flask import render_template, redirect, url_for, flash, request, jsonify, c
 from flask_login import login_required, current_user
 from functools import wraps
 from . import admin
-from models import User, db, AnalysisHistory, SystemSettings, UserMessage, Notification, Conversation, ConversationMessage
+from models import User, db, AnalysisHistory, SystemSettings, UserMessage, Notification, Conversation, ConversationMessage, DownloadRecord
 from forms import AdminUserForm, SystemSettingForm, ConversationMessageForm
 from datetime import datetime, timedelta
+from job_queue import submit_job
+from data_store import scrape_race_card, race_card_path
+import artifact_catalog
 
 def admin_required(f):
     """Admin yetkisi kontrolü decorator'ı"""
@@ -249,17 +252,16 @@ def data_management():
     data_files = []
     
     if os.path.exists(data_folder):
-        for file in os.listdir(data_folder):
-            if file.endswith('.json'):
-                file_path = os.path.join(data_folder, file)
-                file_stat = os.stat(file_path)
-                file_info = {
-                    'name': file,
-                    'size': round(file_stat.st_size / 1024, 2),  # KB cinsinden
-                    'modified': datetime.fromtimestamp(file_stat.st_mtime),
-                    'city': file.split('_')[0] if '_' in file else 'Unknown'
-                }
-                data_files.append(file_info)
+        # Dosya listesi katalogdan (dizin taraması yok)
+        for kayit in artifact_catalog.list_files(('kart', 'veri'), dizin=data_folder):
+            file = os.path.basename(kayit['path'])
+            file_info = {
+                'name': file,
+                'size': round(kayit['size'] / 1024, 2),  # KB cinsinden
+                'modified': datetime.fromtimestamp(kayit['created']),
+                'city': file.split('_')[0] if '_' in file else 'Unknown'
+            }
+            data_files.append(file_info)
     
     # Şehir listesi
     cities = ['istanbul', 'ankara', 'izmir', 'bursa', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
@@ -304,14 +306,13 @@ def fetch_city_data(city):
         if city not in city_functions:
             return jsonify({'success': False, 'error': 'Geçersiz şehir'})
         
-        # Veriyi çek
-        horses = city_functions[city]()
+        # Veriyi çek (eşzamanlı istekler tek çekmeyi paylaşır, JSON burada kaydedilir)
+        horses = scrape_race_card(city, city_functions[city])
         
         if horses and isinstance(horses, list) and len(horses) > 0:
             # Verileri kaydet
             from datetime import datetime
             import pandas as pd
-            import json
             import os
             
             # CSV dosyası oluştur
@@ -323,16 +324,9 @@ def fetch_city_data(city):
             # Downloads klasörü yoksa oluştur
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
             df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            artifact_catalog.register(filepath)
             
-            # JSON dosyası da kaydet (analiz için gerekli)
-            today = datetime.now().strftime('%Y%m%d')
-            json_filename = f"{city}_atlari_{today}.json"
-            json_filepath = os.path.join('data', json_filename)
-            
-            # Data klasörü yoksa oluştur
-            os.makedirs('data', exist_ok=True)
-            with open(json_filepath, 'w', encoding='utf-8') as f:
-                json.dump(horses, f, ensure_ascii=False, indent=2)
+            json_filename = os.path.basename(race_card_path(city))
             
             flash(f'{city.title()} şehri için veri başarıyla çekildi ve kaydedildi.', 'success')
             return jsonify({
@@ -354,38 +348,42 @@ def fetch_city_data(city):
         flash(f'{city.title()} veri çekme hatası: {str(e)}', 'error')
         return jsonify({'success': False, 'error': str(e)})
 
-@admin.route('/fetch_all_data')
-@login_required
-@admin_required
-def fetch_all_data():
-    """Tüm şehirler için veri çek"""
+def _fetch_all_data_isi():
+    """Tüm şehirlerin verisini çekip kaydeder - (yanıt, HTTP kodu) döndürür"""
     try:
         import horse_scraper
         
+        from city_orchestrator import run_cities
+        
         cities = ['istanbul', 'ankara', 'izmir', 'bursa', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
         results = {}
         success_count = 0
         
+        city_functions = {
+            'istanbul': horse_scraper.get_istanbul_races_and_horse_last_race,
+            'ankara': horse_scraper.get_ankara_races_and_horse_last_race,
+            'izmir': horse_scraper.get_izmir_races_and_horse_last_race,
+            'bursa': horse_scraper.get_bursa_races_and_horse_last_race,
+            'adana': horse_scraper.get_adana_races_and_horse_last_race,
+            'kocaeli': horse_scraper.get_kocaeli_races_and_horse_last_race,
+            'sanliurfa': horse_scraper.get_sanliurfa_races_and_horse_last_race,
+            'diyarbakir': horse_scraper.get_diyarbakir_races_and_horse_last_race,
+            'elazig': horse_scraper.get_elazig_races_and_horse_last_race
+        }
+        
+        # Tüm şehirler paralel çekilir (ortak istek hızı limiti ile); JSON'lar burada kaydedilir
+        sehir_sonuclari = run_cities([(city, lambda city=city: scrape_race_card(city, city_functions[city]))
+                                      for city in cities])
+        
         for city in cities:
             try:
-                city_functions = {
-                    'istanbul': horse_scraper.get_istanbul_races_and_horse_last_race,
-                    'ankara': horse_scraper.get_ankara_races_and_horse_last_race,
-                    'izmir': horse_scraper.get_izmir_races_and_horse_last_race,
-                    'bursa': horse_scraper.get_bursa_races_and_horse_last_race,
-                    'adana': horse_scraper.get_adana_races_and_horse_last_race,
-                    'kocaeli': horse_scraper.get_kocaeli_races_and_horse_last_race,
-                    'sanliurfa': horse_scraper.get_sanliurfa_races_and_horse_last_race,
-                    'diyarbakir': horse_scraper.get_diyarbakir_races_and_horse_last_race,
-                    'elazig': horse_scraper.get_elazig_races_and_horse_last_race
-                }
-                
-                horses = city_functions[city]()
+                if sehir_sonuclari[city]['hata']:
+                    raise sehir_sonuclari[city]['hata']
+                horses = sehir_sonuclari[city]['sonuc']
                 if horses and isinstance(horses, list) and len(horses) > 0:
                     # Verileri kaydet (fetch_city_data ile aynı mantık)
                     from datetime import datetime
                     import pandas as pd
-                    import json
                     import os
                     
                     # CSV dosyası oluştur
@@ -397,16 +395,9 @@ def fetch_all_data():
                     # Downloads klasörü yoksa oluştur
                     os.makedirs(os.path.dirname(filepath), exist_ok=True)
                     df.to_csv(filepath, index=False, encoding='utf-8-sig')
+                    artifact_catalog.register(filepath)
                     
-                    # JSON dosyası da kaydet (analiz için gerekli)
-                    today = datetime.now().strftime('%Y%m%d')
-                    json_filename = f"{city}_atlari_{today}.json"
-                    json_filepath = os.path.join('data', json_filename)
-                    
-                    # Data klasörü yoksa oluştur
-                    os.makedirs('data', exist_ok=True)
-                    with open(json_filepath, 'w', encoding='utf-8') as f:
-                        json.dump(horses, f, ensure_ascii=False, indent=2)
+                    json_filename = os.path.basename(race_card_path(city))
                     
                     results[city] = {'success': True, 'data': {'total_horses': len(horses), 'files': [filename, json_filename]}}
                     success_count += 1
@@ -416,19 +407,39 @@ def fetch_all_data():
             except Exception as e:
                 results[city] = {'success': False, 'error': str(e)}
         
-        flash(f'Toplu veri çekme tamamlandı. {success_count}/{len(cities)} şehir başarılı.', 
-              'success' if success_count > 0 else 'warning')
-        
-        return jsonify({
+        return {
             'success': True,
             'results': results,
             'success_count': success_count,
             'total_count': len(cities)
-        })
+        }, 200
         
     except Exception as e:
-        flash(f'Toplu veri çekme hatası: {str(e)}', 'error')
-        return jsonify({'success': False, 'error': str(e)})
+        return {'success': False, 'error': str(e)}, 500
+
+@admin.route('/fetch_all_data')
+@login_required
+@admin_required
+def fetch_all_data():
+    """Tüm şehirler için veri çek (?async=1 ile arka planda)"""
+    if request.args.get('async'):
+        job_id = submit_job('fetch_all_data', _fetch_all_data_isi, user_id=current_user.id,
+                            app=current_app._get_current_object())
+        return jsonify({
+            'success': True,
+            'status': 'accepted',
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id)
+        }), 202
+    
+    payload, status = _fetch_all_data_isi()
+    if payload['success']:
+        flash(f'Toplu veri çekme tamamlandı. {payload["success_count"]}/{payload["total_count"]} şehir başarılı.', 
+              'success' if payload['success_count'] > 0 else 'warning')
+    else:
+        flash(f'Toplu veri çekme hatası: {payload["error"]}', 'error')
+    
+    return jsonify(payload)
 
 @admin.route('/schedule_auto_fetch', methods=['POST'])
 @login_required
@@ -476,21 +487,29 @@ def clear_old_data():
         cutoff_date = datetime.now() - timedelta(days=days)
         deleted_files = []
         
-        for file in os.listdir(data_folder):
-            if file.endswith('.json'):
-                file_path = os.path.join(data_folder, file)
-                file_stat = os.stat(file_path)
-                file_date = datetime.fromtimestamp(file_stat.st_mtime)
-                
-                if file_date < cutoff_date:
-                    os.remove(file_path)
-                    deleted_files.append(file)
+        # Eski dosyalar katalogdan sorgulanır (dizin taraması yok)
+        for kayit in artifact_catalog.list_files(('kart', 'veri'), created_before=cutoff_date.timestamp(),
+                                                dizin=data_folder):
+            file_path = kayit['path']
+            try:
+                os.remove(file_path)
+                deleted_files.append(os.path.basename(file_path))
+            except FileNotFoundError:
+                pass
+            artifact_catalog.unregister(file_path)
+        
+        # Eski indirme kayıtları ve artık kullanılmayan depo dosyaları
+        import artifact_store
+        DownloadRecord.query.filter(DownloadRecord.created_at < datetime.utcnow() - timedelta(days=days)).delete()
+        db.session.commit()
+        deleted_artifacts = artifact_store.remove_unreferenced()
         
         flash(f'{len(deleted_files)} adet eski veri dosyası temizlendi.', 'success')
         return jsonify({
             'success': True,
             'deleted_count': len(deleted_files),
-            'deleted_files': deleted_files
+            'deleted_files': deleted_files,
+            'deleted_artifacts': deleted_artifacts
         })
         
     except Exception as e:
@@ -529,6 +548,9 @@ def delete_user(user_id):
             # Kullanıcının analiz geçmişini sil
             AnalysisHistory.query.filter_by(user_id=user_id).delete()
             
+            # Kullanıcının indirme kayıtlarını sil (depo dosyaları clear_old_data ile temizlenir)
+            DownloadRecord.query.filter_by(user_id=user_id).delete()
+            
             # Son olarak kullanıcıyı sil
             db.session.delete(user)
             db.session.commit()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ANALİZ SONUCU ÖNBELLEĞİ
+Aynı günün aynı kartı için hesaplama sonucu herkes için aynıdır; ilk istekte
+hesaplanan sonuç bellekte (LRU) ve diskte saklanır, sonraki kullanıcılar
+yeniden hesaplamadan alır.
+
+Anahtar: işlem türü + şehir + tarih + girdi JSON'unun içerik özeti +
+kazanan dosyasının içerik özeti + skor sabitlerinin sürümü. Kart yeniden
+çekildiğinde içerik özeti değiştiği için eski sonuç kullanılmaz;
+save_race_card ayrıca şehrin o günkü kayıtlarını siler.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import artifact_catalog
+import single_flight
+
+CACHE_DIZINI = os.environ.get('ANALYSIS_CACHE_DIR', os.path.join('cache', 'analysis'))
+CACHE_AKTIF = os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+MAX_KAYIT = int(os.environ.get('ANALYSIS_CACHE_MAX_ITEMS', '32'))
+# Skor formülü değiştiğinde elle artırılır (sabitler değişirse sürüm zaten değişir)
+CACHE_SURUMU = os.environ.get('ANALYSIS_CACHE_VERSION', '1')
+
+DOWNLOADS_DIZINI = os.path.join('static', 'downloads')
+
+
+class AnalizAnahtari:
+    """Önbellek anahtarı; dosya adı ve bellek anahtarı için özet üretir"""
+    __slots__ = ('tur', 'city', 'tarih', 'ozet')
+
+    def __init__(self, tur, city, tarih, ozet):
+        self.tur = tur
+        self.city = city
+        self.tarih = tarih
+        self.ozet = ozet
+
+    @property
+    def kisa(self):
+        """Dosya adlarında kullanılan kısa özet"""
+        return self.ozet[:10]
+
+    def __str__(self):
+        return f"{self.tur}:{self.city}:{self.tarih}:{self.ozet}"
+
+
+_ozet_cache = {}
+_ozet_lock = threading.Lock()
+
+
+def dosya_ozeti(yol):
+    """
+    Dosya içeriğinin sha1 özeti; dosya yoksa '-'
+    Aynı (boyut, mtime) için yeniden okunmaz - kart os.replace ile yazıldığından
+    yeniden çekilen dosyanın mtime'ı her zaman değişir.
+    """
+    if not yol:
+        return '-'
+    try:
+        st = os.stat(yol)
+    except OSError:
+        return '-'
+    imza = (st.st_size, st.st_mtime_ns)
+    with _ozet_lock:
+        onceki = _ozet_cache.get(yol)
+    if onceki and onceki[0] == imza:
+        return onceki[1]
+
+    h = hashlib.sha1()
+    with open(yol, 'rb') as f:
+        for parca in iter(lambda: f.read(1 << 16), b''):
+            h.update(parca)
+    ozet = h.hexdigest()
+    with _ozet_lock:
+        _ozet_cache[yol] = (imza, ozet)
+    return ozet
+
+
+_surum_kaynak = None
+_surum = None
+
+
+def skor_surumu():
+    """k_adapt tablosu ve skor sabitlerinden türetilen sürüm özeti"""
+    global _surum_kaynak, _surum
+    import horse_scraper
+    import scoring_pipeline
+
+    # Kalibrasyon dosyası değiştiyse tablo burada yeniden yüklenir ve sürüm değişir
+    tablo = horse_scraper.kadapt_tablosu()
+    if tablo is _surum_kaynak and _surum:
+        return _surum
+
+    sabitler = (
+        CACHE_SURUMU,
+        sorted(tablo.items()),
+        sorted(horse_scraper.SEHIR_KATSAYILARI.items()),
+        (horse_scraper.UZUN_MESAFE_FAKTORU, horse_scraper.KISA_MESAFE_FAKTORU, horse_scraper.KILO_FAKTORU),
+        (scoring_pipeline.VARSAYILAN_MESAFE, scoring_pipeline.VARSAYILAN_KILO),
+    )
+    _surum = hashlib.sha1(repr(sabitler).encode('utf-8')).hexdigest()[:12]
+    _surum_kaynak = tablo
+    return _surum
+
+
+def cache_key(tur, city, json_yolu, kazanan_yolu=None, tarih=None):
+    """
+    Girdi dosyalarının içeriğinden önbellek anahtarı oluştur
+
+    Args:
+        tur: İşlem türü ('analiz', 'hesaplama', ...)
+        city: Şehir anahtarı ('istanbul')
+        json_yolu: data/{şehir}_atlari_{tarih}.json
+        kazanan_yolu: Hesaplamada kullanılan kazanan CSV'si (yoksa None)
+
+    Returns:
+        AnalizAnahtari | None: Girdi JSON'u yoksa None (sonuç önbelleğe alınmaz)
+    """
+    if not json_yolu or not os.path.exists(json_yolu):
+        return None
+    tarih_str = (tarih or datetime.now()).strftime('%Y%m%d')
+    parcalar = (tur, city, tarih_str, dosya_ozeti(json_yolu), dosya_ozeti(kazanan_yolu), skor_surumu())
+    ozet = hashlib.sha1('|'.join(parcalar).encode('utf-8')).hexdigest()
+    return AnalizAnahtari(tur, city, tarih_str, ozet)
+
+
+class AnalysisCache:
+    def __init__(self, dizin=CACHE_DIZINI, max_kayit=MAX_KAYIT):
+        self.dizin = dizin
+        self.max_kayit = max_kayit
+        self._bellek = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'bellek_hit': 0, 'disk_hit': 0, 'miss': 0, 'stored': 0, 'evicted': 0, 'invalidated': 0}
+
+    def _dosya_yolu(self, anahtar):
+        return os.path.join(self.dizin, anahtar.tur, f"{anahtar.city}_{anahtar.tarih}_{anahtar.ozet}.json.gz")
+
+    def _bellege_koy(self, anahtar, deger):
+        """LRU'ya ekle (lock altında çağrılır)"""
+        self._bellek[str(anahtar)] = deger
+        self._bellek.move_to_end(str(anahtar))
+        while len(self._bellek) > self.max_kayit:
+            self._bellek.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def get(self, anahtar):
+        """Önce bellekte, sonra diskte ara; yoksa None"""
+        with self._lock:
+            deger = self._bellek.get(str(anahtar))
+            if deger is not None:
+                self._bellek.move_to_end(str(anahtar))
+                self.stats['bellek_hit'] += 1
+                return deger
+
+        try:
+            with gzip.open(self._dosya_yolu(anahtar), 'rt', encoding='utf-8') as f:
+                deger = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats['miss'] += 1
+            return None
+
+        with self._lock:
+            self._bellege_koy(anahtar, deger)
+            self.stats['disk_hit'] += 1
+        return deger
+
+    def put(self, anahtar, deger):
+        """Belleğe ve diske yaz; aynı şehir/günün eski sürümlerini sil"""
+        with self._lock:
+            self._bellege_koy(anahtar, deger)
+            self.stats['stored'] += 1
+
+        yol = self._dosya_yolu(anahtar)
+        os.makedirs(os.path.dirname(yol), exist_ok=True)
+        fd, gecici = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(yol))
+        try:
+            with os.fdopen(fd, 'wb') as ham, gzip.open(ham, 'wt', encoding='utf-8') as f:
+                json.dump(deger, f, ensure_ascii=False)
+            os.replace(gecici, yol)
+        except BaseException:
+            if os.path.exists(gecici):
+                os.remove(gecici)
+            raise
+        self._eskileri_sil(anahtar.tur, anahtar.city, anahtar.tarih, haric=yol)
+
+    def _eskileri_sil(self, tur, city, tarih, haric=None):
+        """Şehrin o günkü disk kayıtlarını sil (haric hariç)"""
+        turler = [tur] if tur else (os.listdir(self.dizin) if os.path.isdir(self.dizin) else [])
+        onek = f"{city}_{tarih}_"
+        silinen = 0
+        for t in turler:
+            dizin = os.path.join(self.dizin, t)
+            if not os.path.isdir(dizin):
+                continue
+            for ad in os.listdir(dizin):
+                yol = os.path.join(dizin, ad)
+                if ad.startswith(onek) and ad.endswith('.json.gz') and yol != haric:
+                    try:
+                        os.remove(yol)
+                        silinen += 1
+                    except OSError:
+                        pass
+        return silinen
+
+    def invalidate(self, city, tarih=None):
+        """Şehrin o günkü tüm sonuçlarını (bellek + disk) geçersiz kıl"""
+        tarih_str = (tarih or datetime.now()).strftime('%Y%m%d')
+        with self._lock:
+            silinecek = [k for k in self._bellek if k.split(':')[1:3] == [city, tarih_str]]
+            for k in silinecek:
+                del self._bellek[k]
+            self.stats['invalidated'] += len(silinecek)
+        self._eskileri_sil(None, city, tarih_str)
+
+    def get_or_compute(self, anahtar, hesapla):
+        """
+        Kayıt varsa döndür, yoksa hesapla ve kaydet. Aynı anahtar için
+        eşzamanlı istekler (başka worker süreçleri dahil) tek hesaplamayı paylaşır.
+
+        Args:
+            hesapla: JSON'a çevrilebilir sonuç döndüren fonksiyon; None dönerse kaydedilmez
+
+        Returns:
+            tuple: (sonuç, önbellekten mi geldi)
+        """
+        if not CACHE_AKTIF or anahtar is None:
+            return hesapla(), False
+
+        deger = self.get(anahtar)
+        if deger is not None:
+            return deger, True
+
+        hesaplandi = []
+
+        def hesapla_ve_kaydet():
+            sonuc = hesapla()
+            hesaplandi.append(True)
+            if sonuc is not None:
+                try:
+                    self.put(anahtar, sonuc)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"[CACHE HATA] Analiz sonucu kaydedilemedi ({anahtar.tur}/{anahtar.city}): {e}")
+            return sonuc
+
+        sonuc = single_flight.run(f"analiz:{anahtar}", hesapla_ve_kaydet, sonuc_oku=lambda: self.get(anahtar))
+        return sonuc, not hesaplandi
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['bellek_kayit'] = len(self._bellek)
+        toplam = stats['bellek_hit'] + stats['disk_hit'] + stats['miss']
+        stats['hit_orani'] = round((stats['bellek_hit'] + stats['disk_hit']) / toplam * 100, 1) if toplam else 0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Süreç genelinde paylaşılan analiz önbelleği"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache()
+    return _cache
+
+
+def invalidate_city(city, tarih=None):
+    """Kart yeniden çekildiğinde şehrin o günkü analiz sonuçlarını sil"""
+    try:
+        get_cache().invalidate(city, tarih)
+    except OSError as e:
+        print(f"[CACHE HATA] {city} analiz önbelleği temizlenemedi: {e}")
+
+
+def export_csv(dosya_adi, metin):
+    """
+    Önbellekteki CSV metnini static/downloads altına yaz (dosya zaten varsa dokunma)
+
+    Returns:
+        str: Dosya yolu
+    """
+    yol = os.path.join(DOWNLOADS_DIZINI, dosya_adi)
+    if os.path.exists(yol):
+        return yol
+    os.makedirs(DOWNLOADS_DIZINI, exist_ok=True)
+    fd, gecici = tempfile.mkstemp(suffix='.csv.tmp', dir=DOWNLOADS_DIZINI)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(metin)
+        os.replace(gecici, yol)
+    except BaseException:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        raise
+    artifact_catalog.register(yol)
+    return yol
@@ -1,4 +1,5 @@
 from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash
+import io
 import os
 import json
 from datetime import datetime
@@ -25,6 +26,14 @@ from models import db, User, AnalysisHistory, Notification, Conversation, Conver
 from forms import ConversationForm, ConversationMessageForm
 from auth import auth
 from admin import admin
+from job_queue import submit_job, get_job
+from data_store import load_race_entries, scrape_race_card, race_card_path
+from scoring_pipeline import score_saved_card
+import analysis_cache
+import delta_refresh
+from batch_comparison import compare_cities
+import artifact_store
+import artifact_catalog
 
 # Güvenlik importları (opsiyonel)
 try:
@@ -74,11 +83,10 @@ from horse_scraper import (
     test_system,
     process_calculation_for_city,
     process_kazanan_cikti_for_json,
+    indirilen_profil_sayaci,
     save_kazanan_cikti_csv,
     get_kazanan_data_for_city,
-    calculate_time_per_100m,
-    calculate_kadapt,
-    time_to_seconds
+    find_kazanan_file
 )
 
 from results_scraper import (
@@ -98,7 +106,7 @@ def apply_security_headers(response):
 
 # Basit Konfigürasyon (Development)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////var/www/site1.1/instance/horse_analysis.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI', 'sqlite:////var/www/site1.1/instance/horse_analysis.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # CSRF ve Session güvenliği
@@ -174,12 +182,14 @@ def premium_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def save_analysis_history(city, analysis_type, result_data):
-    """Analiz geçmişini kaydet"""
-    if current_user.is_authenticated:
+def save_analysis_history(city, analysis_type, result_data, user_id=None):
+    """Analiz geçmişini kaydet (arka plan işlerinde user_id verilir)"""
+    if user_id is None and current_user.is_authenticated:
+        user_id = current_user.id
+    if user_id is not None:
         try:
             analysis = AnalysisHistory(
-                user_id=current_user.id,
+                user_id=user_id,
                 city=city,
                 analysis_type=analysis_type,
                 race_count=result_data.get('race_count', 0),
@@ -194,6 +204,24 @@ def save_analysis_history(city, analysis_type, result_data):
             print(f"[HATA] Analiz geçmişi kaydedilemedi: {e}")
             db.session.rollback()
 
+def _is_calistir(tur, func, *args, async_mod=False):
+    """
+    İşi istek içinde çalıştırır ya da async_mod ise arka plan kuyruğuna ekler.
+    func (yanıt, HTTP kodu) döndürmelidir. İş durumu yalnızca sahibine
+    gösterildiğinden giriş yapmamış kullanıcıların işleri istek içinde çalışır.
+    """
+    if async_mod and current_user.is_authenticated:
+        job_id = submit_job(tur, func, *args, user_id=current_user.id, app=app)
+        return jsonify({
+            'success': True,
+            'status': 'accepted',
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id)
+        }), 202
+
+    payload, status = func(*args)
+    return jsonify(payload), status
+
 # Şehir fonksiyonları mapping
 CITY_FUNCTIONS = {
     'istanbul': ('İstanbul', get_istanbul_races_and_horse_last_race),
@@ -237,39 +265,10 @@ def dashboard():
 def test():
     return {'status': 'ok', 'message': 'Flask çalışıyor'}
 
-@app.route('/api/scrape_city', methods=['POST'])
-@login_required
-def scrape_city():
-    """Tek şehir için at verilerini analiz et - Güvenlik kontrolleriyle"""
+def _scrape_city_isi(city, debug, user_id):
+    """Şehir verisini çekip analiz eder - (yanıt, HTTP kodu) döndürür"""
     try:
-        # Günlük analiz limiti kontrolü
-        can_analyze, message = current_user.can_make_analysis()
-        if not can_analyze:
-            return jsonify({
-                'success': False,
-                'status': 'error',
-                'message': message
-            }), 429  # Too Many Requests
-        
-        # Input validasyonu
-        data = request.get_json()
-        if not data:
-            return jsonify({'success': False, 'message': 'Geçersiz veri'}), 400
-            
-        city = data.get('city', '').lower().strip()
-        allowed_cities = ['istanbul', 'ankara', 'izmir', 'bursa', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
-        
-        if not city or city not in allowed_cities:
-            return jsonify({'success': False, 'message': 'Geçersiz şehir adı'}), 400
-        debug = data.get('debug', False)
-        
-        if city not in CITY_FUNCTIONS:
-            return jsonify({
-                'success': False,
-                'status': 'error',
-                'message': f'Desteklenmeyen şehir: {city}'
-            }), 400
-        
+        user = db.session.get(User, user_id)
         city_name, city_function = CITY_FUNCTIONS[city]
         
         # Önce bugünkü kaydedilmiş veriyi kontrol et
@@ -294,7 +293,8 @@ def scrape_city():
         # Eğer kaydedilmiş veri yoksa veya boşsa, çek
         if not horses:
             print(f"[AT] {city_name} - Kaydedilmiş veri yok, yeni veri çekiliyor...")
-            horses = city_function(debug)
+            # Aynı şehir için eşzamanlı istekler tek çekmeyi paylaşır; JSON burada kaydedilir
+            horses = scrape_race_card(city, city_function, debug)
             data_source = "fresh"
         
         if horses:
@@ -309,11 +309,7 @@ def scrape_city():
                 # Downloads klasörü yoksa oluştur
                 os.makedirs(os.path.dirname(filepath), exist_ok=True)
                 df.to_csv(filepath, index=False, encoding='utf-8-sig')
-                
-                # JSON dosyası da kaydet (analiz için gerekli)
-                os.makedirs('data', exist_ok=True)
-                with open(json_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(horses, f, ensure_ascii=False, indent=2)
+                artifact_catalog.register(filepath)
                 
                 print(f"[DOSYA] {city_name} yeni verileri kaydedildi:")
                 print(f"   CSV: {filepath}")
@@ -322,19 +318,28 @@ def scrape_city():
                 print(f"[VERİ] {city_name} - Kaydedilmiş veri kullanılıyor ({data_source})")
             
             # VERİYİ ANALİZ ET (en önemli kısım!)
+            # Aynı kartın analizi tüm kullanıcılar için aynıdır; ilk hesaplama önbelleğe alınır
             print(f"[ANALİZ] {city_name} verileri analiz ediliyor...")
-            import horse_scraper
-            analyzed_horses = horse_scraper.process_calculation_for_city(horses, city_name)
+            anahtar = analysis_cache.cache_key('analiz', city, json_filepath)
+            
+            def analiz_et():
+                import horse_scraper
+                satirlar = horse_scraper.process_calculation_for_city(horses, city_name)
+                if not satirlar:
+                    return None
+                return {'satirlar': satirlar, 'csv': pd.DataFrame(satirlar).to_csv(index=False)}
+            
+            sonuc, cacheden = analysis_cache.get_cache().get_or_compute(anahtar, analiz_et)
+            analyzed_horses = sonuc['satirlar'] if sonuc else []
+            if cacheden:
+                print(f"[ANALİZ] {city_name} analiz sonucu önbellekten alındı")
             
             if analyzed_horses:
-                # Analiz sonuçlarını CSV olarak kaydet (kullanıcı ID'si ile)
-                df_analyzed = pd.DataFrame(analyzed_horses)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                analyzed_filename = f"{city}_analiz_{timestamp}_user{current_user.id}.csv"
-                analyzed_filepath = os.path.join('static', 'downloads', analyzed_filename)
-                
-                df_analyzed.to_csv(analyzed_filepath, index=False, encoding='utf-8-sig')
-                print(f"[ANALİZ] Analiz sonuçları kaydedildi: {analyzed_filepath}")
+                # Kullanıcıya özel indirme kaydı (yetki _user{id} sonekine bağlı); içerik depoda bir kez tutulur
+                kimlik = f"{anahtar.tarih}_{anahtar.kisa}" if anahtar else datetime.now().strftime('%Y%m%d_%H%M%S')
+                analyzed_filename = f"{city}_analiz_{kimlik}_user{user.id}.csv"
+                kayit = artifact_store.register_download(user.id, analyzed_filename, sonuc['csv'], city=city_name)
+                print(f"[ANALİZ] Analiz sonuçları kaydedildi: {analyzed_filename} -> {kayit.artifact_hash[:10]}")
                 
                 # İstatistik hesapla
                 basarili = sum(1 for h in horses if h.get('Son Derece'))
@@ -349,12 +354,9 @@ def scrape_city():
                     'analysis_type': 'analyze',
                     'data_source': data_source
                 }
-                save_analysis_history(city, 'analyze', result_data)
-                
-                # Başarılı analiz sonrası sayacı artır
-                current_user.increment_analysis_count()
+                save_analysis_history(city, 'analyze', result_data, user_id=user.id)
                 
-                return jsonify({
+                return {
                     'success': True,
                     'status': 'success',
                     'message': f'{city_name} analizi tamamlandı! ({data_source} veri kullanıldı)',
@@ -367,24 +369,88 @@ def scrape_city():
                         'horses': analyzed_horses[:10],  # İlk 10 sonucu önizleme
                         'download_url': f'/download/{analyzed_filename}',
                         'filename': analyzed_filename,
-                        'data_source': data_source
+                        'data_source': data_source,
+                        'from_cache': cacheden
                     }
-                })
+                }, 200
             else:
-                return jsonify({
+                return {
                     'success': False,
                     'status': 'error',
                     'error': f'{city_name} analizi yapılamadı',
                     'message': f'{city_name} analizi yapılamadı'
-                }), 500
+                }, 500
         else:
             print(f"[UYARI] {city_name} için veri çekilemedi - horses listesi boş")
-            return jsonify({
+            return {
                 'success': False,
                 'status': 'error',
                 'error': f'{city_name} için veri çekilemedi',
                 'message': f'{city_name} için veri çekilemedi'
-            }), 500
+            }, 500
+            
+    except Exception as e:
+        print(f"[HATA] /api/scrape_city endpoint'inde hata: {str(e)}")
+        return {
+            'success': False,
+            'status': 'error',
+            'error': f'Hata: {str(e)}',
+            'message': f'Hata: {str(e)}'
+        }, 500
+
+def _scrape_city_rezervli(city, debug, user_id):
+    """Analiz hakkı istek anında ayrılmıştır; analiz başarısız olursa geri verilir"""
+    status = None
+    try:
+        payload, status = _scrape_city_isi(city, debug, user_id)
+        return payload, status
+    finally:
+        if status is None or status >= 400:
+            try:
+                user = db.session.get(User, user_id)
+                if user:
+                    user.release_analysis_count()
+            except Exception as e:
+                print(f"[HATA] Analiz hakkı geri verilemedi: {e}")
+                db.session.rollback()
+
+@app.route('/api/scrape_city', methods=['POST'])
+@login_required
+def scrape_city():
+    """Tek şehir için at verilerini analiz et - Güvenlik kontrolleriyle"""
+    try:
+        # Günlük analiz limiti kontrolü
+        can_analyze, message = current_user.can_make_analysis()
+        if not can_analyze:
+            return jsonify({
+                'success': False,
+                'status': 'error',
+                'message': message
+            }), 429  # Too Many Requests
+        
+        # Input validasyonu
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'message': 'Geçersiz veri'}), 400
+            
+        city = data.get('city', '').lower().strip()
+        allowed_cities = ['istanbul', 'ankara', 'izmir', 'bursa', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
+        
+        if not city or city not in allowed_cities:
+            return jsonify({'success': False, 'message': 'Geçersiz şehir adı'}), 400
+        debug = data.get('debug', False)
+        
+        if city not in CITY_FUNCTIONS:
+            return jsonify({
+                'success': False,
+                'status': 'error',
+                'message': f'Desteklenmeyen şehir: {city}'
+            }), 400
+        
+        # Hak iş kuyruğa alınırken ayrılır; aksi halde bitmemiş işlerle limit aşılabilir
+        current_user.increment_analysis_count()
+        return _is_calistir('scrape_city', _scrape_city_rezervli, city, debug, current_user.id,
+                            async_mod=data.get('async', False))
             
     except Exception as e:
         print(f"[HATA] /api/scrape_city endpoint'inde hata: {str(e)}")
@@ -395,6 +461,65 @@ def scrape_city():
             'message': f'Hata: {str(e)}'
         }), 500
 
+def _refresh_city_isi(city, debug):
+    """Kayıtlı kartı artımlı yeniler - (yanıt, HTTP kodu) döndürür"""
+    city_name, city_function = CITY_FUNCTIONS[city]
+    try:
+        ozet = delta_refresh.refresh_city(city, city_name, debug)
+        if ozet is None:
+            # Bugün için kayıtlı kart yok: tam çekim
+            print(f"[DELTA] {city_name} - Kaydedilmiş kart yok, tam çekim yapılıyor...")
+            # Başka istek/süreç aynı çekimi yaptıysa bu istek profil indirmemiştir
+            with indirilen_profil_sayaci() as sayac:
+                horses = scrape_race_card(city, city_function, debug)
+            if not horses:
+                return {
+                    'success': False,
+                    'status': 'error',
+                    'message': f'{city_name} için veri çekilemedi'
+                }, 500
+            ozet = {'city': city_name, 'total_horses': len(horses), 'added': len(horses),
+                    'removed': 0, 'updated': 0, 'changed_races': sorted({str(h['Koşu']) for h in horses}),
+                    'profiles_fetched': sayac['indirilen'], 'rescored_races': 0, 'changed': True, 'full_scrape': True}
+        return {
+            'success': True,
+            'status': 'success',
+            'message': f'{city_name} kartı güncellendi' if ozet['changed'] else f'{city_name} kartında değişiklik yok',
+            'data': ozet
+        }, 200
+    except Exception as e:
+        print(f"[HATA] /api/refresh_city endpoint'inde hata: {str(e)}")
+        return {
+            'success': False,
+            'status': 'error',
+            'error': f'Hata: {str(e)}',
+            'message': f'Hata: {str(e)}'
+        }, 500
+
+@app.route('/api/refresh_city', methods=['POST'])
+@login_required
+def refresh_city():
+    """Şehrin bugünkü kartını yalnızca değişen atlar için yenile (koşmaz, jokey/kilo değişikliği)"""
+    data = request.get_json()
+    if not data:
+        return jsonify({'success': False, 'message': 'Geçersiz veri'}), 400
+
+    city = data.get('city', '').lower().strip()
+    if city not in CITY_FUNCTIONS:
+        return jsonify({'success': False, 'message': 'Geçersiz şehir adı'}), 400
+
+    return _is_calistir('refresh_city', _refresh_city_isi, city, data.get('debug', False),
+                        async_mod=data.get('async', False))
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    """Arka plan işinin durumu, ilerlemesi ve bitmişse sonucu (yalnızca işin sahibine)"""
+    job = get_job(job_id)
+    if not job or job['user_id'] != current_user.id:
+        return jsonify({'success': False, 'status': 'error', 'message': 'İş bulunamadı'}), 404
+    return jsonify(clean_json_data(job))
+
 @app.route('/api/check_saved_data', methods=['POST'])
 def check_saved_data():
     """Kaydedilmiş veri var mı kontrol et"""
@@ -480,452 +605,67 @@ def calculate_from_saved():
                 'message': f'{city_name} için kaydedilmiş veri bulunamadı. Önce veri çekin.'
             }), 404
         
-        # Kaydedilmiş veriyi oku
-        with open(saved_filepath, 'r', encoding='utf-8') as f:
-            horses = json.load(f)
+        # Kaydedilmiş veriyi oku (satırlar bir kez RaceEntry'ye çevrilir)
+        horses = load_race_entries(city)
+        if horses is None:
+            return jsonify({
+                'status': 'error',
+                'message': f'{city_name} için kaydedilmiş veri okunamadı.'
+            }), 500
         
         print(f"[HESAP] {city_name} için kaydedilmiş veriden hesaplama yapılıyor...")
         print(f"[DEBUG] Ham veri sayısı: {len(horses)}")
-        print(f"[DEBUG] İlk ham veri örneği: {horses[0] if horses else 'Yok'}")
-        
-        # Kazanan verilerini oku
-        kazanan_data = get_kazanan_data_for_city(city_name)
-        print(f"[STAT] {len(kazanan_data)} at için kazanan verisi bulundu")
-        
-        # Hesaplama yap
-        print(f"[HESAP-DEBUG] process_calculation_for_city çağrılıyor...")
-        calculated_data = process_calculation_for_city(horses, city_name)
-        print(f"[HESAP-DEBUG] Hesaplama tamamlandı. Sonuç sayısı: {len(calculated_data)}")
-        
-        # Verileri koşu bazında grupla
-        races_data = {}
-        for item in calculated_data:
-            if item['Koşu'] and 'Koşu' in item['Koşu']:  # Koşu başlığı
-                race_number = item['Koşu'].replace('. Koşu', '').strip()
-                if race_number:
-                    races_data[race_number] = {'horses': []}
-                    print(f"[KOŞU GRUBU] {race_number}. Koşu oluşturuldu")
-            elif item['At İsmi']:  # At verisi
-                # En son koşuya at ekle
-                if races_data:
-                    last_race = list(races_data.keys())[-1]
-                    
-                    # Bu atın kazanan verilerini kontrol et
-                    at_ismi = item['At İsmi']
-                    kazanan_info = kazanan_data.get(at_ismi, {})
-                    
-                    # O atın bugünkü koşu bilgilerini bul
-                    horse_today = next((h for h in horses if h.get('At İsmi') == at_ismi), {})
-                    bugun_mesafe = horse_today.get('Bugünkü Mesafe', '')
-                    bugun_pist = horse_today.get('Bugünkü Pist', '')
-                    
-                    # Birincinin hesaplanmış derecesini çek
-                    calculated_winner_score = ''
-                    
-                    # PARİSLİ için debug
-                    if item['At İsmi'] == 'PARİSLİ':
-                        print(f"\n[PARİSLİ DEBUG] kazanan_info: {kazanan_info}")
-                        print(f"[PARİSLİ DEBUG] Son Mesafe: {item.get('Son Mesafe')}")
-                        print(f"[PARİSLİ DEBUG] Son Pist: {item.get('Son Pist')}")
-                    
-                    # Birincinin mesafe/pist bilgilerini kontrol et
-                    onceki_mesafe = str(kazanan_info.get('onceki_mesafe', '')).strip()
-                    onceki_pist = str(kazanan_info.get('onceki_pist', '')).strip()
-                    
-                    # Eğer birincinin mesafe/pist bilgisi boşsa, ana atın (CAN DENİZİM) bilgilerini kullan
-                    # Çünkü birinci at hesaplamasında aynı koşudaki atın mesafe/pist bilgileri kullanılmalı
-                    if not onceki_mesafe or onceki_mesafe == 'nan' or onceki_mesafe == '':
-                        onceki_mesafe = item.get('Son Mesafe', '')
-                        print(f"[MESAFE TAMAMLANDI] {at_ismi} için ana atın mesafesi kullanıldı: {onceki_mesafe}")
-                    
-                    if not onceki_pist or onceki_pist == 'nan' or onceki_pist == '':
-                        onceki_pist = item.get('Son Pist', '')
-                        print(f"[PİST TAMAMLANDI] {at_ismi} için ana atın pisti kullanıldı: {onceki_pist}")
-                    
-                    if kazanan_info.get('kazanan_derece') and onceki_mesafe and onceki_pist:
-                        # Pist değerlerini integer'a çevir
-                        def pist_to_int(pist):
-                            pist = str(pist).lower()
-                            if 'çim' in pist:
-                                return 1
-                            elif 'kum' in pist and 'sentetik' not in pist:
-                                return 2
-                            elif 'sentetik' in pist:
-                                return 3
-                            return 1
-                        
-                        pist1 = pist_to_int(onceki_pist)
-                        pist3 = pist_to_int(bugun_pist)
-                        
-                        # Mesafe değerlerini float'a çevir
-                        try:
-                            onceki_clean = str(onceki_mesafe).replace(',', '.').strip()
-                            bugun_clean = str(bugun_mesafe).replace(',', '.').strip()
-                            
-                            son_mesafe_float = float(onceki_clean) if onceki_clean and onceki_clean != '' else 1200
-                            bugun_mesafe_float = float(bugun_clean) if bugun_clean and bugun_clean != '' else 1200
-                        except Exception as e:
-                            print(f"[MESAFE HATASI] {at_ismi}: onceki='{onceki_mesafe}', bugun='{bugun_mesafe}', hata: {e}")
-                            son_mesafe_float = 1200
-                            bugun_mesafe_float = 1200
-                        
-                        # 1. Mesafe farkını hesapla (pist geçişi calculate_kadapt'ta)
-                        derece_saniye = time_to_seconds(kazanan_info.get('kazanan_derece'))
-                        if derece_saniye <= 0:
-                            continue
-                        
-                        # Mesafe farklılığını hesapla
-                        mesafe_farki = bugun_mesafe_float - son_mesafe_float
-                        if mesafe_farki != 0:
-                            # Mesafe başına zaman farkı (100m başına)
-                            mevcut_100m_sure = derece_saniye / (son_mesafe_float / 100)
-                            
-                            # Mesafe uzatma/kısaltma faktörü
-                            if mesafe_farki > 0:  # Uzun mesafe
-                                mesafe_faktoru = 0.04  # 100m başına +0.04 saniye
-                            else:  # Kısa mesafe
-                                mesafe_faktoru = -0.03  # 100m başına -0.03 saniye
-                            
-                            # Yeni 100m süresi
-                            yeni_100m_sure = mevcut_100m_sure + (abs(mesafe_farki) / 100) * mesafe_faktoru
-                            toplam_sure = yeni_100m_sure * (bugun_mesafe_float / 100)
-                        else:
-                            toplam_sure = derece_saniye
-                        
-                        if toplam_sure and toplam_sure > 0:
-                            # 2. 100m ortalama süreyi hesapla
-                            ort_100m_sure = toplam_sure / (bugun_mesafe_float / 100)
-
-                            # 3. Şehir+Pist adaptasyonu hesapla
-                            gecmis_sehir = city_name  # Aynı şehir varsayımı
-                            hedef_sehir = city_name
-                            kadapt = calculate_kadapt(gecmis_sehir, onceki_pist, hedef_sehir, bugun_pist)
-                            if item['At İsmi'].strip().upper() == 'DEHLİN':
-                                print(f"[KADAPT-DEHLİN] geçmiş: {gecmis_sehir} ({onceki_pist}), hedef: {hedef_sehir} ({bugun_pist}), kadapt: {kadapt}")
-
-                            # 4. Kadapt uygula
-                            raw_score = ort_100m_sure
-                            adjusted_score = raw_score * kadapt
-
-                            # 5. Kilo etkisi (gerçek kilo)
-                            def safe_float_kilo(value, default=50.5):
-                                if value is None or str(value).strip() == '':
-                                    return default
-                                try:
-                                    return float(str(value).replace(',', '.'))
-                                except (ValueError, TypeError):
-                                    return default
-                            
-                            kilo_onceki = safe_float_kilo(item.get('Son Kilo'), 50.5)
-                            kilo_bugun = safe_float_kilo(item.get('Kilo'), 50.5)
-                            if item['At İsmi'] == 'PARİSLİ':
-                                print(f"[PARISLI-ÇIKTI] onceki_mesafe: {onceki_mesafe}, bugun_mesafe: {bugun_mesafe}, onceki_pist: {onceki_pist}, bugun_pist: {bugun_pist}, kilo_onceki: {kilo_onceki}, kilo_bugun: {kilo_bugun}")
-                            kilo_fark = kilo_bugun - kilo_onceki
-                            calc_score = adjusted_score - (kilo_fark * 0.02)
-                        else:
-                            calc_score = None
-                        
-                        if calc_score and not (math.isnan(calc_score) or math.isinf(calc_score)):
-                            calculated_winner_score = f"{calc_score:.2f}"
-                    
-                    # Skor hesapla: (Çıktı + Birinci Derece) / 2
-                    skor_value = 'Veri yok'
-                    at_adi = item['At İsmi']
-                    
-                    # Debug için mevcut değerleri kontrol et
-                    print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Çıktı='{item.get('Çıktı', '')}', Birinci='{calculated_winner_score}', Skor='{item.get('Skor', '')}'")
-                    
-                    try:
-                        # Önce hesaplanmış Skor değerini kontrol et
-                        skor_str = str(item.get('Skor', '')).strip()
-                        if skor_str and skor_str != 'geçersiz' and skor_str != '':
-                            try:
-                                skor_value = float(skor_str.replace(',', '.'))
-                                print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Hesaplanmış skor kullanıldı: {skor_value}")
-                            except ValueError:
-                                print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Skor parse hatası: {skor_str}")
-                                pass
-                        
-                        # Skor yoksa, Çıktı ve Birinci Derece ile hesapla
-                        if skor_value == 'Veri yok':
-                            cikti_str = str(item.get('Çıktı', '')).strip()
-                            birinci_derece_str = str(calculated_winner_score).strip()
-                            
-                            if (cikti_str and cikti_str != 'geçersiz' and cikti_str.strip() and
-                                birinci_derece_str and birinci_derece_str != 'geçersiz' and birinci_derece_str.strip()):
-                                try:
-                                    # Boş string kontrolü
-                                    cikti_clean = cikti_str.replace(',', '.').strip()
-                                    birinci_clean = birinci_derece_str.replace(',', '.').strip()
-                                    
-                                    if cikti_clean and birinci_clean:
-                                        cikti_val = float(cikti_clean)
-                                        birinci_derece_val = float(birinci_clean)
-                                        
-                                        # Skor hesapla: (Çıktı + Birinci Derece) / 2
-                                        skor = (cikti_val + birinci_derece_val) / 2
-                                        if not (skor != skor):  # NaN kontrolü (NaN != NaN is True)
-                                            skor_value = skor
-                                            print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Manuel skor hesaplandı: {cikti_val} + {birinci_derece_val} = {skor}")
-                                except ValueError as e:
-                                    print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Hesaplama hatası: {e}")
-                                    pass
-                            
-                            # Hâlâ yoksa, sadece Çıktı değerini kullan (fallback)
-                            if skor_value == 'Veri yok' and cikti_str and cikti_str != 'geçersiz' and cikti_str.strip():
-                                try:
-                                    cikti_clean = cikti_str.strip()
-                                    if cikti_clean:
-                                        skor_float = float(cikti_clean)
-                                        if not (skor_float != skor_float):  # NaN kontrolü (NaN != NaN is True)
-                                            skor_value = skor_float
-                                            print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Fallback Çıktı kullanıldı: {skor_value}")
-                                except ValueError:
-                                    print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Çıktı parse hatası: {cikti_str}")
-                                    pass
-                    except (ValueError, TypeError) as e:
-                        print(f"[SAVED-WEB-SKOR-DEBUG] {at_adi}: Genel hata: {e}")
-                        pass
-                    
-                    horse_data = {
-                        'at_adi': item['At İsmi'],
-                        'skor': skor_value,
-                        'cikti_degeri': item.get('Çıktı', ''),  # Ham çıktı değeri
-                        'jokey': '',  # Bu veri yok ama uyumlu olması için
-                        'yas': '',
-                        'agirlik': item.get('Kilo', ''),
-                        'son_mesafe': item.get('Son Mesafe', ''),
-                        'son_pist': item.get('Son Pist', ''),
-                        'son_kilo': item.get('Son Kilo', ''),
-                        'son_hipodrom': item.get('Son Hipodrom', ''),
-                        'son_derece': item.get('Son Derece', ''),
-                        # Birincinin hesaplanmış derecesi (sadece hesaplananlar)
-                        'kazanan_ismi': calculated_winner_score,  # Sadece hesaplanmış değer
-                        'kazanan_derece': kazanan_info.get('kazanan_derece', ''),  # Doğru field
-                        'kazanan_ganyan': kazanan_info.get('kazanan_ganyan', '')  # Doğru field
-                    }
-                    races_data[last_race]['horses'].append(horse_data)
-        
-        # JSON formatına çevir
-        races_list = []
-        for race_num in sorted(races_data.keys(), key=lambda x: int(x) if x.isdigit() else 0):
-            # Her atın skor değerini debug et
-            for horse in races_data[race_num]['horses']:
-                print(f"[JSON-DEBUG] {horse.get('at_adi', '')}: skor={horse.get('skor', 'YOK')}")
-            
-            races_list.append({
-                'race_number': race_num,
-                'horses': races_data[race_num]['horses']
-            })
-        
-        print(f"[YARISSONUC] Oluşturulan koşu sayısı: {len(races_list)}")
-        for i, race in enumerate(races_list):
-            print(f"[YARISSONUC] Koşu {race['race_number']}: {len(race['horses'])} at")
+        print(f"[DEBUG] İlk ham veri örneği: {horses[0].to_dict() if horses else 'Yok'}")
         
-        # Hesaplanmış CSV dosyası oluştur
-        print(f"[DF-DEBUG] DataFrame oluşturuluyor. Veri sayısı: {len(calculated_data)}")
-        calc_df = pd.DataFrame(calculated_data)
-        print(f"[DF-DEBUG] DataFrame oluşturuldu. Shape: {calc_df.shape}")
+        # Aynı kart ve kazanan dosyası için sonuç tüm kullanıcılarda aynıdır; ilk hesaplama önbelleğe alınır
+        kazanan_filepath = find_kazanan_file(city_name)
+        anahtar = analysis_cache.cache_key('hesaplama', city, saved_filepath, kazanan_filepath)
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        calc_filename = f"{city}_hesaplamali_{timestamp}.csv"
-        print(f"[DF-DEBUG] CSV dosya adı: {calc_filename}")
-        calc_filepath = os.path.join('static', 'downloads', calc_filename)
-        
-        # Downloads klasörü yoksa oluştur
-        os.makedirs(os.path.dirname(calc_filepath), exist_ok=True)
-        
-        # Önceki yarışın birincisinin hesaplanmış derecesini calculated_data'ya ekle
-        for i, item in enumerate(calculated_data):
-            if item['At İsmi']:  # At verisi ise
-                at_ismi = item['At İsmi']
-                kazanan_info = kazanan_data.get(at_ismi, {})
-                
-                # O atın bugünkü koşu bilgilerini bul
-                horse_today = next((h for h in horses if h.get('At İsmi') == at_ismi), {})
-                bugun_mesafe = horse_today.get('Bugünkü Mesafe', '')
-                bugun_pist = horse_today.get('Bugünkü Pist', '')
-                
-                # Birincinin hesaplanmış derecesini çek
-                calculated_winner_score = ''
-                
-                # Debug: Kazanan bilgisi kontrolü
-                if not kazanan_info.get('kazanan_derece'):
-                    print(f"[KAZANAN EKSİK] {at_ismi}: kazanan_derece yok")
-                
-                # Birincinin mesafe/pist bilgilerini kontrol et
-                onceki_mesafe = str(kazanan_info.get('onceki_mesafe', '')).strip()
-                onceki_pist = str(kazanan_info.get('onceki_pist', '')).strip()
-                
-                # Eğer boşsa (CSV'de nan/boş) ana atın bilgilerini kullan (aynı koşu)
-                if not onceki_mesafe or onceki_mesafe == 'nan':
-                    onceki_mesafe = item.get('Son Mesafe', '')
-                if not onceki_pist or onceki_pist == 'nan':
-                    onceki_pist = item.get('Son Pist', '')
-                
-                # Kazanan derecesi ve mesafe/pist bilgileri geçerliyse hesapla
-                if (kazanan_info.get('kazanan_derece') and 
-                    onceki_mesafe and onceki_pist and 
-                    str(onceki_mesafe) != 'nan' and str(onceki_pist) != 'nan' and
-                    str(kazanan_info.get('kazanan_derece')) != 'nan'):
-                    # Pist değerlerini integer'a çevir
-                    def pist_to_int_local(pist):
-                        pist = str(pist).lower()
-                        if 'çim' in pist:
-                            return 1
-                        elif 'kum' in pist and 'sentetik' not in pist:
-                            return 2
-                        elif 'sentetik' in pist:
-                            return 3
-                        return 1
-                    
-                    pist1 = pist_to_int_local(onceki_pist)
-                    pist3 = pist_to_int_local(bugun_pist)
-                    
-                    # Mesafe değerlerini float'a çevir
-                    try:
-                        # Birincinin mesafesi (eski koşu)
-                        onceki_mesafe_float = float(str(onceki_mesafe).replace(',', '.'))
-                        # Ana atın bugünkü mesafesi (hesaplama için bu kullanılacak)
-                        bugun_mesafe_float = float(str(bugun_mesafe).replace(',', '.'))
-                    except:
-                        onceki_mesafe_float = 1200
-                        bugun_mesafe_float = 1200
-                    
-                    # Debug için
-                    print(f"[BİRİNCİ DERECE DEBUG] {at_ismi}")
-                    print(f"  kazanan_derece: {kazanan_info.get('kazanan_derece')}")
-                    print(f"  onceki_mesafe_float: {onceki_mesafe_float}")
-                    print(f"  bugun_mesafe_float: {bugun_mesafe_float}")
-                    print(f"  pist1 (önceki): {pist1}, pist3 (bugün): {pist3}")
-                    
-                    # Mesafe farkını hesapla (pist geçişi calculate_kadapt'ta)
-                    derece_saniye = time_to_seconds(kazanan_info.get('kazanan_derece'))
-                    if derece_saniye <= 0:
-                        continue
-                    
-                    # Mesafe farklılığını hesapla
-                    mesafe_farki = bugun_mesafe_float - onceki_mesafe_float
-                    if mesafe_farki != 0:
-                        # Mesafe başına zaman farkı (100m başına)
-                        mevcut_100m_sure = derece_saniye / (onceki_mesafe_float / 100)
-                        
-                        # Mesafe uzatma/kısaltma faktörü
-                        if mesafe_farki > 0:  # Uzun mesafe
-                            mesafe_faktoru = 0.04  # 100m başına +0.04 saniye
-                        else:  # Kısa mesafe
-                            mesafe_faktoru = -0.03  # 100m başına -0.03 saniye
-                        
-                        # Yeni 100m süresi
-                        yeni_100m_sure = mevcut_100m_sure + (abs(mesafe_farki) / 100) * mesafe_faktoru
-                        toplam_sure = yeni_100m_sure * (bugun_mesafe_float / 100)
-                    else:
-                        toplam_sure = derece_saniye
-                    
-                    print(f"  toplam_sure: {toplam_sure}")
-                    
-                    if toplam_sure and toplam_sure > 0:
-                        ort_100m_sure = calculate_time_per_100m(toplam_sure, bugun_mesafe_float)
-                        
-                        # BİRİNCİNİN GERÇEK ŞEHRİNİ KULLAN
-                        birinci_sehir = kazanan_info.get('sehir', city_name)  # Kazanan veriden şehir al
-                        gecmis_sehir = birinci_sehir  # Birincinin gerçek şehri
-                        hedef_sehir = city_name       # Bugünkü koşu şehri
-                        
-                        print(f"  birinci_sehir: {birinci_sehir}")
-                        kadapt = calculate_kadapt(gecmis_sehir, onceki_pist, hedef_sehir, bugun_pist)
-                        raw_score = ort_100m_sure
-                        adjusted_score = raw_score * kadapt
-                        
-                        # Gerçek kilo değerlerini kullan (varsayılan değil)
-                        def safe_float(value, default=50.5):
-                            if value is None or str(value).strip() == '':
-                                return default
-                            try:
-                                return float(str(value).replace(',', '.'))
-                            except (ValueError, TypeError):
-                                return default
-                        
-                        kilo_onceki = safe_float(item.get('Son Kilo'), 50.5)  # Atın geçmiş kilosu
-                        kilo_bugun = safe_float(item.get('Kilo'), 50.5)      # Atın bugünkü kilosu
-                        kilo_fark = kilo_bugun - kilo_onceki
-                        calc_score = adjusted_score - (kilo_fark * 0.02)
-                        
-                        print(f"  kilo_onceki: {kilo_onceki}, kilo_bugun: {kilo_bugun}")
-                        print(f"  kilo_fark: {kilo_fark}, kilo_etkisi: {kilo_fark * 0.02}")
-                        print(f"  ort_100m_sure: {ort_100m_sure}")
-                        print(f"  kadapt: {kadapt}")
-                        print(f"  adjusted_score: {adjusted_score}")
-                        print(f"  calc_score: {calc_score}")
-                    else:
-                        calc_score = None
-                        print(f"  calc_score: None (toplam_sure geçersiz)")
-                    if calc_score and not (math.isnan(calc_score) or math.isinf(calc_score)):
-                        calculated_winner_score = f"{calc_score:.2f}"
-                        print(f"  calculated_winner_score: {calculated_winner_score}")
-                    else:
-                        print(f"  calculated_winner_score: '' (geçersiz calc_score)")
-                
-                calculated_data[i]['Birinci Derece'] = calculated_winner_score  # Sadece hesaplanmış değer
-        
-        # Skor hesapla: (Çıktı + Birinci Derece) / 2
-        for i, item in enumerate(calculated_data):
-            skor_value = ""
-            at_ismi = item.get('At İsmi', '')
+        def hesapla():
+            # Kazanan verilerini oku
+            kazanan_data = get_kazanan_data_for_city(city_name, kazanan_filepath)
+            print(f"[STAT] {len(kazanan_data)} at için kazanan verisi bulundu")
             
-            try:
-                cikti_str = str(item.get('Çıktı', '')).strip()
-                birinci_derece_str = str(item.get('Birinci Derece', '')).strip()
-                
-                # Debug için log ekle
-                if at_ismi and 'Koşu' not in str(item.get('Koşu', '')):
-                    print(f"[SKOR-DEBUG] {at_ismi}: Çıktı='{cikti_str}', Birinci='{birinci_derece_str}'")
-                
-                # Sayısal kontrolü daha güvenli yap
-                def is_numeric_string(s):
-                    try:
-                        float(s.replace(',', '.'))
-                        return True
-                    except ValueError:
-                        return False
-                
-                # Sadece sayısal değerleri işle, koşu başlıklarını ve geçersizleri atla
-                if (cikti_str and cikti_str != 'geçersiz' and is_numeric_string(cikti_str) and
-                    birinci_derece_str and birinci_derece_str != 'geçersiz' and is_numeric_string(birinci_derece_str)):
-                    
-                    cikti_val = float(cikti_str.replace(',', '.'))
-                    birinci_derece_val = float(birinci_derece_str.replace(',', '.'))
-                    
-                    # Skor hesapla: (Çıktı + Birinci Derece) / 2
-                    skor = (cikti_val + birinci_derece_val) / 2
-                    skor_value = f"{skor:.2f}"
-                    
-                    if at_ismi and 'Koşu' not in str(item.get('Koşu', '')):
-                        print(f"[SKOR-DEBUG] {at_ismi}: {cikti_val} + {birinci_derece_val} = {cikti_val + birinci_derece_val}, /2 = {skor}, Final: {skor_value}")
-                    
-            except (ValueError, TypeError) as e:
-                if at_ismi and 'Koşu' not in str(item.get('Koşu', '')):
-                    print(f"[SKOR-HATA] {at_ismi}: {e}")
-                skor_value = ""
+            # Hesaplama yap
+            print(f"[HESAP-DEBUG] process_calculation_for_city çağrılıyor...")
+            calculated_data = process_calculation_for_city(horses, city_name)
+            print(f"[HESAP-DEBUG] Hesaplama tamamlandı. Sonuç sayısı: {len(calculated_data)}")
             
-            calculated_data[i]['Skor'] = skor_value
-        
-        # DataFrame'i yeniden oluştur
-        calc_df = pd.DataFrame(calculated_data)
+            # Birinci derecesi ve skor at başına bir kez hesaplanır; JSON ve CSV aynı sonucu kullanır
+            races_list = score_saved_card(horses, calculated_data, kazanan_data, city_name)
+            
+            print(f"[YARISSONUC] Oluşturulan koşu sayısı: {len(races_list)}")
+            for race in races_list:
+                print(f"[YARISSONUC] Koşu {race['race_number']}: {len(race['horses'])} at")
+            
+            calc_df = pd.DataFrame(calculated_data)
+            
+            # Kolonları düzenle - Skor'u Birinci Derece'den sonra ekle
+            cols = ['Koşu', 'Çıktı', 'Birinci Derece', 'Skor', 'At İsmi', 'Son Mesafe', 'Son Pist', 'Son Kilo', 'Kilo', 'Son Hipodrom']
+            for col in cols:
+                if col not in calc_df.columns:
+                    calc_df[col] = ''
+            calc_df = calc_df.reindex(columns=cols)
+            print(f"[CSV-DEBUG] DataFrame shape: {calc_df.shape}")
+            
+            return {
+                'races': races_list,
+                'csv': calc_df.to_csv(index=False),
+                # Hesaplanabilir atlar
+                'calculated_horses': sum(1 for d in calculated_data if d['Çıktı'] and d['Çıktı'] != 'geçersiz'),
+                'invalid_calculations': sum(1 for d in calculated_data if d['Çıktı'] == 'geçersiz')
+            }
         
-        # Kolonları düzenle - Skor'u Birinci Derece'den sonra ekle
-        cols = ['Koşu', 'Çıktı', 'Birinci Derece', 'Skor', 'At İsmi', 'Son Mesafe', 'Son Pist', 'Son Kilo', 'Kilo', 'Son Hipodrom']
-        for col in cols:
-            if col not in calc_df.columns:
-                calc_df[col] = ''
-        calc_df = calc_df.reindex(columns=cols)
+        sonuc, cacheden = analysis_cache.get_cache().get_or_compute(anahtar, hesapla)
+        if cacheden:
+            print(f"[HESAP] {city_name} hesaplama sonucu önbellekten alındı")
         
-        print(f"[CSV-DEBUG] CSV dosyası oluşturuluyor: {calc_filepath}")
-        print(f"[CSV-DEBUG] DataFrame shape: {calc_df.shape}")
+        kimlik = f"{anahtar.tarih}_{anahtar.kisa}" if anahtar else datetime.now().strftime('%Y%m%d_%H%M%S')
+        calc_filename = f"{city}_hesaplamali_{kimlik}.csv"
         
         try:
-            calc_df.to_csv(calc_filepath, index=False, encoding='utf-8-sig')
-            print(f"[CSV-SUCCESS] CSV dosyası başarıyla oluşturuldu: {calc_filename}")
+            calc_filepath = analysis_cache.export_csv(calc_filename, sonuc['csv'])
+            print(f"[CSV-SUCCESS] CSV dosyası hazır: {calc_filepath}")
         except Exception as csv_error:
             print(f"[CSV-ERROR] CSV dosyası oluşturulamadı: {csv_error}")
             raise csv_error
@@ -935,24 +675,21 @@ def calculate_from_saved():
         successful_data = sum(1 for h in horses if h.get('Son Derece'))
         success_rate = (successful_data / total_horses * 100) if total_horses else 0
         
-        # Hesaplanabilir atlar
-        hesaplanabilir = sum(1 for d in calculated_data if d['Çıktı'] and d['Çıktı'] != 'geçersiz')
-        gecersiz = sum(1 for d in calculated_data if d['Çıktı'] == 'geçersiz')
-        
         # JSON response'u temizle (NaN değerlerini kaldır)
         response_data = {
             'status': 'success',
             'message': f'{city_name} kaydedilmiş veriden hesaplandı! (Çok hızlı)',
             'city': city_name,
-            'races': races_list,
+            'races': sonuc['races'],
             'total_horses': total_horses,
             'successful_data': successful_data,
             'success_rate': round(success_rate, 1),
-            'calculated_horses': hesaplanabilir,
-            'invalid_calculations': gecersiz,
+            'calculated_horses': sonuc['calculated_horses'],
+            'invalid_calculations': sonuc['invalid_calculations'],
             'calculated_download_url': f'/download/{calc_filename}',
             'calculated_filename': calc_filename,
-            'source': 'saved_data'
+            'source': 'saved_data',
+            'from_cache': cacheden
         }
         
         return jsonify(clean_json_data(response_data))
@@ -975,38 +712,20 @@ def calculate_from_saved():
             'message': f'Hata: {error_msg}'
         }), 500
 
-@app.route('/api/scrape_and_save', methods=['POST'])
-def scrape_and_save():
-    """At verilerini çek ve kaydet (hesaplama yapmadan)"""
+def _scrape_and_save_isi(city, debug):
+    """Şehir verisini çekip kaydeder - (yanıt, HTTP kodu) döndürür"""
     try:
-        data = request.get_json()
-        city = data.get('city', '').lower()
-        debug = data.get('debug', False)
-        
-        if city not in CITY_FUNCTIONS:
-            return jsonify({
-                'status': 'error',
-                'message': f'Desteklenmeyen şehir: {city}'
-            }), 400
-        
         city_name, city_function = CITY_FUNCTIONS[city]
         
         print(f"[AT] {city_name} at verileri çekiliyor ve kaydediliyor...")
         
-        # At verilerini çek
-        horses = city_function(debug)
+        # At verilerini çek (bugünkü JSON dosyasına kaydedilir)
+        horses = scrape_race_card(city, city_function, debug)
         
         if horses:
-            # Data klasörü oluştur
-            os.makedirs('data', exist_ok=True)
-            
-            # Bugünkü tarih için JSON dosyasına kaydet
             today = datetime.now().strftime('%Y%m%d')
-            saved_filename = f"{city}_atlari_{today}.json"
-            saved_filepath = os.path.join('data', saved_filename)
-            
-            with open(saved_filepath, 'w', encoding='utf-8') as f:
-                json.dump(horses, f, ensure_ascii=False, indent=2)
+            saved_filepath = race_card_path(city)
+            saved_filename = os.path.basename(saved_filepath)
             
             # Ham veri CSV'si de oluştur
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1017,6 +736,7 @@ def scrape_and_save():
             # Downloads klasörü yoksa oluştur
             os.makedirs(os.path.dirname(raw_filepath), exist_ok=True)
             raw_df.to_csv(raw_filepath, index=False, encoding='utf-8-sig')
+            artifact_catalog.register(raw_filepath)
             
             # KAZANAN ÇIKTI VERİLERİNİ ÇEK
             print(f"[KAZANAN] {city_name} için kazanan verileri çekiliyor...")
@@ -1027,7 +747,7 @@ def scrape_and_save():
             basarili = sum(1 for h in horses if h['Son Derece'])
             oran = (basarili / len(horses) * 100) if horses else 0
             
-            return jsonify({
+            return {
                 'status': 'success',
                 'message': f'{city_name} verileri çekildi ve kaydedildi!',
                 'data': {
@@ -1040,22 +760,22 @@ def scrape_and_save():
                     'raw_filename': raw_filename,
                     'source': 'fresh_scrape'
                 }
-            })
+            }, 200
         else:
-            return jsonify({
+            return {
                 'status': 'error',
                 'message': f'{city_name} için veri çekilemedi'
-            }), 500
+            }, 500
             
     except Exception as e:
-        return jsonify({
+        return {
             'status': 'error',
             'message': f'Hata: {str(e)}'
-        }), 500
+        }, 500
 
-@app.route('/api/scrape_and_calculate', methods=['POST'])
-def scrape_and_calculate():
-    """Tek şehir için at verilerini çek VE hesapla"""
+@app.route('/api/scrape_and_save', methods=['POST'])
+def scrape_and_save():
+    """At verilerini çek ve kaydet (hesaplama yapmadan)"""
     try:
         data = request.get_json()
         city = data.get('city', '').lower()
@@ -1067,12 +787,24 @@ def scrape_and_calculate():
                 'message': f'Desteklenmeyen şehir: {city}'
             }), 400
         
+        return _is_calistir('scrape_and_save', _scrape_and_save_isi, city, debug,
+                            async_mod=data.get('async', False))
+            
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Hata: {str(e)}'
+        }), 500
+
+def _scrape_and_calculate_isi(city, debug):
+    """Şehir verisini çekip hesaplar - (yanıt, HTTP kodu) döndürür"""
+    try:
         city_name, city_function = CITY_FUNCTIONS[city]
         
         print(f"[AT] {city_name} at verileri çekiliyor ve hesaplanıyor...")
         
         # At verilerini çek
-        horses = city_function(debug)
+        horses = scrape_race_card(city, city_function, debug)
         
         if horses:
             # Hesaplama yap
@@ -1195,12 +927,14 @@ def scrape_and_calculate():
                     calc_df[col] = ''
             calc_df = calc_df.reindex(columns=cols)
             calc_df.to_csv(calc_filepath, index=False, encoding='utf-8-sig')
+            artifact_catalog.register(calc_filepath)
             
             # Ham veri CSV'si de oluştur
             raw_df = pd.DataFrame(horses)
             raw_filename = f"{city}_ham_veri_{timestamp}.csv"
             raw_filepath = os.path.join('static', 'downloads', raw_filename)
             raw_df.to_csv(raw_filepath, index=False, encoding='utf-8-sig')
+            artifact_catalog.register(raw_filepath)
             
             # İstatistikler
             basarili = sum(1 for h in horses if h['Son Derece'])
@@ -1227,26 +961,45 @@ def scrape_and_calculate():
                 'calculated_filename': calc_filename
             }
             
-            return jsonify(clean_json_data(response_data))
+            return clean_json_data(response_data), 200
         else:
-            return jsonify({
+            return {
                 'status': 'error',
                 'message': f'{city_name} için veri çekilemedi'
-            }), 500
+            }, 500
             
     except Exception as e:
-        return jsonify({
+        return {
             'status': 'error',
             'message': f'Hata: {str(e)}'
-        }), 500
+        }, 500
 
-@app.route('/api/scrape_all', methods=['POST'])
-def scrape_all_cities():
-    """Tüm şehirler için at verilerini çek"""
+@app.route('/api/scrape_and_calculate', methods=['POST'])
+def scrape_and_calculate():
+    """Tek şehir için at verilerini çek VE hesapla"""
     try:
         data = request.get_json()
+        city = data.get('city', '').lower()
         debug = data.get('debug', False)
         
+        if city not in CITY_FUNCTIONS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Desteklenmeyen şehir: {city}'
+            }), 400
+        
+        return _is_calistir('scrape_and_calculate', _scrape_and_calculate_isi, city, debug,
+                            async_mod=data.get('async', False))
+            
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Hata: {str(e)}'
+        }), 500
+
+def _scrape_all_isi(debug):
+    """Tüm şehirleri çeker - (yanıt, HTTP kodu) döndürür"""
+    try:
         print("[AT] TÜM ŞEHİRLER İÇİN AT VERİLERİ ÇEKİLİYOR...")
         
         # Tüm şehirlerden veri çek
@@ -1264,12 +1017,14 @@ def scrape_all_cities():
             
             df.to_csv(filepath, index=False, encoding='utf-8-sig')
             
+            artifact_catalog.register(filepath)
+            
             # Genel istatistik
             toplam_at = len(all_horses)
             toplam_basarili = sum(1 for h in all_horses if h['Son Derece'])
             genel_oran = (toplam_basarili / toplam_at * 100) if toplam_at else 0
             
-            return jsonify({
+            return {
                 'status': 'success',
                 'message': 'Tüm şehirler için veriler başarıyla çekildi!',
                 'data': {
@@ -1281,12 +1036,28 @@ def scrape_all_cities():
                     'download_url': f'/download/{filename}',
                     'filename': filename
                 }
-            })
+            }, 200
         else:
-            return jsonify({
+            return {
                 'status': 'error',
                 'message': 'Hiçbir şehirden veri çekilemedi'
-            }), 500
+            }, 500
+            
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Hata: {str(e)}'
+        }, 500
+
+@app.route('/api/scrape_all', methods=['POST'])
+def scrape_all_cities():
+    """Tüm şehirler için at verilerini çek"""
+    try:
+        data = request.get_json()
+        debug = data.get('debug', False)
+        
+        return _is_calistir('scrape_all', _scrape_all_isi, debug,
+                            async_mod=data.get('async', False))
             
     except Exception as e:
         return jsonify({
@@ -1325,9 +1096,9 @@ def download_file(filename):
         if not filename.endswith(f'_user{current_user.id}.csv'):
             return jsonify({'error': 'Bu dosyaya erişim yetkiniz yok'}), 403
             
-        filepath = os.path.join('static', 'downloads', filename)
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True, download_name=filename)
+        icerik = artifact_store.open_download(current_user.id, filename)
+        if icerik is not None:
+            return send_file(io.BytesIO(icerik), mimetype='text/csv', as_attachment=True, download_name=filename)
         else:
             return jsonify({'error': 'Dosya bulunamadı'}), 404
     except Exception as e:
@@ -1496,41 +1267,31 @@ def compare_all_cities():
         
         print("[KARŞILAŞTIRMA] Tüm şehirler için karşılaştırma yapılıyor...")
         
-        all_results = {}
-        total_success = 0
-        total_races = 0
+        # Şehirlerin sonuç sayfaları eşzamanlı indirilip karşılaştırılır
+        toplu = compare_cities(list(CITY_FUNCTIONS), debug)
         
-        for city_key, (city_name, _) in CITY_FUNCTIONS.items():
-            print(f"\n=== {city_name} ===")
-            try:
-                comparison = compare_predictions_with_results(city_key, debug)
-                
-                if 'error' not in comparison:
-                    all_results[city_key] = {
-                        'city_name': city_name,
-                        'success_rate': comparison['success_rate'],
-                        'total_races': comparison['total_races'],
-                        'successful_predictions': comparison['successful_predictions'],
-                        'detailed_results': comparison['detailed_results']
-                    }
-                    
-                    total_success += comparison['successful_predictions']
-                    total_races += comparison['total_races']
-                    
-                    print(f"{city_name}: %{comparison['success_rate']:.1f} ({comparison['successful_predictions']}/{comparison['total_races']})")
-                else:
-                    all_results[city_key] = {
-                        'city_name': city_name,
-                        'error': comparison['error']
-                    }
-                    print(f"{city_name}: HATA - {comparison['error']}")
-                    
-            except Exception as e:
+        all_results = {}
+        for city_key, comparison in toplu['city_results'].items():
+            city_name = CITY_FUNCTIONS[city_key][0]
+            if 'error' not in comparison:
+                all_results[city_key] = {
+                    'city_name': city_name,
+                    'success_rate': comparison['success_rate'],
+                    'total_races': comparison['total_races'],
+                    'successful_predictions': comparison['successful_predictions'],
+                    'detailed_results': comparison['detailed_results']
+                }
+                print(f"{city_name}: %{comparison['success_rate']:.1f} ({comparison['successful_predictions']}/{comparison['total_races']})")
+            else:
                 all_results[city_key] = {
                     'city_name': city_name,
-                    'error': str(e)
+                    'error': comparison['error']
                 }
-                print(f"{city_name}: HATA - {str(e)}")
+                print(f"{city_name}: HATA - {comparison['error']}")
+        
+        total_success = toplu['total_successful_predictions']
+        total_races = toplu['total_races']
+        print(f"[KARŞILAŞTIRMA] {len(all_results)} şehir {toplu['sure']:.1f} sn'de tamamlandı")
         
         # Genel başarı oranı
         overall_success_rate = (total_success / total_races * 100) if total_races > 0 else 0
@@ -1559,7 +1320,6 @@ def get_analysis_files():
         
     try:
         import os
-        import glob
         from datetime import datetime
         
         downloads_dir = os.path.join('static', 'downloads')
@@ -1574,17 +1334,26 @@ def get_analysis_files():
         
         print(f"[DEBUG] Kullanıcı {current_user.email} için {len(user_analyses)} analiz kaydı bulundu")
         
-        # Downloads klasöründeki CSV dosyalarını bul - sadece bu kullanıcının dosyaları
+        # Artifact deposundaki indirme kayıtları
+        kayitli = set()
+        for kayit in artifact_store.list_downloads(current_user.id):
+            kayitli.add(kayit.filename)
+            files.setdefault(kayit.city or 'Diğer', []).append({
+                'filename': kayit.filename,
+                'size': kayit.size or 0,
+                'date_created': kayit.created_at.strftime('%Y-%m-%d %H:%M:%S') if kayit.created_at else ''
+            })
+        
+        # Downloads klasöründeki eski CSV dosyaları - katalogdan, sadece bu kullanıcının dosyaları
         if os.path.exists(downloads_dir):
-            # Sadece bu kullanıcıya ait dosyaları filtrele
-            user_pattern = f"*_user{current_user.id}.csv"
-            csv_files = glob.glob(os.path.join(downloads_dir, user_pattern))
+            csv_files = artifact_catalog.list_files(None, user_id=current_user.id, dizin=downloads_dir)
             
-            print(f"[DEBUG] Kullanıcı {current_user.id} için pattern: {user_pattern}")
-            print(f"[DEBUG] Bulunan dosyalar: {csv_files}")
+            print(f"[DEBUG] Kullanıcı {current_user.id} için katalogda {len(csv_files)} dosya bulundu")
             
-            for file_path in csv_files:
-                filename = os.path.basename(file_path)
+            for katalog_kaydi in csv_files:
+                filename = os.path.basename(katalog_kaydi['path'])
+                if filename in kayitli:
+                    continue
                 
                 print(f"[DEBUG] Kullanıcı dosyası: {filename}")
                 
@@ -1628,11 +1397,10 @@ def get_analysis_files():
                         files[city] = []
                     
                     # Dosya bilgilerini ekle
-                    file_stat = os.stat(file_path)
                     files[city].append({
                         'filename': filename,
-                        'size': file_stat.st_size,
-                        'date_created': datetime.fromtimestamp(file_stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+                        'size': katalog_kaydi['size'],
+                        'date_created': datetime.fromtimestamp(katalog_kaydi['created']).strftime('%Y-%m-%d %H:%M:%S')
                     })
         
         # Her şehirin dosyalarını tarihe göre sırala (en yeni önce)
@@ -1697,9 +1465,9 @@ def view_analysis_file(filename):
                 'error': 'Bu dosyaya erişim yetkiniz yok'
             }), 403
         
-        file_path = os.path.join('static', 'downloads', filename)
+        icerik = artifact_store.open_download(current_user.id, filename)
         
-        if not os.path.exists(file_path):
+        if icerik is None:
             return jsonify({
                 'success': False,
                 'error': 'Dosya bulunamadı'
@@ -1707,13 +1475,13 @@ def view_analysis_file(filename):
         
         # CSV dosyasını oku
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            df = pd.read_csv(io.BytesIO(icerik), encoding='utf-8-sig')
         except UnicodeDecodeError:
             # UTF-8 okuma hatası varsa farklı encoding'ler dene
             try:
-                df = pd.read_csv(file_path, encoding='latin1')
+                df = pd.read_csv(io.BytesIO(icerik), encoding='latin1')
             except:
-                df = pd.read_csv(file_path, encoding='cp1254')
+                df = pd.read_csv(io.BytesIO(icerik), encoding='cp1254')
         
         # NaN değerlerini boş string ile değiştir
         df = df.fillna('')
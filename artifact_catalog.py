@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DOSYA KATALOĞU
+data/ ve static/downloads altındaki dosyaların (tür, şehir, tarih, kullanıcı,
+yol, boyut, oluşturulma) bilgisini SQLite'ta tutar. Dosya yazan her yer
+register() ile kaydı günceller; kazanan dosyası arama, kullanıcı dosyaları
+ve admin veri listesi dizin taramak yerine indeksli sorgu kullanır.
+
+Katalog ilk açıldığında mevcut dosyalardan otomatik oluşturulur. Dışarıdan
+kopyalanan/silinen dosyalar için yeniden oluşturma:
+    python artifact_catalog.py rebuild
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+KATALOG_DB = os.environ.get('ARTIFACT_CATALOG_DB', os.path.join('cache', 'catalog.db'))
+DATA_DIZINI = 'data'
+DOWNLOADS_DIZINI = os.path.join('static', 'downloads')
+
+# Dosya adı -> (tür, şehir, tarih) kuralları; ilk eşleşen geçerli
+_KURALLAR = (
+    ('kart', re.compile(r'^(?P<city>[^_]+)_atlari_(?P<date>\d{8})\.json$')),
+    ('kazanan', re.compile(r'^(?P<city>.+?)_kazanan_cikti_(?P<date>\d{8})_.*\.csv$')),
+    ('analiz', re.compile(r'^(?P<city>[^_]+)_analiz_(?P<date>\d{8})_.*_user\d+\.csv$')),
+    ('hesaplama', re.compile(r'^(?P<city>[^_]+)_hesaplamali_(?P<date>\d{8})')),
+    ('ham', re.compile(r'^(?P<city>[^_]+)_(?:ham_veri|atlari)_(?P<date>\d{8})_\d{6}\.csv$')),
+)
+_KULLANICI = re.compile(r'_user(\d+)\.csv$')
+
+_lock = threading.Lock()
+_conn = None
+
+
+def siniflandir(yol):
+    """
+    Dosya yolundan katalog alanları
+
+    Returns:
+        tuple: (tür, şehir, tarih, kullanıcı id) - bilinmeyen json 'veri', diğerleri 'diger'
+    """
+    ad = os.path.basename(yol)
+    kullanici = _KULLANICI.search(ad)
+    user_id = int(kullanici.group(1)) if kullanici else None
+    for tur, desen in _KURALLAR:
+        eslesme = desen.match(ad)
+        if eslesme:
+            return tur, eslesme.group('city'), eslesme.group('date'), user_id
+    tur = 'veri' if ad.endswith('.json') else 'diger'
+    return tur, None, None, user_id
+
+
+def _normalize(yol):
+    return os.path.normpath(yol)
+
+
+def _db():
+    """Paylaşılan bağlantı (lock altında çağrılır); katalog yeni oluşturulduysa doldurulur"""
+    global _conn
+    if _conn is None:
+        dizin = os.path.dirname(KATALOG_DB)
+        if dizin:
+            os.makedirs(dizin, exist_ok=True)
+        conn = sqlite3.connect(KATALOG_DB, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        yeni = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'dosyalar'"
+        ).fetchone() is None
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS dosyalar (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                city TEXT,
+                date TEXT,
+                user_id INTEGER,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_dosyalar_tur_sehir ON dosyalar(kind, city, date, created)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_dosyalar_kullanici ON dosyalar(user_id, kind)')
+        conn.commit()
+        _conn = conn
+        if yeni:
+            _yeniden_olustur(conn)
+    return _conn
+
+
+def _kayit_satiri(yol):
+    st = os.stat(yol)
+    tur, city, tarih, user_id = siniflandir(yol)
+    return (_normalize(yol), tur, city, tarih, user_id, st.st_size, st.st_mtime)
+
+
+def register(yol):
+    """Yazılan dosyayı kataloğa ekle/güncelle (hata yazan tarafı etkilemez)"""
+    try:
+        satir = _kayit_satiri(yol)
+        with _lock:
+            db = _db()
+            db.execute('INSERT OR REPLACE INTO dosyalar VALUES (?, ?, ?, ?, ?, ?, ?)', satir)
+            db.commit()
+    except (OSError, sqlite3.Error) as e:
+        print(f"[UYARI] Katalog güncellenemedi ({yol}): {e}")
+
+
+def unregister(yol):
+    """Silinen dosyanın kaydını kaldır"""
+    try:
+        with _lock:
+            db = _db()
+            db.execute('DELETE FROM dosyalar WHERE path = ?', (_normalize(yol),))
+            db.commit()
+    except sqlite3.Error as e:
+        print(f"[UYARI] Katalog kaydı silinemedi ({yol}): {e}")
+
+
+def _satirlar(sql, parametreler):
+    with _lock:
+        db = _db()
+        imlec = db.execute(sql, parametreler)
+        adlar = [d[0] for d in imlec.description]
+        return [dict(zip(adlar, satir)) for satir in imlec.fetchall()]
+
+
+def find_latest(kind, city=None, date=None):
+    """
+    Türün (ve verilirse şehir/tarihin) en son oluşturulan dosyası
+
+    Returns:
+        str | None: Dosya yolu; katalogda olup diskte olmayan kayıtlar atlanır
+    """
+    kosullar, parametreler = ['kind = ?'], [kind]
+    if city is not None:
+        kosullar.append('city = ?')
+        parametreler.append(city)
+    if date is not None:
+        kosullar.append('date = ?')
+        parametreler.append(date)
+    sql = f"SELECT path FROM dosyalar WHERE {' AND '.join(kosullar)} ORDER BY created DESC"
+    for satir in _satirlar(sql, parametreler):
+        if os.path.exists(satir['path']):
+            return satir['path']
+        unregister(satir['path'])
+    return None
+
+
+def list_files(kinds, user_id=None, city=None, created_before=None, dizin=None):
+    """
+    Katalogdaki dosyalar (en yeni önce)
+
+    Args:
+        kinds: Tür veya tür listesi ('kart', ('kart', 'veri'), ...); None ise tüm türler
+        created_before: epoch; verilirse yalnızca bundan eski dosyalar
+        dizin: Verilirse yalnızca bu dizindeki dosyalar ('data')
+
+    Returns:
+        list: [{'path', 'kind', 'city', 'date', 'user_id', 'size', 'created'}, ...];
+              katalogda olup diskte olmayan kayıtlar katalogdan silinir ve listelenmez
+    """
+    kosullar, parametreler = ['1 = 1'], []
+    if isinstance(kinds, str):
+        kinds = (kinds,)
+    if kinds:
+        kosullar.append(f"kind IN ({', '.join('?' * len(kinds))})")
+        parametreler.extend(kinds)
+    if user_id is not None:
+        kosullar.append('user_id = ?')
+        parametreler.append(user_id)
+    if city is not None:
+        kosullar.append('city = ?')
+        parametreler.append(city)
+    if created_before is not None:
+        kosullar.append('created < ?')
+        parametreler.append(created_before)
+    if dizin is not None:
+        kosullar.append('substr(path, 1, ?) = ?')
+        onek = _normalize(dizin) + os.sep
+        parametreler.extend([len(onek), onek])
+    sql = f"SELECT * FROM dosyalar WHERE {' AND '.join(kosullar)} ORDER BY created DESC"
+    dosyalar = []
+    for satir in _satirlar(sql, parametreler):
+        if os.path.exists(satir['path']):
+            dosyalar.append(satir)
+        else:
+            unregister(satir['path'])
+    return dosyalar
+
+
+def _yeniden_olustur(db, dizinler=(DATA_DIZINI, DOWNLOADS_DIZINI)):
+    """Kataloğu dizinlerdeki dosyalardan baştan oluştur (lock altında çağrılır)"""
+    satirlar = []
+    for dizin in dizinler:
+        if not os.path.isdir(dizin):
+            continue
+        for ad in os.listdir(dizin):
+            yol = os.path.join(dizin, ad)
+            if ad.startswith('.') or ad.endswith('.tmp') or not os.path.isfile(yol):
+                continue
+            try:
+                satirlar.append(_kayit_satiri(yol))
+            except OSError:
+                continue
+    db.execute('DELETE FROM dosyalar')
+    db.executemany('INSERT OR REPLACE INTO dosyalar VALUES (?, ?, ?, ?, ?, ?, ?)', satirlar)
+    db.commit()
+    return len(satirlar)
+
+
+def rebuild(dizinler=(DATA_DIZINI, DOWNLOADS_DIZINI)):
+    """
+    Kataloğu diskteki dosyalardan yeniden oluştur
+
+    Returns:
+        int: Kataloğa eklenen dosya sayısı
+    """
+    with _lock:
+        return _yeniden_olustur(_db(), dizinler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dosya kataloğu')
+    alt = parser.add_subparsers(dest='komut', required=True)
+    alt.add_parser('rebuild', help='data/ ve static/downloads taranarak katalog yeniden oluşturulur')
+    alt.add_parser('stats', help='Tür bazında dosya sayıları')
+    args = parser.parse_args()
+
+    if args.komut == 'rebuild':
+        sayi = rebuild()
+        print(f"[TAMAM] Katalog yeniden oluşturuldu: {sayi} dosya ({KATALOG_DB})")
+    else:
+        for satir in _satirlar('SELECT kind, COUNT(*) AS sayi, SUM(size) AS boyut FROM dosyalar GROUP BY kind', ()):
+            print(f"{satir['kind']:<12}{satir['sayi']:>8}{(satir['boyut'] or 0) / 1024:>12.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+İÇERİK ADRESLİ DOSYA DEPOSU
+Analiz CSV'leri içeriklerinin sha256 özetiyle artifacts/{ab}/{özet}.gz olarak
+bir kez yazılır. Kullanıcıya özel indirme dosyaları (..._user{id}.csv) diskte
+kopya olarak değil, download_record tablosunda bu özete işaret eden küçük
+kayıtlar olarak tutulur. Aynı analizi indiren her kullanıcı aynı dosyayı okur.
+
+Depo static/ dışında durur; dosyalara yalnızca yetki kontrolü yapan
+endpoint'ler üzerinden erişilir. Kaydı olmayan eski dosyalar için
+static/downloads altındaki dosya okunur.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from models import db, DownloadRecord
+
+ARTIFACT_DIZINI = os.environ.get('ARTIFACT_DIR', 'artifacts')
+DOWNLOADS_DIZINI = os.path.join('static', 'downloads')
+CSV_ENCODING = 'utf-8-sig'
+# Bu süreden yeni (yazılmış/yeniden kullanılmış) depo dosyaları temizlikte silinmez
+SILME_BEKLEMESI = int(os.environ.get('ARTIFACT_GRACE_SECONDS', '600'))
+
+
+def artifact_path(ozet):
+    return os.path.join(ARTIFACT_DIZINI, ozet[:2], f"{ozet}.gz")
+
+
+def put_bytes(icerik):
+    """
+    İçeriği özetiyle depoya yaz (zaten varsa yazmaz)
+
+    Returns:
+        str: sha256 özeti
+    """
+    ozet = hashlib.sha256(icerik).hexdigest()
+    yol = artifact_path(ozet)
+    if os.path.exists(yol):
+        try:
+            # Kayıt commit edilene kadar remove_unreferenced dosyayı silmesin
+            os.utime(yol)
+            return ozet
+        except FileNotFoundError:
+            pass
+
+    os.makedirs(os.path.dirname(yol), exist_ok=True)
+    fd, gecici = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(yol))
+    try:
+        with os.fdopen(fd, 'wb') as ham, gzip.GzipFile(fileobj=ham, mode='wb', compresslevel=6, mtime=0) as f:
+            f.write(icerik)
+        os.replace(gecici, yol)
+    except BaseException:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        raise
+    return ozet
+
+
+def read_bytes(ozet):
+    """Depodaki içeriği aç (yoksa None)"""
+    try:
+        with gzip.open(artifact_path(ozet), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def register_download(user_id, filename, metin, city=None, kind='analiz'):
+    """
+    CSV metnini depoya yazıp kullanıcı için indirme kaydı oluştur.
+    Aynı dosya adı için kayıt zaten varsa içerik özeti ve oluşturma zamanı
+    güncellenir (eski kayıt temizliği yeniden verilen indirmeyi silmez).
+
+    Returns:
+        DownloadRecord
+    """
+    icerik = metin.encode(CSV_ENCODING)
+    ozet = put_bytes(icerik)
+
+    kayit = DownloadRecord.query.filter_by(filename=filename).first()
+    if kayit is None:
+        kayit = DownloadRecord(user_id=user_id, filename=filename, city=city, kind=kind)
+        db.session.add(kayit)
+    else:
+        kayit.created_at = datetime.utcnow()
+    kayit.artifact_hash = ozet
+    kayit.size = len(icerik)
+    db.session.commit()
+    return kayit
+
+
+def open_download(user_id, filename):
+    """
+    Kullanıcının indirme dosyasının içeriği
+
+    Returns:
+        bytes | None: Kayıt/dosya yoksa None
+    """
+    kayit = DownloadRecord.query.filter_by(user_id=user_id, filename=filename).first()
+    if kayit is not None:
+        icerik = read_bytes(kayit.artifact_hash)
+        if icerik is None:
+            print(f"[HATA] {filename} için depo dosyası bulunamadı: {kayit.artifact_hash}")
+        return icerik
+
+    # Depodan önceki dosyalar
+    eski_yol = os.path.join(DOWNLOADS_DIZINI, os.path.basename(filename))
+    if os.path.exists(eski_yol):
+        with open(eski_yol, 'rb') as f:
+            return f.read()
+    return None
+
+
+def list_downloads(user_id):
+    """Kullanıcının indirme kayıtları (en yeni önce)"""
+    return (DownloadRecord.query.filter_by(user_id=user_id)
+            .order_by(DownloadRecord.created_at.desc()).all())
+
+
+def remove_unreferenced():
+    """
+    Hiçbir kayıt tarafından kullanılmayan depo dosyalarını sil. Son
+    SILME_BEKLEMESI saniyede yazılan ya da put_bytes ile yeniden kullanılan
+    dosyalar, kaydı henüz commit edilmemiş olabileceğinden atlanır.
+
+    Returns:
+        int: Silinen dosya sayısı
+    """
+    kullanilan = {ozet for (ozet,) in db.session.query(DownloadRecord.artifact_hash).distinct()}
+    esik = time.time() - SILME_BEKLEMESI
+    silinen = 0
+    if not os.path.isdir(ARTIFACT_DIZINI):
+        return 0
+    for alt in os.listdir(ARTIFACT_DIZINI):
+        dizin = os.path.join(ARTIFACT_DIZINI, alt)
+        if not os.path.isdir(dizin):
+            continue
+        for ad in os.listdir(dizin):
+            if not ad.endswith('.gz') or ad[:-3] in kullanilan:
+                continue
+            yol = os.path.join(dizin, ad)
+            try:
+                if os.path.getmtime(yol) > esik:
+                    continue
+                os.remove(yol)
+                silinen += 1
+            except OSError:
+                pass
+    return silinen
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ASENKRON SAYFA ÇEKME MOTORU
+Bir yarış kartındaki tüm at profillerini eşzamanlı indirir.
+Her host için ayarlanabilir bir eşzamanlılık limiti uygular,
+sonuçları verilen URL sırasıyla aynı sırada döndürür.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Host başına aynı anda açık istek sayısı (ortam değişkeni ile değiştirilebilir)
+VARSAYILAN_HOST_LIMITI = int(os.environ.get('SCRAPER_HOST_CONCURRENCY', '6'))
+
+
+def _host(url):
+    """URL'den host adını çıkar"""
+    try:
+        return urlparse(url).netloc or 'yerel'
+    except Exception:
+        return 'yerel'
+
+
+async def _fetch_all_async(urls, fetch_func, host_limit, hata_degeri):
+    loop = asyncio.get_running_loop()
+    semaforlar = {}
+    for url in urls:
+        host = _host(url)
+        if host not in semaforlar:
+            semaforlar[host] = asyncio.Semaphore(host_limit)
+
+    # Bloklayan istekler (requests) thread havuzunda çalışır,
+    # host limiti semafor ile asyncio tarafında uygulanır
+    max_workers = max(1, min(len(urls), host_limit * len(semaforlar)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='profil') as executor:
+
+        async def tek_istek(url):
+            async with semaforlar[_host(url)]:
+                try:
+                    return await loop.run_in_executor(executor, fetch_func, url)
+                except Exception as e:
+                    print(f"[ASYNC HATA] {url}: {e}")
+                    return hata_degeri
+
+        return await asyncio.gather(*(tek_istek(url) for url in urls))
+
+
+def fetch_all(urls, fetch_func, host_limit=None, hata_degeri=None):
+    """
+    urls listesindeki her adres için fetch_func(url) çağrısını eşzamanlı çalıştırır
+
+    Args:
+        urls: Çekilecek URL listesi
+        fetch_func: Tek URL için bloklayan çekme/parse fonksiyonu
+        host_limit: Host başına eşzamanlı istek limiti (varsayılan: SCRAPER_HOST_CONCURRENCY)
+        hata_degeri: Hata veren URL'ler için dönecek değer
+
+    Returns:
+        list: fetch_func sonuçları, urls ile aynı sırada
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    limit = host_limit or VARSAYILAN_HOST_LIMITI
+    if limit < 1:
+        limit = 1
+
+    coro = _fetch_all_async(urls, fetch_func, limit, hata_degeri)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Zaten çalışan bir event loop içindeysek ayrı bir thread'de çalıştır
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GERİYE DÖNÜK TEST (BACKTEST)
+Bir tarih aralığı ve şehir kümesi için kaydedilmiş kartları (columnar_store,
+yoksa data/*.json) ve kesinleşmiş sonuçları (results_store) toplu yükler,
+her şehir/gün için perform_comparison ya da perform_detailed_comparison'ı
+süreç havuzunda çalıştırır. Başarı oranları şehir, bugünkü pist ve mesafe
+aralığına göre toplanır.
+
+Depoda sonucu olmayan günler --indir ile sonuç sayfalarından çekilip
+depoya yazılır (sonraki çalıştırmalar ağa çıkmaz).
+
+Kullanım:
+    python backtest.py [--baslangic 20250928] [--bitis 20251017] [--sehirler istanbul,ankara]
+                       [--detayli] [--indir] [--isci 4] [--json cikti.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import columnar_store
+import results_store
+from city_orchestrator import run_cities
+from race_entry import MESAFE_ARALIKLARI, Pist, kosu_no, pist_turu, sayi
+from results_scraper import fetch_results, perform_comparison, perform_detailed_comparison
+
+ISCI_SAYISI = int(os.environ.get('BACKTEST_WORKERS', str(os.cpu_count() or 1)))
+
+_PIST_ADLARI = {Pist.KUM: 'Kum', Pist.CIM: 'Çim', Pist.SENTETIK: 'Sentetik', Pist.BILINMIYOR: 'Bilinmiyor'}
+
+
+def mesafe_araligi(mesafe):
+    """'1400' -> '1300-1600'; mesafe yoksa 'Bilinmiyor'"""
+    metre = sayi(mesafe)
+    if metre is None:
+        return 'Bilinmiyor'
+    for sinir, etiket in MESAFE_ARALIKLARI:
+        if metre <= sinir:
+            return etiket
+    return '2100+'
+
+
+def _kosu_bilgileri(predictions):
+    """{koşu no: (pist, mesafe aralığı)} - koşunun ilk atından"""
+    kosular = {}
+    for horse in predictions:
+        numara = kosu_no(horse.get('Koşu', ''))
+        if numara and numara not in kosular:
+            kosular[numara] = (_PIST_ADLARI[pist_turu(horse.get('Bugünkü Pist', ''))],
+                               mesafe_araligi(horse.get('Bugünkü Mesafe', '')))
+    return kosular
+
+
+def _gunu_karsilastir(is_):
+    """
+    Süreç havuzu işi: tek şehir/gün karşılaştırması
+
+    Returns:
+        tuple: (şehir, tarih, toplam koşu, başarılı, [(pist, mesafe aralığı, başarılı mı), ...])
+    """
+    city, tarih, predictions, results, detayli = is_
+    if detayli:
+        comparison = perform_detailed_comparison(predictions, results)
+        kosu_detaylari = comparison.get('detailed_races', [])
+    else:
+        comparison = perform_comparison(predictions, results)
+        kosu_detaylari = comparison.get('detailed_results', [])
+    basarili = {kosu['race_number'] for kosu in kosu_detaylari if kosu['is_successful']}
+
+    # Karşılaştırmadaki gibi yalnızca sonucu olan koşular sayılır
+    kosular = [(pist, aralik, numara in basarili)
+               for numara, (pist, aralik) in _kosu_bilgileri(predictions).items() if numara in results]
+    return city, tarih, comparison.get('total_races', 0), comparison.get('successful_predictions', 0), kosular
+
+
+def _oran(toplam, basarili):
+    return {
+        'total_races': toplam,
+        'successful_predictions': basarili,
+        'success_rate': round(basarili / toplam * 100, 1) if toplam else 0,
+    }
+
+
+def _eksik_sonuclari_indir(eksikler):
+    """Depoda olmayan şehir/gün sonuçlarını eşzamanlı çek (kesinleşenler depoya yazılır)"""
+    isler = [((city, tarih), partial(fetch_results, city, datetime.strptime(tarih, '%Y%m%d')))
+             for city, tarih in eksikler]
+    return {anahtar: sonuc['sonuc'] for anahtar, sonuc in run_cities(isler).items() if sonuc['sonuc']}
+
+
+def load_history(cities=None, start=None, end=None, indir=False):
+    """
+    Tarih aralığındaki kayıtlı kartlar ve sonuçları
+
+    Returns:
+        tuple: ({(şehir, 'YYYYMMDD'): (at listesi, sonuçlar)} - yalnızca sonucu olanlar,
+                sonucu bulunamayan (şehir, tarih) listesi)
+    """
+    kartlar = columnar_store.load_cards(cities, start, end)
+    sonuclar = results_store.load_range(cities, start, end)
+
+    eksikler = [anahtar for anahtar in kartlar if not sonuclar.get(anahtar)]
+    if indir and eksikler:
+        print(f"[BACKTEST] {len(eksikler)} şehir/gün için sonuçlar indiriliyor...")
+        sonuclar.update(_eksik_sonuclari_indir(eksikler))
+        eksikler = [anahtar for anahtar in eksikler if not sonuclar.get(anahtar)]
+
+    gecmis = {anahtar: (horses, sonuclar[anahtar]) for anahtar, horses in kartlar.items() if sonuclar.get(anahtar)}
+    return gecmis, eksikler
+
+
+def run_backtest(cities=None, start=None, end=None, detayli=False, indir=False, isci=None):
+    """
+    Tarih aralığındaki tüm kayıtlı kartları sonuçlarla karşılaştır
+
+    Args:
+        cities: Şehir anahtarları (None ise hepsi)
+        start, end: 'YYYYMMDD' (dahil)
+        detayli: perform_detailed_comparison kullan (ilk 3 tahminde kazanan = başarılı)
+        indir: Depoda sonucu olmayan günleri sonuç sayfasından çek
+        isci: Süreç sayısı (varsayılan: BACKTEST_WORKERS / CPU sayısı)
+
+    Returns:
+        dict: overall, by_city, by_track, by_distance, days (şehir/gün özetleri),
+              missing_results (sonucu bulunamayan şehir/günler), sure
+    """
+    baslangic = time.perf_counter()
+    gecmis, eksikler = load_history(cities, start, end, indir)
+    isler = [(city, tarih, horses, results, detayli) for (city, tarih), (horses, results) in gecmis.items()]
+
+    isci = max(1, min(isci or ISCI_SAYISI, len(isler)))
+    if isci > 1:
+        with ProcessPoolExecutor(max_workers=isci) as executor:
+            gunler = list(executor.map(_gunu_karsilastir, isler, chunksize=max(1, len(isler) // (isci * 4))))
+    else:
+        gunler = [_gunu_karsilastir(is_) for is_ in isler]
+
+    sehirler, pistler, mesafeler = {}, {}, {}
+    toplam = basarili = 0
+    for city, _, gun_toplam, gun_basarili, kosular in gunler:
+        sayac = sehirler.setdefault(city, [0, 0])
+        sayac[0] += gun_toplam
+        sayac[1] += gun_basarili
+        toplam += gun_toplam
+        basarili += gun_basarili
+        for pist, aralik, kosu_basarili in kosular:
+            for grup, anahtar in ((pistler, pist), (mesafeler, aralik)):
+                sayac = grup.setdefault(anahtar, [0, 0])
+                sayac[0] += 1
+                sayac[1] += kosu_basarili
+
+    def sirali(grup, sira=None):
+        anahtarlar = sorted(grup, key=sira.index if sira else None)
+        return {anahtar: _oran(*grup[anahtar]) for anahtar in anahtarlar}
+
+    mesafe_sirasi = [etiket for _, etiket in MESAFE_ARALIKLARI] + ['2100+', 'Bilinmiyor']
+    return {
+        'mode': 'detailed' if detayli else 'winner',
+        'overall': _oran(toplam, basarili),
+        'by_city': sirali(sehirler),
+        'by_track': sirali(pistler),
+        'by_distance': sirali(mesafeler, mesafe_sirasi),
+        'days': [{'city': city, 'date': tarih, **_oran(gun_toplam, gun_basarili)}
+                 for city, tarih, gun_toplam, gun_basarili, _ in gunler],
+        'missing_results': [f"{city}_{tarih}" for city, tarih in eksikler],
+        'sure': round(time.perf_counter() - baslangic, 3),
+    }
+
+
+def _tablo(baslik, grup):
+    print(f"\n{baslik:<14}{'Koşu':>8}{'Başarılı':>10}{'Oran':>8}")
+    for anahtar, oran in grup.items():
+        print(f"{anahtar:<14}{oran['total_races']:>8}{oran['successful_predictions']:>10}{oran['success_rate']:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kayıtlı tahminler üzerinde geriye dönük test')
+    parser.add_argument('--baslangic', help='YYYYMMDD (dahil)')
+    parser.add_argument('--bitis', help='YYYYMMDD (dahil)')
+    parser.add_argument('--sehirler', help='Virgülle ayrılmış şehir anahtarları (varsayılan: hepsi)')
+    parser.add_argument('--detayli', action='store_true', help='İlk 3 tahminde kazanan varsa başarılı say')
+    parser.add_argument('--indir', action='store_true', help='Depoda olmayan sonuçları indir')
+    parser.add_argument('--isci', type=int, default=None, help='Süreç sayısı')
+    parser.add_argument('--json', help='Sonucu JSON dosyasına yaz')
+    args = parser.parse_args()
+
+    cities = [c.strip().lower() for c in args.sehirler.split(',')] if args.sehirler else None
+    sonuc = run_backtest(cities, args.baslangic, args.bitis, args.detayli, args.indir, args.isci)
+
+    if not sonuc['days']:
+        print("[HATA] Karşılaştırılacak kart/sonuç bulunamadı"
+              + (" (sonuçlar için --indir kullanın)" if sonuc['missing_results'] else ""))
+        return 1
+
+    genel = sonuc['overall']
+    print(f"[BACKTEST] {len(sonuc['days'])} şehir/gün, {genel['total_races']} koşu, "
+          f"%{genel['success_rate']:.1f} başarı ({sonuc['mode']}) - {sonuc['sure']:.2f} sn")
+    _tablo('Şehir', sonuc['by_city'])
+    _tablo('Pist', sonuc['by_track'])
+    _tablo('Mesafe', sonuc['by_distance'])
+    if sonuc['missing_results']:
+        print(f"\n[UYARI] Sonucu olmayan {len(sonuc['missing_results'])} şehir/gün atlandı: "
+              f"{', '.join(sonuc['missing_results'][:10])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(sonuc, f, ensure_ascii=False, indent=2)
+        print(f"\n[TAMAM] Sonuç yazıldı: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
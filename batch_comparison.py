@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TOPLU SONUÇ KARŞILAŞTIRMASI
+Tüm şehirlerin önceki gün sonuç sayfaları aynı anda indirilir; her şehrin
+sayfası ayrıştırılıp tahminlerle karşılaştırılması kendi işçi thread'inde
+yapılır. Siteye giden istek hızı http_client'taki ortak token bucket ile
+sınırlı olduğundan toplam süre yaklaşık en yavaş şehrin süresi kadardır.
+
+/api/compare_all_cities, comparison_scheduler.run_midnight_comparison ve
+results_scraper.schedule_midnight_check bu modülü kullanır.
+"""
+
+import time
+from datetime import datetime
+from functools import partial
+
+from city_orchestrator import run_cities
+from results_scraper import compare_predictions_with_results, save_comparison_results
+
+SEHIRLER = ('bursa', 'istanbul', 'ankara', 'izmir', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig')
+
+
+def _karsilastir(city, debug, kaydet):
+    comparison = compare_predictions_with_results(city, debug)
+    if kaydet and 'error' not in comparison:
+        save_comparison_results(city, comparison)
+    return comparison
+
+
+def compare_cities(cities=SEHIRLER, debug=False, kaydet=False, max_workers=None):
+    """
+    Şehirlerin dünkü tahminlerini sonuçlarla eşzamanlı karşılaştır
+
+    Args:
+        cities: Şehir anahtarları
+        kaydet: Başarılı karşılaştırmalar save_comparison_results ile kaydedilsin mi
+        max_workers: Eşzamanlı şehir sayısı (varsayılan: SCRAPER_CITY_CONCURRENCY)
+
+    Returns:
+        dict: {'city_results': {şehir: compare_predictions_with_results çıktısı; beklenmeyen
+               hatada {'error': ..., 'exception': True}}, ve genel toplamlar:
+               total_cities, successful_cities, total_races, total_successful_predictions,
+               overall_success_rate, sure}
+    """
+    zaman = datetime.now().isoformat()
+    baslangic = time.perf_counter()
+    sonuclar = run_cities([(city, partial(_karsilastir, city, debug, kaydet)) for city in cities],
+                          max_workers=max_workers)
+
+    city_results = {}
+    toplam_kosu = toplam_basarili = basarili_sehir = 0
+    for city, sonuc in sonuclar.items():
+        if sonuc['hata'] is not None:
+            city_results[city] = {'error': str(sonuc['hata']), 'exception': True}
+            continue
+        comparison = sonuc['sonuc']
+        city_results[city] = comparison
+        if 'error' not in comparison:
+            basarili_sehir += 1
+            toplam_kosu += comparison['total_races']
+            toplam_basarili += comparison['successful_predictions']
+
+    return {
+        'timestamp': zaman,
+        'city_results': city_results,
+        'total_cities': len(city_results),
+        'successful_cities': basarili_sehir,
+        'total_races': toplam_kosu,
+        'total_successful_predictions': toplam_basarili,
+        'overall_success_rate': (toplam_basarili / toplam_kosu * 100) if toplam_kosu > 0 else 0,
+        'sure': time.perf_counter() - baslangic,
+    }
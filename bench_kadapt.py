@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+K_ADAPT BENCHMARK'I
+data/ altındaki kaydedilmiş kartlardaki (hipodrom, pist) kombinasyonları
+üzerinde eski calculate_kadapt (her çağrıda normalizasyon + print) ile
+önceden hesaplanmış tabloyu karşılaştırır. Sonuçların birebir aynı
+olduğunu doğrular ve at başına süreyi raporlar.
+
+Kullanım:
+    python bench_kadapt.py [--data-dir data] [--tekrar 5]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+from horse_scraper import (
+    SEHIR_KATSAYILARI, SEHIR_PIST_HIZLARI,
+    calculate_kadapt, calculate_kadapt_batch
+)
+
+SEHIR_ADLARI = {
+    'istanbul': 'İstanbul', 'ankara': 'Ankara', 'izmir': 'İzmir', 'adana': 'Adana',
+    'bursa': 'Bursa', 'kocaeli': 'Kocaeli', 'sanliurfa': 'Şanlıurfa',
+    'diyarbakir': 'Diyarbakır', 'elazig': 'Elazığ'
+}
+
+
+def _eski_normalize_sehir(sehir):
+    sehir_clean = str(sehir).lower().strip()
+    sehir_clean = sehir_clean.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
+    for ad in ('istanbul', 'ankara', 'izmir', 'bursa', 'adana', 'kocaeli', 'elazig', 'diyarbakir'):
+        if ad in sehir_clean:
+            return ad
+    if 'sanliurfa' in sehir_clean or 'urfa' in sehir_clean:
+        return 'sanliurfa'
+    return 'unknown'
+
+
+def _eski_sehir_pist_key(sehir, pist):
+    if not sehir or not pist:
+        return "unknown_unknown"
+
+    def normalize_pist_simple(p):
+        p_clean = str(p).lower().strip()
+        p_clean = p_clean.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
+        if 'cim' in p_clean:
+            return 'çim'
+        elif 'kum' in p_clean and 'sentetik' not in p_clean:
+            return 'kum'
+        elif 'sentetik' in p_clean or 'sentet' in p_clean:
+            return 'sentetik'
+        return 'unknown'
+
+    return f"{_eski_normalize_sehir(sehir)}_{normalize_pist_simple(pist)}"
+
+
+def eski_calculate_kadapt(gecmis_sehir, gecmis_pist, hedef_sehir, hedef_pist):
+    """Tablo öncesi calculate_kadapt (referans)"""
+    hedef_key = _eski_sehir_pist_key(hedef_sehir, hedef_pist)
+    gecmis_key = _eski_sehir_pist_key(gecmis_sehir, gecmis_pist)
+    hedef_hiz = SEHIR_PIST_HIZLARI.get(hedef_key, None)
+    gecmis_hiz = SEHIR_PIST_HIZLARI.get(gecmis_key, None)
+
+    print(f"[KADAPT-KONTROL] {gecmis_sehir}({gecmis_pist}) -> {hedef_sehir}({hedef_pist})")
+    print(f"[KADAPT-KONTROL] Keys: {gecmis_key} -> {hedef_key}")
+    print(f"[KADAPT-KONTROL] Hızlar: {gecmis_hiz} -> {hedef_hiz}")
+    if hedef_hiz is not None and gecmis_hiz is not None:
+        pist_kadapt = gecmis_hiz / hedef_hiz
+        gecmis_sehir_katsayi = (SEHIR_KATSAYILARI.get(_eski_normalize_sehir(gecmis_sehir), 1.0)
+                                / SEHIR_KATSAYILARI.get(_eski_normalize_sehir(hedef_sehir), 1.0))
+        sehir_kadapt = gecmis_sehir_katsayi / 1.0
+        toplam_kadapt = pist_kadapt * sehir_kadapt
+        print(f"[KADAPT-KONTROL] Pist katsayı: {pist_kadapt:.3f}, Şehir katsayı: {sehir_kadapt:.3f}, TOPLAM: {toplam_kadapt:.3f}")
+        return toplam_kadapt
+
+    hedef_sehir_clean = _eski_sehir_pist_key(hedef_sehir, "").replace("_", "")
+    gecmis_sehir_clean = _eski_sehir_pist_key(gecmis_sehir, "").replace("_", "")
+    gecmis_katsayi = SEHIR_KATSAYILARI.get(gecmis_sehir_clean, 1.0) / SEHIR_KATSAYILARI.get(hedef_sehir_clean, 1.0)
+    katsayi = gecmis_katsayi / 1.0
+    print(f"[KADAPT-KONTROL] Şehir katsayıları - Geçmiş: {gecmis_katsayi:.3f}, Hedef: 1.000, Sonuç: {katsayi:.3f}")
+    return katsayi
+
+
+def kosullari_yukle(data_dizini):
+    """Kaydedilmiş kartlardan (geçmiş şehir, geçmiş pist, hedef şehir, hedef pist) listesi"""
+    kosullar = []
+    for yol in sorted(glob.glob(os.path.join(data_dizini, '*_atlari_*.json'))):
+        sehir = os.path.basename(yol).split('_atlari_')[0]
+        sehir_adi = SEHIR_ADLARI.get(sehir, sehir)
+        try:
+            with open(yol, 'r', encoding='utf-8') as f:
+                atlar = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for at in atlar:
+            kosullar.append((at.get('Son Hipodrom', sehir_adi), str(at.get('Son Pist', '')).strip(),
+                             sehir_adi, str(at.get('Bugünkü Pist', '')).strip()))
+    return kosullar
+
+
+def tum_kombinasyonlar():
+    """Hız tablosundaki tüm şehir/pist çiftleri + bilinmeyen değerler"""
+    sehirler = list(SEHIR_ADLARI.values()) + ['Veliefendi', 'Şanlıurfa Ceylanpınar', '', 'Bilinmeyen']
+    pistler = ['Çim', 'Kum', 'Sentetik', 'Çim*', 'çim', 'KUM', '', '-']
+    return [(gs, gp, hs, hp) for gs in sehirler for gp in pistler for hs in sehirler for hp in pistler]
+
+
+def olc(fonksiyon, tekrar):
+    sureler = []
+    for _ in range(tekrar):
+        baslangic = time.perf_counter()
+        fonksiyon()
+        sureler.append(time.perf_counter() - baslangic)
+    return statistics.median(sureler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='k_adapt benchmark\'ı')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--tekrar', type=int, default=5)
+    args = parser.parse_args()
+
+    kosullar = kosullari_yukle(args.data_dir)
+    kontrol = kosullar + tum_kombinasyonlar()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        eski_sonuclar = [eski_calculate_kadapt(*k) for k in kontrol]
+    yeni_sonuclar = [calculate_kadapt(*k) for k in kontrol]
+    toplu_sonuclar = calculate_kadapt_batch(kontrol)
+
+    uyusmayan = [(k, e, y) for k, e, y in zip(kontrol, eski_sonuclar, yeni_sonuclar) if e != y]
+    if toplu_sonuclar != yeni_sonuclar:
+        print("[HATA] calculate_kadapt_batch sonuçları calculate_kadapt ile aynı değil")
+        return 1
+    if uyusmayan:
+        print(f"[HATA] {len(uyusmayan)} kombinasyonda sonuç farklı:")
+        for k, e, y in uyusmayan[:20]:
+            print(f"   {k}: eski={e!r} yeni={y!r}")
+        return 1
+
+    olcum = kosullar or kontrol
+    n = len(olcum)
+
+    def eski():
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for k in olcum:
+                eski_calculate_kadapt(*k)
+
+    def yeni():
+        for k in olcum:
+            calculate_kadapt(*k)
+
+    def toplu():
+        calculate_kadapt_batch(olcum)
+
+    print(f"{n} at ({'kaydedilmiş kartlar' if kosullar else 'sentetik kombinasyonlar'}), "
+          f"{len(kontrol)} kombinasyon birebir doğrulandı\n")
+    eski_us = olc(eski, args.tekrar) / n * 1e6
+    print(f"{'Yöntem':<28}{'µs/at':>10}{'Hızlanma':>10}")
+    print(f"{'eski (normalize + print)':<28}{eski_us:>10.2f}{'1.0x':>10}")
+    for ad, fonk in (('tablo (calculate_kadapt)', yeni), ('tablo (toplu)', toplu)):
+        us = olc(fonk, args.tekrar) / n * 1e6
+        print(f"{ad:<28}{us:>10.2f}{eski_us / us:>9.1f}x")
+
+    print("\n[TAMAM] Tüm kombinasyonlarda sonuçlar birebir aynı")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
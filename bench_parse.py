@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTML AYRIŞTIRMA BENCHMARK'I
+HTTP önbelleğinde (cache/http) saklanan gerçek sayfalar üzerinde
+(önbellek boşsa test_fixtures/sayfalar altındaki örnek sayfalarla) eski yöntem (html.parser, tam belge) ile yeni yöntemi (html_parser.make_soup)
+karşılaştırır. Her sayfa için iki yöntemin ayrıştırma sonuçlarının
+birebir aynı olduğunu doğrular ve sayfa başına süreyi raporlar.
+
+Kullanım:
+    python bench_parse.py [--cache-dir cache/http] [--tekrar 5] [--limit 200]
+"""
+
+import argparse
+import gzip
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+import html_parser
+from horse_scraper import parse_race_card
+from profile_parser import parse_horse_profile
+from race_results import parse_race_result_page
+from results_scraper import parse_results_page
+
+# Önbellek boşken kullanılan örnek sayfalar (dosya adı = sayfa türü)
+ORNEK_DIZINI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_fixtures', 'sayfalar')
+
+
+def sayfa_turu(url):
+    """URL'den sayfa türünü çıkar"""
+    parsed = urlparse(url)
+    parcalar = parsed.path.strip('/').split('/')
+    if parcalar and parcalar[0] == 'at':
+        return 'profil'
+    if parcalar and parcalar[-1] == 'sonuclar':
+        return 'kosu_sonucu' if len(parcalar) > 3 or parsed.query else 'gunluk_sonuc'
+    if len(parcalar) == 2:
+        return 'kart'
+    return None
+
+
+def ornekleri_yukle(cache_dizini, limit=None):
+    """Önbellek indeksinden (url, tür, html) örneklerini oku"""
+    index_yolu = os.path.join(cache_dizini, 'index.db')
+    if not os.path.exists(index_yolu):
+        return []
+
+    conn = sqlite3.connect(index_yolu)
+    satirlar = conn.execute('SELECT url, dosya, encoding FROM yanitlar ORDER BY url').fetchall()
+    conn.close()
+
+    ornekler = []
+    for url, dosya, encoding in satirlar:
+        tur = sayfa_turu(url)
+        if not tur:
+            continue
+        try:
+            with gzip.open(os.path.join(cache_dizini, dosya), 'rb') as f:
+                icerik = f.read()
+        except OSError:
+            continue
+        ornekler.append((url, tur, icerik.decode(encoding or 'utf-8', errors='replace')))
+        if limit and len(ornekler) >= limit:
+            break
+    return ornekler
+
+
+def ornek_sayfalari_yukle(dizin=ORNEK_DIZINI):
+    """Depodaki örnek sayfaları (yol, tür, html) olarak oku"""
+    ornekler = []
+    if not os.path.isdir(dizin):
+        return ornekler
+    for ad in sorted(os.listdir(dizin)):
+        tur, uzanti = os.path.splitext(ad)
+        if uzanti != '.html':
+            continue
+        with open(os.path.join(dizin, ad), encoding='utf-8') as f:
+            ornekler.append((os.path.join(dizin, ad), tur, f.read()))
+    return ornekler
+
+
+def olc(fonksiyon, tekrar):
+    """Fonksiyonun medyan çalışma süresi (saniye)"""
+    sureler = []
+    for _ in range(tekrar):
+        baslangic = time.perf_counter()
+        fonksiyon()
+        sureler.append(time.perf_counter() - baslangic)
+    return statistics.median(sureler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML ayrıştırma benchmark\'ı')
+    parser.add_argument('--cache-dir', default=os.environ.get('HTTP_CACHE_DIR', os.path.join('cache', 'http')))
+    parser.add_argument('--tekrar', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    ornekler = ornekleri_yukle(args.cache_dir, args.limit)
+    if not ornekler:
+        ornekler = ornek_sayfalari_yukle()
+        if not ornekler:
+            print(f"[HATA] {args.cache_dir} içinde örnek sayfa yok - önce bir scraping çalıştırın")
+            return 1
+        print(f"[UYARI] {args.cache_dir} boş, depodaki örnek sayfalar kullanılıyor")
+
+    bugun = datetime.now()
+    turler = {
+        'kart': (html_parser.KART_SECICI, parse_race_card),
+        'profil': (html_parser.PROFIL_SECICI, lambda soup: parse_horse_profile(soup, bugun=bugun)),
+        'kosu_sonucu': (html_parser.SONUC_SECICI, parse_race_result_page),
+        'gunluk_sonuc': (html_parser.TABLO_SECICI, parse_results_page),
+    }
+
+    print(f"Parser: {html_parser.parser_adi()} (alt ağaç filtresi: {'var' if html_parser.STRAINER_DESTEKLI else 'yok'})")
+    print(f"{len(ornekler)} örnek sayfa, her ölçüm {args.tekrar} tekrar (medyan)\n")
+
+    ozet = {}
+    uyusmayan = []
+    for url, tur, html in ornekler:
+        secici, ayristir = turler[tur]
+
+        eski_sonuc = ayristir(BeautifulSoup(html, 'html.parser'))
+        yeni_sonuc = ayristir(html_parser.make_soup(html, secici))
+        if eski_sonuc != yeni_sonuc:
+            uyusmayan.append(url)
+
+        eski = olc(lambda: ayristir(BeautifulSoup(html, 'html.parser')), args.tekrar)
+        yeni = olc(lambda: ayristir(html_parser.make_soup(html, secici)), args.tekrar)
+
+        kayit = ozet.setdefault(tur, {'sayfa': 0, 'eski': [], 'yeni': []})
+        kayit['sayfa'] += 1
+        kayit['eski'].append(eski)
+        kayit['yeni'].append(yeni)
+
+    print(f"{'Tür':<14}{'Sayfa':>7}{'Eski ms':>11}{'Yeni ms':>11}{'Hızlanma':>10}")
+    for tur, kayit in sorted(ozet.items()):
+        eski_ms = statistics.mean(kayit['eski']) * 1000
+        yeni_ms = statistics.mean(kayit['yeni']) * 1000
+        hiz = eski_ms / yeni_ms if yeni_ms else 0
+        print(f"{tur:<14}{kayit['sayfa']:>7}{eski_ms:>11.2f}{yeni_ms:>11.2f}{hiz:>9.1f}x")
+
+    if uyusmayan:
+        print(f"\n[HATA] {len(uyusmayan)} sayfada sonuçlar farklı:")
+        for url in uyusmayan[:20]:
+            print(f"   {url}")
+        return 1
+
+    print("\n[TAMAM] Tüm sayfalarda sonuçlar birebir aynı")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
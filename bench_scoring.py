@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SKOR MOTORU BENCHMARK'I
+data/*_atlari_*.json kartlarının tamamı üzerinde Python motoru
+(_process_calculation_for_city_python) ile vektörel motoru
+(vector_scoring) karşılaştırır. Çıktı satırlarının birebir aynı
+olduğunu doğrular ve saniyede işlenen at sayısını raporlar.
+
+Kullanım:
+    python bench_scoring.py [--data-dir data] [--tekrar 20]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+from horse_scraper import _process_calculation_for_city_python
+from vector_scoring import process_calculation_vectorized, score_cards
+
+SEHIR_ADLARI = {
+    'istanbul': 'İstanbul', 'ankara': 'Ankara', 'izmir': 'İzmir', 'adana': 'Adana',
+    'bursa': 'Bursa', 'kocaeli': 'Kocaeli', 'sanliurfa': 'Şanlıurfa',
+    'diyarbakir': 'Diyarbakır', 'elazig': 'Elazığ'
+}
+
+
+def kartlari_yukle(data_dizini):
+    """[(atlar, şehir adı, dosya adı), ...]"""
+    kartlar = []
+    for yol in sorted(glob.glob(os.path.join(data_dizini, '*_atlari_*.json'))):
+        sehir = os.path.basename(yol).split('_atlari_')[0]
+        try:
+            with open(yol, 'r', encoding='utf-8') as f:
+                atlar = json.load(f)
+        except (OSError, ValueError):
+            continue
+        kartlar.append((atlar, SEHIR_ADLARI.get(sehir, sehir), os.path.basename(yol)))
+    return kartlar
+
+
+def olc(fonksiyon, tekrar):
+    """En iyi çalışma süresi (saniye) - kısa ölçümlerde medyandan daha kararlı"""
+    sureler = []
+    for _ in range(tekrar):
+        baslangic = time.perf_counter()
+        fonksiyon()
+        sureler.append(time.perf_counter() - baslangic)
+    return min(sureler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Skor motoru benchmark\'ı')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--tekrar', type=int, default=20)
+    args = parser.parse_args()
+
+    kartlar = kartlari_yukle(args.data_dir)
+    if not kartlar:
+        print(f"[HATA] {args.data_dir} içinde *_atlari_*.json dosyası yok")
+        return 1
+    at_sayisi = sum(len(atlar) for atlar, _, _ in kartlar)
+
+    # Doğrulama: her kart için iki motor aynı satırları üretmeli (sütun sırası dahil)
+    uyusmayan = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        python_sonuclari = [_process_calculation_for_city_python(atlar, sehir) for atlar, sehir, _ in kartlar]
+    for (atlar, sehir, dosya), beklenen in zip(kartlar, python_sonuclari):
+        sonuc = process_calculation_vectorized(atlar, sehir)
+        if sonuc != beklenen or [list(s) for s in sonuc] != [list(s) for s in beklenen]:
+            uyusmayan.append(dosya)
+    if score_cards([(atlar, sehir) for atlar, sehir, _ in kartlar]) != python_sonuclari:
+        uyusmayan.append('(toplu skorlama)')
+
+    def python_motoru():
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for atlar, sehir, _ in kartlar:
+                _process_calculation_for_city_python(atlar, sehir)
+
+    def vektorel_kart():
+        for atlar, sehir, _ in kartlar:
+            process_calculation_vectorized(atlar, sehir)
+
+    def vektorel_toplu():
+        score_cards([(atlar, sehir) for atlar, sehir, _ in kartlar])
+
+    print(f"{len(kartlar)} kart, {at_sayisi} at, her ölçüm {args.tekrar} tekrarın en iyisi\n")
+    python_sure = olc(python_motoru, args.tekrar)
+    print(f"{'Motor':<26}{'ms':>10}{'at/sn':>12}{'Hızlanma':>10}")
+    print(f"{'python (kart kart)':<26}{python_sure * 1000:>10.1f}{at_sayisi / python_sure:>12,.0f}{'1.0x':>10}")
+    for ad, fonksiyon in (('vektörel (kart kart)', vektorel_kart), ('vektörel (tüm kartlar)', vektorel_toplu)):
+        sure = olc(fonksiyon, args.tekrar)
+        print(f"{ad:<26}{sure * 1000:>10.1f}{at_sayisi / sure:>12,.0f}{python_sure / sure:>9.1f}x")
+
+    if uyusmayan:
+        print(f"\n[HATA] {len(uyusmayan)} kartta sonuçlar farklı:")
+        for dosya in uyusmayan[:20]:
+            print(f"   {dosya}")
+        return 1
+
+    print("\n[TAMAM] Tüm kartlarda çıktı satırları birebir aynı")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ÇOK ŞEHİRLİ PARALEL SCRAPING
+Şehir scraper fonksiyonlarını aynı anda çalıştırır. Siteye giden
+toplam istek hızı http_client'taki ortak token bucket ile sınırlıdır,
+bu yüzden şehirler arasında ayrıca bekleme yapılmaz.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from job_queue import current_job, aktif_job
+
+# Aynı anda işlenecek şehir sayısı
+SEHIR_PARALELLIGI = int(os.environ.get('SCRAPER_CITY_CONCURRENCY', '9'))
+
+
+def run_cities(city_functions, *args, max_workers=None, **kwargs):
+    """
+    Şehir fonksiyonlarını paralel çalıştırır
+
+    Args:
+        city_functions: [(anahtar, fonksiyon), ...] listesi
+        *args, **kwargs: Her fonksiyona aynen geçirilecek parametreler
+        max_workers: Eşzamanlı şehir sayısı (varsayılan: SCRAPER_CITY_CONCURRENCY)
+
+    Returns:
+        dict: anahtar -> {'sonuc': fonksiyon sonucu, 'hata': Exception | None, 'sure': saniye},
+              city_functions ile aynı sırada
+    """
+    city_functions = list(city_functions)
+    if not city_functions:
+        return {}
+
+    workers = max(1, min(len(city_functions), max_workers or SEHIR_PARALELLIGI))
+    # Arka plan işinin ilerlemesi şehir thread'lerinde de aynı işe yazılsın
+    job = current_job()
+
+    def calistir(func):
+        baslangic = time.perf_counter()
+        try:
+            with aktif_job(job):
+                sonuc = func(*args, **kwargs)
+            return {'sonuc': sonuc, 'hata': None, 'sure': time.perf_counter() - baslangic}
+        except Exception as e:
+            return {'sonuc': None, 'hata': e, 'sure': time.perf_counter() - baslangic}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sehir') as executor:
+        futures = [(anahtar, executor.submit(calistir, func)) for anahtar, func in city_functions]
+        return {anahtar: future.result() for anahtar, future in futures}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SÜTUNSAL KART DEPOSU
+Yarış kartlarını şehir ve tarihe göre bölümlenmiş Arrow IPC dosyaları
+olarak saklar:
+
+    data/columnar/city={şehir}/date={YYYYMMDD}/part-0.arrow
+
+JSON'daki alanlar aynen (string) tutulur, böylece okunan kart
+process_calculation_for_city ve karşılaştırma koduna JSON'dakiyle aynı
+girer. Yanlarında analiz için tipli sütunlar bulunur: mesafe (m) ve kilo
+(kg) sayı, dereceler saniye olarak. Çok günlü okumalarda yalnızca istenen
+şehir/tarih bölümleri açılır ve dosyalar bellek eşlemeli okunur.
+
+Hızlı yol tipli sütunlardır: scan() / load_frame() yalnızca istenen
+sütunları okur ve string ayrıştırmaya gerek bırakmaz (kadapt_calibration
+bu yolu kullanır). load_cards() ise her satırı JSON'daki string dict'lere
+geri çevirir; dict bekleyen karşılaştırma kodu (backtest, param_sweep)
+içindir ve JSON okumaktan hızlı değildir.
+Dosyalar sıkıştırılmadan yazılır: günlük kartlar küçük olduğundan
+Parquet'in açma maliyeti okuma süresine baskın geliyordu; sıkıştırmasız
+IPC sütunları kopyalamadan eşler.
+
+pyarrow opsiyoneldir; kurulu değilse yazma atlanır ve okumalar JSON'a döner.
+Mevcut JSON kartlarını taşımak için:
+    python columnar_store.py migrate
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.fs as pafs
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from horse_scraper import _clean_float, _clean_kilo, time_to_seconds
+
+DATA_DIZINI = 'data'
+COLUMNAR_DIZINI = os.environ.get('COLUMNAR_DIR', os.path.join(DATA_DIZINI, 'columnar'))
+COLUMNAR_AKTIF = os.environ.get('COLUMNAR_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+DOSYA_ADI = 'part-0.arrow'
+
+_KART_DOSYASI = re.compile(r'^(?P<city>[^_]+)_atlari_(?P<date>\d{8})\.json$')
+
+
+def _derece_saniye(deger):
+    """'1.32.43' -> 92.43; boş/geçersiz derece None"""
+    saniye = time_to_seconds(deger)
+    return saniye if saniye and saniye > 0 else None
+
+
+def _kosu_no(deger):
+    deger = str(deger).strip()
+    return int(deger) if deger.isdigit() else None
+
+
+# Tipli sütun -> (JSON alanı, dönüştürücü, arrow tipi)
+TIPLI_SUTUNLAR = (
+    ('kosu_no', 'Koşu', _kosu_no, 'int16'),
+    ('kilo_kg', 'Kilo', _clean_kilo, 'float32'),
+    ('son_kilo_kg', 'Son Kilo', _clean_kilo, 'float32'),
+    ('son_mesafe_m', 'Son Mesafe', _clean_float, 'float32'),
+    ('bugun_mesafe_m', 'Bugünkü Mesafe', _clean_float, 'float32'),
+    ('son_derece_sn', 'Son Derece', _derece_saniye, 'float64'),
+)
+TIPLI_ADLAR = frozenset(ad for ad, _, _, _ in TIPLI_SUTUNLAR)
+
+
+def card_path(city, tarih_str):
+    """Kartın Arrow dosyasının yolu"""
+    return os.path.join(COLUMNAR_DIZINI, f"city={city}", f"date={tarih_str}", DOSYA_ADI)
+
+
+def _tablo(horses):
+    """At listesinden Arrow tablosu: JSON alanları (string) + tipli sütunlar"""
+    alanlar = []
+    for horse in horses:
+        for anahtar in horse:
+            if anahtar not in alanlar:
+                alanlar.append(anahtar)
+
+    sutunlar = {}
+    for alan in alanlar:
+        # Eksik alan null olarak tutulur, okurken satıra eklenmez
+        sutunlar[alan] = pa.array([None if alan not in h else str(h[alan]) for h in horses], type=pa.string())
+    for ad, alan, donustur, tip in TIPLI_SUTUNLAR:
+        sutunlar[ad] = pa.array([donustur(h[alan]) if alan in h else None for h in horses], type=tip)
+    return pa.table(sutunlar)
+
+
+def _satirlar(tablo):
+    """Arrow tablosundan JSON'daki biçimde at listesi"""
+    alanlar = [ad for ad in tablo.column_names if ad not in TIPLI_ADLAR and ad not in ('city', 'date')]
+    sutunlar = [tablo.column(ad).to_pylist() for ad in alanlar]
+    return [{k: v for k, v in zip(alanlar, degerler) if v is not None} for degerler in zip(*sutunlar)]
+
+
+def write_card(city, tarih_str, horses):
+    """
+    Kartı Arrow IPC olarak yaz (geçici dosya + os.replace)
+
+    Returns:
+        str | None: Dosya yolu; pyarrow yoksa veya depo kapalıysa None
+    """
+    if not (PYARROW_AVAILABLE and COLUMNAR_AKTIF) or not horses:
+        return None
+
+    yol = card_path(city, tarih_str)
+    os.makedirs(os.path.dirname(yol), exist_ok=True)
+    # Nokta ile başlayan dosyalar dataset taramasında atlanır
+    gecici = os.path.join(os.path.dirname(yol), f".{DOSYA_ADI}.{os.getpid()}.tmp")
+    try:
+        feather.write_feather(_tablo(horses), gecici, compression='uncompressed')
+        os.replace(gecici, yol)
+    except BaseException:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        raise
+    return yol
+
+
+def read_card(city, tarih_str):
+    """Sütunsal karttan at listesi (yoksa None)"""
+    if not PYARROW_AVAILABLE:
+        return None
+    yol = card_path(city, tarih_str)
+    if not os.path.exists(yol):
+        return None
+    try:
+        return _satirlar(feather.read_table(yol, memory_map=True))
+    except (OSError, pa.ArrowException) as e:
+        print(f"[HATA] Sütunsal kart okunamadı ({yol}): {e}")
+        return None
+
+
+def _filtre(cities=None, start=None, end=None):
+    """Bölüm filtresi: şehir listesi ve [start, end] tarih aralığı (YYYYMMDD)"""
+    kosullar = []
+    if cities:
+        kosullar.append(ds.field('city').isin(list(cities)))
+    if start:
+        kosullar.append(ds.field('date') >= start)
+    if end:
+        kosullar.append(ds.field('date') <= end)
+    filtre = None
+    for kosul in kosullar:
+        filtre = kosul if filtre is None else filtre & kosul
+    return filtre
+
+
+def _dataset():
+    if not os.path.isdir(COLUMNAR_DIZINI):
+        return None
+    bolumleme = ds.partitioning(pa.schema([('city', pa.string()), ('date', pa.string())]), flavor='hive')
+    return ds.dataset(COLUMNAR_DIZINI, format='ipc', partitioning=bolumleme,
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def scan(cities=None, start=None, end=None, columns=None):
+    """
+    Bölümlenmiş depodan tek tablo okur; yalnızca filtreye uyan
+    şehir/tarih dosyaları açılır
+
+    Args:
+        cities: Şehir anahtarları (['istanbul', 'ankara']); None ise hepsi
+        start, end: 'YYYYMMDD' (dahil)
+        columns: Okunacak sütunlar (None ise hepsi; 'city' ve 'date' bölüm sütunlarıdır)
+
+    Returns:
+        pyarrow.Table | None: pyarrow yoksa veya depo boşsa None
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+    dataset = _dataset()
+    if dataset is None:
+        return None
+    return dataset.to_table(columns=columns, filter=_filtre(cities, start, end))
+
+
+def load_frame(cities=None, start=None, end=None, columns=None):
+    """
+    Çok günlü analiz için kartlar tek bir pandas DataFrame olarak (tipli sütunlar dahil)
+
+    Args:
+        columns: Okunacak sütunlar ('city', 'date', JSON alanları, TIPLI_SUTUNLAR adları);
+                 None ise hepsi
+
+    Returns:
+        DataFrame: Depo yoksa JSON kartlarından aynı sütunlarla kurulur
+    """
+    tablo = scan(cities, start, end, columns)
+    if tablo is not None:
+        return tablo.to_pandas()
+
+    satirlar = []
+    for (city, tarih), horses in _json_kartlari(cities, start, end).items():
+        for horse in horses:
+            satir = {'city': city, 'date': tarih, **horse}
+            for ad, alan, donustur, _ in TIPLI_SUTUNLAR:
+                satir[ad] = donustur(horse[alan]) if alan in horse else None
+            satirlar.append(satir)
+    df = pd.DataFrame(satirlar)
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df
+
+
+def _json_kartlari(cities=None, start=None, end=None, data_dizini=DATA_DIZINI):
+    """JSON kartlarından (şehir, tarih) -> at listesi (pyarrow yoksa)"""
+    kartlar = {}
+    for yol in sorted(glob.glob(os.path.join(data_dizini, '*_atlari_*.json'))):
+        eslesme = _KART_DOSYASI.match(os.path.basename(yol))
+        if not eslesme:
+            continue
+        city, tarih = eslesme.group('city'), eslesme.group('date')
+        if (cities and city not in cities) or (start and tarih < start) or (end and tarih > end):
+            continue
+        try:
+            with open(yol, 'r', encoding='utf-8') as f:
+                kartlar[(city, tarih)] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return kartlar
+
+
+def load_cards(cities=None, start=None, end=None):
+    """
+    Çok günlü karşılaştırmalar için kartlar, JSON'daki string dict'ler olarak.
+    Satırlar tek tek yeniden kurulduğu için JSON okumaktan hızlı değildir;
+    sayısal analizlerde load_frame()/scan() kullanın.
+
+    Returns:
+        dict: {(şehir, 'YYYYMMDD'): at listesi} - şehir/tarihe göre sıralı.
+        Depo yoksa JSON dosyaları okunur.
+    """
+    dataset = _dataset() if PYARROW_AVAILABLE else None
+    if dataset is None:
+        return _json_kartlari(cities, start, end)
+
+    kartlar = {}
+    for parca in dataset.get_fragments(filter=_filtre(cities, start, end)):
+        anahtarlar = ds.get_partition_keys(parca.partition_expression)
+        # Parça başına scanner kurmak yerine dosya doğrudan eşlenir
+        kartlar[(anahtarlar['city'], anahtarlar['date'])] = _satirlar(feather.read_table(parca.path, memory_map=True))
+    return dict(sorted(kartlar.items()))
+
+
+def migrate(data_dizini=DATA_DIZINI):
+    """
+    data/ altındaki JSON kartlarını sütunsal depoya taşır; her kart geri
+    okunarak JSON ile aynı olduğu doğrulanır. JSON dosyalarına dokunulmaz.
+
+    Returns:
+        tuple: (taşınan, farklı çıkan dosya listesi)
+    """
+    tasinan, farkli = 0, []
+    for (city, tarih), horses in _json_kartlari(data_dizini=data_dizini).items():
+        write_card(city, tarih, horses)
+        if read_card(city, tarih) != horses:
+            farkli.append(f"{city}_atlari_{tarih}.json")
+            continue
+        tasinan += 1
+    return tasinan, farkli
+
+
+def _boyut(dizin, desen):
+    return sum(os.path.getsize(p) for p in glob.glob(os.path.join(dizin, desen), recursive=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sütunsal kart deposu')
+    alt = parser.add_subparsers(dest='komut', required=True)
+    alt.add_parser('migrate', help='data/*_atlari_*.json kartlarını sütunsal depoya taşı')
+    bench = alt.add_parser('bench', help='Kartları JSON ve sütunsal depodan okuma süresi')
+    bench.add_argument('--city', action='append', help='Yalnızca bu şehir(ler)')
+    bench.add_argument('--start')
+    bench.add_argument('--end')
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("[HATA] pyarrow kurulu değil (pip install pyarrow)")
+        return 1
+
+    if args.komut == 'migrate':
+        tasinan, farkli = migrate()
+        print(f"[TAMAM] {tasinan} kart taşındı -> {COLUMNAR_DIZINI}")
+        print(f"   JSON: {_boyut(DATA_DIZINI, '*_atlari_*.json') / 1024:.0f} KB, "
+              f"Arrow: {_boyut(COLUMNAR_DIZINI, '**/*.arrow') / 1024:.0f} KB")
+        for dosya in farkli:
+            print(f"[HATA] Geri okunan kart JSON ile aynı değil: {dosya}")
+        return 1 if farkli else 0
+
+    baslangic = time.perf_counter()
+    json_kartlari = _json_kartlari(args.city, args.start, args.end)
+    json_sure = time.perf_counter() - baslangic
+    baslangic = time.perf_counter()
+    kartlar = load_cards(args.city, args.start, args.end)
+    arrow_sure = time.perf_counter() - baslangic
+    baslangic = time.perf_counter()
+    tablo = scan(args.city, args.start, args.end, columns=['city', 'date', 'kilo_kg', 'son_derece_sn'])
+    tarama_sure = time.perf_counter() - baslangic
+    baslangic = time.perf_counter()
+    cerceve = load_frame(args.city, args.start, args.end, columns=['city', 'date', 'kilo_kg', 'son_derece_sn'])
+    cerceve_sure = time.perf_counter() - baslangic
+
+    print(f"{len(json_kartlari)} kart (JSON), {len(kartlar)} kart (Arrow)")
+    print(f"{'JSON okuma':<28}{json_sure * 1000:>10.1f} ms")
+    print(f"{'Arrow okuma (satırlar)':<28}{arrow_sure * 1000:>10.1f} ms")
+    print(f"{'Arrow tarama (4 sütun)':<28}{tarama_sure * 1000:>10.1f} ms  ({tablo.num_rows if tablo is not None else 0} satır)")
+    print(f"{'DataFrame (4 sütun)':<28}{cerceve_sure * 1000:>10.1f} ms  ({len(cerceve)} satır)")
+    if kartlar != json_kartlari:
+        print("[HATA] Sütunsal kartlar JSON ile aynı değil (migrate çalıştırıldı mı?)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,7 +10,8 @@ import schedule
 import time
 import logging
 from datetime import datetime
-from results_scraper import compare_predictions_with_results, save_comparison_results
+from batch_comparison import SEHIRLER, compare_cities
+from kadapt_calibration import calibrate
 
 # Logging ayarları
 logging.basicConfig(
@@ -30,58 +31,44 @@ def run_midnight_comparison():
     """
     logger.info("🌙 Otomatik gece karşılaştırması başlatılıyor...")
     
-    cities = ['bursa', 'istanbul', 'ankara', 'izmir', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
+    # Tüm şehirlerin sonuç sayfaları eşzamanlı indirilip karşılaştırılır; başarılılar kaydedilir
+    toplu = compare_cities(SEHIRLER, debug=True, kaydet=True)
     
     overall_results = {
-        'timestamp': datetime.now().isoformat(),
-        'total_cities': 0,
-        'successful_cities': 0,
-        'total_races': 0,
-        'total_successful_predictions': 0,
+        'timestamp': toplu['timestamp'],
+        'total_cities': toplu['total_cities'],
+        'successful_cities': toplu['successful_cities'],
+        'total_races': toplu['total_races'],
+        'total_successful_predictions': toplu['total_successful_predictions'],
         'city_results': {}
     }
     
-    for city in cities:
-        try:
-            logger.info(f"📊 {city.upper()} sonuçları kontrol ediliyor...")
+    for city, comparison in toplu['city_results'].items():
+        if comparison.get('exception'):
+            logger.error(f"💥 {city.upper()} hatası: {comparison['error']}")
+            overall_results['city_results'][city] = {
+                'error': comparison['error'],
+                'status': 'exception'
+            }
+        elif 'error' not in comparison:
+            success_rate = comparison['success_rate']
             
-            comparison = compare_predictions_with_results(city, debug=True)
+            overall_results['city_results'][city] = {
+                'success_rate': success_rate,
+                'total_races': comparison['total_races'],
+                'successful_predictions': comparison['successful_predictions'],
+                'status': 'success'
+            }
             
-            if 'error' not in comparison:
-                overall_results['total_cities'] += 1
-                overall_results['successful_cities'] += 1
-                overall_results['total_races'] += comparison['total_races']
-                overall_results['total_successful_predictions'] += comparison['successful_predictions']
-                
-                success_rate = comparison['success_rate']
-                
-                overall_results['city_results'][city] = {
-                    'success_rate': success_rate,
-                    'total_races': comparison['total_races'],
-                    'successful_predictions': comparison['successful_predictions'],
-                    'status': 'success'
-                }
-                
-                # Sonuçları kaydet
-                save_comparison_results(city, comparison)
-                
-                logger.info(f"✅ {city.upper()}: %{success_rate:.1f} başarı ({comparison['successful_predictions']}/{comparison['total_races']})")
-                
-            else:
-                overall_results['total_cities'] += 1
-                overall_results['city_results'][city] = {
-                    'error': comparison['error'],
-                    'status': 'error'
-                }
-                logger.warning(f"❌ {city.upper()}: {comparison['error']}")
-                
-        except Exception as e:
-            logger.error(f"💥 {city.upper()} hatası: {str(e)}")
-            overall_results['total_cities'] += 1
+            logger.info(f"✅ {city.upper()}: %{success_rate:.1f} başarı ({comparison['successful_predictions']}/{comparison['total_races']})")
+        else:
             overall_results['city_results'][city] = {
-                'error': str(e),
-                'status': 'exception'
+                'error': comparison['error'],
+                'status': 'error'
             }
+            logger.warning(f"❌ {city.upper()}: {comparison['error']}")
+    
+    logger.info(f"⏱️ {toplu['total_cities']} şehir {toplu['sure']:.1f} sn'de karşılaştırıldı")
     
     # Genel başarı oranını hesapla
     if overall_results['total_races'] > 0:
@@ -113,6 +100,17 @@ def run_midnight_comparison():
     except Exception as e:
         logger.error(f"💾 Özet kayıt hatası: {str(e)}")
     
+    # Yeni kaydedilen sonuçlarla pist hızlarını yeniden kalibre et (değiştiyse tablo yeniden yüklenir)
+    try:
+        kalibrasyon = calibrate()
+        if kalibrasyon['surum']:
+            logger.info(f"🏇 Pist hızları kalibre edildi: {len(kalibrasyon['kalibre_edilen'])} şehir/pist, "
+                        f"sürüm {kalibrasyon['surum']} ({kalibrasyon['sure']:.1f} sn)")
+        else:
+            logger.info(f"🏇 Pist hızları değişmedi ({kalibrasyon['kosu_sayisi']} koşu)")
+    except Exception as e:
+        logger.error(f"🏇 Pist hızı kalibrasyon hatası: {str(e)}")
+    
     logger.info("🏁 Otomatik gece karşılaştırması tamamlandı!")
 
 def start_scheduler():
@@ -20,6 +20,7 @@ from horse_scraper import (
     get_diyarbakir_races_and_horse_last_race,
     get_elazig_races_and_horse_last_race
 )
+from city_orchestrator import run_cities
 
 # Logging konfigürasyonu
 logging.basicConfig(
@@ -57,10 +58,15 @@ class DataScheduler:
         total_count = len(self.city_functions)
         results = {}
         
+        # Şehirler paralel çekilir; siteye giden istek hızı http_client'ta ortak sınırlanır
+        logging.info(f"[ÇEKME] {total_count} şehir paralel çekiliyor...")
+        sehir_sonuclari = run_cities(self.city_functions.items())
+        
         for city, func in self.city_functions.items():
             try:
-                logging.info(f"[ÇEKME] {city.title()} verisi çekiliyor...")
-                result = func()
+                if sehir_sonuclari[city]['hata']:
+                    raise sehir_sonuclari[city]['hata']
+                result = sehir_sonuclari[city]['sonuc']
                 
                 if result and isinstance(result, dict) and result.get('success'):
                     results[city] = {'success': True, 'data': result}
@@ -88,9 +94,6 @@ class DataScheduler:
                     results[city] = {'success': False, 'error': error_msg}
                     logging.error(f"[HATA] {city.title()} verisi çekilemedi: {error_msg}")
                 
-                # Şehirler arası kısa bekleme
-                time.sleep(2)
-                
             except Exception as e:
                 results[city] = {'success': False, 'error': str(e)}
                 logging.error(f"[HATA] {city.title()} veri çekme hatası: {e}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GÜNLÜK YARIŞ KARTI DOSYALARI
+data/{şehir}_atlari_{YYYYMMDD}.json dosyalarını atomik olarak yazar/okur
+ve aynı şehir için eşzamanlı scraping isteklerini tek çekmede birleştirir.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import analysis_cache
+import artifact_catalog
+import columnar_store
+import race_warehouse
+import single_flight
+from race_entry import from_dicts
+
+DATA_DIZINI = 'data'
+
+
+def race_card_path(city, tarih=None):
+    """Şehrin günlük kart JSON dosyasının yolu"""
+    tarih_str = (tarih or datetime.now()).strftime('%Y%m%d')
+    return os.path.join(DATA_DIZINI, f"{city}_atlari_{tarih_str}.json")
+
+
+def save_race_card(city, horses, tarih=None):
+    """
+    Kartı geçici dosyaya yazıp yerine taşır; okuyanlar hiçbir zaman
+    yarım yazılmış dosya görmez
+
+    Returns:
+        str: Kaydedilen dosya yolu
+    """
+    yol = race_card_path(city, tarih)
+    os.makedirs(os.path.dirname(yol), exist_ok=True)
+
+    fd, gecici = tempfile.mkstemp(prefix=f'.{city}_', suffix='.json.tmp', dir=os.path.dirname(yol))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(horses, f, ensure_ascii=False, indent=2)
+        os.replace(gecici, yol)
+    except BaseException:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        raise
+    artifact_catalog.register(yol)
+    # Çok günlü analizler için sütunsal kopya (pyarrow yoksa atlanır)
+    try:
+        columnar_store.write_card(city, (tarih or datetime.now()).strftime('%Y%m%d'), horses)
+    except Exception as e:
+        print(f"[UYARI] {city} kartı sütunsal depoya yazılamadı: {e}")
+    try:
+        race_warehouse.write_card(city, tarih or datetime.now(), horses)
+    except Exception as e:
+        print(f"[UYARI] {city} kartı veri ambarına yazılamadı: {e}")
+    # Eski kartla hesaplanmış analiz sonuçları artık geçersiz
+    analysis_cache.invalidate_city(city, tarih)
+    return yol
+
+
+def load_race_card(city, tarih=None):
+    """Kaydedilmiş kartı oku (JSON yoksa sütunsal depodan; ikisi de yoksa None)"""
+    yol = race_card_path(city, tarih)
+    if not os.path.exists(yol):
+        return columnar_store.read_card(city, (tarih or datetime.now()).strftime('%Y%m%d'))
+    try:
+        with open(yol, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[HATA] Kaydedilmiş veri okunamadı: {e}")
+        return None
+
+
+def load_race_entries(city, tarih=None):
+    """Kaydedilmiş kartı RaceEntry listesi olarak oku (sayısal alanlar ayrıştırılmış)"""
+    horses = load_race_card(city, tarih)
+    return from_dicts(horses) if horses is not None else None
+
+
+def scrape_race_card(city, city_function, debug=False):
+    """
+    Şehrin bugünkü kartını çekip kaydeder. Aynı şehir için eşzamanlı
+    çağrılar (başka worker süreçleri dahil) tek bir çekmeyi paylaşır.
+
+    Returns:
+        list: At verileri (çekilemezse boş liste)
+    """
+    anahtar = f"scrape:{city}:{datetime.now().strftime('%Y%m%d')}"
+
+    def cek():
+        horses = city_function(debug)
+        if horses:
+            save_race_card(city, horses)
+        return horses
+
+    return single_flight.run(anahtar, cek, sonuc_oku=lambda: load_race_card(city)) or []
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ARTIMLI KART YENİLEME
+Gün içinde kart değiştiğinde (koşmaz at, jokey/kilo değişikliği, karta
+sonradan eklenen at) şehrin tamamını yeniden çekmek yerine yalnızca kart
+sayfası indirilir ve kayıtlı kartla (koşu, at ismi) bazında karşılaştırılır:
+
+  - yeni atların profilleri çekilir,
+  - karttan çıkan (koşmaz) atlar silinir,
+  - kalan atların jokey, bugünkü kilo, mesafe ve pist alanları güncellenir.
+
+Değişiklik varsa kart atomik olarak yeniden yazılır ve önbellekteki analiz
+sonucunda yalnızca etkilenen koşular yeniden hesaplanır; diğer koşuların
+satırları aynen korunur (koşular birbirinden bağımsız puanlanır).
+"""
+
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import analysis_cache
+import horse_scraper
+import single_flight
+from data_store import load_race_card, race_card_path, save_race_card
+
+# Karttan güncellenen alanlar -> parse_race_card demetindeki sıra
+KART_ALANLARI = (('Jokey', 3), ('Son Kilo', 4), ('Bugünkü Mesafe', 5), ('Bugünkü Pist', 6))
+
+# Kayıtlı kart yenileme sırasında (ör. tam scrape ile) değişirse yeniden deneme sayısı
+DENEME_SAYISI = 3
+_KART_DEGISTI = object()
+
+
+def _anahtar(kosu, at_ismi):
+    return (str(kosu), str(at_ismi))
+
+
+def kart_farki(eski_atlar, kart_atlari):
+    """
+    Kayıtlı kart ile yeni parse edilen kartı karşılaştır
+
+    Args:
+        eski_atlar: Kayıtlı kart (at dict'leri)
+        kart_atlari: parse_race_card çıktısı
+
+    Returns:
+        dict: atlar (kart sırasıyla; yeni atların yeri None), eklenenler
+              (kart_atlari demetleri), cikanlar, guncellenenler ((koşu, at) listeleri),
+              degisen_kosular (str koşu no kümesi)
+    """
+    eskiler = {_anahtar(h['Koşu'], h['At İsmi']): h for h in eski_atlar}
+    gorulen = set()
+    atlar, eklenenler, guncellenenler = [], [], []
+    degisen_kosular = set()
+
+    for satir in kart_atlari:
+        anahtar = _anahtar(satir[0], satir[1])
+        gorulen.add(anahtar)
+        eski = eskiler.get(anahtar)
+        if eski is None or eski.get('Profil Linki') != satir[2]:
+            atlar.append(None)
+            eklenenler.append(satir)
+            degisen_kosular.add(anahtar[0])
+            continue
+        yeni = dict(eski)
+        for alan, sira in KART_ALANLARI:
+            yeni[alan] = satir[sira]
+        if yeni != eski:
+            guncellenenler.append(anahtar)
+            degisen_kosular.add(anahtar[0])
+        atlar.append(yeni)
+
+    cikanlar = [anahtar for anahtar in eskiler if anahtar not in gorulen]
+    degisen_kosular.update(kosu for kosu, _ in cikanlar)
+
+    # Koşu içi sıra değiştiyse de o koşu yeniden hesaplanır
+    eski_sira = [a for a in (_anahtar(h['Koşu'], h['At İsmi']) for h in eski_atlar) if a in gorulen]
+    yeni_sira = [a for a in (_anahtar(s[0], s[1]) for s in kart_atlari) if a in eskiler]
+    for eski, yeni in zip(eski_sira, yeni_sira):
+        if eski != yeni:
+            degisen_kosular.update((eski[0], yeni[0]))
+
+    return {
+        'atlar': atlar,
+        'eklenenler': eklenenler,
+        'cikanlar': cikanlar,
+        'guncellenenler': guncellenenler,
+        'degisen_kosular': degisen_kosular,
+    }
+
+
+def _kosu_bloklari(satirlar):
+    """Analiz satırlarını koşu başlığına göre böl: {koşu no: [başlık, atlar...]}"""
+    bloklar = {}
+    kosu = None
+    for satir in satirlar:
+        baslik = str(satir.get('Koşu', ''))
+        if baslik.endswith('. Koşu'):
+            kosu = baslik[:-len('. Koşu')]
+            bloklar[kosu] = []
+        if kosu is not None:
+            bloklar[kosu].append(satir)
+    return bloklar
+
+
+def analizi_guncelle(eski_satirlar, horses, degisen_kosular, sehir_adi):
+    """
+    Eski analiz satırlarında yalnızca değişen koşuları yeniden hesapla
+
+    Returns:
+        list: Tüm kartın analiz satırları (tam hesaplamayla aynı sırada)
+    """
+    eski_bloklar = _kosu_bloklari(eski_satirlar)
+    kosular = list(dict.fromkeys(str(h['Koşu']) for h in horses))
+    hesaplanacak = [k for k in kosular if k in degisen_kosular or k not in eski_bloklar]
+
+    yeni_bloklar = {}
+    if hesaplanacak:
+        secilen = set(hesaplanacak)
+        yeni_satirlar = horse_scraper.process_calculation_for_city(
+            [h for h in horses if str(h['Koşu']) in secilen], sehir_adi) or []
+        yeni_bloklar = _kosu_bloklari(yeni_satirlar)
+
+    satirlar = []
+    for kosu in kosular:
+        satirlar.extend(yeni_bloklar.get(kosu, []) if kosu in hesaplanacak else eski_bloklar[kosu])
+    return satirlar
+
+
+def refresh_city(city, sehir_adi, debug=False, host_limit=None):
+    """
+    Şehrin bugünkü kartını artımlı olarak yenile
+
+    Args:
+        city: Şehir anahtarı / URL kodu ('istanbul')
+        sehir_adi: Şehir adı (Türkçe)
+
+    Returns:
+        dict | None: Değişiklik özeti; kayıtlı kart yoksa None
+    """
+    tarih = datetime.now()
+    anahtar = f"delta:{city}:{tarih.strftime('%Y%m%d')}"
+    return single_flight.run(anahtar, _yenile, city, sehir_adi, tarih, debug, host_limit)
+
+
+def _kart_imzasi(city, tarih):
+    try:
+        bilgi = os.stat(race_card_path(city, tarih))
+    except OSError:
+        return None
+    return (bilgi.st_mtime_ns, bilgi.st_size)
+
+
+def _yenile(city, sehir_adi, tarih, debug, host_limit):
+    # Tam scrape (scrape_race_card) kendi anahtarıyla aynı anda çalışabilir; yazdığı kart
+    # eski karttan türetilen kartla ezilmesin diye kart değiştiyse baştan denenir
+    for _ in range(DENEME_SAYISI):
+        ozet = _bir_kez_yenile(city, sehir_adi, tarih, debug, host_limit)
+        if ozet is not _KART_DEGISTI:
+            return ozet
+        print(f"[DELTA] {sehir_adi}: kayıtlı kart yenileme sırasında değişti, yeniden deneniyor")
+    raise RuntimeError(f"{sehir_adi} kartı yenileme sırasında sürekli değişti")
+
+
+def _bir_kez_yenile(city, sehir_adi, tarih, debug, host_limit):
+    imza = _kart_imzasi(city, tarih)
+    eski_atlar = load_race_card(city, tarih)
+    if not eski_atlar:
+        return None
+
+    kart_atlari = horse_scraper.fetch_race_card(sehir_adi, city, debug, dogrula=True)
+    if not kart_atlari:
+        # Sayfa alınamadı/boş geldi: kayıtlı kart silinmez
+        raise RuntimeError(f"{sehir_adi} kart sayfası alınamadı")
+
+    fark = kart_farki(eski_atlar, kart_atlari)
+    ozet = {
+        'city': sehir_adi,
+        'total_horses': len(kart_atlari),
+        'added': len(fark['eklenenler']),
+        'removed': len(fark['cikanlar']),
+        'updated': len(fark['guncellenenler']),
+        'changed_races': sorted(fark['degisen_kosular'], key=lambda k: (len(k), k)),
+        'profiles_fetched': 0,
+        'rescored_races': 0,
+        'changed': bool(fark['degisen_kosular']),
+    }
+    if not ozet['changed']:
+        print(f"[DELTA] {sehir_adi}: kart değişmemiş")
+        return ozet
+
+    # Yalnızca yeni atların profilleri çekilir
+    with horse_scraper.indirilen_profil_sayaci() as sayac:
+        yeni_atlar = iter(horse_scraper.fetch_card_horses(fark['eklenenler'], sehir_adi, debug, host_limit)
+                          if fark['eklenenler'] else [])
+    horses = [at if at is not None else next(yeni_atlar) for at in fark['atlar']]
+    ozet['profiles_fetched'] = sayac['indirilen']
+
+    # Eski kartın analiz sonucu, kart yeniden yazılınca geçersiz kılınmadan önce alınır
+    json_yolu = race_card_path(city, tarih)
+    eski_anahtar = analysis_cache.cache_key('analiz', city, json_yolu, tarih=tarih)
+    eski_sonuc = analysis_cache.get_cache().get(eski_anahtar) if eski_anahtar and analysis_cache.CACHE_AKTIF else None
+
+    if _kart_imzasi(city, tarih) != imza:
+        return _KART_DEGISTI
+    save_race_card(city, horses, tarih)
+
+    if eski_sonuc:
+        satirlar = analizi_guncelle(eski_sonuc['satirlar'], horses, fark['degisen_kosular'], sehir_adi)
+        yeni_anahtar = analysis_cache.cache_key('analiz', city, json_yolu, tarih=tarih)
+        if satirlar and yeni_anahtar:
+            try:
+                analysis_cache.get_cache().put(
+                    yeni_anahtar, {'satirlar': satirlar, 'csv': pd.DataFrame(satirlar).to_csv(index=False)})
+            except (OSError, TypeError, ValueError) as e:
+                print(f"[CACHE HATA] Analiz sonucu kaydedilemedi ({city}): {e}")
+        ozet['rescored_races'] = len(set(fark['degisen_kosular']) & {str(h['Koşu']) for h in horses})
+
+    print(f"[DELTA] {sehir_adi}: +{ozet['added']} at, -{ozet['removed']} at, "
+          f"{ozet['updated']} güncelleme, değişen koşular: {', '.join(ozet['changed_races'])}")
+    return ozet
@@ -6,8 +6,11 @@ GELİŞTİRİLMİŞ HESAPLAMA SİSTEMİ - KAZANAN ÇIKTI DAHİL
 Bu sistem tüm hesaplamaları yapar + her atın önceki koşu kazananını da ekler
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import artifact_catalog
+from html_parser import make_soup, PROFIL_SECICI
+from profile_parser import get_horse_profile
+import race_results
 from datetime import datetime
 import pandas as pd
 import time
@@ -75,9 +78,9 @@ def get_horse_last_race(profil_linki, at_ismi, debug=False):
     try:
         time.sleep(0.3)
         at_url = f"https://yenibeygir.com{profil_linki}"
-        at_resp = requests.get(at_url)
+        at_resp = http_client.get_cached(at_url)
         at_resp.raise_for_status()
-        at_soup = BeautifulSoup(at_resp.text, 'html.parser')
+        at_soup = make_soup(at_resp.text, PROFIL_SECICI)
         
         bugun = datetime.now()
         bugun_tarih = bugun.date()
@@ -155,32 +158,10 @@ def get_onceki_kosu_url(profil_url, bugun_tarih_str):
     Atın profilinden önceki koşu URL'sini çıkarır
     """
     try:
-        time.sleep(0.5)
-        response = requests.get(profil_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # at_Yarislar tablosunu bul
-        at_yarislar_table = None
-        for table in soup.find_all('table'):
-            if 'at_Yarislar' in str(table.get('id', '')):
-                at_yarislar_table = table
-                break
-        
-        if not at_yarislar_table:
-            return None
-        
-        # Tüm linkleri bul
-        links = at_yarislar_table.find_all('a', href=True)
-        
-        for link in links:
-            href = link.get('href', '')
-            if '/sonuclar?' in href:
-                # Bugünün tarihini kontrol et - bugünkü koşuyu atla
-                if bugun_tarih_str not in href:
-                    full_url = f"https://yenibeygir.com{href}"
-                    return full_url
-        
+        # Profil ortak ayrıştırıcıdan gelir; aynı gün içinde tekrar indirilmez
+        onceki_kosu_url = get_horse_profile(profil_url)['son_kosu_url']
+        if onceki_kosu_url and bugun_tarih_str not in onceki_kosu_url:
+            return onceki_kosu_url
         return None
         
     except Exception as e:
@@ -192,37 +173,12 @@ def get_onceki_kosu_birincisi(sonuc_url):
     Yarış sonuç sayfasından birinci atı çıkarır
     """
     try:
-        time.sleep(0.5)
-        response = requests.get(sonuc_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # kosanAtlar tablosunu bul
-        kosan_atlar_table = None
-        for table in soup.find_all('table'):
-            if 'kosanAtlar' in str(table.get('id', '')):
-                kosan_atlar_table = table
-                break
-        
-        if not kosan_atlar_table:
-            return None, None, None
-        
-        # İlk satırı bul (birinci)
-        tbody = kosan_atlar_table.find('tbody')
-        if tbody:
-            first_row = tbody.find('tr')
-            if first_row:
-                cells = first_row.find_all('td')
-                if len(cells) >= 3:
-                    birinci_isim = cells[1].get_text(strip=True)  # At ismi
-                    birinci_derece = cells[2].get_text(strip=True)  # Derece
-                    
-                    # Ganyan değerini bul (genelde son sütunlarda)
-                    ganyan = ""
-                    if len(cells) > 10:
-                        ganyan = cells[-1].get_text(strip=True)
-                    
-                    return birinci_isim, birinci_derece, ganyan
+        if not race_results.onbellekte_mi(sonuc_url):
+            time.sleep(0.5)
+        sonuc = race_results.get_race_result(sonuc_url)
+        birinci = race_results.kazanan(sonuc)
+        if birinci:
+            return birinci['at_ismi'], birinci['derece'], birinci['ganyan']
         
         return None, None, None
         
@@ -258,10 +214,8 @@ def get_kazanan_cikti(at_id, profil_linki, bugun_tarih):
 
 class GelismisHesaplayici:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Tüm modüller tek havuzlu oturumu paylaşır
+        self.session = http_client.get_session()
     
     def process_json_file(self, json_file_path):
         """
@@ -437,6 +391,7 @@ class GelismisHesaplayici:
                     writer.writeheader()
                     writer.writerows(results)
             
+            artifact_catalog.register(filepath)
             logger.info(f"CSV kaydedildi: {filepath}")
             return str(filepath)
             
@@ -17,43 +17,23 @@ import json
 import re
 from urllib.parse import urljoin, urlparse
 import ssl
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import threading
+from contextlib import contextmanager
+from async_fetcher import fetch_all
+from city_orchestrator import run_cities
+import http_client
+from html_parser import make_soup, KART_SECICI
+from profile_parser import normalize_weight, get_horse_profile, cached_horse_profile, remember_profile
+from race_results import get_race_result, kazanan as race_kazanan, at_sonucu as race_at_sonucu
+from job_queue import KartIlerlemesi
+import artifact_catalog
+import profile_store
+import race_warehouse
 
 # Güvenli HTTP oturumu
 def create_secure_session():
-    """Güvenli HTTP oturumu oluştur"""
-    session = requests.Session()
-    
-    # SSL doğrulama aktif
-    session.verify = True
-    
-    # User-Agent güvenliği
-    session.headers.update({
-        'User-Agent': 'At-Yarisi-Analiz-Bot/1.0',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'tr-TR,tr;q=0.8,en-US;q=0.5,en;q=0.3',
-        'Accept-Encoding': 'gzip, deflate',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    })
-    
-    # Retry stratejisi
-    retry_strategy = Retry(
-        total=3,
-        status_forcelist=[429, 500, 502, 503, 504],
-        method_whitelist=["HEAD", "GET", "OPTIONS"],
-        backoff_factor=1
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    
-    # Timeout ayarları
-    session.timeout = 30
-    
-    return session
+    """Güvenli HTTP oturumu - süreç genelinde paylaşılan havuzlu oturumu döndürür"""
+    return http_client.get_session()
 
 def validate_url(url, allowed_domains=['www.yenibeygir.com']):
     """URL güvenlik validasyonu"""
@@ -94,184 +74,34 @@ def sanitize_html_content(content):
             
     return str(soup)
 
-def normalize_weight(weight_str):
-    """
-    Kilo değerlerini normalize eder
-    "50+2,0" -> "52.0"
-    "57+0,1" -> "57.1"  
-    "52,5" -> "52.5"
-    57 -> "57"
-    """
-    if not weight_str or str(weight_str).strip() == '':
-        return ''
-    
-    weight_str = str(weight_str).strip()
-    
-    # "50+2,0" formatını işle
-    if '+' in weight_str:
-        try:
-            parts = weight_str.replace(',', '.').split('+')
-            result = sum(float(p) for p in parts if p.strip())
-            if result == int(result):
-                return str(int(result))
-            else:
-                return str(round(result, 1))
-        except Exception:
-            return weight_str.replace(',', '.')
-    
-    # "52,5" formatını işle (virgülü noktaya çevir)
-    if ',' in weight_str:
-        try:
-            result = float(weight_str.replace(',', '.'))
-            if result == int(result):
-                return str(int(result))
-            else:
-                return str(round(result, 1))
-        except Exception:
-            return weight_str
-    
-    # Zaten normal format
-    try:
-        result = float(weight_str)
-        if result == int(result):
-            return str(int(result))
-        else:
-            return str(round(result, 1))
-    except:
-        return weight_str
-
 def get_horse_last_race(profil_linki, at_ismi, debug=False):
     """
     Atın son koşu verilerini geliştirilmiş algoritmla çeker
     Bugünkü koşuyu göz ardı eder ve gerçek son koşuyu bulur
     """
+    time.sleep(0.3)  # Rate limiting (tekil çağrılar için)
+    return _fetch_horse_last_race(profil_linki, at_ismi, debug)
+
+def _fetch_horse_last_race(profil_linki, at_ismi, debug=False):
+    """get_horse_last_race'in bekleme yapmayan hali - eşzamanlı motor tarafından kullanılır"""
     mesafe_onceki = pist_onceki = derece = kilo_onceki = son_hipodrom = ''
     
     try:
-        time.sleep(0.3)  # Rate limiting
-        at_url = f"https://yenibeygir.com{profil_linki}"
-        at_resp = requests.get(at_url)
-        at_resp.raise_for_status()
-        at_soup = BeautifulSoup(at_resp.text, 'html.parser')
-        
-        bugun = datetime.now()
-        bugun_tarih = bugun.date()
+        profil = get_horse_profile(profil_linki)
+        son_kosu = profil['son_kosu']
         
         if debug:
-            print(f"    [ANALIZ] {at_ismi} analiz ediliyor... (Bugun: {bugun_tarih.strftime('%d.%m.%Y')})")
+            print(f"    [ANALIZ] {at_ismi} analiz ediliyor... (Bugun: {datetime.now().strftime('%d.%m.%Y')})")
+            print(f"      [LISTE] {len(profil['gecmis'])} kosu bulundu")
         
-        # Tüm koşu satırlarını bul
-        all_trs = at_soup.find_all('tr')
-        tr_list = []
-        
-        for tr2 in all_trs:
-            cells = tr2.find_all('td')
-            if len(cells) > 0:
-                first_cell_text = cells[0].get_text(strip=True)
-                tarih_link = cells[0].find('a')
-                
-                tarih_text = None
-                if tarih_link:
-                    link_text = tarih_link.get_text(strip=True)
-                    if '.' in link_text and len(link_text.split('.')) == 3:
-                        tarih_text = link_text
-                elif '.' in first_cell_text and len(first_cell_text.split('.')) == 3:
-                    tarih_text = first_cell_text
-                
-                if tarih_text:
-                    try:
-                        date_parts = tarih_text.split('.')
-                        if len(date_parts[0]) <= 2 and len(date_parts[1]) <= 2 and len(date_parts[2]) == 4:
-                            tr_list.append((tarih_text, tr2))
-                    except:
-                        pass
-        
-        # Tarihe göre sırala (en yeni ilk)
-        tr_list_sorted = []
-        for tarih_text, tr_item in tr_list:
-            try:
-                tarih_dt = datetime.strptime(tarih_text, '%d.%m.%Y')
-                tr_list_sorted.append((tarih_dt, tr_item))
-            except:
-                pass
-        
-        tr_list_sorted.sort(reverse=True, key=lambda x: x[0])
-        
-        if debug and tr_list_sorted:
-            print(f"      [LISTE] {len(tr_list_sorted)} kosu bulundu")
-        
-        # En uygun koşuyu bul - SIKI KONTROLLER
-        veri_tr = None
-        for i, (tarih_dt, tr_item) in enumerate(tr_list_sorted):
-            tds = tr_item.find_all('td')
-            if len(tds) > 6:
-                derece_val = tds[6].get_text(strip=True)
-                kosu_tarih = tarih_dt.date()
-                
-                if debug:
-                    durum = "BUGUN" if kosu_tarih == bugun_tarih else "GECMIS" if kosu_tarih < bugun_tarih else "GELECEK"
-                    print(f"      {i+1}. {tarih_dt.strftime('%d.%m.%Y')} - Derece: '{derece_val}' - {durum}")
-                
-                # SIKI KONTROLLER
-                if kosu_tarih < bugun_tarih:  # Sadece geçmiş koşular
-                    if derece_val and derece_val.strip():  # Derece var mı?
-                        # Geçersiz durumları filtrele
-                        gecersiz_durumlar = ['koşmaz', 'çekildi', 'düştü', 'diskalifiye', 'dns', 'dnf']
-                        if derece_val.lower() not in gecersiz_durumlar:
-                            # Derece formatı kontrolü
-                            try:
-                                # Derece bir zaman formatında olmalı (1.32.91) veya sayısal
-                                if ('.' in derece_val and len(derece_val.replace('.', '')) >= 3) or derece_val.replace('.', '').isdigit():
-                                    if debug:
-                                        print(f"      [TAMAM] KOŞU SEÇİLDİ: {tarih_dt.strftime('%d.%m.%Y')} - Derece: {derece_val}")
-                                    veri_tr = tr_item
-                                    break
-                                else:
-                                    if debug:
-                                        print(f"      [HATA] Geçersiz derece formatı: '{derece_val}'")
-                            except:
-                                if debug:
-                                    print(f"      [HATA] Derece parse hatası: '{derece_val}'")
-                        else:
-                            if debug:
-                                print(f"      [HATA] Geçersiz durum: '{derece_val}'")
-                    else:
-                        if debug:
-                            print(f"      [HATA] Derece bilgisi yok")
-                elif kosu_tarih == bugun_tarih:
-                    if debug:
-                        print(f"      [UYARI] Bugünkü koşu atlandı")
-                else:
-                    if debug:
-                        print(f"      [UYARI] Gelecek tarihli koşu atlandı")
-        
-        if veri_tr:
-            tds = veri_tr.find_all('td')
-            
-            # Hipodrom bilgisi
-            if len(tds) > 1:
-                son_hipodrom = tds[1].get_text(strip=True)
-            
-            # Pist ve mesafe bilgisi
-            pist_span = (
-                veri_tr.find('span', class_='kumpist') or
-                veri_tr.find('span', class_='cimpist') or
-                veri_tr.find('span', class_='sentetikpist')
-            )
-            if pist_span:
-                mesafe_onceki = pist_span.get('data-mesafe', '').strip()
-                pist_onceki = pist_span.get('data-pist', '').strip()
-            
-            # Derece bilgisi
-            if len(tds) > 6:
-                derece = tds[6].get_text(strip=True)
-            
-            # Kilo bilgisi
-            if len(tds) > 10:
-                kilo_span = tds[10].find('span')
-                if kilo_span:
-                    kilo_onceki_raw = kilo_span.get_text(strip=True)
-                    kilo_onceki = normalize_weight(kilo_onceki_raw)
+        if son_kosu.get('tarih'):
+            mesafe_onceki = son_kosu['mesafe']
+            pist_onceki = son_kosu['pist']
+            derece = son_kosu['derece']
+            kilo_onceki = son_kosu['kilo']
+            son_hipodrom = son_kosu['hipodrom']
+            if debug:
+                print(f"      [TAMAM] KOŞU SEÇİLDİ: {son_kosu['tarih'].strftime('%d.%m.%Y')} - Derece: {derece}")
         else:
             if debug:
                 print(f"      [HATA] {at_ismi} için uygun son koşu bulunamadı")
@@ -282,34 +112,15 @@ def get_horse_last_race(profil_linki, at_ismi, debug=False):
     
     return mesafe_onceki, pist_onceki, derece, kilo_onceki, son_hipodrom
 
-def get_city_races_unified(sehir_adi, url_suffix, debug=False):
+def parse_race_card(html, debug=False):
     """
-    Tüm şehirler için birleşik at verisi çekme fonksiyonu
-    
-    Args:
-        sehir_adi: Şehir adı (Türkçe)
-        url_suffix: URL'de kullanılacak şehir kodu
-        debug: Debug bilgilerini göster
+    Yarış kartı sayfasını ayrıştırır
     
     Returns:
-        list: At bilgileri listesi
+        list: (kosu_no, at_ismi, profil_linki, jokey, kilo, mesafe, pist) demetleri, sayfa sırasıyla
     """
-    bugun = datetime.now()
-    tarih_str = bugun.strftime('%d-%m-%Y')
-    url = f"https://yenibeygir.com/{tarih_str}/{url_suffix}"
-    
-    if debug:
-        print(f"[DEBUG] {sehir_adi} at verileri cekiliyor: {url}")
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"[HATA] {sehir_adi} sayfasina erisilemedi: {e}")
-        return []
-        
-    soup = BeautifulSoup(response.text, 'html.parser')
-    horses = []
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, KART_SECICI)
+    kart_atlari = []
     
     for yaris_header in soup.find_all('div', class_='yarisHeader'):
         # Koşu numarası
@@ -365,31 +176,163 @@ def get_city_races_unified(sehir_adi, url_suffix, debug=False):
                     kilo_raw = kilo_td.get_text(strip=True)
                     kilo = normalize_weight(kilo_raw)
                 
-                # Son koşu verilerini geliştirilmiş fonksiyonla çek
-                mesafe_onceki, pist_onceki, derece, kilo_onceki, son_hipodrom = get_horse_last_race(
-                    profil_linki, at_ismi, debug
-                )
-                
-                horses.append({
-                    'Koşu': kosu_no,
-                    'At İsmi': at_ismi,
-                    'Profil Linki': profil_linki,
-                    'Jokey': jokey,
-                    'Son Kilo': kilo,
-                    'Son Mesafe': mesafe_onceki,
-                    'Son Pist': pist_onceki,
-                    'Son Derece': derece,
-                    'Kilo': kilo_onceki,
-                    'Bugünkü Mesafe': mesafe,
-                    'Bugünkü Pist': pist,
-                    'Şehir': sehir_adi,
-                    'Son Hipodrom': son_hipodrom
-                })
+                kart_atlari.append((kosu_no, at_ismi, profil_linki, jokey, kilo, mesafe, pist))
+    
+    return kart_atlari
+
+def fetch_race_card(sehir_adi, url_suffix, debug=False, dogrula=False):
+    """
+    Şehrin bugünkü yarış kartı sayfasını indirip parse eder
+
+    Args:
+        dogrula: True ise önbellekteki taze kart da sunucuya sorulur (ETag)
+
+    Returns:
+        list | None: parse_race_card çıktısı; sayfa alınamazsa None
+    """
+    tarih_str = datetime.now().strftime('%d-%m-%Y')
+    url = f"https://yenibeygir.com/{tarih_str}/{url_suffix}"
+    
+    if debug:
+        print(f"[DEBUG] {sehir_adi} at verileri cekiliyor: {url}")
+    
+    try:
+        response = http_client.get_cached(url, dogrula=dogrula)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"[HATA] {sehir_adi} sayfasina erisilemedi: {e}")
+        return None
+        
+    return parse_race_card(response.text, debug)
+
+# indirilen_profil_sayaci bloğundaki iş parçacığının sayacı
+_profil_sayaci = threading.local()
+
+@contextmanager
+def indirilen_profil_sayaci():
+    """
+    Blok içinde bu iş parçacığında siteden indirilen profil sayısını toplar
+    (depodan gelenler sayılmaz). Kart çekimi dönüş değeri at listesi olduğundan
+    sayı bu sözlükten okunur: {'indirilen': int}
+    """
+    onceki = getattr(_profil_sayaci, 'sayac', None)
+    sayac = _profil_sayaci.sayac = {'indirilen': 0}
+    try:
+        yield sayac
+    finally:
+        _profil_sayaci.sayac = onceki
+
+def fetch_card_horses(kart_atlari, sehir_adi, debug=False, host_limit=None):
+    """
+    Kart satırları için at profillerini eşzamanlı çekip at listesini oluşturur
+
+    Args:
+        kart_atlari: parse_race_card çıktısı (veya bir alt kümesi)
+
+    Returns:
+        list: At bilgileri listesi (kart sırasıyla)
+    """
+    bugun = datetime.now()
+    
+    # Son koşu verilerini tüm kart için eşzamanlı çek
+    profil_isimleri = {}
+    for kosu_no, at_ismi, profil_linki, _, _, _, _ in kart_atlari:
+        profil_isimleri[f"https://yenibeygir.com{profil_linki}"] = (profil_linki, at_ismi, kosu_no)
+    
+    # Arka plan işinde çalışıyorsa biten koşu/at sayısını işe yaz
+    ilerleme = KartIlerlemesi(at[0] for at in kart_atlari)
+    
+    # Son profilden beri yeni koşusu olamayacak atların profilleri depodan gelir
+    profil_linkleri = list(dict.fromkeys(at[2] for at in kart_atlari))
+    saklanan = profile_store.load_fresh(profil_linkleri, bugun.date())
+    for profil_linki, profil in saklanan.items():
+        remember_profile(profil_linki, profil)
+    
+    def profil_cek(at_url):
+        profil_linki, at_ismi, kosu_no = profil_isimleri[at_url]
+        try:
+            return _fetch_horse_last_race(profil_linki, at_ismi, debug)
+        finally:
+            ilerleme.at_bitti(kosu_no)
+    
+    bos_sonuc = ('', '', '', '', '')
+    son_kosular = fetch_all(
+        [f"https://yenibeygir.com{at[2]}" for at in kart_atlari],
+        profil_cek,
+        host_limit=host_limit,
+        hata_degeri=bos_sonuc
+    )
+    
+    # İndirilen profiller depoya, koşu geçmişleri ambara tek transaction'da yazılır
+    # İndirilemeyen profiller (None) indirilmiş sayılmaz
+    indirilen = {}
+    for link in profil_linkleri:
+        if link not in saklanan:
+            profil = cached_horse_profile(link)
+            if profil is not None:
+                indirilen[link] = profil
+    alinamayan = len(profil_linkleri) - len(saklanan) - len(indirilen)
+    profile_store.save_many(indirilen, bugun.date())
+    race_warehouse.write_profiles(indirilen)
+    
+    ilerleme.profiller(len(saklanan), len(indirilen))
+    sayac = getattr(_profil_sayaci, 'sayac', None)
+    if sayac is not None:
+        sayac['indirilen'] += len(indirilen)
+    if profil_linkleri:
+        print(f"[PROFIL] {sehir_adi}: {len(profil_linkleri)} profil, {len(saklanan)} depodan, "
+              f"{len(indirilen)} indirildi" + (f", {alinamayan} alınamadı" if alinamayan else "")
+              + f" (%{len(saklanan) / len(profil_linkleri) * 100:.0f} atlandı)")
+    
+    horses = []
+    for (kosu_no, at_ismi, profil_linki, jokey, kilo, mesafe, pist), son_kosu in zip(kart_atlari, son_kosular):
+        mesafe_onceki, pist_onceki, derece, kilo_onceki, son_hipodrom = son_kosu or bos_sonuc
+        
+        horses.append({
+            'Koşu': kosu_no,
+            'At İsmi': at_ismi,
+            'Profil Linki': profil_linki,
+            'Jokey': jokey,
+            'Son Kilo': kilo,
+            'Son Mesafe': mesafe_onceki,
+            'Son Pist': pist_onceki,
+            'Son Derece': derece,
+            'Kilo': kilo_onceki,
+            'Bugünkü Mesafe': mesafe,
+            'Bugünkü Pist': pist,
+            'Şehir': sehir_adi,
+            'Son Hipodrom': son_hipodrom
+        })
+    
+    return horses
+
+def get_city_races_unified(sehir_adi, url_suffix, debug=False, host_limit=None):
+    """
+    Tüm şehirler için birleşik at verisi çekme fonksiyonu
+    
+    Önce yarış kartı parse edilir, ardından tüm at profilleri
+    async_fetcher ile eşzamanlı indirilir.
+    
+    Args:
+        sehir_adi: Şehir adı (Türkçe)
+        url_suffix: URL'de kullanılacak şehir kodu
+        debug: Debug bilgilerini göster
+        host_limit: Host başına eşzamanlı profil isteği limiti
+    
+    Returns:
+        list: At bilgileri listesi
+    """
+    kart_atlari = fetch_race_card(sehir_adi, url_suffix, debug)
+    if kart_atlari is None:
+        return []
+    
+    horses = fetch_card_horses(kart_atlari, sehir_adi, debug, host_limit)
     
     if debug:
         basarili = sum(1 for h in horses if h['Son Derece'])
         oran = (basarili / len(horses) * 100) if horses else 0
         print(f"[TAMAM] {sehir_adi} - {len(horses)} at, {basarili} başarılı (%{oran:.1f})")
+        http_client.print_stats()
     
     return horses
 
@@ -444,9 +387,14 @@ def get_all_cities_data(debug=False):
     all_horses = []
     city_stats = {}
     
-    for city_name, city_func in city_functions:
+    # Şehirler paralel çekilir; istek hızı http_client'ta ortak sınırlanır
+    sonuclar = run_cities(city_functions, debug)
+    
+    for city_name, _ in city_functions:
         try:
-            horses = city_func(debug)
+            if sonuclar[city_name]['hata']:
+                raise sonuclar[city_name]['hata']
+            horses = sonuclar[city_name]['sonuc']
             all_horses.extend(horses)
             
             basarili = sum(1 for h in horses if h['Son Derece'])
@@ -472,6 +420,7 @@ def get_all_cities_data(debug=False):
     print(f"   Toplam at: {toplam_at}")
     print(f"   Başarılı: {toplam_basarili}")
     print(f"   Genel başarı oranı: %{genel_oran:.1f}")
+    http_client.print_stats("   HTTP:")
     
     return all_horses, city_stats
 
@@ -494,10 +443,14 @@ def create_all_csv_files(debug=False):
         ("Elazığ", "elazig_atlari_yeni.csv", get_elazig_races_and_horse_last_race)
     ]
     
+    sonuclar = run_cities([(city_name, city_func) for city_name, _, city_func in city_functions], debug)
+    
     for city_name, filename, city_func in city_functions:
         try:
             print(f"\n[AT] {city_name} işleniyor...")
-            horses = city_func(debug)
+            if sonuclar[city_name]['hata']:
+                raise sonuclar[city_name]['hata']
+            horses = sonuclar[city_name]['sonuc']
             
             if horses:
                 df = pd.DataFrame(horses)
@@ -616,54 +569,63 @@ def pist_to_int(pist):
         return 3
     return 0
 
+def _turkce_sadelestir(metin):
+    metin = str(metin).lower().strip()
+    return metin.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
+
+def _normalize_sehir(s):
+    """Hipodrom/şehir adını katsayı tablolarındaki şehir anahtarına çevir"""
+    s_clean = _turkce_sadelestir(s)
+    if 'istanbul' in s_clean:
+        return 'istanbul'
+    elif 'ankara' in s_clean:
+        return 'ankara'
+    elif 'izmir' in s_clean:
+        return 'izmir'
+    elif 'bursa' in s_clean:
+        return 'bursa'
+    elif 'adana' in s_clean:
+        return 'adana'
+    elif 'kocaeli' in s_clean:
+        return 'kocaeli'
+    elif 'elazig' in s_clean:
+        return 'elazig'
+    elif 'diyarbakir' in s_clean:
+        return 'diyarbakir'
+    elif 'sanliurfa' in s_clean or 'urfa' in s_clean:
+        return 'sanliurfa'
+    return 'unknown'
+
+def _normalize_pist(p):
+    """Pist adını çim/kum/sentetik anahtarına çevir"""
+    p_clean = _turkce_sadelestir(p)
+    if 'cim' in p_clean:
+        return 'çim'
+    elif 'kum' in p_clean and 'sentetik' not in p_clean:
+        return 'kum'
+    elif 'sentetik' in p_clean or 'sentet' in p_clean:
+        return 'sentetik'
+    return 'unknown'
+
+# Ham (hipodrom, pist) string'i -> şehir_pist anahtarı; aynı string'ler bir kez normalize edilir
+_SEHIR_PIST_ANAHTARLARI = {}
+
 def get_sehir_pist_key(sehir, pist):
     """Şehir ve pist türünden anahtar oluştur"""
     if not sehir or not pist:
         return "unknown_unknown"
     
-    # Şehir normalleştirme - basitleştirilmiş
-    def normalize_sehir_simple(s):
-        s_clean = str(s).lower().strip()
-        s_clean = s_clean.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
-        if 'istanbul' in s_clean:
-            return 'istanbul'
-        elif 'ankara' in s_clean:
-            return 'ankara'
-        elif 'izmir' in s_clean:
-            return 'izmir'
-        elif 'bursa' in s_clean:
-            return 'bursa'
-        elif 'adana' in s_clean:
-            return 'adana'
-        elif 'kocaeli' in s_clean:
-            return 'kocaeli'
-        elif 'elazig' in s_clean:
-            return 'elazig'
-        elif 'diyarbakir' in s_clean:
-            return 'diyarbakir'
-        elif 'sanliurfa' in s_clean or 'urfa' in s_clean:
-            return 'sanliurfa'
-        return 'unknown'
-    
-    # Pist normalleştirme - basitleştirilmiş
-    def normalize_pist_simple(p):
-        p_clean = str(p).lower().strip()
-        p_clean = p_clean.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
-        if 'cim' in p_clean:
-            return 'çim'
-        elif 'kum' in p_clean and 'sentetik' not in p_clean:
-            return 'kum'
-        elif 'sentetik' in p_clean or 'sentet' in p_clean:
-            return 'sentetik'
-        return 'unknown'
-    
-    sehir_clean = normalize_sehir_simple(sehir)
-    pist_clean = normalize_pist_simple(pist)
-    
-    return f"{sehir_clean}_{pist_clean}"
+    try:
+        return _SEHIR_PIST_ANAHTARLARI[(sehir, pist)]
+    except KeyError:
+        anahtar = f"{_normalize_sehir(sehir)}_{_normalize_pist(pist)}"
+        _SEHIR_PIST_ANAHTARLARI[(sehir, pist)] = anahtar
+        return anahtar
+    except TypeError:
+        return f"{_normalize_sehir(sehir)}_{_normalize_pist(pist)}"
 
-# Şehir + Pist kombinasyonları için ortalama hızlar (m/s)
-SEHIR_PIST_HIZLARI = {
+# Şehir + Pist kombinasyonları için ortalama hızlar (m/s) - kalibrasyon dosyası yoksa kullanılır
+VARSAYILAN_SEHIR_PIST_HIZLARI = {
     'adana_kum': 14.7505,
     'adana_çim': 15.7531,
     'adana_sentetik': 15.2500,  # Eklendi
@@ -693,79 +655,159 @@ SEHIR_PIST_HIZLARI = {
     'sanliurfa_sentetik': 14.4300  # Eklendi
 }
 
+# Mesafe farkı başına 100m süre düzeltmesi (uzun / kısa mesafe) ve kilo farkı katsayısı.
+# Python motoru, vector_scoring ve scoring_pipeline bunları skor_faktorleri() ile okur.
+VARSAYILAN_SKOR_FAKTORLERI = {'uzun_mesafe': 0.04, 'kisa_mesafe': -0.03, 'kilo': 0.02}
+
+# Kalibrasyon dosyası; değiştiğinde tablo yeniden yüklenir. Pist hızlarını kadapt_calibration.py,
+# şehir katsayıları ve skor faktörleriyle birlikte tüm seti param_sweep.py --uygula yazar.
+KADAPT_KATSAYI_DOSYASI = os.environ.get('KADAPT_COEFFICIENTS', os.path.join('data', 'kadapt', 'sehir_pist_hizlari.json'))
+KADAPT_KONTROL_ARALIGI = float(os.environ.get('KADAPT_RELOAD_SECONDS', '30'))
+
+def _kadapt_tablosu_olustur(hizlar=None, sehir_katsayilari=None):
+    """
+    Tüm (geçmiş şehir_pist, hedef şehir_pist) çiftleri için k_adapt değerleri.
+    Hedef şehir referans (1.0): pist hız oranı × şehir katsayısı oranı.
+    Tabloda olmayan çiftler (hız bilinmiyor) için katsayı 1.0'dır.
+    """
+    hizlar = SEHIR_PIST_HIZLARI if hizlar is None else hizlar
+    sehir_katsayilari = SEHIR_KATSAYILARI if sehir_katsayilari is None else sehir_katsayilari
+    tablo = {}
+    for gecmis_key, gecmis_hiz in hizlar.items():
+        gecmis_sehir = gecmis_key.rsplit('_', 1)[0]
+        for hedef_key, hedef_hiz in hizlar.items():
+            hedef_sehir = hedef_key.rsplit('_', 1)[0]
+            pist_kadapt = gecmis_hiz / hedef_hiz
+            sehir_kadapt = sehir_katsayilari.get(gecmis_sehir, 1.0) / sehir_katsayilari.get(hedef_sehir, 1.0)
+            tablo[(gecmis_key, hedef_key)] = pist_kadapt * sehir_kadapt
+    return tablo
+
+def _kadapt_dosya_imzasi():
+    try:
+        bilgi = os.stat(KADAPT_KATSAYI_DOSYASI)
+    except OSError:
+        return None
+    return (bilgi.st_mtime_ns, bilgi.st_size)
+
+def _kadapt_yukle():
+    """
+    Kalibrasyon dosyasındaki hızları, şehir katsayılarını ve skor faktörlerini
+    varsayılanların üzerine yazıp k_adapt tablosunu yeniden kurar. Dosya
+    yoksa/okunamazsa varsayılanlar kullanılır. Tablo yeni bir dict olarak
+    değiştirilir (analysis_cache sürümü tablo kimliğine bağlı).
+    """
+    global SEHIR_PIST_HIZLARI, SEHIR_KATSAYILARI, KADAPT_TABLOSU, KADAPT_SURUMU, _kadapt_imza
+    global UZUN_MESAFE_FAKTORU, KISA_MESAFE_FAKTORU, KILO_FAKTORU
+    imza = _kadapt_dosya_imzasi()
+    hizlar = dict(VARSAYILAN_SEHIR_PIST_HIZLARI)
+    sehir_katsayilari = load_normalization_coefficients()[1]
+    faktorler = dict(VARSAYILAN_SKOR_FAKTORLERI)
+    surum = None
+    if imza is not None:
+        try:
+            with open(KADAPT_KATSAYI_DOSYASI, 'r', encoding='utf-8') as f:
+                veri = json.load(f)
+            hizlar.update({k: float(v) for k, v in veri['sehir_pist_hizlari'].items() if float(v) > 0})
+            sehir_katsayilari.update({k: float(v) for k, v in veri.get('sehir_katsayilari', {}).items()
+                                      if float(v) > 0})
+            faktorler.update({k: float(v) for k, v in veri.get('skor_faktorleri', {}).items() if k in faktorler})
+            surum = veri.get('surum')
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"[UYARI] k_adapt katsayı dosyası okunamadı ({KADAPT_KATSAYI_DOSYASI}): {e}")
+            hizlar = dict(VARSAYILAN_SEHIR_PIST_HIZLARI)
+            sehir_katsayilari = load_normalization_coefficients()[1]
+            faktorler = dict(VARSAYILAN_SKOR_FAKTORLERI)
+            surum = None
+    tablo = _kadapt_tablosu_olustur(hizlar, sehir_katsayilari)
+    SEHIR_PIST_HIZLARI = hizlar
+    SEHIR_KATSAYILARI = sehir_katsayilari
+    UZUN_MESAFE_FAKTORU = faktorler['uzun_mesafe']
+    KISA_MESAFE_FAKTORU = faktorler['kisa_mesafe']
+    KILO_FAKTORU = faktorler['kilo']
+    KADAPT_TABLOSU = tablo
+    KADAPT_SURUMU = surum
+    _kadapt_imza = imza
+    if surum:
+        print(f"[KADAPT] Katsayı tablosu yüklendi: {surum}")
+
+SEHIR_PIST_HIZLARI = dict(VARSAYILAN_SEHIR_PIST_HIZLARI)
+UZUN_MESAFE_FAKTORU = VARSAYILAN_SKOR_FAKTORLERI['uzun_mesafe']
+KISA_MESAFE_FAKTORU = VARSAYILAN_SKOR_FAKTORLERI['kisa_mesafe']
+KILO_FAKTORU = VARSAYILAN_SKOR_FAKTORLERI['kilo']
+KADAPT_TABLOSU = {}
+KADAPT_SURUMU = None
+_kadapt_imza = None
+_kadapt_sonraki_kontrol = 0.0
+_kadapt_yukle()
+
+def kadapt_tablosu():
+    """
+    Güncel k_adapt tablosu; kalibrasyon dosyası en fazla KADAPT_KONTROL_ARALIGI
+    saniyede bir kontrol edilir, değiştiyse yeniden yüklenir
+    """
+    global _kadapt_sonraki_kontrol
+    simdi = time.monotonic()
+    if simdi >= _kadapt_sonraki_kontrol:
+        _kadapt_sonraki_kontrol = simdi + KADAPT_KONTROL_ARALIGI
+        if _kadapt_dosya_imzasi() != _kadapt_imza:
+            _kadapt_yukle()
+    return KADAPT_TABLOSU
+
+def skor_faktorleri():
+    """Güncel (uzun mesafe, kısa mesafe, kilo) faktörleri; kalibrasyon dosyası değiştiyse yeniden yüklenir"""
+    kadapt_tablosu()
+    return UZUN_MESAFE_FAKTORU, KISA_MESAFE_FAKTORU, KILO_FAKTORU
+
 def calculate_kadapt(gecmis_sehir, gecmis_pist, hedef_sehir, hedef_pist):
     """k_adapt hesapla - HEDEF ŞEHİR REFERANS (1.0) OLARAK KULLANILIR"""
-    hedef_key = get_sehir_pist_key(hedef_sehir, hedef_pist)
-    gecmis_key = get_sehir_pist_key(gecmis_sehir, gecmis_pist)
-    hedef_hiz = SEHIR_PIST_HIZLARI.get(hedef_key, None)
-    gecmis_hiz = SEHIR_PIST_HIZLARI.get(gecmis_key, None)
-    
-    # DEBUG: Katsayı hesaplama kontrolü
-    print(f"[KADAPT-KONTROL] {gecmis_sehir}({gecmis_pist}) -> {hedef_sehir}({hedef_pist})")
-    print(f"[KADAPT-KONTROL] Keys: {gecmis_key} -> {hedef_key}")
-    print(f"[KADAPT-KONTROL] Hızlar: {gecmis_hiz} -> {hedef_hiz}")
-    # HİZ TABLOSUNA DAYALI HESAPLAMA (YENİ SİSTEM)
-    if hedef_hiz is not None and gecmis_hiz is not None:
-        # Pist bazlı hız katsayısı hesapla
-        pist_kadapt = gecmis_hiz / hedef_hiz
-        
-        # ŞEHİR İSİMLERİNİ NORMALIZE ET
-        def normalize_sehir(sehir):
-            sehir_clean = str(sehir).lower().strip()
-            sehir_clean = sehir_clean.replace('ı', 'i').replace('ü', 'u').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')
-            if 'istanbul' in sehir_clean:
-                return 'istanbul'
-            elif 'ankara' in sehir_clean:
-                return 'ankara'
-            elif 'izmir' in sehir_clean:
-                return 'izmir'
-            elif 'bursa' in sehir_clean:
-                return 'bursa'
-            elif 'adana' in sehir_clean:
-                return 'adana'
-            elif 'kocaeli' in sehir_clean:
-                return 'kocaeli'
-            elif 'elazig' in sehir_clean:
-                return 'elazig'
-            elif 'diyarbakir' in sehir_clean:
-                return 'diyarbakir'
-            elif 'sanliurfa' in sehir_clean or 'urfa' in sehir_clean:
-                return 'sanliurfa'
-            return 'unknown'
-        
-        # ŞEHİR FARKI KATSAYISI EKLE - HEDEF ŞEHİR REFERANS!
-        hedef_sehir_clean = normalize_sehir(hedef_sehir)
-        gecmis_sehir_clean = normalize_sehir(gecmis_sehir)
-        
-        # HEDEF ŞEHİR 1.0 REFERANS
-        hedef_sehir_katsayi = 1.0
-        gecmis_sehir_katsayi = SEHIR_KATSAYILARI.get(gecmis_sehir_clean, 1.0) / SEHIR_KATSAYILARI.get(hedef_sehir_clean, 1.0)
-        
-        sehir_kadapt = gecmis_sehir_katsayi / hedef_sehir_katsayi
-        
-        # TOPLAM KATSAYI = PİST × ŞEHİR
-        toplam_kadapt = pist_kadapt * sehir_kadapt
-        
-        print(f"[KADAPT-KONTROL] Pist katsayı: {pist_kadapt:.3f}, Şehir katsayı: {sehir_kadapt:.3f}, TOPLAM: {toplam_kadapt:.3f}")
-        return toplam_kadapt
-    
-    # HIZ TABLOSU YOK - SADECE ŞEHİR KATSAYISI
-    if hedef_hiz is None or gecmis_hiz is None:
-        hedef_sehir_clean = get_sehir_pist_key(hedef_sehir, "").replace("_", "")
-        gecmis_sehir_clean = get_sehir_pist_key(gecmis_sehir, "").replace("_", "")
-        
-        # HEDEF ŞEHİR REFERANS: Hedef şehrin katsayısını 1.0 kabul et
-        hedef_katsayi = 1.0
-        gecmis_katsayi = SEHIR_KATSAYILARI.get(gecmis_sehir_clean, 1.0) / SEHIR_KATSAYILARI.get(hedef_sehir_clean, 1.0)
-        
-        katsayi = gecmis_katsayi / hedef_katsayi
-        print(f"[KADAPT-KONTROL] Şehir katsayıları - Geçmiş: {gecmis_katsayi:.3f}, Hedef: {hedef_katsayi:.3f}, Sonuç: {katsayi:.3f}")
-        return katsayi
+    return kadapt_tablosu().get((get_sehir_pist_key(gecmis_sehir, gecmis_pist),
+                                 get_sehir_pist_key(hedef_sehir, hedef_pist)), 1.0)
+
+def calculate_kadapt_batch(kosullar):
+    """
+    Birden çok at için k_adapt değerleri
+
+    Args:
+        kosullar: (geçmiş şehir, geçmiş pist, hedef şehir, hedef pist) dörtlüleri
+
+    Returns:
+        list: Aynı sırada k_adapt değerleri
+    """
+    tablo = kadapt_tablosu()
+    anahtar = get_sehir_pist_key
+    return [tablo.get((anahtar(gs, gp), anahtar(hs, hp)), 1.0) for gs, gp, hs, hp in kosullar]
+
+_SAYI_DISI = re.compile(r'[^0-9\.]+')
+_BAS_SAYI = re.compile(r'([0-9]+\.?[0-9]*)')
+
+def _clean_float(val):
+    """Mesafe değerinden sayıyı çıkar ("1.400m" -> 1.4, boş -> None)"""
+    s = str(val).replace('"','').replace("'",'').replace(' ','').replace(',','.')
+    s = _SAYI_DISI.sub('', s)
+    return float(s) if s else None
+
+def _clean_kilo(val):
+    """Kilo değerinin başındaki sayıyı çıkar ("57+2" -> 57.0, yoksa None)"""
+    s = str(val).replace('"','').replace("'",'').replace(' ','').replace(',','.')
+    match = _BAS_SAYI.match(s)
+    if match:
+        return float(match.group(1))
+    return None
 
 def process_calculation_for_city(horses_list, city_name):
-    """Şehir için hesaplama işlemi yap"""
+    """Şehir için hesaplama işlemi yap (numpy varsa vektörel motor ile)"""
+    try:
+        from vector_scoring import process_calculation_vectorized
+    except ImportError:
+        return _process_calculation_for_city_python(horses_list, city_name)
+    return process_calculation_vectorized(horses_list, city_name)
+
+def _process_calculation_for_city_python(horses_list, city_name):
+    """Şehir için hesaplama işlemi yap - at at Python döngüsü (referans motor)"""
     import math
     
+    uzun_faktor, kisa_faktor, kilo_faktor = skor_faktorleri()
+    
     # Hesaplama için gerekli değişkenler
     data = []
     group = []
@@ -797,8 +839,15 @@ def process_calculation_for_city(horses_list, city_name):
             x2['Son Hipodrom'] = son_hipodrom_map.get(key, '')
             data.append(x2)
     
+    # Şehir+Pist adaptasyon katsayıları tüm atlar için tek seferde
+    kadaptlar = calculate_kadapt_batch(
+        (horse.get('Son Hipodrom', city_name), str(horse.get('Son Pist', '')).strip(),
+         city_name, str(horse.get('Bugünkü Pist', '')).strip())
+        for horse in horses_list
+    )
+    
     # Her at için hesaplama yap
-    for horse in horses_list:
+    for horse, kadapt in zip(horses_list, kadaptlar):
         kosu = horse['Koşu']
         if group_kosu is None:
             group_kosu = kosu
@@ -815,16 +864,10 @@ def process_calculation_for_city(horses_list, city_name):
         else:
             derece = derece_raw
             
-            def clean_float(val):
-                import re
-                s = str(val).replace('"','').replace("'",'').replace(' ','').replace(',','.')
-                s = re.sub(r'[^0-9\.]+', '', s)
-                return float(s) if s else None
-            
             son_mesafe_raw = horse.get('Son Mesafe', '')
             bugun_mesafe_raw = horse.get('Bugünkü Mesafe', '')
-            son_mesafe = clean_float(son_mesafe_raw)
-            bugun_mesafe = clean_float(bugun_mesafe_raw)
+            son_mesafe = _clean_float(son_mesafe_raw)
+            bugun_mesafe = _clean_float(bugun_mesafe_raw)
             son_pist = str(horse.get('Son Pist', '')).strip()
             bugun_pist = str(horse.get('Bugünkü Pist', '')).strip()
             
@@ -846,9 +889,9 @@ def process_calculation_for_city(horses_list, city_name):
                         
                         # Mesafe uzatma/kısaltma faktörü
                         if mesafe_farki > 0:  # Uzun mesafe
-                            mesafe_faktoru = 0.04  # 100m başına +0.04 saniye
+                            mesafe_faktoru = uzun_faktor
                         else:  # Kısa mesafe
-                            mesafe_faktoru = -0.03  # 100m başına -0.03 saniye
+                            mesafe_faktoru = kisa_faktor
                         
                         # Yeni 100m süresi
                         yeni_100m_sure = mevcut_100m_sure + (abs(mesafe_farki) / 100) * mesafe_faktoru
@@ -858,29 +901,16 @@ def process_calculation_for_city(horses_list, city_name):
                     
                     ort_100m_sure = toplam_sure / (bugun_mesafe / 100)
                     
-                    # Şehir+Pist adaptasyonu hesapla
-                    gecmis_sehir = horse.get('Son Hipodrom', city_name)
-                    hedef_sehir = city_name
-                    kadapt = calculate_kadapt(gecmis_sehir, son_pist, hedef_sehir, bugun_pist)
-                    
                     raw_score = ort_100m_sure
                     adjusted_score = raw_score * kadapt
                     
-                    def clean_kilo(val):
-                        import re
-                        s = str(val).replace('"','').replace("'",'').replace(' ','').replace(',','.')
-                        match = re.match(r'([0-9]+\.?[0-9]*)', s)
-                        if match:
-                            return float(match.group(1))
-                        return None
-                    
-                    kilo_onceki = clean_kilo(horse.get('Son Kilo', ''))
-                    kilo_bugun = clean_kilo(horse.get('Kilo', ''))
+                    kilo_onceki = _clean_kilo(horse.get('Son Kilo', ''))
+                    kilo_bugun = _clean_kilo(horse.get('Kilo', ''))
                     
                     cikti_deger = adjusted_score
                     if kilo_onceki is not None and kilo_bugun is not None:
                         kilo_fark = kilo_bugun - kilo_onceki
-                        cikti_deger -= kilo_fark * 0.02
+                        cikti_deger -= kilo_fark * kilo_faktor
                     
                     if cikti_deger is None or cikti_deger <= 0:
                         cikti = 'geçersiz'
@@ -913,102 +943,29 @@ def get_winner_data_from_url(race_url):
     try:
         print(f"[KAZANAN VERİSİ] URL çekiliyor: {race_url}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(race_url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            print(f"[KAZANAN VERİSİ HATASI] HTTP {response.status_code}: {race_url}")
+        try:
+            sonuc = get_race_result(race_url)
+        except requests.HTTPError as e:
+            print(f"[KAZANAN VERİSİ HATASI] HTTP {e.response.status_code}: {race_url}")
             return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
         
-        # kosanAtlar tablosunu bul
-        result_table = soup.find('table', class_='kosanAtlar')
-        if not result_table:
+        if sonuc['hata'] == 'tablo':
             print(f"[KAZANAN VERİSİ HATASI] kosanAtlar tablosu bulunamadı: {race_url}")
             return None
-            
-        tbody = result_table.find('tbody')
-        if not tbody:
+        if sonuc['hata'] == 'tbody':
             print(f"[KAZANAN VERİSİ HATASI] tbody bulunamadı: {race_url}")
             return None
-            
-        # İlk sıradaki (1. olan) at bilgilerini al
-        rows = tbody.find_all('tr')
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= 9:  # En az 9 kolon olmalı
-                # Sıra numarasını kontrol et (ilk hücre)
-                sira_cell = cells[0]
-                sira = sira_cell.get_text(strip=True)
-                
-                if sira == '1':
-                    # At adını al (2. hücre, içindeki atisimlink'den)
-                    at_cell = cells[1]
-                    at_link = at_cell.find('a', class_='atisimlink')
-                    if at_link:
-                        at_adi = at_link.get_text(strip=True)
-                    else:
-                        at_adi = at_cell.get_text(strip=True)
-                    
-                    # Derece (9. hücre - "Derece" kolonu)
-                    derece_cell = cells[8]
-                    derece = derece_cell.get_text(strip=True)
-                    
-                    # Ganyan (10. hücre - "Gny" kolonu)
-                    ganyan = ""
-                    if len(cells) > 9:
-                        ganyan_cell = cells[9]
-                        ganyan = ganyan_cell.get_text(strip=True)
-                    
-                    # Yarış bilgilerini de al
-                    yarış_mesafe = ""
-                    yarış_pist = ""
-                    
-                    # Pist ve mesafe bilgisi için span'larda ara
-                    pist_spans = soup.find_all('span', class_=['kumpist', 'cimpist', 'sentetikpist'])
-                    for pist_span in pist_spans:
-                        span_text = pist_span.get_text().strip()
-                        span_class = ' '.join(pist_span.get('class', []))
-                        
-                        # Span text'inden mesafe ve pist çıkar: "1700 Çim" formatında
-                        import re
-                        if span_text:
-                            # Mesafe ara (sayı + boşluk + pist türü)
-                            match = re.match(r'(\d+)\s*(Çim|Kum|Sentetik)', span_text)
-                            if match:
-                                yarış_mesafe = match.group(1)
-                                yarış_pist = match.group(2)
-                                break
-                    
-                    # Eğer span text'inde bulamazsa class adından pist türünü çıkar
-                    if not yarış_pist and pist_spans:
-                        first_span = pist_spans[0]
-                        span_class = ' '.join(first_span.get('class', []))
-                        if 'kumpist' in span_class:
-                            yarış_pist = "Kum"
-                        elif 'cimpist' in span_class:
-                            yarış_pist = "Çim"
-                        elif 'sentetikpist' in span_class:
-                            yarış_pist = "Sentetik"
-                        
-                        # Mesafe için span text'inde sadece sayı ara
-                        if not yarış_mesafe and pist_spans:
-                            span_text = first_span.get_text().strip()
-                            mesafe_match = re.search(r'(\d+)', span_text)
-                            if mesafe_match:
-                                yarış_mesafe = mesafe_match.group(1)
-                    
-                    print(f"[KAZANAN BULUNDU] {at_adi} - {derece} - {ganyan} (Mesafe: {yarış_mesafe}, Pist: {yarış_pist})")
-                    return {
-                        'birinci_ismi': at_adi,
-                        'birinci_derece': derece,
-                        'birinci_ganyan': ganyan,
-                        'yarış_mesafe': yarış_mesafe,
-                        'yarış_pist': yarış_pist
-                    }
+        
+        birinci = race_kazanan(sonuc)
+        if birinci:
+            print(f"[KAZANAN BULUNDU] {birinci['at_ismi']} - {birinci['derece']} - {birinci['ganyan']} (Mesafe: {sonuc['mesafe']}, Pist: {sonuc['pist']})")
+            return {
+                'birinci_ismi': birinci['at_ismi'],
+                'birinci_derece': birinci['derece'],
+                'birinci_ganyan': birinci['ganyan'],
+                'yarış_mesafe': sonuc['mesafe'],
+                'yarış_pist': sonuc['pist']
+            }
         
         print(f"[KAZANAN VERİSİ HATASI] Birinci bulunamadı: {race_url}")
         return None
@@ -1022,56 +979,26 @@ def get_horse_rank_from_url(race_url, horse_name):
     try:
         print(f"[AT DERECESİ] {horse_name} için {race_url} kontrol ediliyor...")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(race_url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            print(f"[AT DERECESİ HATASI] HTTP {response.status_code}: {race_url}")
+        try:
+            sonuc = get_race_result(race_url)
+        except requests.HTTPError as e:
+            print(f"[AT DERECESİ HATASI] HTTP {e.response.status_code}: {race_url}")
             return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
         
-        # kosanAtlar tablosunu bul
-        result_table = soup.find('table', class_='kosanAtlar')
-        if not result_table:
+        if sonuc['hata'] == 'tablo':
             print(f"[AT DERECESİ HATASI] kosanAtlar tablosu bulunamadı: {race_url}")
             return None
-            
-        tbody = result_table.find('tbody')
-        if not tbody:
+        if sonuc['hata'] == 'tbody':
             print(f"[AT DERECESİ HATASI] tbody bulunamadı: {race_url}")
             return None
-            
-        # Tüm satırları kontrol et ve atı bul
-        rows = tbody.find_all('tr')
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) >= 9:  # En az 9 kolon olmalı
-                # At adını al (2. hücre, içindeki atisimlink'den)
-                at_cell = cells[1]
-                at_link = at_cell.find('a', class_='atisimlink')
-                if at_link:
-                    at_adi = at_link.get_text(strip=True)
-                else:
-                    at_adi = at_cell.get_text(strip=True)
-                
-                # Eğer aradığımız at buysa
-                if at_adi.upper() == horse_name.upper():
-                    # Sıra numarasını al (ilk hücre)
-                    sira_cell = cells[0]
-                    sira = sira_cell.get_text(strip=True)
-                    
-                    # Derece (9. hücre - "Derece" kolonu)
-                    derece_cell = cells[8]
-                    derece = derece_cell.get_text(strip=True)
-                    
-                    print(f"[AT DERECESİ BULUNDU] {horse_name}: {sira}. sıra, derece: {derece}")
-                    return {
-                        'sira': sira,
-                        'derece': derece
-                    }
+        
+        satir = race_at_sonucu(sonuc, horse_name)
+        if satir:
+            print(f"[AT DERECESİ BULUNDU] {horse_name}: {satir['sira']}. sıra, derece: {satir['derece']}")
+            return {
+                'sira': satir['sira'],
+                'derece': satir['derece']
+            }
         
         print(f"[AT DERECESİ HATASI] {horse_name} bulunamadı: {race_url}")
         return None
@@ -1082,72 +1009,16 @@ def get_horse_rank_from_url(race_url, horse_name):
 
 
 def get_last_race_url_from_profile(profile_link):
-    """At profil linkinden son koşu URL'sini çeker"""
+    """At profil linkinden son koşu URL'sini çeker (profil bir kez indirilip ayrıştırılır)"""
     try:
-        # Profil linkini tam URL'e çevir
-        base_url = "https://yenibeygir.com"
-        if profile_link.startswith('/'):
-            full_profile_url = base_url + profile_link
-        else:
-            full_profile_url = profile_link
-            
-        print(f"[PROFİL URL] Çekiliyor: {full_profile_url}")
+        print(f"[PROFİL URL] Çekiliyor: {profile_link}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        race_url = get_horse_profile(profile_link)['son_kosu_url']
+        if race_url:
+            print(f"[SON KOŞU URL] Bulundu: {race_url}")
+            return race_url
         
-        response = requests.get(full_profile_url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            print(f"[PROFİL URL HATASI] HTTP {response.status_code}: {full_profile_url}")
-            return None
-            
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # at_Yarislar tablosunu bul
-        races_table = soup.find('table', class_='at_Yarislar')
-        if races_table:
-            tbody = races_table.find('tbody')
-            if tbody:
-                rows = tbody.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 1:
-                        # İlk hücredeki linki al (tarih hücresi)
-                        date_cell = cells[0]
-                        link = date_cell.find('a')
-                        if link and link.get('href'):
-                            href = link.get('href')
-                            # "Bugün" linkini atla, geçmiş yarışları al
-                            link_text = link.get_text(strip=True)
-                            if link_text != 'Bugün' and href:
-                                # Tarihi kontrol et - sadece geçmiş tarihler
-                                try:
-                                    # URL'den tarihi çıkar (örn: /19-09-2025/istanbul/...)
-                                    href_str = str(href)
-                                    if '/' in href_str:
-                                        date_part = href_str.split('/')[1]  # 19-09-2025
-                                        if len(date_part.split('-')) == 3:
-                                            day, month, year = date_part.split('-')
-                                            race_date = datetime(int(year), int(month), int(day))
-                                            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                                            
-                                            # Sadece geçmiş tarihli koşuları al
-                                            if race_date < today:
-                                                # Eğer href tam URL değilse base_url ekle
-                                                if href_str.startswith('/'):
-                                                    race_url = base_url + href_str
-                                                else:
-                                                    race_url = href_str
-                                                print(f"[SON KOŞU URL] Bulundu: {race_url}")
-                                                return race_url
-                                            else:
-                                                print(f"[SON KOŞU URL] Gelecek tarih atlandı: {date_part}")
-                                except ValueError:
-                                    # Tarih parse edilemezse, URL'i kontrol etmeye devam et
-                                    pass
-        
-        print(f"[SON KOŞU URL] at_Yarislar tablosu bulunamadı: {full_profile_url}")
+        print(f"[SON KOŞU URL] at_Yarislar tablosu bulunamadı: {profile_link}")
         return None
         
     except Exception as e:
@@ -1252,6 +1123,7 @@ def save_kazanan_cikti_csv(kazanan_data, city_name, output_date):
         
         # CSV olarak kaydet
         df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        artifact_catalog.register(filepath)
         
         print(f"[KAZANAN CSV] {city_name}: {filename} kaydedildi ({len(kazanan_data)} kayıt)")
         return filepath
@@ -1266,28 +1138,19 @@ def save_kazanan_cikti_csv(kazanan_data, city_name, output_date):
 #     # Bu fonksiyon artık kullanılmıyor - tüm atlar için calculate_average_time kullanılıyor
 #     pass
 
-def get_kazanan_data_for_city(city_name):
+def find_kazanan_file(city_name):
+    """Şehir için bugünkü en son kazanan CSV dosyasının yolu (yoksa None)"""
+    bugun_tarih = datetime.now().strftime('%Y%m%d')
+    return artifact_catalog.find_latest('kazanan', city=city_name.lower(), date=bugun_tarih)
+
+def get_kazanan_data_for_city(city_name, latest_file=None):
     """Şehir için en son kazanan verilerini oku"""
     try:
-        downloads_dir = os.path.join('static', 'downloads')
-        bugun_tarih = datetime.now().strftime('%Y%m%d')
-        
-        # Bu şehir ve tarih için kazanan dosyalarını ara
-        kazanan_files = []
-        for filename in os.listdir(downloads_dir):
-            if filename.startswith(f"{city_name.lower()}_kazanan_cikti_{bugun_tarih}_") and filename.endswith('.csv'):
-                filepath = os.path.join(downloads_dir, filename)
-                timestamp = os.path.getmtime(filepath)
-                kazanan_files.append((timestamp, filepath, filename))
-        
-        if not kazanan_files:
+        latest_file = latest_file or find_kazanan_file(city_name)
+        if not latest_file:
             print(f"[KAZANAN VERİSİ] {city_name} için bugünkü kazanan dosyası bulunamadı")
             return {}
         
-        # En son dosyayı al
-        kazanan_files.sort(reverse=True)  # En yeni dosya ilk
-        latest_file = kazanan_files[0][1]
-        
         print(f"[KAZANAN VERİSİ] {city_name} kazanan verisi okunuyor: {os.path.basename(latest_file)}")
         
         df = pd.read_csv(latest_file)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTML AYRIŞTIRMA KATMANI
+Sayfaları mümkünse lxml ile ve yalnızca gereken alt ağaçları
+(yarış başlıkları ve tablolar, at_Yarislar satırları, kosanAtlar tablosu)
+oluşturarak ayrıştırır. HTML_PARSER ortam değişkeni ile
+'html.parser' seçilirse eski davranışa (tam belge) dönülür.
+"""
+
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# bs4 4.13+ parse_only için allow_tag_creation arayüzünü kullanır
+STRAINER_DESTEKLI = hasattr(SoupStrainer, 'allow_tag_creation')
+
+HTML_PARSER = os.environ.get('HTML_PARSER', 'lxml')
+
+
+def parser_adi():
+    """Kullanılacak BeautifulSoup parser adı"""
+    if HTML_PARSER == 'lxml' and LXML_AVAILABLE:
+        return 'lxml'
+    return 'html.parser'
+
+
+class SecimliStrainer(SoupStrainer):
+    """
+    (etiket, class) kurallarından herhangi birine uyan etiketleri
+    alt ağaçlarıyla birlikte tutar. class None ise yalnızca etiket adı aranır.
+    """
+
+    def __init__(self, *kurallar):
+        super().__init__()
+        self.kurallar = kurallar
+
+    @property
+    def excludes_everything(self):
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        for etiket, sinif in self.kurallar:
+            if name != etiket:
+                continue
+            if sinif is None:
+                return True
+            deger = (attrs or {}).get('class') or ''
+            siniflar = deger.split() if isinstance(deger, str) else list(deger)
+            if sinif in siniflar:
+                return True
+        return False
+
+    def allow_string_creation(self, string):
+        return False
+
+
+# Sayfa türlerine göre tutulacak alt ağaçlar
+KART_SECICI = (('div', 'yarisHeader'), ('table', None))
+PROFIL_SECICI = (('table', None),)
+SONUC_SECICI = (('table', 'kosanAtlar'), ('span', 'kumpist'), ('span', 'cimpist'), ('span', 'sentetikpist'))
+TABLO_SECICI = (('table', None),)
+
+
+def make_soup(html, secici=None):
+    """
+    HTML'i ayrıştır
+
+    Args:
+        html: Sayfa içeriği (str veya bytes)
+        secici: Tutulacak (etiket, class) kuralları; None ise tüm belge
+
+    Returns:
+        BeautifulSoup
+    """
+    parser = parser_adi()
+    if secici and parser == 'lxml' and STRAINER_DESTEKLI:
+        return BeautifulSoup(html, parser, parse_only=SecimliStrainer(*secici))
+    return BeautifulSoup(html, parser)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ORTAK HTTP İSTEMCİSİ
+Tüm scraper modülleri tek bir keep-alive oturumu ve bağlantı havuzu kullanır.
+Timeout ve retry ayarları tek yerden yönetilir, bağlantı sayaçları
+get_stats() ile okunabilir.
+
+Host başına istek bütçesi (SCRAPER_MAX_RPS / SCRAPER_BURST) süreç içindedir:
+aynı süreçteki tüm şehirler ve thread'ler paylaşır, ancak ayrı süreçler
+(ör. gunicorn -w 4) kendi kovalarını tutar. Siteye giden toplam hız
+worker sayısı ile çarpılır; çok worker'lı kurulumda SCRAPER_MAX_RPS buna
+göre bölünmelidir.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import response_cache
+
+# Havuz ve timeout ayarları (ortam değişkenleri ile değiştirilebilir)
+HAVUZ_BOYUTU = int(os.environ.get('HTTP_POOL_SIZE', '16'))
+VARSAYILAN_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT_SECONDS', '15'))
+MAX_RETRY = int(os.environ.get('MAX_SCRAPING_RETRIES', '3'))
+
+# Host başına saniyedeki istek bütçesi (süreç içindeki tüm şehirler ve thread'ler ortak kullanır)
+MAX_ISTEK_HIZI = float(os.environ.get('SCRAPER_MAX_RPS', '8'))
+ISTEK_PATLAMASI = int(os.environ.get('SCRAPER_BURST', '8'))
+
+VARSAYILAN_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'tr-TR,tr;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket - saniyede `hiz` token, en fazla `kapasite` birikir"""
+
+    def __init__(self, hiz, kapasite):
+        self.hiz = hiz
+        self.kapasite = max(1, kapasite)
+        self.token = float(self.kapasite)
+        self.son = time.monotonic()
+        self.bekleme_suresi = 0.0
+        self._lock = threading.Lock()
+
+    def al(self):
+        """Bir token al; gerekirse token birikene kadar bekle"""
+        if self.hiz <= 0:
+            return
+        with self._lock:
+            simdi = time.monotonic()
+            self.token = min(self.kapasite, self.token + (simdi - self.son) * self.hiz)
+            self.son = simdi
+            self.token -= 1
+            bekle = -self.token / self.hiz if self.token < 0 else 0.0
+            self.bekleme_suresi += bekle
+        if bekle > 0:
+            time.sleep(bekle)
+
+
+_kovalar = {}
+_kova_lock = threading.Lock()
+
+
+def _kova(url):
+    """URL'nin host'una ait ortak token bucket"""
+    host = urlparse(url).netloc
+    with _kova_lock:
+        if host not in _kovalar:
+            _kovalar[host] = TokenBucket(MAX_ISTEK_HIZI, ISTEK_PATLAMASI)
+        return _kovalar[host]
+
+
+def create_session(pool_size=None):
+    """Keep-alive, retry ve bağlantı havuzu ayarlı yeni bir oturum oluştur"""
+    session = requests.Session()
+    session.verify = True
+    session.headers.update(VARSAYILAN_HEADERS)
+
+    retry_strategy = Retry(
+        total=MAX_RETRY,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "OPTIONS"],
+        backoff_factor=1,
+        raise_on_status=False
+    )
+    boyut = pool_size or HAVUZ_BOYUTU
+    # pool_block: havuz doluysa yeni bağlantı açmak yerine boşalmasını bekle,
+    # böylece eşzamanlı bağlantı sayısı da tüm şehirler için sınırlı kalır
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=boyut,
+        pool_maxsize=boyut,
+        pool_block=True
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Süreç genelinde paylaşılan oturumu döndür"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url, **kwargs):
+    """Paylaşılan oturum üzerinden GET isteği (varsayılan timeout ve ortak hız limiti ile)"""
+    kwargs.setdefault('timeout', VARSAYILAN_TIMEOUT)
+    _kova(url).al()
+    return get_session().get(url, **kwargs)
+
+
+class CachedResponse:
+    """Önbellekten dönen yanıt - requests.Response'un kullanılan kısmıyla uyumlu"""
+
+    def __init__(self, url, content, encoding=None):
+        self.url = url
+        self.status_code = 200
+        self.ok = True
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.headers = {}
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def raise_for_status(self):
+        return None
+
+
+def get_cached(url, gecerli=None, dogrula=False, **kwargs):
+    """
+    Önbellek destekli GET isteği
+
+    Taze kayıt varsa ağa çıkmadan döner; süresi dolmuş kayıt ETag/Last-Modified
+    ile doğrulanır (304 gelirse eski içerik kullanılır). dogrula True ise taze
+    kayıt da aynı şekilde sunucuya sorulur. Yalnızca 200 yanıtlar ve
+    gecerli(text) True dönen içerikler önbelleğe yazılır.
+    """
+    if not response_cache.CACHE_AKTIF:
+        return get(url, **kwargs)
+
+    cache = response_cache.get_cache()
+    try:
+        kayit = cache.lookup(url)
+    except Exception as e:
+        print(f"[CACHE HATA] {url}: {e}")
+        kayit = None
+
+    if kayit and kayit.taze and not dogrula:
+        return CachedResponse(url, kayit.icerik, kayit.encoding)
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if kayit:
+        if kayit.etag:
+            headers['If-None-Match'] = kayit.etag
+        if kayit.last_modified:
+            headers['If-Modified-Since'] = kayit.last_modified
+
+    response = get(url, headers=headers, **kwargs)
+
+    if response.status_code == 304 and kayit:
+        cache.refresh(url)
+        return CachedResponse(url, kayit.icerik, kayit.encoding)
+
+    if response.status_code == 200:
+        try:
+            if gecerli is None or gecerli(response.text):
+                cache.store(
+                    url,
+                    response.content,
+                    encoding=response.encoding or response.apparent_encoding,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+        except Exception as e:
+            print(f"[CACHE HATA] {url} kaydedilemedi: {e}")
+
+    return response
+
+
+def get_stats():
+    """
+    Bağlantı havuzu sayaçları
+
+    Returns:
+        dict: istek sayısı, açılan yeni bağlantı (TCP+TLS el sıkışması) sayısı
+              ve yeniden kullanılan bağlantı sayısı
+    """
+    istek = 0
+    yeni_baglanti = 0
+    hostlar = {}
+
+    session = _session
+    if session is not None:
+        # Aynı adapter http ve https için mount edildiğinden tekilleştir
+        adapterler = {id(a): a for a in session.adapters.values()}.values()
+        for adapter in adapterler:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                istek += pool.num_requests
+                yeni_baglanti += pool.num_connections
+                hostlar[pool.host] = {
+                    'istek': pool.num_requests,
+                    'yeni_baglanti': pool.num_connections
+                }
+
+    with _kova_lock:
+        hiz_bekleme = sum(k.bekleme_suresi for k in _kovalar.values())
+
+    return {
+        'istek': istek,
+        'yeni_baglanti': yeni_baglanti,
+        'yeniden_kullanim': max(0, istek - yeni_baglanti),
+        'hiz_bekleme_sn': round(hiz_bekleme, 2),
+        'hostlar': hostlar
+    }
+
+
+def print_stats(prefix='[HTTP]'):
+    """Sayaçları tek satır olarak yazdır"""
+    stats = get_stats()
+    print(f"{prefix} {stats['istek']} istek, {stats['yeni_baglanti']} yeni bağlantı, "
+          f"{stats['yeniden_kullanim']} yeniden kullanım, hız limiti beklemesi {stats['hiz_bekleme_sn']} sn")
+    if response_cache.CACHE_AKTIF:
+        try:
+            c = response_cache.get_cache().get_stats()
+            print(f"{prefix} önbellek: {c['hit']} hit, {c['miss']} miss, {c['revalidated']} doğrulama "
+                  f"(%{c['hit_orani']}), {c['kayit']} kayıt / {c['boyut_mb']} MB")
+        except Exception as e:
+            print(f"[CACHE HATA] istatistik alınamadı: {e}")
+    return stats
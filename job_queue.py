@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ARKA PLAN İŞ KUYRUĞU
+Uzun süren scraping/analiz işlerini web worker'ı bloklamadan
+sınırlı bir thread havuzunda çalıştırır. Her iş bir ID alır;
+durum, ilerleme (biten koşu / at sayısı) ve sonuç /api/jobs/<id>
+üzerinden sorgulanır.
+
+İş, gönderildiği süreçte çalışır; durumu ise tüm gunicorn worker'larının
+okuyabilmesi için SQLite'ta (cache/jobs.db) tutulur. Durum değişiklikleri
+hemen, ilerleme sayaçları en fazla JOB_PROGRESS_SECONDS aralıkla yazılır.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+# Aynı anda çalışabilecek iş sayısı
+JOB_ISCI_SAYISI = int(os.environ.get('JOB_WORKERS', '2'))
+# Biten işlerin saklanma süresi (saniye)
+JOB_SAKLAMA_SURESI = int(os.environ.get('JOB_RETENTION_SECONDS', '3600'))
+# Süreçler arası paylaşılan iş durumu
+JOB_DB = os.environ.get('JOB_STORE_DB', os.path.join('cache', 'jobs.db'))
+# İlerleme sayaçlarının veritabanına yazılma aralığı (saniye)
+ILERLEME_YAZMA_ARALIGI = float(os.environ.get('JOB_PROGRESS_SECONDS', '0.5'))
+
+# Veritabanına yazılan alanlar (ilerleme ve sonuç JSON olarak)
+_ALANLAR = ('id', 'tur', 'user_id', 'durum', 'ilerleme', 'sonuc', 'http_status', 'hata',
+            'olusturma', 'baslama', 'bitis', '_bitis_zamani')
+_JSON_ALANLAR = frozenset(('ilerleme', 'sonuc'))
+
+_yerel = threading.local()
+
+
+class JobQueue:
+    def __init__(self, max_workers=JOB_ISCI_SAYISI, db_yolu=None):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='job')
+        # Bu süreçte çalışan/bitmiş işler (yazma kaynağı); diğer süreçlerin işleri veritabanından okunur
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._db_yolu = db_yolu or JOB_DB
+        self._conn = None
+        self._db_lock = threading.Lock()
+
+    def _db(self):
+        """Paylaşılan bağlantı (_db_lock altında çağrılır)"""
+        if self._conn is None:
+            dizin = os.path.dirname(self._db_yolu)
+            if dizin:
+                os.makedirs(dizin, exist_ok=True)
+            conn = sqlite3.connect(self._db_yolu, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS isler (
+                    id TEXT PRIMARY KEY,
+                    tur TEXT NOT NULL,
+                    user_id INTEGER,
+                    durum TEXT NOT NULL,
+                    ilerleme TEXT NOT NULL,
+                    sonuc TEXT,
+                    http_status INTEGER,
+                    hata TEXT,
+                    olusturma TEXT NOT NULL,
+                    baslama TEXT,
+                    bitis TEXT,
+                    _bitis_zamani REAL
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _yaz(self, job):
+        """İşin anlık durumunu veritabanına yaz (_lock altında çağrılır)"""
+        job['_yazma_zamani'] = time.monotonic()
+        satir = tuple(json.dumps(job[alan], ensure_ascii=False, default=str) if alan in _JSON_ALANLAR else job[alan]
+                      for alan in _ALANLAR)
+        try:
+            with self._db_lock:
+                db = self._db()
+                with db:
+                    db.execute(f"INSERT OR REPLACE INTO isler VALUES ({', '.join('?' * len(_ALANLAR))})", satir)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[UYARI] İş durumu yazılamadı ({job['id']}): {e}")
+
+    def _oku(self, job_id):
+        try:
+            with self._db_lock:
+                imlec = self._db().execute(f"SELECT {', '.join(_ALANLAR)} FROM isler WHERE id = ?", (job_id,))
+                satir = imlec.fetchone()
+        except (sqlite3.Error, OSError) as e:
+            print(f"[UYARI] İş durumu okunamadı ({job_id}): {e}")
+            return None
+        if satir is None:
+            return None
+        job = dict(zip(_ALANLAR, satir))
+        for alan in _JSON_ALANLAR:
+            job[alan] = json.loads(job[alan]) if job[alan] is not None else None
+        return job
+
+    def submit(self, tur, func, *args, user_id=None, app=None, **kwargs):
+        """
+        İşi kuyruğa ekler ve hemen job ID döndürür
+
+        Args:
+            tur: İş türü (ör. 'scrape_city')
+            func: Çalıştırılacak fonksiyon; (payload, http_status) veya payload döndürür
+            user_id: İşin sahibi (durum sorgusunda kontrol edilir)
+            app: Verilirse iş bu Flask uygulamasının app_context'i içinde çalışır
+        """
+        self._temizle()
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'tur': tur,
+            'user_id': user_id,
+            'durum': 'bekliyor',
+            'ilerleme': {'kosu_tamam': 0, 'kosu_toplam': 0, 'at_tamam': 0, 'at_toplam': 0},
+            'sonuc': None,
+            'http_status': None,
+            'hata': None,
+            'olusturma': datetime.now().isoformat(),
+            'baslama': None,
+            'bitis': None,
+            '_bitis_zamani': None,
+            '_yazma_zamani': 0.0
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._yaz(job)
+
+        self._executor.submit(self._calistir, job, func, args, kwargs, app)
+        return job_id
+
+    def _calistir(self, job, func, args, kwargs, app):
+        with self._lock:
+            job['durum'] = 'calisiyor'
+            job['baslama'] = datetime.now().isoformat()
+            self._yaz(job)
+
+        try:
+            with aktif_job(job):
+                if app is not None:
+                    with app.app_context():
+                        sonuc = func(*args, **kwargs)
+                else:
+                    sonuc = func(*args, **kwargs)
+
+            payload, status = sonuc if isinstance(sonuc, tuple) else (sonuc, 200)
+            with self._lock:
+                job['sonuc'] = payload
+                job['http_status'] = status
+                job['durum'] = 'tamamlandi' if status < 400 else 'hata'
+        except Exception as e:
+            print(f"[JOB HATA] {job['tur']} ({job['id']}): {e}")
+            with self._lock:
+                job['hata'] = str(e)
+                job['http_status'] = 500
+                job['durum'] = 'hata'
+        finally:
+            with self._lock:
+                job['bitis'] = datetime.now().isoformat()
+                job['_bitis_zamani'] = time.time()
+                self._yaz(job)
+
+    def get(self, job_id):
+        """İşin anlık durumunun kopyası (yoksa None); başka süreçteki işler veritabanından okunur"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                kopya = {k: v for k, v in job.items() if not k.startswith('_')}
+                kopya['ilerleme'] = dict(job['ilerleme'])
+                return kopya
+        job = self._oku(job_id)
+        if not job:
+            return None
+        return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def ilerleme_ekle(self, job, **delta):
+        """İlerleme sayaçlarını artır (veritabanına aralıklı yazılır)"""
+        with self._lock:
+            for anahtar, deger in delta.items():
+                job['ilerleme'][anahtar] = job['ilerleme'].get(anahtar, 0) + deger
+            if time.monotonic() - job['_yazma_zamani'] >= ILERLEME_YAZMA_ARALIGI:
+                self._yaz(job)
+
+    def _temizle(self):
+        """Saklama süresi dolan bitmiş işleri sil"""
+        sinir = time.time() - JOB_SAKLAMA_SURESI
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items()
+                           if job['_bitis_zamani'] and job['_bitis_zamani'] < sinir]:
+                del self._jobs[job_id]
+        try:
+            with self._db_lock:
+                db = self._db()
+                with db:
+                    db.execute('DELETE FROM isler WHERE _bitis_zamani IS NOT NULL AND _bitis_zamani < ?', (sinir,))
+        except (sqlite3.Error, OSError) as e:
+            print(f"[UYARI] Eski işler silinemedi: {e}")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Süreç genelinde paylaşılan iş kuyruğu"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def submit_job(tur, func, *args, **kwargs):
+    """Paylaşılan kuyruğa iş ekle, job ID döndür"""
+    return get_queue().submit(tur, func, *args, **kwargs)
+
+
+def get_job(job_id):
+    return get_queue().get(job_id)
+
+
+def current_job():
+    """Bu thread'de çalışan iş (iş dışında None)"""
+    return getattr(_yerel, 'job', None)
+
+
+@contextmanager
+def aktif_job(job):
+    """Alt thread'lerde ilerlemenin doğru işe yazılması için işi bu thread'e bağla"""
+    onceki = getattr(_yerel, 'job', None)
+    _yerel.job = job
+    try:
+        yield job
+    finally:
+        _yerel.job = onceki
+
+
+class KartIlerlemesi:
+    """
+    Bir yarış kartının profil indirme ilerlemesini aktif işe yazar.
+    İş dışında çağrılırsa hiçbir şey yapmaz.
+    """
+
+    def __init__(self, kosu_numaralari):
+        self.job = current_job()
+        self._kalan = Counter(kosu_numaralari)
+        self._lock = threading.Lock()
+        if self.job:
+            get_queue().ilerleme_ekle(self.job, kosu_toplam=len(self._kalan), at_toplam=sum(self._kalan.values()))
+
+    def at_bitti(self, kosu_no):
+        if not self.job:
+            return
+        with self._lock:
+            self._kalan[kosu_no] -= 1
+            kosu_bitti = self._kalan[kosu_no] == 0
+        get_queue().ilerleme_ekle(self.job, at_tamam=1, kosu_tamam=1 if kosu_bitti else 0)
+
+    def profiller(self, atlanan, indirilen):
+        """Depodan gelen (indirilmeyen) ve indirilen profil sayıları"""
+        if self.job:
+            get_queue().ilerleme_ekle(self.job, profil_atlanan=atlanan, profil_indirilen=indirilen)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+PİST HIZI KALİBRASYONU
+SEHIR_PIST_HIZLARI'ndaki (hipodrom, pist) ortalama hızları elle girilmiş
+değerler yerine kayıtlı geçmişten yeniden hesaplar. Kaynaklar:
+
+  - veri ambarı past_runs (profillerden gelen geçmiş koşular),
+  - profil deposundaki geçmiş koşular,
+  - kayıtlı kartların son koşu alanları (Son Hipodrom/Pist/Mesafe/Derece),
+  - kesinleşmiş sonuçlar (kartın bugünkü mesafe ve pistiyle birleştirilir).
+
+Aynı koşu birden fazla kaynakta bulunabildiği için (at, şehir_pist, mesafe,
+derece) bazında tekilleştirilir. Mesafe bileşimi hipodromdan hipodroma
+değiştiğinden her koşunun hızı kendi mesafe aralığının (race_entry.MESAFE_ARALIKLARI)
+ortalamasına bölünür; bir anahtarın hızı bu oranların ortalamasıdır ve
+kalibre edilen anahtarlarda varsayılan hızların ölçeğine getirilir. En az
+KADAPT_MIN_RUNS koşusu olmayan anahtarlar varsayılan değerini korur.
+
+Sonuç sürümlü bir JSON olarak KADAPT_COEFFICIENTS dosyasına atomik yazılır
+(önceki sürümler arsiv/ altında saklanır); horse_scraper dosya değişimini
+görüp k_adapt tablosunu yeniden yükler. Hızlar değişmediyse dosyaya dokunulmaz;
+dosyadaki şehir katsayıları ve skor faktörleri (param_sweep.py --uygula) korunur.
+
+Kullanım:
+    python kadapt_calibration.py [--min-kosu 30] [--kuru]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import columnar_store
+import profile_store
+import race_warehouse
+import results_store
+from horse_scraper import KADAPT_KATSAYI_DOSYASI, VARSAYILAN_SEHIR_PIST_HIZLARI, get_sehir_pist_key
+from race_entry import MESAFE_ARALIKLARI, derece_saniye, sayi
+
+MIN_KOSU = int(os.environ.get('KADAPT_MIN_RUNS', '30'))
+
+# Ayrıştırma hatalarını (eksik derece, yanlış mesafe) elemek için makul aralıklar
+HIZ_ARALIGI = (10.0, 20.0)        # m/s
+MESAFE_ARALIGI = (800.0, 4000.0)  # metre
+
+_SUTUNLAR = ('kaynak', 'kimlik', 'hipodrom', 'pist', 'mesafe', 'derece')
+# Kartlar sütunsal depodan tipli sütunlarla okunur (mesafe/derece yeniden ayrıştırılmaz)
+_KART_SUTUNLARI = ['city', 'date', 'Koşu', 'At İsmi', 'Profil Linki', 'Şehir', 'Son Hipodrom', 'Son Pist',
+                   'Bugünkü Pist', 'son_mesafe_m', 'bugun_mesafe_m', 'son_derece_sn']
+
+
+def _ham_kosular(kaynak, satirlar):
+    """(kimlik, hipodrom, pist, mesafe str, derece str) satırları -> DataFrame (mesafe m, derece sn)"""
+    return pd.DataFrame([(kaynak, str(kimlik), hipodrom, pist, sayi(mesafe), derece_saniye(derece))
+                         for kimlik, hipodrom, pist, mesafe, derece in satirlar], columns=_SUTUNLAR)
+
+
+def _ambar_kosulari():
+    if not race_warehouse.WAREHOUSE_AKTIF:
+        return _ham_kosular('ambar', [])
+    try:
+        satirlar = race_warehouse.query('SELECT at_id, hipodrom, mesafe, pist, derece FROM past_runs')
+    except sqlite3.Error as e:
+        print(f"[UYARI] Veri ambarı okunamadı: {e}")
+        satirlar = []
+    return _ham_kosular('ambar', ((s['at_id'], s['hipodrom'], s['pist'], s['mesafe'], s['derece']) for s in satirlar))
+
+
+def _profil_kosulari():
+    return _ham_kosular('profil', ((kimlik, k.get('hipodrom', ''), k.get('pist', ''), k.get('mesafe', ''),
+                                    k.get('derece', '')) for kimlik, k in profile_store.past_runs()))
+
+
+def _kart_ve_sonuc_kosulari():
+    """Kartların son koşu alanları ve kartın bugünkü koşularının sonuç dereceleri"""
+    kartlar = columnar_store.load_frame(columns=_KART_SUTUNLARI)
+    if kartlar.empty:
+        return _ham_kosular('kart', [])
+    kartlar = kartlar.astype({'city': str, 'date': str, 'Koşu': str})
+    kartlar['isim'] = kartlar['At İsmi'].fillna('').map(race_warehouse.isim_anahtari)
+    kartlar['kimlik'] = kartlar['Profil Linki'].str.extract(r'/at/(\d+)', expand=False).fillna('isim:' + kartlar['isim'])
+
+    kart_kosulari = pd.DataFrame({
+        'kaynak': 'kart', 'kimlik': kartlar['kimlik'], 'hipodrom': kartlar['Son Hipodrom'],
+        'pist': kartlar['Son Pist'], 'mesafe': kartlar['son_mesafe_m'], 'derece': kartlar['son_derece_sn'],
+    })
+
+    sonuclar = pd.DataFrame(
+        [(city, tarih, str(kosu), race_warehouse.isim_anahtari(r.get('at_ismi', '')), derece_saniye(r.get('derece', '')))
+         for (city, tarih), results in results_store.load_range().items()
+         for kosu, satirlar in results.items() for r in satirlar],
+        columns=['city', 'date', 'Koşu', 'isim', 'derece'])
+    if sonuclar.empty:
+        return kart_kosulari
+
+    # Koşunun hipodromu/pisti/mesafesi kartın ilk atından; sonuçtaki at karttaki atla eşlenir
+    anahtar = ['city', 'date', 'Koşu']
+    kosular = kartlar.drop_duplicates(anahtar)[anahtar + ['Şehir', 'Bugünkü Pist', 'bugun_mesafe_m']]
+    atlar = kartlar.drop_duplicates(anahtar + ['isim'])[anahtar + ['isim', 'kimlik']]
+    sonuclar = sonuclar.merge(kosular, on=anahtar).merge(atlar, on=anahtar + ['isim'], how='left')
+    sonuclar['kimlik'] = sonuclar['kimlik'].fillna('isim:' + sonuclar['isim'])
+    sonuc_kosulari = pd.DataFrame({
+        'kaynak': 'sonuc', 'kimlik': sonuclar['kimlik'], 'hipodrom': sonuclar['Şehir'],
+        'pist': sonuclar['Bugünkü Pist'], 'mesafe': sonuclar['bugun_mesafe_m'], 'derece': sonuclar['derece'],
+    })
+    return pd.concat([kart_kosulari, sonuc_kosulari], ignore_index=True)
+
+
+def load_runs():
+    """
+    Tüm kaynaklardan tekilleştirilmiş, makul hızdaki koşular
+
+    Returns:
+        DataFrame: kaynak, kimlik, anahtar (şehir_pist), mesafe (m), derece (sn), hiz (m/s)
+    """
+    cerceveler = [c for c in (_ambar_kosulari(), _profil_kosulari(), _kart_ve_sonuc_kosulari()) if not c.empty]
+    if not cerceveler:
+        return pd.DataFrame(columns=['kaynak', 'kimlik', 'mesafe', 'derece', 'anahtar', 'hiz'])
+    df = pd.concat(cerceveler, ignore_index=True)
+
+    # Aynı ham (hipodrom, pist) çiftleri bir kez normalize edilir
+    df['anahtar'] = [get_sehir_pist_key(h, p) for h, p in zip(df['hipodrom'], df['pist'])]
+    df['mesafe'] = pd.to_numeric(df['mesafe'], errors='coerce')
+    df['derece'] = pd.to_numeric(df['derece'], errors='coerce')
+    df = df[~df['anahtar'].str.contains('unknown')].dropna(subset=['mesafe', 'derece'])
+    df = df.assign(hiz=df['mesafe'] / df['derece'])
+    df = df[df['mesafe'].between(*MESAFE_ARALIGI) & df['hiz'].between(*HIZ_ARALIGI)]
+    return (df.drop_duplicates(subset=['kimlik', 'anahtar', 'mesafe', 'derece'])
+              .drop(columns=['hipodrom', 'pist']).reset_index(drop=True))
+
+
+def _bantlar(mesafe):
+    etiketler = np.array([etiket for _, etiket in MESAFE_ARALIKLARI] + ['2100+'])
+    return etiketler[np.searchsorted([sinir for sinir, _ in MESAFE_ARALIKLARI], mesafe, side='left')]
+
+
+def hesapla(df, min_kosu=None):
+    """
+    Koşulardan şehir_pist hızlarını hesapla
+
+    Returns:
+        dict: sehir_pist_hizlari (tüm anahtarlar; kalibre edilmeyenler varsayılan),
+              kalibre_edilen, mesafe_bantlari, kosu_sayisi, kaynaklar, min_kosu
+    """
+    min_kosu = MIN_KOSU if min_kosu is None else min_kosu
+    hizlar = dict(VARSAYILAN_SEHIR_PIST_HIZLARI)
+    sonuc = {
+        'min_kosu': min_kosu,
+        'kosu_sayisi': int(len(df)),
+        'kaynaklar': {k: int(v) for k, v in df['kaynak'].value_counts().items()} if len(df) else {},
+        'sehir_pist_hizlari': hizlar,
+        'kalibre_edilen': {},
+        'mesafe_bantlari': {},
+    }
+    if df.empty:
+        return sonuc
+
+    df = df.assign(bant=_bantlar(df['mesafe'].to_numpy()))
+    df['oran'] = df['hiz'] / df.groupby('bant')['hiz'].transform('mean')
+
+    bantlar = df.groupby(['anahtar', 'bant'])['hiz'].agg(['size', 'mean'])
+    for (anahtar, bant), satir in bantlar.iterrows():
+        sonuc['mesafe_bantlari'].setdefault(anahtar, {})[bant] = {
+            'kosu': int(satir['size']), 'ortalama_hiz': round(float(satir['mean']), 4)}
+
+    gruplar = df.groupby('anahtar').agg(kosu=('oran', 'size'), oran=('oran', 'mean'))
+    gruplar = gruplar[gruplar['kosu'] >= min_kosu]
+    if gruplar.empty:
+        return sonuc
+
+    # Oranlar, kalibre edilen anahtarların varsayılan hız ortalamasına ölçeklenir; böylece
+    # kalibre edilmemiş anahtarlarla k_adapt oranları tutarlı kalır
+    ortak = [a for a in gruplar.index if a in VARSAYILAN_SEHIR_PIST_HIZLARI]
+    if ortak:
+        olcek = np.mean([VARSAYILAN_SEHIR_PIST_HIZLARI[a] for a in ortak]) / gruplar.loc[ortak, 'oran'].mean()
+    else:
+        olcek = df['hiz'].mean()
+
+    for anahtar, satir in gruplar.iterrows():
+        hiz = round(float(satir['oran'] * olcek), 4)
+        hizlar[anahtar] = hiz
+        sonuc['kalibre_edilen'][anahtar] = {
+            'kosu': int(satir['kosu']), 'hiz': hiz, 'varsayilan': VARSAYILAN_SEHIR_PIST_HIZLARI.get(anahtar)}
+    sonuc['sehir_pist_hizlari'] = dict(sorted(hizlar.items()))
+    return sonuc
+
+
+# Skorlamayı etkileyen bölümler; hızlar dışındakiler (param_sweep --uygula yazar) verilmezse korunur
+KATSAYI_ALANLARI = ('sehir_pist_hizlari', 'sehir_katsayilari', 'skor_faktorleri')
+
+
+def _ozet(katsayilar):
+    return hashlib.sha256(json.dumps(katsayilar, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def _mevcut(dosya):
+    try:
+        with open(dosya, 'r', encoding='utf-8') as f:
+            veri = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return veri if isinstance(veri, dict) else {}
+
+
+def yaz(sonuc, dosya=KADAPT_KATSAYI_DOSYASI):
+    """
+    Katsayı tablosunu sürümleyip atomik yaz. sonuc'ta olmayan şehir
+    katsayıları ve skor faktörleri mevcut dosyadan aynen alınır.
+
+    Returns:
+        str | None: Yeni sürüm; katsayılar değişmediyse None
+    """
+    mevcut = _mevcut(dosya)
+    sonuc = {**{alan: mevcut[alan] for alan in KATSAYI_ALANLARI[1:] if alan in mevcut}, **sonuc}
+    ozet = _ozet({alan: sonuc[alan] for alan in KATSAYI_ALANLARI if alan in sonuc})
+    if mevcut.get('ozet') == ozet:
+        return None
+
+    surum = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{ozet[:8]}"
+    icerik = json.dumps({'surum': surum, 'ozet': ozet, 'olusturma': datetime.now().isoformat(timespec='seconds'),
+                         **sonuc}, ensure_ascii=False, indent=2)
+
+    dizin = os.path.dirname(dosya) or '.'
+    arsiv = os.path.join(dizin, 'arsiv')
+    os.makedirs(arsiv, exist_ok=True)
+    with open(os.path.join(arsiv, f"sehir_pist_hizlari_{surum}.json"), 'w', encoding='utf-8') as f:
+        f.write(icerik)
+
+    fd, gecici = tempfile.mkstemp(prefix='.sehir_pist_hizlari_', suffix='.json.tmp', dir=dizin)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(icerik)
+        os.replace(gecici, dosya)
+    except BaseException:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+        raise
+    return surum
+
+
+def calibrate(min_kosu=None, kaydet=True):
+    """
+    Kayıtlı geçmişten pist hızlarını yeniden hesapla ve (değiştiyse) yaz
+
+    Returns:
+        dict: hesapla() çıktısı + surum (değişmediyse/kaydedilmediyse None), dosya, sure
+    """
+    baslangic = time.perf_counter()
+    sonuc = hesapla(load_runs(), min_kosu)
+    sonuc['surum'] = yaz(sonuc) if kaydet else None
+    sonuc['dosya'] = KADAPT_KATSAYI_DOSYASI
+    sonuc['sure'] = round(time.perf_counter() - baslangic, 3)
+    return sonuc
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Şehir/pist hızlarını kayıtlı geçmişten kalibre et')
+    parser.add_argument('--min-kosu', type=int, default=None, help=f'Anahtar başına en az koşu (varsayılan: {MIN_KOSU})')
+    parser.add_argument('--kuru', action='store_true', help='Hesapla ama dosyaya yazma')
+    args = parser.parse_args()
+
+    sonuc = calibrate(args.min_kosu, kaydet=not args.kuru)
+    kaynaklar = ', '.join(f"{k}: {v}" for k, v in sorted(sonuc['kaynaklar'].items()))
+    print(f"[KADAPT] {sonuc['kosu_sayisi']} koşu ({kaynaklar or 'veri yok'}) - {sonuc['sure']:.2f} sn")
+    if not sonuc['kalibre_edilen']:
+        print(f"[UYARI] En az {sonuc['min_kosu']} koşusu olan şehir/pist yok; varsayılan hızlar geçerli")
+        return 1
+
+    print(f"\n{'Şehir_Pist':<18}{'Koşu':>7}{'Varsayılan':>12}{'Kalibre':>10}")
+    for anahtar, bilgi in sonuc['kalibre_edilen'].items():
+        varsayilan = f"{bilgi['varsayilan']:.4f}" if bilgi['varsayilan'] is not None else '-'
+        print(f"{anahtar:<18}{bilgi['kosu']:>7}{varsayilan:>12}{bilgi['hiz']:>10.4f}")
+
+    if args.kuru:
+        print("\n[TAMAM] Kuru çalıştırma; dosya yazılmadı")
+    elif sonuc['surum']:
+        print(f"\n[TAMAM] Yeni sürüm {sonuc['surum']} yazıldı: {sonuc['dosya']}")
+    else:
+        print(f"\n[TAMAM] Hızlar değişmedi; {sonuc['dosya']} korunuyor")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,7 +7,9 @@ At yarisi sonuclarindan kazanan atin derecesini ceker
 """
 
 import requests
-from bs4 import BeautifulSoup
+import http_client
+import artifact_catalog
+from html_parser import make_soup, SONUC_SECICI
 import csv
 import os
 from datetime import datetime
@@ -32,10 +34,8 @@ SEHIRLER = {
 
 class KazananCiktiScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Tüm modüller tek havuzlu oturumu paylaşır
+        self.session = http_client.get_session()
         
     def get_kazanan_derece(self, tarih, sehir, kosu_no, at_id):
         """
@@ -57,11 +57,11 @@ class KazananCiktiScraper:
             logging.info(f"Veri cekiliyor: {url}")
             
             # Sayfayi cek
-            response = self.session.get(url, timeout=10)
+            response = http_client.get_cached(url)
             response.raise_for_status()
             
             # HTML parse et
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content, SONUC_SECICI)
             
             # Kazanan ati bul (1. siradaki at)
             table = soup.find('table', class_='kosanAtlar')
@@ -155,6 +155,7 @@ class KazananCiktiScraper:
                     writer.writeheader()
                     writer.writerows(data)
             
+            artifact_catalog.register(filepath)
             logging.info(f"CSV kaydedildi: {filepath}")
             return filepath
             
@@ -46,6 +46,7 @@ class User(UserMixin, db.Model):
     user_notifications = db.relationship('Notification', backref='user', lazy=True, cascade='all, delete-orphan')
     user_conversations = db.relationship('Conversation', backref='user', lazy=True, cascade='all, delete-orphan')
     user_sent_messages = db.relationship('ConversationMessage', foreign_keys='ConversationMessage.sender_id', backref='sender', lazy=True, cascade='all, delete-orphan')
+    download_records = db.relationship('DownloadRecord', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
         """Güvenli şifre hashleme - bcrypt kullanarak"""
@@ -185,6 +186,17 @@ class User(UserMixin, db.Model):
         
         db.session.commit()
     
+    def release_analysis_count(self):
+        """Başarısız analiz için önceden ayrılan hakkı geri ver"""
+        from datetime import date
+        
+        # Premium sayacı gün değiştiyse zaten sıfırlanmıştır
+        if self.is_premium_active() and self.last_analysis_date != date.today():
+            return
+        if self.daily_analysis_count:
+            self.daily_analysis_count -= 1
+            db.session.commit()
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -210,6 +222,22 @@ class AnalysisHistory(db.Model):
     def __repr__(self):
         return f'<AnalysisHistory {self.city} - {self.analysis_date}>'
 
+class DownloadRecord(db.Model):
+    """Kullanıcı indirme kaydı - dosya içeriği artifact deposunda hash ile tutulur"""
+    __tablename__ = 'download_record'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), unique=True, nullable=False)  # {şehir}_analiz_..._user{id}.csv
+    artifact_hash = db.Column(db.String(64), nullable=False, index=True)  # İçeriğin sha256 özeti
+    city = db.Column(db.String(50))
+    kind = db.Column(db.String(20), default='analiz')
+    size = db.Column(db.Integer)  # Sıkıştırılmamış boyut (byte)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DownloadRecord {self.filename} -> {self.artifact_hash[:10]}>'
+
 class SystemSettings(db.Model):
     """Sistem ayarları"""
     id = db.Column(db.Integer, primary_key=True)
@@ -6,8 +6,11 @@ OTOMATIK KAZANAN CIKTI SCRAPER
 Mevcut JSON dosyalarindan at bilgilerini alip kazanan verilerini ceker
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import artifact_catalog
+from html_parser import make_soup, PROFIL_SECICI
+import race_results
+from race_results import get_race_result
 import csv
 import os
 import json
@@ -22,10 +25,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 class OtomatikKazananScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Tüm modüller tek havuzlu oturumu paylaşır
+        self.session = http_client.get_session()
         
     def get_at_id_from_link(self, profil_link):
         """
@@ -101,51 +102,33 @@ class OtomatikKazananScraper:
     def get_onceki_kosu_birincisi(self, onceki_kosu_url):
         """
         Verilen onceki kosu URL'sindeki birinci atin bilgilerini cek
+        (sonuc sayfasi race_results uzerinden bir kez cekilir)
         """
         try:
             logging.info(f"Onceki kosu birincisi cekiliyor: {onceki_kosu_url}")
             
-            response = self.session.get(onceki_kosu_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Birinci ati bul (1. siradaki at)
-            table = soup.find('table', class_='kosanAtlar')
-            if not table:
+            sonuc = get_race_result(onceki_kosu_url)
+            if sonuc['hata'] == 'tablo':
                 logging.error(f"Sonuc tablosu bulunamadi: {onceki_kosu_url}")
                 return None
-            
-            tbody = table.find('tbody')
-            if not tbody:
+            if sonuc['hata'] == 'tbody':
                 logging.error("Tablo body bulunamadi")
                 return None
-            
-            first_row = tbody.find('tr')
-            if not first_row:
+            if not sonuc['siralama']:
                 logging.error("Ilk satir bulunamadi")
                 return None
             
-            cells = first_row.find_all('td')
-            if len(cells) < 9:
-                logging.error("Yeterli hucre bulunamadi")
-                return None
-            
             # Birinci at bilgileri
-            sira = cells[0].get_text(strip=True)
-            at_ismi_cell = cells[1].find('a', class_='atisimlink')
-            at_ismi = at_ismi_cell.get_text(strip=True) if at_ismi_cell else "Bilinmiyor"
-            derece = cells[8].get_text(strip=True) if cells[8] else "Bilinmiyor"
-            ganyan = cells[9].get_text(strip=True) if len(cells) > 9 else "Bilinmiyor"
+            birinci = sonuc['siralama'][0]
             
             result = {
-                'birinci_at_ismi': at_ismi,
-                'birinci_at_derece': derece,
-                'birinci_at_ganyan': ganyan,
+                'birinci_at_ismi': birinci['at_ismi'] or "Bilinmiyor",
+                'birinci_at_derece': birinci['derece'] or "Bilinmiyor",
+                'birinci_at_ganyan': birinci['ganyan'] or "Bilinmiyor",
                 'url': onceki_kosu_url
             }
             
-            logging.info(f"Basarili: Onceki kosu birincisi: {at_ismi} ({derece})")
+            logging.info(f"Basarili: Onceki kosu birincisi: {result['birinci_at_ismi']} ({result['birinci_at_derece']})")
             return result
             
         except Exception as e:
@@ -161,10 +144,10 @@ class OtomatikKazananScraper:
             profil_url = f"https://yenibeygir.com/at/{at_id}"
             logging.info(f"At profili cekiliyor: {profil_url}")
             
-            response = self.session.get(profil_url, timeout=10)
+            response = http_client.get_cached(profil_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content, PROFIL_SECICI)
             
             # Kosu gecmisi tablosunu bul (at_Yarislar class'i)
             kosu_table = soup.find('table', class_='at_Yarislar')
@@ -227,7 +210,6 @@ class OtomatikKazananScraper:
             
             # Her at icin gecmis kosu kazananini cek
             results = []
-            processed_past_races = {}  # Ayni gecmis kosuyu birden fazla kez cekmeyi onle
             
             for i, horse in enumerate(horses, 1):
                 try:
@@ -249,15 +231,8 @@ class OtomatikKazananScraper:
                         logging.warning(f"  Onceki kosu URL'si bulunamadi, atlanıyor")
                         continue
                     
-                    # Cache kontrolu
-                    if onceki_kosu_url in processed_past_races:
-                        cached_result = processed_past_races[onceki_kosu_url].copy()
-                        cached_result['at_ismi'] = at_ismi
-                        cached_result['at_id'] = at_id
-                        cached_result['bugun_kosu_no'] = kosu_no
-                        results.append(cached_result)
-                        logging.info(f"  Cache'den alindi: {onceki_kosu_url}")
-                        continue
+                    # Ayni gecmis kosu race_results tarafindan bir kez cekilir
+                    onbellekte = race_results.onbellekte_mi(onceki_kosu_url)
                     
                     # Bu atin onceki kosusundaki birinci ati cek
                     birinci_result = self.get_onceki_kosu_birincisi(onceki_kosu_url)
@@ -280,15 +255,13 @@ class OtomatikKazananScraper:
                         
                         results.append(result)
                         
-                        # Cache'e kaydet
-                        processed_past_races[onceki_kosu_url] = result.copy()
-                        
                         logging.info(f"  Basarili: {at_ismi} -> Onceki kosu birincisi: {birinci_result['birinci_at_ismi']} ({birinci_result['birinci_at_derece']})")
                     else:
                         logging.warning(f"  Onceki kosu birincisi bulunamadi")
                     
-                    # Rate limiting
-                    time.sleep(2)
+                    # Rate limiting (sadece siteye gidildiyse)
+                    if not onbellekte:
+                        time.sleep(2)
                     
                 except Exception as e:
                     at_ismi_safe = horse.get('At İsmi', 'Bilinmiyor At') if 'horse' in locals() else 'Bilinmiyor At'
@@ -351,6 +324,7 @@ class OtomatikKazananScraper:
                     writer.writeheader()
                     writer.writerows(data)
             
+            artifact_catalog.register(filepath)
             logging.info(f"CSV kaydedildi: {filepath}")
             return filepath
             
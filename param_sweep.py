@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SKOR SABİTLERİ PARAMETRE TARAMASI
+Mesafe faktörleri (uzun 0.04 / kısa -0.03), kilo katsayısı (0.02),
+SEHIR_KATSAYILARI ve SEHIR_PIST_HIZLARI için ızgara ya da rastgele arama
+yapar ve parametre setlerini kazanan isabet oranına göre sıralar.
+
+Kartlar ve sonuçlar backtest.load_history ile bir kez yüklenir; string
+alanlar vector_scoring.parse_columns ile bir kez ayrıştırılır. Her süreç bu
+dizileri başlangıçta bir kez alır ve parametre setlerini partiler halinde
+(K set x n at matrisleri) vector_scoring.compute_scores ile skorlar.
+
+İsabet: koşuda en düşük skorlu (geçerli) atın 1. gelmesi; koşu sayısı
+perform_comparison'daki gibi sonucu olan koşulardır.
+
+Başlangıç seti üretimde kullanılan tek settir (horse_scraper: skor faktörleri,
+şehir katsayıları ve pist hızları, kalibrasyon dosyası dahil). --uygula en iyi
+seti bu dosyaya (KADAPT_COEFFICIENTS) yazar; Python motoru, vector_scoring ve
+scoring_pipeline dosya değişimini görüp yeni seti kullanır.
+
+Kullanım:
+    python param_sweep.py izgara [--uzun 0.03,0.04,0.05] [--kisa -0.04,-0.03,-0.02]
+                          [--kilo 0.01,0.02,0.03] [--sehir-olcek 0,1] [--pist-olcek 1]
+    python param_sweep.py rastgele [--deneme 500] [--gurultu 0.01] [--tohum 1]
+    ortak: [--baslangic YYYYMMDD] [--bitis YYYYMMDD] [--sehirler istanbul,ankara]
+           [--isci 4] [--ilk 20] [--json cikti.json] [--uygula]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import horse_scraper
+import kadapt_calibration
+import vector_scoring
+from backtest import load_history
+from race_entry import kosu_no
+from results_scraper import are_names_similar, clean_horse_name
+
+ISCI_SAYISI = int(os.environ.get('BACKTEST_WORKERS', str(os.cpu_count() or 1)))
+# Tek seferde skorlanan parametre seti sayısı (K x n matris)
+PARTI = 32
+
+
+def _liste(metin):
+    return [float(x) for x in metin.split(',') if x.strip()]
+
+
+def girdileri_hazirla(gecmis):
+    """
+    Parametreden bağımsız girdiler: ayrıştırılmış sütunlar, k_adapt indeksleri,
+    koşu grupları ve her satırın gerçek kazanan olup olmadığı
+
+    Args:
+        gecmis: backtest.load_history çıktısı {(şehir, tarih): (atlar, sonuçlar)}
+    """
+    anahtarlar = list(gecmis)
+    sutunlar = vector_scoring.build_columns([(gecmis[a][0], a[0]) for a in anahtarlar])
+    ayrik = vector_scoring.parse_columns(sutunlar)
+    ayrik.pop('kosullar')
+    grup, grup_ilk = vector_scoring._gruplar(sutunlar)
+
+    # k_adapt = hız(geçmiş)/hız(hedef) * şehir(geçmiş)/şehir(hedef); tabloda olmayan çiftler 1.0
+    pist_anahtarlari = list(horse_scraper.SEHIR_PIST_HIZLARI)
+    sehirler = list(dict.fromkeys(k.rsplit('_', 1)[0] for k in pist_anahtarlari))
+    pist_no = {k: i for i, k in enumerate(pist_anahtarlari)}
+    sehir_no = {s: i for i, s in enumerate(sehirler)}
+    kosullar = zip(sutunlar['gecmis_sehir'], sutunlar['son_pist'], sutunlar['sehir'], sutunlar['bugun_pist'])
+    indeksler = []
+    for gs, gp, hs, hp in kosullar:
+        gecmis_anahtar = horse_scraper.get_sehir_pist_key(gs, gp)
+        hedef_anahtar = horse_scraper.get_sehir_pist_key(hs, hp)
+        if gecmis_anahtar in pist_no and hedef_anahtar in pist_no:
+            indeksler.append((pist_no[gecmis_anahtar], pist_no[hedef_anahtar],
+                              sehir_no[gecmis_anahtar.rsplit('_', 1)[0]], sehir_no[hedef_anahtar.rsplit('_', 1)[0]]))
+        else:
+            indeksler.append((-1, -1, -1, -1))
+    indeksler = np.array(indeksler, dtype=np.int64).reshape(-1, 4)
+
+    # Gerçek kazanan: sonuçtaki 1. at ile isim eşleşmesi (perform_comparison ile aynı kural)
+    atlar = sutunlar['atlar']
+    kart = sutunlar['kart'].tolist()
+    kazanan = np.zeros(len(atlar), dtype=bool)
+    sayilan = np.zeros(len(grup_ilk), dtype=bool)
+    for g, ilk in enumerate(grup_ilk.tolist()):
+        numara = kosu_no(atlar[ilk].get('Koşu', ''))
+        sonuc = gecmis[anahtarlar[kart[ilk]]][1].get(numara) if numara else None
+        if sonuc is None:
+            continue
+        sayilan[g] = True
+        birinci = next((r for r in sonuc if r['sira'] == 1), None)
+        if birinci is None:
+            continue
+        birinci_isim = clean_horse_name(birinci['at_ismi'])
+        son = grup_ilk[g + 1] if g + 1 < len(grup_ilk) else len(atlar)
+        for i in range(ilk, son):
+            kazanan[i] = are_names_similar(clean_horse_name(atlar[i].get('At İsmi', '')), birinci_isim)
+
+    return {
+        'ayrik': ayrik,
+        'indeksler': indeksler,
+        'grup_ilk': grup_ilk,
+        'sayilan': sayilan,
+        'kazanan': kazanan,
+        'pist_anahtarlari': pist_anahtarlari,
+        'sehirler': sehirler,
+    }
+
+
+def varsayilan_parametreler(girdiler):
+    """Üretimdeki güncel set (kalibrasyon dosyası varsa onunla)"""
+    uzun, kisa, kilo = horse_scraper.skor_faktorleri()
+    return {
+        'uzun': uzun,
+        'kisa': kisa,
+        'kilo': kilo,
+        'sehir': np.array([horse_scraper.SEHIR_KATSAYILARI.get(s, 1.0) for s in girdiler['sehirler']]),
+        'hiz': np.array([horse_scraper.SEHIR_PIST_HIZLARI[k] for k in girdiler['pist_anahtarlari']]),
+    }
+
+
+def izgara(girdiler, uzunlar, kisalar, kilolar, sehir_olcekleri, pist_olcekleri):
+    """
+    Izgara araması: şehir katsayılarının 1'den, pist hızlarının ortalamadan
+    sapmaları ölçek ile çarpılır (1 = mevcut tablo, 0 = düz tablo)
+    """
+    v = varsayilan_parametreler(girdiler)
+    ort_hiz = v['hiz'].mean()
+    setler = []
+    for uzun, kisa, kilo, so, po in itertools.product(uzunlar, kisalar, kilolar, sehir_olcekleri, pist_olcekleri):
+        setler.append({
+            'uzun': uzun, 'kisa': kisa, 'kilo': kilo,
+            'sehir': 1 + so * (v['sehir'] - 1),
+            'hiz': ort_hiz + po * (v['hiz'] - ort_hiz),
+            'etiket': f"şehir x{so:g}, pist x{po:g}",
+        })
+    return setler
+
+
+def rastgele(girdiler, deneme, gurultu, tohum=None):
+    """
+    Rastgele arama: faktörler mevcut değerin ±%50'si içinde düzgün, şehir
+    katsayıları ve pist hızları log-normal gürültüyle örneklenir
+    """
+    v = varsayilan_parametreler(girdiler)
+    rng = np.random.default_rng(tohum)
+    setler = []
+    for i in range(deneme):
+        setler.append({
+            'uzun': float(rng.uniform(0.5, 1.5) * v['uzun']),
+            'kisa': float(rng.uniform(0.5, 1.5) * v['kisa']),
+            'kilo': float(rng.uniform(0.5, 1.5) * v['kilo']),
+            'sehir': v['sehir'] * np.exp(rng.normal(0, gurultu, len(v['sehir']))),
+            'hiz': v['hiz'] * np.exp(rng.normal(0, gurultu, len(v['hiz']))),
+            'etiket': f"rastgele #{i + 1}",
+        })
+    return setler
+
+
+_GIRDILER = None
+
+
+def _isci_baslat(girdiler):
+    global _GIRDILER
+    _GIRDILER = girdiler
+
+
+def _parti_skorla(parti):
+    """
+    Süreç havuzu işi: K parametre setinin isabet sayıları
+
+    Args:
+        parti: (uzun (K,), kisa (K,), kilo (K,), şehir (K, C), hız (K, P)) dizileri
+    """
+    return isabetler(_GIRDILER, *parti)
+
+
+def isabetler(girdiler, uzun, kisa, kilo, sehir, hiz):
+    """Her parametre seti için isabet eden koşu sayısı (K,)"""
+    ayrik = girdiler['ayrik']
+    gp, hp, gs, hs = girdiler['indeksler'].T
+    bilinen = gp >= 0
+    with np.errstate(all='ignore'):
+        kadapt = np.where(bilinen, (hiz[:, gp] / hiz[:, hp]) * (sehir[:, gs] / sehir[:, hs]), 1.0)
+    kesik, gecerli = vector_scoring.compute_scores(ayrik, kadapt, uzun[:, None], kisa[:, None], kilo[:, None])
+
+    # Koşu başına en düşük geçerli skorlu ilk at
+    n = kesik.shape[1]
+    ilk = girdiler['grup_ilk']
+    anahtar = np.where(gecerli, kesik, np.inf)
+    en_dusuk = np.minimum.reduceat(anahtar, ilk, axis=1)
+    grup_no = np.repeat(np.arange(len(ilk)), np.diff(np.append(ilk, n)))
+    aday = gecerli & (anahtar == en_dusuk[:, grup_no])
+    secilen = np.minimum.reduceat(np.where(aday, np.arange(n), n), ilk, axis=1)
+
+    kazanan = np.append(girdiler['kazanan'], False)
+    isabet = kazanan[secilen] & girdiler['sayilan']
+    return isabet.sum(axis=1)
+
+
+def run_sweep(setler, girdiler, isci=None):
+    """
+    Parametre setlerini paralel skorla ve isabet oranına göre sırala
+
+    Returns:
+        list: [{'isabet', 'kosu', 'oran', parametreler...}, ...] en iyiden kötüye
+    """
+    dizi = {
+        'uzun': np.array([s['uzun'] for s in setler], dtype=float),
+        'kisa': np.array([s['kisa'] for s in setler], dtype=float),
+        'kilo': np.array([s['kilo'] for s in setler], dtype=float),
+        'sehir': np.array([s['sehir'] for s in setler], dtype=float),
+        'hiz': np.array([s['hiz'] for s in setler], dtype=float),
+    }
+    partiler = [tuple(dizi[ad][i:i + PARTI] for ad in ('uzun', 'kisa', 'kilo', 'sehir', 'hiz'))
+                for i in range(0, len(setler), PARTI)]
+
+    isci = max(1, min(isci or ISCI_SAYISI, len(partiler)))
+    if isci > 1:
+        with ProcessPoolExecutor(max_workers=isci, initializer=_isci_baslat, initargs=(girdiler,)) as executor:
+            sonuclar = list(executor.map(_parti_skorla, partiler))
+    else:
+        sonuclar = [isabetler(girdiler, *parti) for parti in partiler]
+    isabet = np.concatenate(sonuclar) if sonuclar else np.zeros(0, dtype=np.int64)
+
+    kosu = int(girdiler['sayilan'].sum())
+    sirali = []
+    for i in np.argsort(-isabet, kind='stable').tolist():
+        s = setler[i]
+        sirali.append({
+            'isabet': int(isabet[i]),
+            'kosu': kosu,
+            'oran': round(isabet[i] / kosu * 100, 2) if kosu else 0,
+            'etiket': s['etiket'],
+            'uzun': s['uzun'],
+            'kisa': s['kisa'],
+            'kilo': s['kilo'],
+            'sehir_katsayilari': dict(zip(girdiler['sehirler'], np.round(s['sehir'], 5).tolist())),
+            'sehir_pist_hizlari': dict(zip(girdiler['pist_anahtarlari'], np.round(s['hiz'], 4).tolist())),
+        })
+    return sirali
+
+
+def uygula(s, dosya=None):
+    """
+    Seti tüm skor motorlarının okuduğu kalibrasyon dosyasına yaz
+
+    Returns:
+        str | None: Yeni sürüm; set dosyadakiyle aynıysa None
+    """
+    return kadapt_calibration.yaz({
+        'kaynak': f"param_sweep: {s['etiket']} (isabet %{s['oran']})",
+        'sehir_pist_hizlari': s['sehir_pist_hizlari'],
+        'sehir_katsayilari': s['sehir_katsayilari'],
+        'skor_faktorleri': {'uzun_mesafe': s['uzun'], 'kisa_mesafe': s['kisa'], 'kilo': s['kilo']},
+    }, dosya or horse_scraper.KADAPT_KATSAYI_DOSYASI)
+
+
+def _dogrula(girdiler, gecmis):
+    """Varsayılan parametrelerle skorlar vektörel motorun skorlarıyla aynı olmalı"""
+    v = varsayilan_parametreler(girdiler)
+    sutunlar = vector_scoring.build_columns([(horses, city) for (city, _), (horses, _) in gecmis.items()])
+    beklenen = vector_scoring.score_columns(sutunlar)
+    gp, hp, gs, hs = girdiler['indeksler'].T
+    with np.errstate(all='ignore'):
+        kadapt = np.where(gp >= 0, (v['hiz'][gp] / v['hiz'][hp]) * (v['sehir'][gs] / v['sehir'][hs]), 1.0)
+    kesik, gecerli = vector_scoring.compute_scores(girdiler['ayrik'], kadapt)
+    return (np.array_equal(gecerli, beklenen['gecerli'])
+            and np.array_equal(kesik, beklenen['cikti'], equal_nan=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Skor sabitleri için parametre taraması')
+    parser.add_argument('mod', choices=['izgara', 'rastgele'])
+    parser.add_argument('--uzun', default='0.03,0.04,0.05')
+    parser.add_argument('--kisa', default='-0.04,-0.03,-0.02')
+    parser.add_argument('--kilo', default='0.01,0.02,0.03')
+    parser.add_argument('--sehir-olcek', default='0,1')
+    parser.add_argument('--pist-olcek', default='1')
+    parser.add_argument('--deneme', type=int, default=500)
+    parser.add_argument('--gurultu', type=float, default=0.01, help='Log-normal gürültü (σ)')
+    parser.add_argument('--tohum', type=int, default=None)
+    parser.add_argument('--baslangic', help='YYYYMMDD (dahil)')
+    parser.add_argument('--bitis', help='YYYYMMDD (dahil)')
+    parser.add_argument('--sehirler', help='Virgülle ayrılmış şehir anahtarları (varsayılan: hepsi)')
+    parser.add_argument('--isci', type=int, default=None, help='Süreç sayısı')
+    parser.add_argument('--ilk', type=int, default=20, help='Tabloda gösterilecek set sayısı')
+    parser.add_argument('--json', help='Sıralı sonuçları JSON dosyasına yaz')
+    parser.add_argument('--uygula', action='store_true',
+                        help='En iyi seti kalibrasyon dosyasına yaz (tüm skor motorları kullanır)')
+    args = parser.parse_args()
+
+    baslangic = time.perf_counter()
+    cities = [c.strip().lower() for c in args.sehirler.split(',')] if args.sehirler else None
+    gecmis, eksikler = load_history(cities, args.baslangic, args.bitis)
+    if not gecmis:
+        print("[HATA] Sonucu olan kayıtlı kart bulunamadı (sonuçlar için: python backtest.py --indir)")
+        return 1
+    girdiler = girdileri_hazirla(gecmis)
+    if not _dogrula(girdiler, gecmis):
+        print("[HATA] Varsayılan parametrelerle skorlar vektörel motordan farklı")
+        return 1
+    hazirlik = time.perf_counter() - baslangic
+
+    if args.mod == 'izgara':
+        setler = izgara(girdiler, _liste(args.uzun), _liste(args.kisa), _liste(args.kilo),
+                        _liste(args.sehir_olcek), _liste(args.pist_olcek))
+    else:
+        setler = rastgele(girdiler, args.deneme, args.gurultu, args.tohum)
+    varsayilan = varsayilan_parametreler(girdiler)
+    setler.insert(0, {**varsayilan, 'etiket': 'mevcut sabitler'})
+
+    tarama = time.perf_counter()
+    sirali = run_sweep(setler, girdiler, args.isci)
+    sure = time.perf_counter() - tarama
+
+    print(f"[TARAMA] {len(gecmis)} şehir/gün, {len(girdiler['kazanan'])} at, {sirali[0]['kosu']} koşu; "
+          f"{len(setler)} parametre seti {sure:.2f} sn (hazırlık {hazirlik:.2f} sn)")
+    if eksikler:
+        print(f"[UYARI] Sonucu olmayan {len(eksikler)} şehir/gün atlandı")
+    print(f"\n{'Sıra':>4}  {'İsabet':>7}  {'Oran':>6}  {'uzun':>7}  {'kısa':>7}  {'kilo':>7}  Set")
+    for sira, s in enumerate(sirali[:args.ilk], 1):
+        print(f"{sira:>4}  {s['isabet']:>7}  {s['oran']:>5.1f}%  {s['uzun']:>7.4f}  {s['kisa']:>7.4f}  "
+              f"{s['kilo']:>7.4f}  {s['etiket']}")
+    mevcut = next(i for i, s in enumerate(sirali, 1) if s['etiket'] == 'mevcut sabitler')
+    print(f"\nMevcut sabitler: {mevcut}. sırada (%{sirali[mevcut - 1]['oran']:.1f})")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(sirali, f, ensure_ascii=False, indent=2)
+        print(f"[TAMAM] Sonuç yazıldı: {args.json}")
+    if args.uygula:
+        surum = uygula(sirali[0])
+        if surum:
+            print(f"[TAMAM] En iyi set ({sirali[0]['etiket']}) sürüm {surum} olarak yazıldı: "
+                  f"{horse_scraper.KADAPT_KATSAYI_DOSYASI}")
+        else:
+            print(f"[TAMAM] En iyi set dosyadakiyle aynı; {horse_scraper.KADAPT_KATSAYI_DOSYASI} korunuyor")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
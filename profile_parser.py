@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AT PROFİLİ AYRIŞTIRICI
+Profil sayfasındaki koşu satırlarını tek geçişte okur ve
+son koşu verileri, son koşu sonuç URL'si ve tarihli koşu geçmişini
+tek bir kayıt olarak döndürür.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+import http_client
+from html_parser import make_soup, PROFIL_SECICI
+
+BASE_URL = "https://yenibeygir.com"
+
+# Son koşu seçiminde geçersiz sayılan derece değerleri
+GECERSIZ_DURUMLAR = ['koşmaz', 'çekildi', 'düştü', 'diskalifiye', 'dns', 'dnf']
+
+PIST_SINIFLARI = ('kumpist', 'cimpist', 'sentetikpist')
+
+# Aynı gün içinde tekrar istenen profiller için bellek içi kayıt sayısı
+MEMO_BOYUTU = 5000
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def normalize_weight(weight_str):
+    """
+    Kilo değerlerini normalize eder
+    "50+2,0" -> "52.0"
+    "57+0,1" -> "57.1"
+    "52,5" -> "52.5"
+    57 -> "57"
+    """
+    if not weight_str or str(weight_str).strip() == '':
+        return ''
+
+    weight_str = str(weight_str).strip()
+
+    # "50+2,0" formatını işle
+    if '+' in weight_str:
+        try:
+            parts = weight_str.replace(',', '.').split('+')
+            result = sum(float(p) for p in parts if p.strip())
+            if result == int(result):
+                return str(int(result))
+            else:
+                return str(round(result, 1))
+        except Exception:
+            return weight_str.replace(',', '.')
+
+    # "52,5" formatını işle (virgülü noktaya çevir)
+    if ',' in weight_str:
+        try:
+            result = float(weight_str.replace(',', '.'))
+            if result == int(result):
+                return str(int(result))
+            else:
+                return str(round(result, 1))
+        except Exception:
+            return weight_str
+
+    # Zaten normal format
+    try:
+        result = float(weight_str)
+        if result == int(result):
+            return str(int(result))
+        else:
+            return str(round(result, 1))
+    except:
+        return weight_str
+
+
+def profil_url(profil_linki):
+    """Profil linkini tam URL'e çevir"""
+    profil_linki = (profil_linki or '').strip()
+    if profil_linki.startswith('/'):
+        return BASE_URL + profil_linki
+    return profil_linki
+
+
+def derece_gecerli_mi(derece_val):
+    """Son koşu seçimi için derece değeri kullanılabilir mi"""
+    if not derece_val or not derece_val.strip():
+        return False
+    if derece_val.lower() in GECERSIZ_DURUMLAR:
+        return False
+    # Derece bir zaman formatında olmalı (1.32.91) veya sayısal
+    return ('.' in derece_val and len(derece_val.replace('.', '')) >= 3) or derece_val.replace('.', '').isdigit()
+
+
+def _metin_tarihi(cells):
+    """İlk hücredeki GG.AA.YYYY tarih metnini döndür (yoksa None)"""
+    first_cell_text = cells[0].get_text(strip=True)
+    tarih_link = cells[0].find('a')
+
+    tarih_text = None
+    if tarih_link:
+        link_text = tarih_link.get_text(strip=True)
+        if '.' in link_text and len(link_text.split('.')) == 3:
+            tarih_text = link_text
+    elif '.' in first_cell_text and len(first_cell_text.split('.')) == 3:
+        tarih_text = first_cell_text
+
+    if tarih_text:
+        date_parts = tarih_text.split('.')
+        if len(date_parts[0]) <= 2 and len(date_parts[1]) <= 2 and len(date_parts[2]) == 4:
+            return tarih_text
+    return None
+
+
+def _href_tarihi(href):
+    """/19-09-2025/istanbul/... biçimindeki linkten tarihi çıkar"""
+    href_str = str(href)
+    if '/' not in href_str:
+        return None
+    date_part = href_str.split('/')[1]
+    if len(date_part.split('-')) != 3:
+        return None
+    try:
+        day, month, year = date_part.split('-')
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _satir_bilgileri(tr, tds):
+    """Koşu satırından hipodrom, pist, mesafe, derece ve kilo bilgilerini çıkar"""
+    hipodrom = mesafe = pist = derece = kilo = ''
+
+    if len(tds) > 1:
+        hipodrom = tds[1].get_text(strip=True)
+
+    pist_span = None
+    for sinif in PIST_SINIFLARI:
+        pist_span = tr.find('span', class_=sinif)
+        if pist_span:
+            break
+    if pist_span:
+        mesafe = pist_span.get('data-mesafe', '').strip()
+        pist = pist_span.get('data-pist', '').strip()
+
+    if len(tds) > 6:
+        derece = tds[6].get_text(strip=True)
+
+    if len(tds) > 10:
+        kilo_span = tds[10].find('span')
+        if kilo_span:
+            kilo = normalize_weight(kilo_span.get_text(strip=True))
+
+    return {'hipodrom': hipodrom, 'mesafe': mesafe, 'pist': pist, 'derece': derece, 'kilo': kilo}
+
+
+def parse_horse_profile(html, bugun=None):
+    """
+    Profil sayfasını tek geçişte ayrıştırır
+
+    Args:
+        html: Profil sayfası HTML'i (veya BeautifulSoup nesnesi)
+        bugun: Karşılaştırma tarihi (varsayılan: şimdi)
+
+    Returns:
+        dict: {
+            'son_kosu': {'mesafe', 'pist', 'derece', 'kilo', 'hipodrom'} - seçilen son koşu,
+            'son_kosu_url': at_Yarislar tablosundaki ilk geçmiş tarihli sonuç linki,
+            'gecmis': tarihli koşu listesi (en yeni ilk, bugün/gelecek dahil)
+        }
+    """
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, PROFIL_SECICI)
+    bugun = bugun or datetime.now()
+    bugun_tarih = bugun.date()
+    bugun_gece = bugun.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Son koşu URL'si yalnızca at_Yarislar tablosunun satırlarından seçilir
+    yarislar_satirlari = set()
+    races_table = soup.find('table', class_='at_Yarislar')
+    if races_table:
+        tbody = races_table.find('tbody')
+        if tbody:
+            yarislar_satirlari = {id(tr) for tr in tbody.find_all('tr')}
+
+    son_kosu_url = None
+    tarihli = []
+    gecmis = []
+
+    for tr in soup.find_all('tr'):
+        tds = tr.find_all('td')
+
+        if son_kosu_url is None and id(tr) in yarislar_satirlari:
+            cells = tr.find_all(['td', 'th'])
+            link = cells[0].find('a') if cells else None
+            href = link.get('href') if link else None
+            if href and link.get_text(strip=True) != 'Bugün':
+                race_date = _href_tarihi(href)
+                if race_date and race_date < bugun_gece:
+                    son_kosu_url = BASE_URL + href if str(href).startswith('/') else str(href)
+
+        if not tds:
+            continue
+
+        tarih_text = _metin_tarihi(tds)
+        tarih_dt = None
+        if tarih_text:
+            try:
+                tarih_dt = datetime.strptime(tarih_text, '%d.%m.%Y')
+            except ValueError:
+                tarih_dt = None
+            if tarih_dt:
+                tarihli.append((tarih_dt, tr, tds))
+
+        # Geçmiş listesi: metin tarihi yoksa ("Bugün") link tarihine bak
+        link = tds[0].find('a')
+        href = link.get('href') if link else None
+        if tarih_dt is None and href:
+            tarih_dt = _href_tarihi(href)
+        if tarih_dt is None:
+            continue
+
+        kosu_tarih = tarih_dt.date()
+        kayit = _satir_bilgileri(tr, tds)
+        kayit['tarih'] = kosu_tarih
+        kayit['durum'] = 'gecmis' if kosu_tarih < bugun_tarih else 'bugun' if kosu_tarih == bugun_tarih else 'gelecek'
+        kayit['url'] = (BASE_URL + href if str(href).startswith('/') else str(href)) if href else ''
+        gecmis.append(kayit)
+
+    # En uygun koşu: en yeni geçmiş tarihli ve geçerli dereceli satır
+    tarihli.sort(reverse=True, key=lambda x: x[0])
+    son_kosu = {'mesafe': '', 'pist': '', 'derece': '', 'kilo': '', 'hipodrom': ''}
+    for tarih_dt, tr, tds in tarihli:
+        if len(tds) > 6 and tarih_dt.date() < bugun_tarih and derece_gecerli_mi(tds[6].get_text(strip=True)):
+            bilgi = _satir_bilgileri(tr, tds)
+            son_kosu = {k: bilgi[k] for k in son_kosu}
+            son_kosu['tarih'] = tarih_dt.date()
+            break
+
+    gecmis.sort(reverse=True, key=lambda k: k['tarih'])
+
+    return {
+        'son_kosu': son_kosu,
+        'son_kosu_url': son_kosu_url,
+        'gecmis': gecmis
+    }
+
+
+def cached_horse_profile(profil_linki):
+    """Bugün zaten ayrıştırılmış profil (yoksa None; istek yapmaz)"""
+    anahtar = (profil_url(profil_linki), datetime.now().date())
+    with _memo_lock:
+        return _memo.get(anahtar)
+
+
+def remember_profile(profil_linki, profil):
+    """Depodan gelen profili bugün için belleğe koy (get_horse_profile istek yapmaz)"""
+    anahtar = (profil_url(profil_linki), datetime.now().date())
+    with _memo_lock:
+        _memo[anahtar] = profil
+        _memo.move_to_end(anahtar)
+        while len(_memo) > MEMO_BOYUTU:
+            _memo.popitem(last=False)
+
+
+def get_horse_profile(profil_linki):
+    """
+    Profili indirip ayrıştırır; aynı gün içindeki tekrar çağrılar bellekten döner
+
+    Raises:
+        requests.HTTPError: Profil sayfası alınamazsa
+    """
+    url = profil_url(profil_linki)
+    anahtar = (url, datetime.now().date())
+
+    with _memo_lock:
+        if anahtar in _memo:
+            _memo.move_to_end(anahtar)
+            return _memo[anahtar]
+
+    response = http_client.get_cached(url)
+    response.raise_for_status()
+    profil = parse_horse_profile(response.text)
+
+    with _memo_lock:
+        _memo[anahtar] = profil
+        while len(_memo) > MEMO_BOYUTU:
+            _memo.popitem(last=False)
+    return profil
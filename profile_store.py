@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ARTIMLI PROFİL DEPOSU
+Ayrıştırılmış at profilleri (son koşu, son koşu URL'si, tarihli koşu
+geçmişi) at_id ile SQLite'ta (cache/profiles.db) saklanır. Günlük
+scrapingde bir atın profili yalnızca kayıtlı profilden sonra tamamlanmış
+yeni bir koşusu olabiliyorsa indirilir.
+
+Kayıtlı profil şu durumda yeniden kullanılır (kart tarihi T, profilin
+çekildiği gün F <= T):
+  - T tarihli koşu (bugünkü koşu) profilde zaten görünüyordu, yani at
+    F gününde T koşusuna yazılmıştı, ve
+  - profilde [F, T) aralığında tarihli satır yok: F günü koşulan ('Bugün')
+    ya da F ile T arasına yazılmış ('gelecek') koşu sonucu henüz profilde
+    olmayacağı için bu durumda profil yeniden indirilir.
+Bu koşullarda T'den önceki, F'de görünen tüm satırlar zaten tamamlanmıştı;
+yeni indirilen profilden seçilecek son koşu normalde kayıtlı olanla aynıdır.
+Tek istisna, at F'den sonra (F ile T arasına tarihli) başka bir koşuya
+yazılıp o koşuyu da koşmuşsa: bu satır kayıtlı profilde olmadığından
+depodaki son koşu eski kalır.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+
+DEPO_DB = os.environ.get('PROFILE_STORE_DB', os.path.join('cache', 'profiles.db'))
+DEPO_AKTIF = os.environ.get('PROFILE_STORE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+_AT_ID = re.compile(r'/at/(\d+)')
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _at_id(profil_linki):
+    eslesme = _AT_ID.search(str(profil_linki or ''))
+    return int(eslesme.group(1)) if eslesme else None
+
+
+def _db():
+    """Paylaşılan bağlantı (lock altında çağrılır)"""
+    global _conn
+    if _conn is None:
+        dizin = os.path.dirname(DEPO_DB)
+        if dizin:
+            os.makedirs(dizin, exist_ok=True)
+        conn = sqlite3.connect(DEPO_DB, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS profiller (
+                at_id INTEGER PRIMARY KEY,
+                profil_linki TEXT NOT NULL,
+                profil_tarihi TEXT NOT NULL,
+                son_kosu_tarihi TEXT,
+                veri TEXT NOT NULL
+            )
+        ''')
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _tarih(deger):
+    return date.fromisoformat(deger) if deger else None
+
+
+def _serilestir(profil):
+    """Profil dict'i -> JSON (tarihler ISO)"""
+    son_kosu = dict(profil['son_kosu'])
+    if son_kosu.get('tarih'):
+        son_kosu['tarih'] = son_kosu['tarih'].isoformat()
+    gecmis = [{**k, 'tarih': k['tarih'].isoformat()} for k in profil['gecmis']]
+    return json.dumps({'son_kosu': son_kosu, 'son_kosu_url': profil['son_kosu_url'], 'gecmis': gecmis},
+                      ensure_ascii=False)
+
+
+def _coz(veri, kart_tarihi):
+    """JSON -> profil dict'i; satır durumları kart tarihine göre yeniden belirlenir"""
+    profil = json.loads(veri)
+    if profil['son_kosu'].get('tarih'):
+        profil['son_kosu']['tarih'] = _tarih(profil['son_kosu']['tarih'])
+    for kosu in profil['gecmis']:
+        kosu['tarih'] = _tarih(kosu['tarih'])
+        kosu['durum'] = ('gecmis' if kosu['tarih'] < kart_tarihi
+                         else 'bugun' if kosu['tarih'] == kart_tarihi else 'gelecek')
+    return profil
+
+
+def yeniden_kullanilabilir(kosu_tarihleri, profil_tarihi, kart_tarihi):
+    """
+    Kayıtlı profil kart günü için hâlâ güncel mi
+
+    Args:
+        kosu_tarihleri: Profildeki tüm tarihli satırların tarihleri (bugün/gelecek dahil)
+        profil_tarihi: Profilin indirildiği gün
+        kart_tarihi: Bugünkü kartın tarihi
+    """
+    if profil_tarihi > kart_tarihi or kart_tarihi not in kosu_tarihleri:
+        return False
+    return not any(profil_tarihi <= t < kart_tarihi for t in kosu_tarihleri)
+
+
+def load_fresh(profil_linkleri, kart_tarihi):
+    """
+    Kart günü için indirilmesine gerek olmayan profiller
+
+    Returns:
+        dict: {profil linki: profil} - yalnızca yeniden kullanılabilenler
+    """
+    if not DEPO_AKTIF:
+        return {}
+    kimlikler = {}
+    for link in profil_linkleri:
+        kimlik = _at_id(link)
+        if kimlik is not None:
+            kimlikler[kimlik] = link
+    if not kimlikler:
+        return {}
+
+    try:
+        with _lock:
+            db = _db()
+            satirlar = []
+            idler = list(kimlikler)
+            for i in range(0, len(idler), 500):
+                parca = idler[i:i + 500]
+                satirlar.extend(db.execute(
+                    f"SELECT at_id, profil_tarihi, veri FROM profiller WHERE at_id IN ({', '.join('?' * len(parca))})",
+                    parca).fetchall())
+    except sqlite3.Error as e:
+        print(f"[UYARI] Profil deposu okunamadı: {e}")
+        return {}
+
+    sonuc = {}
+    for kimlik, profil_tarihi, veri in satirlar:
+        profil = _coz(veri, kart_tarihi)
+        tarihler = {k['tarih'] for k in profil['gecmis']}
+        if yeniden_kullanilabilir(tarihler, _tarih(profil_tarihi), kart_tarihi):
+            sonuc[kimlikler[kimlik]] = profil
+    return sonuc
+
+
+def save_many(profiller, profil_tarihi=None):
+    """
+    İndirilen profilleri tek transaction'da kaydet
+
+    Args:
+        profiller: {profil linki: parse_horse_profile çıktısı} (None değerler atlanır)
+        profil_tarihi: İndirme günü (varsayılan: bugün)
+    """
+    if not DEPO_AKTIF:
+        return 0
+    profil_tarihi = (profil_tarihi or date.today()).isoformat()
+    satirlar = []
+    for link, profil in profiller.items():
+        kimlik = _at_id(link)
+        if kimlik is None or not profil:
+            continue
+        tamamlanan = [k['tarih'] for k in profil['gecmis'] if k.get('durum') == 'gecmis']
+        son_tarih = max(tamamlanan).isoformat() if tamamlanan else None
+        satirlar.append((kimlik, link, profil_tarihi, son_tarih, _serilestir(profil)))
+    if not satirlar:
+        return 0
+
+    try:
+        with _lock:
+            db = _db()
+            with db:
+                db.executemany('INSERT OR REPLACE INTO profiller VALUES (?, ?, ?, ?, ?)', satirlar)
+    except sqlite3.Error as e:
+        print(f"[UYARI] Profil deposuna yazılamadı: {e}")
+        return 0
+    return len(satirlar)
+
+
+def past_runs():
+    """
+    Kayıtlı tüm profillerin tamamlanmış geçmiş koşuları (toplu analiz için)
+
+    Returns:
+        list: [(at_id, koşu dict'i), ...] - profilin çekildiği günden önceki satırlar
+    """
+    if not DEPO_AKTIF:
+        return []
+    try:
+        with _lock:
+            satirlar = _db().execute('SELECT at_id, profil_tarihi, veri FROM profiller').fetchall()
+    except sqlite3.Error as e:
+        print(f"[UYARI] Profil deposu okunamadı: {e}")
+        return []
+    return [(kimlik, kosu) for kimlik, profil_tarihi, veri in satirlar
+            for kosu in _coz(veri, _tarih(profil_tarihi))['gecmis'] if kosu['durum'] == 'gecmis']
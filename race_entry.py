@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KART SATIRI MODELİ
+Kart JSON'undaki bir at satırı ('Koşu', 'At İsmi', 'Son Derece', ...)
+yerine kullanılan __slots__ nesnesi. String alanlar aynen tutulur, sayısal
+alanlar oluşturulurken bir kez ayrıştırılır: derece saniye, mesafe metre,
+kilo kg, pist türü Pist olarak. Aynı string değerler (1400, 'Kum', '57')
+kartlar arasında tekrar ettiğinden ayrıştırma sonuçları önbelleklidir ve
+bu alanların stringleri intern edilerek tek kopya tutulur.
+
+to_dict() JSON'daki dict'i birebir geri verir; get() ve [] ile dict gibi
+okunabildiğinden at listesi bekleyen kod değişmeden çalışır.
+"""
+
+import sys
+from enum import IntEnum
+from functools import lru_cache
+
+from horse_scraper import time_to_seconds
+
+# JSON alanı -> nesne alanı (JSON'daki sıra)
+ALANLAR = (
+    ('Koşu', 'kosu'),
+    ('At İsmi', 'at_ismi'),
+    ('Profil Linki', 'profil_linki'),
+    ('Jokey', 'jokey'),
+    ('Son Kilo', 'son_kilo'),
+    ('Son Mesafe', 'son_mesafe'),
+    ('Son Pist', 'son_pist'),
+    ('Son Derece', 'son_derece'),
+    ('Kilo', 'kilo'),
+    ('Bugünkü Mesafe', 'bugun_mesafe'),
+    ('Bugünkü Pist', 'bugun_pist'),
+    ('Şehir', 'sehir'),
+    ('Son Hipodrom', 'son_hipodrom'),
+)
+_ALAN = dict(ALANLAR)
+# Az sayıda farklı değer alan alanlar (tek kopya tutulur)
+_TEKRARLI = frozenset(('kosu', 'jokey', 'son_kilo', 'son_mesafe', 'son_pist', 'kilo',
+                       'bugun_mesafe', 'bugun_pist', 'sehir', 'son_hipodrom'))
+
+
+class Pist(IntEnum):
+    """horse_scraper.pist_to_int ile aynı numaralandırma"""
+    BILINMIYOR = 0
+    CIM = 1
+    KUM = 2
+    SENTETIK = 3
+
+
+_PIST_ADLARI = {'kum': Pist.KUM, 'çim': Pist.CIM, 'cim': Pist.CIM, 'sentetik': Pist.SENTETIK}
+# Mesafe aralıkları: (üst sınır metre, etiket); son aralığın üstü '2100+'
+MESAFE_ARALIKLARI = ((1200, '≤1200'), (1600, '1300-1600'), (2000, '1700-2000'))
+
+
+@lru_cache(maxsize=4096)
+def pist_turu(pist):
+    """'Kum*' / 'Çim' / 'Sentetik' -> Pist (bilinmeyen/boş BILINMIYOR)"""
+    return _PIST_ADLARI.get(str(pist or '').replace('*', '').strip().lower(), Pist.BILINMIYOR)
+
+
+@lru_cache(maxsize=4096)
+def sayi(deger):
+    """'1400' / '57,5' -> float; boş veya sayı değilse None"""
+    try:
+        return float(str(deger).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=8192)
+def derece_saniye(derece):
+    """'1.32.43' -> 92.43; boş/geçersiz derece None"""
+    saniye = time_to_seconds(derece)
+    return saniye if saniye > 0 else None
+
+
+@lru_cache(maxsize=256)
+def kosu_no(kosu):
+    kosu = str(kosu).strip()
+    return int(kosu) if kosu.isdigit() else None
+
+
+class RaceEntry:
+    """
+    Kart satırı. JSON'da olmayan alanlar None tutulur ve to_dict()'e
+    yazılmaz; bilinmeyen alanlar (ör. 'Çıktı') ekstra içinde saklanır.
+    """
+    __slots__ = tuple(alan for _, alan in ALANLAR) + (
+        'ekstra',
+        # Ayrıştırılmış alanlar
+        'kosu_no', 'son_derece_sn', 'son_mesafe_m', 'bugun_mesafe_m',
+        'kilo_kg', 'son_kilo_kg', 'son_pist_turu', 'bugun_pist_turu',
+    )
+
+    def __init__(self, **alanlar):
+        ekstra = alanlar.pop('ekstra', None)
+        for _, alan in ALANLAR:
+            setattr(self, alan, alanlar.pop(alan, None))
+        if alanlar:
+            raise TypeError(f"Bilinmeyen alanlar: {', '.join(alanlar)}")
+        self.ekstra = ekstra or None
+        self._ayristir()
+
+    def _ayristir(self):
+        self.kosu_no = kosu_no(self.kosu) if self.kosu is not None else None
+        self.son_derece_sn = derece_saniye(self.son_derece) if self.son_derece else None
+        self.son_mesafe_m = sayi(self.son_mesafe)
+        self.bugun_mesafe_m = sayi(self.bugun_mesafe)
+        self.kilo_kg = sayi(self.kilo)
+        self.son_kilo_kg = sayi(self.son_kilo)
+        self.son_pist_turu = pist_turu(self.son_pist)
+        self.bugun_pist_turu = pist_turu(self.bugun_pist)
+
+    @classmethod
+    def from_dict(cls, horse):
+        """Kart JSON'undaki dict'ten"""
+        entry = cls.__new__(cls)
+        ekstra = None
+        for anahtar, deger in horse.items():
+            alan = _ALAN.get(anahtar)
+            if alan is None:
+                if ekstra is None:
+                    ekstra = {}
+                ekstra[anahtar] = deger
+        for anahtar, alan in ALANLAR:
+            deger = horse.get(anahtar)
+            if alan in _TEKRARLI and type(deger) is str:
+                deger = sys.intern(deger)
+            setattr(entry, alan, deger)
+        entry.ekstra = ekstra
+        entry._ayristir()
+        return entry
+
+    def to_dict(self):
+        """Kart JSON'undaki biçimde dict"""
+        horse = {}
+        for anahtar, alan in ALANLAR:
+            deger = getattr(self, alan)
+            if deger is not None:
+                horse[anahtar] = deger
+        if self.ekstra:
+            horse.update(self.ekstra)
+        return horse
+
+    def get(self, anahtar, varsayilan=None):
+        """dict.get ile aynı; JSON alan adlarıyla okur"""
+        alan = _ALAN.get(anahtar)
+        if alan is not None:
+            deger = getattr(self, alan)
+            return varsayilan if deger is None else deger
+        if self.ekstra:
+            return self.ekstra.get(anahtar, varsayilan)
+        return varsayilan
+
+    def __getitem__(self, anahtar):
+        deger = self.get(anahtar, _YOK)
+        if deger is _YOK:
+            raise KeyError(anahtar)
+        return deger
+
+    def __contains__(self, anahtar):
+        return self.get(anahtar, _YOK) is not _YOK
+
+    def __repr__(self):
+        return f"RaceEntry({self.kosu!r}, {self.at_ismi!r})"
+
+
+_YOK = object()
+
+
+def from_dicts(horses):
+    """At listesinden RaceEntry listesi (zaten RaceEntry olanlar aynen kalır)"""
+    return [h if isinstance(h, RaceEntry) else RaceEntry.from_dict(h) for h in horses]
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KOŞU SONUÇ MODELİ
+Bir koşunun sonuç sayfasını (kosanAtlar tablosu) tek seferde ayrıştırır:
+tüm varış sırası, at, derece, ganyan ile koşu mesafesi ve pisti.
+Sonuçlar çalışma boyunca URL bazında bellekte tutulur; kazanan ve
+at derecesi sorguları aynı kayıttan cevaplanır.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from bs4 import BeautifulSoup
+
+import http_client
+from html_parser import make_soup, SONUC_SECICI
+
+MEMO_BOYUTU = 2000
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_url_kilitleri = {}
+
+
+def _mesafe_pist(soup):
+    """Sayfadaki pist span'larından koşu mesafesi ve pist türünü çıkar"""
+    yarış_mesafe = ""
+    yarış_pist = ""
+
+    pist_spans = soup.find_all('span', class_=['kumpist', 'cimpist', 'sentetikpist'])
+    for pist_span in pist_spans:
+        span_text = pist_span.get_text().strip()
+        # Span text'inden mesafe ve pist çıkar: "1700 Çim" formatında
+        if span_text:
+            match = re.match(r'(\d+)\s*(Çim|Kum|Sentetik)', span_text)
+            if match:
+                yarış_mesafe = match.group(1)
+                yarış_pist = match.group(2)
+                break
+
+    # Eğer span text'inde bulamazsa class adından pist türünü çıkar
+    if not yarış_pist and pist_spans:
+        first_span = pist_spans[0]
+        span_class = ' '.join(first_span.get('class', []))
+        if 'kumpist' in span_class:
+            yarış_pist = "Kum"
+        elif 'cimpist' in span_class:
+            yarış_pist = "Çim"
+        elif 'sentetikpist' in span_class:
+            yarış_pist = "Sentetik"
+
+        # Mesafe için span text'inde sadece sayı ara
+        if not yarış_mesafe:
+            mesafe_match = re.search(r'(\d+)', first_span.get_text().strip())
+            if mesafe_match:
+                yarış_mesafe = mesafe_match.group(1)
+
+    return yarış_mesafe, yarış_pist
+
+
+def parse_race_result_page(html):
+    """
+    Sonuç sayfasını ayrıştırır
+
+    Returns:
+        dict: {
+            'siralama': [{'sira', 'at_ismi', 'derece', 'ganyan'}, ...] sayfa sırasıyla,
+            'mesafe': koşu mesafesi, 'pist': pist türü,
+            'hata': None | 'tablo' (kosanAtlar yok) | 'tbody' (tbody yok)
+        }
+    """
+    soup = html if isinstance(html, BeautifulSoup) else make_soup(html, SONUC_SECICI)
+    sonuc = {'siralama': [], 'mesafe': '', 'pist': '', 'hata': None}
+
+    result_table = soup.find('table', class_='kosanAtlar')
+    if not result_table:
+        sonuc['hata'] = 'tablo'
+        return sonuc
+
+    tbody = result_table.find('tbody')
+    if not tbody:
+        sonuc['hata'] = 'tbody'
+        return sonuc
+
+    for row in tbody.find_all('tr'):
+        cells = row.find_all(['td', 'th'])
+        if len(cells) < 9:  # En az 9 kolon olmalı
+            continue
+
+        # At adı (2. hücre, içindeki atisimlink'den)
+        at_cell = cells[1]
+        at_link = at_cell.find('a', class_='atisimlink')
+        at_adi = at_link.get_text(strip=True) if at_link else at_cell.get_text(strip=True)
+
+        sonuc['siralama'].append({
+            'sira': cells[0].get_text(strip=True),
+            'at_ismi': at_adi,
+            'derece': cells[8].get_text(strip=True),  # "Derece" kolonu
+            'ganyan': cells[9].get_text(strip=True) if len(cells) > 9 else ""  # "Gny" kolonu
+        })
+
+    sonuc['mesafe'], sonuc['pist'] = _mesafe_pist(soup)
+    return sonuc
+
+
+def _tablo_var(html):
+    """Önbelleğe yazılacak sayfa sonuç tablosunu içeriyor mu"""
+    return parse_race_result_page(html)['hata'] is None
+
+
+def get_race_result(race_url):
+    """
+    Sonuç sayfasını indirip ayrıştırır; aynı URL çalışma boyunca bir kez işlenir.
+    Sonuç tablosu olmayan sayfalar (ör. sonuç henüz girilmemiş) ne bellekte ne
+    disk önbelleğinde saklanır; sonraki çağrı sayfayı yeniden çeker.
+
+    Raises:
+        requests.HTTPError: Sayfa alınamazsa (hata sonuçları saklanmaz)
+    """
+    with _memo_lock:
+        if race_url in _memo:
+            _memo.move_to_end(race_url)
+            return _memo[race_url]
+        kilit = _url_kilitleri.setdefault(race_url, threading.Lock())
+
+    # Aynı URL'yi eşzamanlı isteyen thread'ler tek indirmeyi bekler
+    with kilit:
+        with _memo_lock:
+            if race_url in _memo:
+                return _memo[race_url]
+
+        try:
+            response = http_client.get_cached(race_url, gecerli=_tablo_var)
+            response.raise_for_status()
+            sonuc = parse_race_result_page(response.content)
+            if sonuc['hata'] is None:
+                with _memo_lock:
+                    _memo[race_url] = sonuc
+                    while len(_memo) > MEMO_BOYUTU:
+                        _memo.popitem(last=False)
+        finally:
+            with _memo_lock:
+                _url_kilitleri.pop(race_url, None)
+        return sonuc
+
+
+def onbellekte_mi(race_url):
+    """URL'nin sonucu bellekte var mı"""
+    with _memo_lock:
+        return race_url in _memo
+
+
+def kazanan(sonuc):
+    """Sırası '1' olan ilk satır (yoksa None)"""
+    for satir in sonuc['siralama']:
+        if satir['sira'] == '1':
+            return satir
+    return None
+
+
+def at_sonucu(sonuc, at_ismi):
+    """İsmi eşleşen (büyük/küçük harf duyarsız) ilk satır (yoksa None)"""
+    aranan = at_ismi.upper()
+    for satir in sonuc['siralama']:
+        if satir['at_ismi'].upper() == aranan:
+            return satir
+    return None
+
+
+def clear_cache():
+    """Bellekteki sonuç kayıtlarını temizle"""
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+YARIŞ VERİ AMBARI
+Kartlar, kart satırları, at profilleri ve geçmiş koşular, koşu sonuçları ve
+karşılaştırmalar tek bir SQLite veritabanında (data/warehouse.db) normalize
+tablolarda tutulur. Scraper ve results_scraper her şehir/gün için tek
+transaction'da toplu yazar; analiz sorguları dosya taramak yerine indeksli
+aramadır:
+
+    entries(at_id), entries(isim_anahtari), race_cards(city, date, race_no),
+    race_results(city, date, race_no), race_results(isim_anahtari), past_runs(at_id, tarih)
+
+Mevcut data/*.json ve data/comparisons/*.json dosyalarını aktarmak için:
+    python race_warehouse.py import
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+
+WAREHOUSE_DB = os.environ.get('WAREHOUSE_DB', os.path.join('data', 'warehouse.db'))
+WAREHOUSE_AKTIF = os.environ.get('WAREHOUSE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+DATA_DIZINI = 'data'
+KARSILASTIRMA_DIZINI = os.path.join(DATA_DIZINI, 'comparisons')
+
+_AT_ID = re.compile(r'/at/(\d+)')
+_PARANTEZ = re.compile(r'\([^)]*\)')
+_BOSLUK = re.compile(r'\s+')
+_KART_DOSYASI = re.compile(r'^(?P<city>[^_]+)_atlari_(?P<date>\d{8})\.json$')
+_KARSILASTIRMA_DOSYASI = re.compile(r'^(?P<city>[^_]+)_comparison_(?P<date>\d{8})\.json$')
+
+SEMA = '''
+CREATE TABLE IF NOT EXISTS race_cards (
+    id INTEGER PRIMARY KEY,
+    city TEXT NOT NULL,
+    date TEXT NOT NULL,
+    race_no INTEGER NOT NULL,
+    mesafe TEXT,
+    pist TEXT,
+    sehir_adi TEXT,
+    UNIQUE (city, date, race_no)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    race_id INTEGER NOT NULL REFERENCES race_cards(id) ON DELETE CASCADE,
+    sira INTEGER NOT NULL,
+    at_id INTEGER,
+    at_ismi TEXT NOT NULL,
+    isim_anahtari TEXT NOT NULL,
+    profil_linki TEXT,
+    jokey TEXT,
+    kilo TEXT,
+    son_kilo TEXT,
+    son_mesafe TEXT,
+    son_pist TEXT,
+    son_derece TEXT,
+    son_hipodrom TEXT,
+    PRIMARY KEY (race_id, sira)
+);
+CREATE INDEX IF NOT EXISTS ix_entries_at_id ON entries(at_id);
+CREATE INDEX IF NOT EXISTS ix_entries_isim ON entries(isim_anahtari);
+CREATE TABLE IF NOT EXISTS horses (
+    at_id INTEGER PRIMARY KEY,
+    at_ismi TEXT,
+    profil_linki TEXT,
+    son_kosu_tarihi TEXT,
+    profil_tarihi TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_horses_isim ON horses(at_ismi);
+CREATE TABLE IF NOT EXISTS past_runs (
+    at_id INTEGER NOT NULL,
+    tarih TEXT NOT NULL,
+    hipodrom TEXT NOT NULL DEFAULT '',
+    mesafe TEXT NOT NULL DEFAULT '',
+    pist TEXT,
+    derece TEXT,
+    kilo TEXT,
+    url TEXT,
+    PRIMARY KEY (at_id, tarih, hipodrom, mesafe)
+);
+CREATE TABLE IF NOT EXISTS race_results (
+    city TEXT NOT NULL,
+    date TEXT NOT NULL,
+    race_no INTEGER NOT NULL,
+    sira INTEGER NOT NULL,
+    at_ismi TEXT NOT NULL,
+    isim_anahtari TEXT NOT NULL,
+    at_ismi_full TEXT,
+    derece TEXT,
+    PRIMARY KEY (city, date, race_no, sira)
+);
+CREATE INDEX IF NOT EXISTS ix_results_isim ON race_results(isim_anahtari);
+CREATE TABLE IF NOT EXISTS comparisons (
+    city TEXT NOT NULL,
+    date TEXT NOT NULL,
+    total_races INTEGER,
+    successful_predictions INTEGER,
+    success_rate REAL,
+    veri TEXT NOT NULL,
+    PRIMARY KEY (city, date)
+);
+'''
+
+_lock = threading.Lock()
+_conn = None
+
+
+def at_id(profil_linki):
+    """'/at/94359/stella-girl' -> 94359 (yoksa None)"""
+    eslesme = _AT_ID.search(str(profil_linki or ''))
+    return int(eslesme.group(1)) if eslesme else None
+
+
+def isim_anahtari(at_ismi):
+    """Kart ve sonuç sayfasındaki at isimlerini eşleştirmek için anahtar"""
+    return _BOSLUK.sub(' ', _PARANTEZ.sub('', str(at_ismi or ''))).strip().upper()
+
+
+def _tarih_str(tarih):
+    if isinstance(tarih, (date, datetime)):
+        return tarih.strftime('%Y%m%d')
+    return str(tarih)
+
+
+def _kosu_no(deger):
+    try:
+        return int(str(deger).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _db():
+    """Paylaşılan bağlantı (lock altında çağrılır)"""
+    global _conn
+    if _conn is None:
+        dizin = os.path.dirname(WAREHOUSE_DB)
+        if dizin:
+            os.makedirs(dizin, exist_ok=True)
+        conn = sqlite3.connect(WAREHOUSE_DB, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.executescript(SEMA)
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _yaz(islem, aciklama):
+    """islem(db)'yi tek transaction'da çalıştırır; hata yazan tarafı etkilemez"""
+    if not WAREHOUSE_AKTIF:
+        return False
+    try:
+        with _lock:
+            db = _db()
+            with db:
+                islem(db)
+        return True
+    except (sqlite3.Error, OSError) as e:
+        print(f"[UYARI] Veri ambarına yazılamadı ({aciklama}): {e}")
+        return False
+
+
+def _kart_yaz(db, city, tarih, horses):
+    kosular = {}
+    for horse in horses:
+        kosu_no = _kosu_no(horse.get('Koşu'))
+        if kosu_no is not None:
+            kosular.setdefault(kosu_no, horse)
+
+    # Kart yeniden çekildiyse o günün satırları baştan yazılır
+    db.execute('DELETE FROM race_cards WHERE city = ? AND date = ?', (city, tarih))
+    db.executemany(
+        'INSERT INTO race_cards (city, date, race_no, mesafe, pist, sehir_adi) VALUES (?, ?, ?, ?, ?, ?)',
+        [(city, tarih, no, h.get('Bugünkü Mesafe', ''), h.get('Bugünkü Pist', ''), h.get('Şehir', ''))
+         for no, h in kosular.items()])
+    race_ids = dict(db.execute('SELECT race_no, id FROM race_cards WHERE city = ? AND date = ?', (city, tarih)))
+
+    satirlar, atlar = [], {}
+    for sira, horse in enumerate(horses):
+        race_id = race_ids.get(_kosu_no(horse.get('Koşu')))
+        if race_id is None:
+            continue
+        kimlik = at_id(horse.get('Profil Linki'))
+        satirlar.append((race_id, sira, kimlik, horse.get('At İsmi', ''), isim_anahtari(horse.get('At İsmi')),
+                         horse.get('Profil Linki', ''), horse.get('Jokey', ''), horse.get('Kilo', ''),
+                         horse.get('Son Kilo', ''), horse.get('Son Mesafe', ''), horse.get('Son Pist', ''),
+                         horse.get('Son Derece', ''), horse.get('Son Hipodrom', '')))
+        if kimlik is not None:
+            atlar[kimlik] = (kimlik, horse.get('At İsmi', ''), horse.get('Profil Linki', ''))
+    db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', satirlar)
+    db.executemany('''
+        INSERT INTO horses (at_id, at_ismi, profil_linki) VALUES (?, ?, ?)
+        ON CONFLICT(at_id) DO UPDATE SET at_ismi = excluded.at_ismi, profil_linki = excluded.profil_linki
+    ''', list(atlar.values()))
+
+
+def write_card(city, tarih, horses):
+    """Şehrin günlük kartını (koşular + at satırları) tek transaction'da yaz"""
+    if not horses:
+        return False
+    tarih = _tarih_str(tarih)
+    return _yaz(lambda db: _kart_yaz(db, city, tarih, horses), f"{city} kartı {tarih}")
+
+
+def write_profiles(profiller, profil_tarihi=None):
+    """
+    At profillerini ve geçmiş koşularını toplu yaz
+
+    Args:
+        profiller: {profil linki: parse_horse_profile çıktısı}
+        profil_tarihi: Profilin çekildiği gün (varsayılan: bugün)
+    """
+    profil_tarihi = _tarih_str(profil_tarihi or datetime.now())
+    atlar, kosular = [], []
+    for profil_linki, profil in profiller.items():
+        kimlik = at_id(profil_linki)
+        if kimlik is None or not profil:
+            continue
+        gecmis = [k for k in profil.get('gecmis', []) if k.get('durum') == 'gecmis']
+        son_tarih = max((k['tarih'] for k in gecmis), default=None)
+        atlar.append((kimlik, profil_linki, _tarih_str(son_tarih) if son_tarih else None, profil_tarihi))
+        for kosu in gecmis:
+            kosular.append((kimlik, _tarih_str(kosu['tarih']), kosu.get('hipodrom', ''), kosu.get('mesafe', ''),
+                            kosu.get('pist', ''), kosu.get('derece', ''), kosu.get('kilo', ''), kosu.get('url', '')))
+    if not atlar:
+        return False
+
+    def yaz(db):
+        db.executemany('''
+            INSERT INTO horses (at_id, profil_linki, son_kosu_tarihi, profil_tarihi) VALUES (?, ?, ?, ?)
+            ON CONFLICT(at_id) DO UPDATE SET profil_linki = excluded.profil_linki,
+                son_kosu_tarihi = excluded.son_kosu_tarihi, profil_tarihi = excluded.profil_tarihi
+        ''', atlar)
+        db.executemany('INSERT OR REPLACE INTO past_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)', kosular)
+
+    return _yaz(yaz, f"{len(atlar)} profil")
+
+
+def write_results(city, tarih, results):
+    """
+    Sonuç sayfasından ayrıştırılan koşu sonuçlarını yaz
+
+    Args:
+        results: {koşu no: [{'sira', 'at_ismi', 'derece', 'at_ismi_full'}, ...]}
+    """
+    if not results:
+        return False
+    tarih = _tarih_str(tarih)
+    satirlar = [(city, tarih, int(kosu_no), r['sira'], r['at_ismi'], isim_anahtari(r['at_ismi']),
+                 r.get('at_ismi_full', ''), r.get('derece', ''))
+                for kosu_no, sonuclar in results.items() for r in sonuclar]
+
+    def yaz(db):
+        db.execute('DELETE FROM race_results WHERE city = ? AND date = ?', (city, tarih))
+        db.executemany('INSERT OR REPLACE INTO race_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)', satirlar)
+
+    return _yaz(yaz, f"{city} sonuçları {tarih}")
+
+
+def write_comparison(city, tarih, comparison):
+    """Karşılaştırma sonucunu (özet sütunları + tam JSON) yaz"""
+    tarih = _tarih_str(tarih)
+    satir = (city, tarih, comparison.get('total_races'), comparison.get('successful_predictions'),
+             comparison.get('success_rate'), json.dumps(comparison, ensure_ascii=False))
+    return _yaz(lambda db: db.execute('INSERT OR REPLACE INTO comparisons VALUES (?, ?, ?, ?, ?, ?)', satir),
+                f"{city} karşılaştırması {tarih}")
+
+
+def query(sql, parametreler=()):
+    """Salt okunur sorgu; satırlar dict olarak döner"""
+    with _lock:
+        imlec = _db().execute(sql, parametreler)
+        adlar = [d[0] for d in imlec.description]
+        return [dict(zip(adlar, satir)) for satir in imlec.fetchall()]
+
+
+def predictions_with_results(city=None, start=None, end=None, at_id_=None):
+    """
+    Kart satırlarını aynı gün/koşunun sonucu ile birleştirir
+
+    Returns:
+        list: Her at için kart alanları + 'bitis_sirasi' ve 'bitis_derecesi' (sonuç yoksa None)
+    """
+    kosullar, parametreler = ['1 = 1'], []
+    if city:
+        kosullar.append('c.city = ?')
+        parametreler.append(city)
+    if start:
+        kosullar.append('c.date >= ?')
+        parametreler.append(_tarih_str(start))
+    if end:
+        kosullar.append('c.date <= ?')
+        parametreler.append(_tarih_str(end))
+    if at_id_ is not None:
+        kosullar.append('e.at_id = ?')
+        parametreler.append(at_id_)
+    return query(f'''
+        SELECT c.city, c.date, c.race_no, c.mesafe, c.pist, e.at_id, e.at_ismi, e.jokey, e.kilo,
+               e.son_kilo, e.son_mesafe, e.son_pist, e.son_derece, e.son_hipodrom,
+               r.sira AS bitis_sirasi, r.derece AS bitis_derecesi
+        FROM race_cards c
+        JOIN entries e ON e.race_id = c.id
+        LEFT JOIN race_results r ON r.city = c.city AND r.date = c.date AND r.race_no = c.race_no
+             AND r.isim_anahtari = e.isim_anahtari
+        WHERE {' AND '.join(kosullar)}
+        ORDER BY c.date, c.city, c.race_no, e.sira
+    ''', parametreler)
+
+
+def horse_history(at_id_):
+    """Atın profilden gelen geçmiş koşuları (en yeni önce)"""
+    return query('SELECT * FROM past_runs WHERE at_id = ? ORDER BY tarih DESC', (at_id_,))
+
+
+def import_files(data_dizini=DATA_DIZINI):
+    """
+    data/*_atlari_*.json kartlarını ve data/comparisons/*.json karşılaştırmalarını aktar
+
+    Returns:
+        tuple: (kart sayısı, karşılaştırma sayısı)
+    """
+    kart, karsilastirma = 0, 0
+    for desen, regex, yazici in (
+            (os.path.join(data_dizini, '*_atlari_*.json'), _KART_DOSYASI, write_card),
+            (os.path.join(data_dizini, 'comparisons', '*_comparison_*.json'), _KARSILASTIRMA_DOSYASI, write_comparison)):
+        for yol in sorted(glob.glob(desen)):
+            eslesme = regex.match(os.path.basename(yol))
+            if not eslesme:
+                continue
+            try:
+                with open(yol, 'r', encoding='utf-8') as f:
+                    veri = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[UYARI] {yol} okunamadı: {e}")
+                continue
+            if yazici(eslesme.group('city'), eslesme.group('date'), veri):
+                if yazici is write_card:
+                    kart += 1
+                else:
+                    karsilastirma += 1
+    return kart, karsilastirma
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Yarış veri ambarı')
+    alt = parser.add_subparsers(dest='komut', required=True)
+    alt.add_parser('import', help='data/ altındaki kart ve karşılaştırma JSON\'larını aktar')
+    alt.add_parser('stats', help='Tablo satır sayıları')
+    args = parser.parse_args()
+
+    if args.komut == 'import':
+        kart, karsilastirma = import_files()
+        print(f"[TAMAM] {kart} kart, {karsilastirma} karşılaştırma aktarıldı ({WAREHOUSE_DB})")
+        return 0
+
+    for tablo in ('race_cards', 'entries', 'horses', 'past_runs', 'race_results', 'comparisons'):
+        sayi = query(f'SELECT COUNT(*) AS sayi FROM {tablo}')[0]['sayi']
+        print(f"{tablo:<16}{sayi:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KALICI HTTP YANIT ÖNBELLEĞİ
+yenibeygir sayfalarını URL bazında sıkıştırılmış olarak diske yazar.
+- Geçmiş tarihli sayfalar (sonuçlar, eski koşular) hiç eskimez
+- At profilleri (/at/...) gün sonuna kadar geçerlidir
+- Diğer sayfalar (bugünün yarış kartı vb.) kısa süre geçerlidir
+Süresi dolan kayıtlar ETag/Last-Modified ile koşullu istekle doğrulanır.
+Toplam boyut sınırı aşıldığında en uzun süredir kullanılmayan kayıtlar silinir.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+CACHE_DIZINI = os.environ.get('HTTP_CACHE_DIR', os.path.join('cache', 'http'))
+CACHE_AKTIF = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+MAX_BOYUT = int(float(os.environ.get('HTTP_CACHE_MAX_MB', '200')) * 1024 * 1024)
+KISA_TTL = int(os.environ.get('HTTP_CACHE_SHORT_TTL', '600'))
+
+
+def _url_tarihi(url):
+    """URL yolunun ilk parçasındaki DD-MM-YYYY tarihini döndür"""
+    parcalar = urlparse(url).path.strip('/').split('/')
+    if not parcalar:
+        return None
+    try:
+        return datetime.strptime(parcalar[0], '%d-%m-%Y').date()
+    except ValueError:
+        return None
+
+
+def ttl_hesapla(url, simdi=None):
+    """
+    URL sınıfına göre kaydın son geçerlilik zamanı (epoch)
+
+    Returns:
+        float | None: None ise kayıt hiç eskimez
+    """
+    simdi = simdi or datetime.now()
+    tarih = _url_tarihi(url)
+    if tarih and tarih < simdi.date():
+        return None
+
+    parcalar = urlparse(url).path.strip('/').split('/')
+    if parcalar and parcalar[0] == 'at':
+        gece_yarisi = datetime.combine(simdi.date() + timedelta(days=1), datetime.min.time())
+        return gece_yarisi.timestamp()
+
+    return simdi.timestamp() + KISA_TTL
+
+
+class CacheKaydi:
+    """Önbellekten okunan tek kayıt"""
+    __slots__ = ('url', 'icerik', 'encoding', 'etag', 'last_modified', 'taze')
+
+    def __init__(self, url, icerik, encoding, etag, last_modified, taze):
+        self.url = url
+        self.icerik = icerik
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.taze = taze
+
+
+class ResponseCache:
+    def __init__(self, dizin=CACHE_DIZINI, max_boyut=MAX_BOYUT):
+        self.dizin = dizin
+        self.max_boyut = max_boyut
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {'hit': 0, 'miss': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(self.dizin, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.dizin, 'index.db'),
+                                   timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS yanitlar (
+                    url TEXT PRIMARY KEY,
+                    dosya TEXT NOT NULL,
+                    encoding TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    alinma REAL NOT NULL,
+                    son_gecerlilik REAL,
+                    son_erisim REAL NOT NULL,
+                    boyut INTEGER NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_yanitlar_erisim ON yanitlar(son_erisim)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _dosya_yolu(self, url):
+        anahtar = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(anahtar[:2], anahtar + '.gz')
+
+    def lookup(self, url):
+        """URL için kaydı döndür (yoksa None). Bulunursa son erişim zamanı güncellenir."""
+        simdi = time.time()
+        with self._lock:
+            db = self._db()
+            satir = db.execute(
+                'SELECT dosya, encoding, etag, last_modified, son_gecerlilik FROM yanitlar WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if not satir:
+                self.stats['miss'] += 1
+                return None
+            dosya, encoding, etag, last_modified, son_gecerlilik = satir
+            try:
+                with gzip.open(os.path.join(self.dizin, dosya), 'rb') as f:
+                    icerik = f.read()
+            except OSError:
+                db.execute('DELETE FROM yanitlar WHERE url = ?', (url,))
+                db.commit()
+                self.stats['miss'] += 1
+                return None
+            taze = son_gecerlilik is None or son_gecerlilik > simdi
+            if taze:
+                self.stats['hit'] += 1
+                db.execute('UPDATE yanitlar SET son_erisim = ? WHERE url = ?', (simdi, url))
+                db.commit()
+            else:
+                self.stats['miss'] += 1
+        return CacheKaydi(url, icerik, encoding, etag, last_modified, taze)
+
+    def store(self, url, icerik, encoding=None, etag=None, last_modified=None):
+        """Yanıtı sıkıştırıp diske yaz ve indeksi güncelle"""
+        simdi = time.time()
+        dosya = self._dosya_yolu(url)
+        tam_yol = os.path.join(self.dizin, dosya)
+        os.makedirs(os.path.dirname(tam_yol), exist_ok=True)
+
+        gecici = f"{tam_yol}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(gecici, 'wb', compresslevel=6) as f:
+            f.write(icerik)
+        os.replace(gecici, tam_yol)
+        boyut = os.path.getsize(tam_yol)
+
+        with self._lock:
+            db = self._db()
+            db.execute('''
+                INSERT OR REPLACE INTO yanitlar
+                (url, dosya, encoding, etag, last_modified, alinma, son_gecerlilik, son_erisim, boyut)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, dosya, encoding, etag, last_modified, simdi, ttl_hesapla(url), simdi, boyut))
+            db.commit()
+            self.stats['stored'] += 1
+            self._evict()
+
+    def refresh(self, url):
+        """304 yanıtı sonrası kaydın geçerlilik süresini yenile"""
+        simdi = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('UPDATE yanitlar SET son_gecerlilik = ?, son_erisim = ?, alinma = ? WHERE url = ?',
+                       (ttl_hesapla(url), simdi, simdi, url))
+            db.commit()
+            self.stats['revalidated'] += 1
+
+    def _evict(self):
+        """Boyut sınırı aşıldıysa en eski erişilen kayıtları sil (lock altında çağrılır)"""
+        db = self._db()
+        toplam = db.execute('SELECT COALESCE(SUM(boyut), 0) FROM yanitlar').fetchone()[0]
+        if toplam <= self.max_boyut:
+            return
+
+        hedef = int(self.max_boyut * 0.9)
+        silinecek = []
+        for url, dosya, boyut in db.execute('SELECT url, dosya, boyut FROM yanitlar ORDER BY son_erisim'):
+            if toplam <= hedef:
+                break
+            silinecek.append((url, dosya))
+            toplam -= boyut
+
+        for url, dosya in silinecek:
+            try:
+                os.remove(os.path.join(self.dizin, dosya))
+            except OSError:
+                pass
+            db.execute('DELETE FROM yanitlar WHERE url = ?', (url,))
+        db.commit()
+        self.stats['evicted'] += len(silinecek)
+
+    def get_stats(self):
+        """Hit/miss sayaçları ve önbellek boyutu"""
+        with self._lock:
+            db = self._db()
+            kayit, boyut = db.execute('SELECT COUNT(*), COALESCE(SUM(boyut), 0) FROM yanitlar').fetchone()
+            stats = dict(self.stats)
+        toplam = stats['hit'] + stats['miss']
+        stats['kayit'] = kayit
+        stats['boyut_mb'] = round(boyut / 1024 / 1024, 2)
+        stats['hit_orani'] = round(stats['hit'] / toplam * 100, 1) if toplam else 0
+        return stats
+
+    def clear(self):
+        """Tüm önbelleği temizle"""
+        with self._lock:
+            db = self._db()
+            for (dosya,) in db.execute('SELECT dosya FROM yanitlar').fetchall():
+                try:
+                    os.remove(os.path.join(self.dizin, dosya))
+                except OSError:
+                    pass
+            db.execute('DELETE FROM yanitlar')
+            db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Süreç genelinde paylaşılan önbellek nesnesi"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -7,8 +7,13 @@ Gece saat 12'den sonra bir önceki günün sonuçlarını çeker
 ve tahminlerle karşılaştırır
 """
 
-import requests
-from bs4 import BeautifulSoup
+import http_client
+from data_store import load_race_card, load_race_entries, race_card_path
+import race_warehouse
+import results_store
+import single_flight
+from race_entry import from_dicts
+from html_parser import make_soup, TABLO_SECICI
 from datetime import datetime, timedelta
 import time
 import json
@@ -86,10 +91,36 @@ def get_previous_day_results(city, debug=False):
     Returns:
         dict: Koşu sonuçları {race_number: [{'at_ismi': '', 'derece': '', 'sira': 1}, ...]}
     """
+    # Bir önceki güne ait tarihi hesapla
+    yesterday = datetime.now() - timedelta(days=1)
+    
+    # Kesinleşmiş sonuçlar bir kez indirilip depodan okunur
+    kayitli = results_store.load(city, yesterday)
+    if kayitli is not None:
+        if debug:
+            print(f"[SONUÇ] {city.upper()} sonuçları depodan okundu ({len(kayitli)} koşu)")
+        return kayitli
+    
+    # Aynı şehir/gün için eşzamanlı istekler tek indirmeyi paylaşır
+    return single_flight.run(f"sonuc:{city}:{yesterday.strftime('%Y%m%d')}", fetch_results, city, yesterday, debug,
+                             sonuc_oku=lambda: results_store.load(city, yesterday))
+
+def _kart_kosu_sayisi(city, tarih):
+    """O günün kayıtlı kartındaki koşu sayısı (kart yoksa None)"""
+    horses = load_race_card(city, tarih)
+    if not horses:
+        return None
+    return len({str(h.get('Koşu', '')) for h in horses})
+
+def fetch_results(city, tarih, debug=False):
+    """
+    Verilen günün sonuç sayfasını indirip ayrıştırır; kesinleşmişse depoya yazar
+    
+    Returns:
+        dict: Koşu sonuçları (çekilemezse boş dict)
+    """
     try:
-        # Bir önceki güne ait tarihi hesapla
-        yesterday = datetime.now() - timedelta(days=1)
-        date_str = yesterday.strftime('%d-%m-%Y')
+        date_str = tarih.strftime('%d-%m-%Y')
         
         # URL'yi oluştur
         url = f"https://yenibeygir.com/{date_str}/{city}/sonuclar"
@@ -97,8 +128,16 @@ def get_previous_day_results(city, debug=False):
         if debug:
             print(f"[SONUÇ] {city.upper()} sonuçları çekiliyor: {url}")
         
-        # Sayfayı çek
-        response = requests.get(url, timeout=10)
+        # Sayfayı çek (geçmiş gün sonuçları değişmez; yalnızca tamamlanmış sayfalar önbelleğe yazılır)
+        # Önbellek kontrolü için ayrıştırılan sayfa aşağıda yeniden ayrıştırılmaz
+        kart_kosu_sayisi = _kart_kosu_sayisi(city, tarih)
+        ayristirilan = []
+        
+        def gecerli(html):
+            ayristirilan.append(parse_results_page(make_soup(html, TABLO_SECICI)))
+            return results_store.tamamlanmis_mi(ayristirilan[-1], kart_kosu_sayisi)
+        
+        response = http_client.get_cached(url, gecerli=gecerli)
         
         if debug:
             print(f"[SONUÇ] HTTP Status: {response.status_code}")
@@ -110,10 +149,13 @@ def get_previous_day_results(city, debug=False):
         
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Sonuç verilerini parse et
-        results = parse_results_page(soup, debug)
+        if ayristirilan:
+            results = ayristirilan[-1]
+        else:
+            results = parse_results_page(make_soup(response.text, TABLO_SECICI), debug)
+        results_store.save(city, tarih, results, kart_kosu_sayisi)
+        race_warehouse.write_results(city, tarih, results)
         
         if debug:
             print(f"[SONUÇ] {len(results)} koşu sonucu bulundu")
@@ -268,20 +310,15 @@ def compare_predictions_with_results(city, debug=False):
     try:
         # Dünün tarihini hesapla
         yesterday = datetime.now() - timedelta(days=1)
-        date_str = yesterday.strftime('%Y%m%d')
         
-        # Tahmin dosyasını bul
-        prediction_file = f"data/{city}_atlari_{date_str}.json"
+        # Tahminleri yükle (JSON kart, yoksa sütunsal depo); satırlar bir kez RaceEntry'ye çevrilir
+        predictions = load_race_entries(city, yesterday)
         
-        if not os.path.exists(prediction_file):
+        if predictions is None:
             if debug:
-                print(f"[UYARI] Tahmin dosyası bulunamadı: {prediction_file}")
+                print(f"[UYARI] Tahmin dosyası bulunamadı: {race_card_path(city, yesterday)}")
             return {'error': 'Tahmin dosyası bulunamadı'}
         
-        # Tahminleri yükle
-        with open(prediction_file, 'r', encoding='utf-8') as f:
-            predictions = json.load(f)
-        
         # Sonuçları çek
         results = get_previous_day_results(city, debug)
         
@@ -312,20 +349,15 @@ def get_detailed_race_comparison(city, debug=False):
     try:
         # Dünün tarihini hesapla
         yesterday = datetime.now() - timedelta(days=1)
-        date_str = yesterday.strftime('%Y%m%d')
         
-        # Tahmin dosyasını bul
-        prediction_file = f"data/{city}_atlari_{date_str}.json"
+        # Tahminleri yükle (JSON kart, yoksa sütunsal depo); satırlar bir kez RaceEntry'ye çevrilir
+        predictions = load_race_entries(city, yesterday)
         
-        if not os.path.exists(prediction_file):
+        if predictions is None:
             if debug:
-                print(f"[UYARI] Tahmin dosyası bulunamadı: {prediction_file}")
+                print(f"[UYARI] Tahmin dosyası bulunamadı: {race_card_path(city, yesterday)}")
             return {'error': 'Tahmin dosyası bulunamadı'}
         
-        # Tahminleri yükle
-        with open(prediction_file, 'r', encoding='utf-8') as f:
-            predictions = json.load(f)
-        
         # Sonuçları çek
         results = get_previous_day_results(city, debug)
         
@@ -363,6 +395,9 @@ def perform_detailed_comparison(predictions, results, debug=False):
     }
     
     try:
+        # Derece/mesafe alanları satır başına bir kez ayrıştırılır
+        predictions = from_dicts(predictions)
+        
         # Tahminleri koşu numarasına göre grupla
         predictions_by_race = {}
         for prediction in predictions:
@@ -417,18 +452,13 @@ def perform_detailed_comparison(predictions, results, debug=False):
                 
                 if not cikti_str or cikti_str == 'geçersiz':
                     son_derece = str(prediction.get('Son Derece', '')).strip()
-                    son_mesafe = str(prediction.get('Son Mesafe', '')).strip()
+                    derece_saniye = prediction.son_derece_sn or 0
+                    son_mesafe_value = prediction.son_mesafe_m
                     
-                    if son_derece and son_mesafe:
-                        try:
-                            derece_saniye = time_to_seconds(son_derece)
-                            son_mesafe_value = float(son_mesafe.replace(',', '.'))
-                            if son_mesafe_value > 0:
-                                cikti_value = derece_saniye / (son_mesafe_value / 100)
-                                if debug:
-                                    print(f"    [HESAPLANDI] {horse_name}: {son_derece} ({derece_saniye}s) / {son_mesafe_value}m = {cikti_value:.2f}")
-                        except:
-                            cikti_value = 0
+                    if son_derece and son_mesafe_value is not None and son_mesafe_value > 0:
+                        cikti_value = derece_saniye / (son_mesafe_value / 100)
+                        if debug:
+                            print(f"    [HESAPLANDI] {horse_name}: {son_derece} ({derece_saniye}s) / {son_mesafe_value}m = {cikti_value:.2f}")
                 else:
                     try:
                         cikti_value = float(cikti_str.replace(',', '.'))
@@ -436,12 +466,8 @@ def perform_detailed_comparison(predictions, results, debug=False):
                         cikti_value = 0
                 
                 # Tahmini süreyi hesapla
-                if cikti_value > 0 and mesafe_str:
-                    try:
-                        mesafe_value = float(mesafe_str.replace(',', '.'))
-                        calculated_time = cikti_value * (mesafe_value / 100)
-                    except:
-                        calculated_time = 0
+                if cikti_value > 0 and prediction.bugun_mesafe_m is not None:
+                    calculated_time = cikti_value * (prediction.bugun_mesafe_m / 100)
                 
                 # Gerçek sonucu bul
                 actual_position = None
@@ -555,6 +581,9 @@ def perform_comparison(predictions, results, debug=False):
     }
     
     try:
+        # Derece/mesafe alanları satır başına bir kez ayrıştırılır
+        predictions = from_dicts(predictions)
+        
         # Tahminleri koşu numarasına göre grupla
         predictions_by_race = {}
         for prediction in predictions:
@@ -600,6 +629,7 @@ def perform_comparison(predictions, results, debug=False):
             
             # En iyi tahminimizi bul - çıktı değeri * mesafe ile hesaplanan en düşük skor
             predicted_winner = None
+            predicted_time = 0
             best_calculated_time = float('inf')
             
             for prediction in race_predictions:
@@ -614,9 +644,11 @@ def perform_comparison(predictions, results, debug=False):
                     
                     if son_derece and son_mesafe:
                         try:
-                            # Son derece'yi saniyeye çevir
-                            derece_saniye = time_to_seconds(son_derece)
-                            son_mesafe_value = float(son_mesafe.replace(',', '.'))
+                            # Ayrıştırılmış derece (saniye) ve mesafe
+                            derece_saniye = prediction.son_derece_sn or 0
+                            son_mesafe_value = prediction.son_mesafe_m
+                            if son_mesafe_value is None:
+                                continue
                             
                             if derece_saniye > 0 and son_mesafe_value > 0:
                                 # 100m başına süreyi hesapla
@@ -632,8 +664,10 @@ def perform_comparison(predictions, results, debug=False):
                     try:
                         # Çıktı değerini float'a çevir
                         cikti_value = float(cikti_str.replace(',', '.'))
-                        # Mesafeyi float'a çevir  
-                        mesafe_value = float(mesafe_str.replace(',', '.'))
+                        # Ayrıştırılmış bugünkü mesafe
+                        mesafe_value = prediction.bugun_mesafe_m
+                        if mesafe_value is None:
+                            continue
                         
                         # Tahmini süreyi hesapla: çıktı * (mesafe/100)
                         calculated_time = cikti_value * (mesafe_value / 100)
@@ -641,8 +675,7 @@ def perform_comparison(predictions, results, debug=False):
                         if calculated_time < best_calculated_time:
                             best_calculated_time = calculated_time
                             predicted_winner = prediction
-                            predicted_winner['calculated_time'] = calculated_time
-                            predicted_winner['calculated_cikti'] = cikti_value  # Hesaplanan çıktıyı kaydet
+                            predicted_time = calculated_time
                             
                     except (ValueError, TypeError):
                         continue
@@ -662,9 +695,7 @@ def perform_comparison(predictions, results, debug=False):
                 comparison_results['successful_predictions'] += 1
             
             # Tahmini süreyi formatla
-            predicted_time_formatted = ""
-            if 'calculated_time' in predicted_winner:
-                predicted_time_formatted = seconds_to_time_format(predicted_winner['calculated_time'])
+            predicted_time_formatted = seconds_to_time_format(predicted_time)
             
             race_detail = {
                 'race_number': race_num,
@@ -676,7 +707,7 @@ def perform_comparison(predictions, results, debug=False):
                 'prediction_details': {
                     'cikti': predicted_winner.get('Çıktı', ''),
                     'mesafe': predicted_winner.get('Bugünkü Mesafe', ''),
-                    'calculated_time': seconds_to_time_format(predicted_winner.get('calculated_time', 0))
+                    'calculated_time': seconds_to_time_format(predicted_time)
                 }
             }
             
@@ -686,8 +717,7 @@ def perform_comparison(predictions, results, debug=False):
                 status = "✓ DOĞRU" if is_successful else "✗ YANLIŞ"
                 cikti = predicted_winner.get('Çıktı', '')
                 mesafe = predicted_winner.get('Bugünkü Mesafe', '')
-                calc_time = predicted_winner.get('calculated_time', 0)
-                calc_time_formatted = seconds_to_time_format(calc_time)
+                calc_time_formatted = seconds_to_time_format(predicted_time)
                 print(f"[KOŞU {race_num}] {status}")
                 print(f"  Tahmin: {predicted_name} (Çıktı: {cikti}, Mesafe: {mesafe}m, Hesaplanan: {calc_time_formatted})")
                 print(f"  Gerçek: {actual_name} (Derece: {winner['derece']})")
@@ -740,7 +770,7 @@ def schedule_midnight_check():
     Gece saat 12'den sonra otomatik kontrol yapacak fonksiyon
     Bu fonksiyon sürekli çalışacak bir servis olarak tasarlanmalı
     """
-    cities = ['bursa', 'istanbul', 'ankara', 'izmir', 'adana', 'kocaeli', 'sanliurfa', 'diyarbakir', 'elazig']
+    from batch_comparison import SEHIRLER, compare_cities
     
     while True:
         now = datetime.now()
@@ -749,25 +779,18 @@ def schedule_midnight_check():
         if now.hour == 0 and now.minute == 30:
             print(f"[OTOMATIK] {now.strftime('%d.%m.%Y %H:%M')} - Önceki gün sonuçları kontrol ediliyor...")
             
-            for city in cities:
-                try:
-                    print(f"\n=== {city.upper()} SONUÇLARI ===")
-                    comparison = compare_predictions_with_results(city, debug=True)
+            # Şehirler eşzamanlı karşılaştırılır; başarılı sonuçlar kaydedilir
+            toplu = compare_cities(SEHIRLER, debug=True, kaydet=True)
+            for city, comparison in toplu['city_results'].items():
+                print(f"\n=== {city.upper()} SONUÇLARI ===")
+                if 'error' not in comparison:
+                    success_rate = comparison['success_rate']
+                    total_races = comparison['total_races']
+                    successful = comparison['successful_predictions']
                     
-                    if 'error' not in comparison:
-                        success_rate = comparison['success_rate']
-                        total_races = comparison['total_races']
-                        successful = comparison['successful_predictions']
-                        
-                        print(f"BAŞARI ORANI: {success_rate:.1f}% ({successful}/{total_races})")
-                        
-                        # Sonuçları kaydet
-                        save_comparison_results(city, comparison)
-                    else:
-                        print(f"HATA: {comparison['error']}")
-                
-                except Exception as e:
-                    print(f"HATA ({city}): {str(e)}")
+                    print(f"BAŞARI ORANI: {success_rate:.1f}% ({successful}/{total_races})")
+                else:
+                    print(f"HATA: {comparison['error']}")
             
             # Bir sonraki gün için bekle
             time.sleep(24 * 60 * 60)  # 24 saat bekle
@@ -798,6 +821,7 @@ def save_comparison_results(city, comparison_data):
             json.dump(comparison_data, f, ensure_ascii=False, indent=2)
         
         print(f"[KAYIT] Sonuçlar kaydedildi: {filename}")
+        race_warehouse.write_comparison(city, yesterday, comparison_data)
         
     except Exception as e:
         print(f"[HATA] Sonuç kayıt hatası: {str(e)}")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KESİNLEŞMİŞ SONUÇ DEPOSU
+Günü bitmiş bir şehrin sonuç sayfası bir daha değişmez. Sayfadan
+ayrıştırılan sonuçlar ({koşu no: [{'sira', 'at_ismi', 'derece',
+'at_ismi_full'}, ...]}) (şehir, tarih) başına SQLite'ta (data/results.db)
+kalıcı olarak saklanır; sonraki istekler sayfayı indirip ayrıştırmak
+yerine buradan okur.
+
+Yalnızca tarihi bugünden önce olan ve tamamlanmış sayfalar kaydedilir:
+ayrıştırılan koşu sayısı o günün kayıtlı kartındaki koşu sayısına ulaşmalı
+(kart yoksa her koşu tablosunda birinci olmalı). Boş, eksik ya da gün
+içinde çekilmiş sayfalar her seferinde yeniden çekilir.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+SONUC_DB = os.environ.get('RESULTS_STORE_DB', os.path.join('data', 'results.db'))
+SONUC_AKTIF = os.environ.get('RESULTS_STORE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _db():
+    """Paylaşılan bağlantı (lock altında çağrılır)"""
+    global _conn
+    if _conn is None:
+        dizin = os.path.dirname(SONUC_DB)
+        if dizin:
+            os.makedirs(dizin, exist_ok=True)
+        conn = sqlite3.connect(SONUC_DB, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sonuclar (
+                city TEXT NOT NULL,
+                date TEXT NOT NULL,
+                kosu_sayisi INTEGER NOT NULL,
+                kayit_zamani TEXT NOT NULL,
+                veri TEXT NOT NULL,
+                PRIMARY KEY (city, date)
+            )
+        ''')
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _gun(tarih):
+    return tarih.date() if isinstance(tarih, datetime) else tarih
+
+
+def tamamlanmis_mi(results, kart_kosu_sayisi=None):
+    """
+    Sayfadaki tüm koşuların sonuçları ayrıştırılmış mı
+
+    Args:
+        kart_kosu_sayisi: Kayıtlı karttaki koşu sayısı (kart yoksa None; bu durumda
+                          her koşu tablosunda 1. sıradaki at aranır)
+    """
+    if not results:
+        return False
+    if kart_kosu_sayisi:
+        return len(results) >= kart_kosu_sayisi
+    return all(any(r.get('sira') == 1 for r in sonuclar) for sonuclar in results.values())
+
+
+def kesin_mi(tarih, results, kart_kosu_sayisi=None):
+    """Sonuçlar kesinleşmiş mi: gün bitmiş ve sayfa tamamlanmış"""
+    return _gun(tarih) < date.today() and tamamlanmis_mi(results, kart_kosu_sayisi)
+
+
+def load(city, tarih):
+    """
+    Kaydedilmiş sonuçları oku
+
+    Returns:
+        dict | None: {koşu no (int): [...]}; kayıt yoksa None
+    """
+    if not SONUC_AKTIF:
+        return None
+    try:
+        with _lock:
+            satir = _db().execute('SELECT veri FROM sonuclar WHERE city = ? AND date = ?',
+                                  (city, _gun(tarih).isoformat())).fetchone()
+    except sqlite3.Error as e:
+        print(f"[UYARI] Sonuç deposu okunamadı: {e}")
+        return None
+    if satir is None:
+        return None
+    # JSON anahtarları string; koşu numaraları int olarak geri verilir
+    return {int(kosu_no): sonuclar for kosu_no, sonuclar in json.loads(satir[0]).items()}
+
+
+def save(city, tarih, results, kart_kosu_sayisi=None):
+    """
+    Kesinleşmiş sonuçları kalıcı olarak kaydet (kesin değilse yazılmaz)
+
+    Args:
+        kart_kosu_sayisi: O günün kayıtlı kartındaki koşu sayısı (bkz. tamamlanmis_mi)
+
+    Returns:
+        bool: Kaydedildiyse True
+    """
+    if not SONUC_AKTIF or not kesin_mi(tarih, results, kart_kosu_sayisi):
+        return False
+    satir = (city, _gun(tarih).isoformat(), len(results), datetime.now().isoformat(timespec='seconds'),
+             json.dumps(results, ensure_ascii=False))
+    try:
+        with _lock:
+            db = _db()
+            with db:
+                db.execute('INSERT OR REPLACE INTO sonuclar VALUES (?, ?, ?, ?, ?)', satir)
+    except sqlite3.Error as e:
+        print(f"[UYARI] Sonuç deposuna yazılamadı: {e}")
+        return False
+    return True
+
+
+def load_range(cities=None, start=None, end=None):
+    """
+    Çok günlü analiz için kaydedilmiş sonuçlar
+
+    Args:
+        cities: Şehir anahtarları (None ise hepsi)
+        start, end: 'YYYYMMDD' (dahil)
+
+    Returns:
+        dict: {(şehir, 'YYYYMMDD'): {koşu no: [...]}}
+    """
+    if not SONUC_AKTIF:
+        return {}
+    kosullar, parametreler = ['1 = 1'], []
+    if cities:
+        kosullar.append(f"city IN ({', '.join('?' * len(cities))})")
+        parametreler.extend(cities)
+    if start:
+        kosullar.append('date >= ?')
+        parametreler.append(datetime.strptime(start, '%Y%m%d').date().isoformat())
+    if end:
+        kosullar.append('date <= ?')
+        parametreler.append(datetime.strptime(end, '%Y%m%d').date().isoformat())
+    try:
+        with _lock:
+            satirlar = _db().execute(
+                f"SELECT city, date, veri FROM sonuclar WHERE {' AND '.join(kosullar)} ORDER BY city, date",
+                parametreler).fetchall()
+    except sqlite3.Error as e:
+        print(f"[UYARI] Sonuç deposu okunamadı: {e}")
+        return {}
+    return {(city, tarih.replace('-', '')): {int(k): v for k, v in json.loads(veri).items()}
+            for city, tarih, veri in satirlar}
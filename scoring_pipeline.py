@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KAYDEDİLMİŞ KART SKOR HATTI
+/api/calculate_from_saved için hesaplanmış satırları (process_calculation_for_city
+çıktısı) tek geçişte işler: her atın bugünkü koşu bilgisi (koşu, at ismi)
+indeksinden bulunur, önceki yarış birincisinin düzeltilmiş derecesi ve
+(Çıktı + Birinci Derece) / 2 skoru at başına bir kez hesaplanır. Aynı sonuç
+hem JSON yanıtındaki koşu listesine hem CSV satırlarına yazılır. Kart satırları
+RaceEntry olarak indekslendiğinden bugünkü mesafe bir kez ayrıştırılır.
+"""
+
+import math
+
+from horse_scraper import calculate_kadapt, calculate_time_per_100m, skor_faktorleri, time_to_seconds
+from race_entry import from_dicts, sayi
+
+KOSU_SONEKI = '. Koşu'
+VARSAYILAN_MESAFE = 1200
+VARSAYILAN_KILO = 50.5
+
+
+def index_horses(horses):
+    """
+    Ham at listesini (koşu, at ismi) ve at ismi ile indeksler
+
+    Returns:
+        tuple: ({(koşu, at ismi): RaceEntry}, {at ismi: RaceEntry}) - aynı anahtarda ilk kayıt geçerli
+    """
+    kosu_indeksi = {}
+    isim_indeksi = {}
+    for horse in from_dicts(horses):
+        at_ismi = horse.get('At İsmi')
+        kosu_indeksi.setdefault((str(horse.get('Koşu', '')), at_ismi), horse)
+        isim_indeksi.setdefault(at_ismi, horse)
+    return kosu_indeksi, isim_indeksi
+
+
+def _bos_mu(deger):
+    """Boş string, None veya CSV'den gelen NaN"""
+    return not deger or str(deger) == 'nan'
+
+
+def _safe_float(value, default=VARSAYILAN_KILO):
+    if value is None or str(value).strip() == '':
+        return default
+    try:
+        return float(str(value).replace(',', '.'))
+    except (ValueError, TypeError):
+        return default
+
+
+def winner_adjusted_score(item, horse_today, kazanan_info, city_name):
+    """
+    Önceki yarış birincisinin derecesini bugünkü koşu koşullarına göre düzeltir
+    (mesafe farkı, şehir/pist k_adapt, atın kilo farkı)
+
+    Args:
+        horse_today: Atın kart satırı (RaceEntry; kartta yoksa None)
+
+    Returns:
+        str: '12.34' biçiminde düzeltilmiş derece, hesaplanamazsa ''
+    """
+    kazanan_derece = kazanan_info.get('kazanan_derece')
+    if _bos_mu(kazanan_derece):
+        return ''
+
+    # Birincinin mesafe/pist bilgisi yoksa aynı koşudaki atın son koşu bilgileri kullanılır
+    onceki_mesafe = str(kazanan_info.get('onceki_mesafe', '')).strip()
+    onceki_pist = str(kazanan_info.get('onceki_pist', '')).strip()
+    if _bos_mu(onceki_mesafe):
+        onceki_mesafe = item.get('Son Mesafe', '')
+    if _bos_mu(onceki_pist):
+        onceki_pist = item.get('Son Pist', '')
+    if _bos_mu(onceki_mesafe) or _bos_mu(onceki_pist):
+        return ''
+
+    bugun_pist = horse_today.get('Bugünkü Pist', '') if horse_today else ''
+    onceki_mesafe_float = sayi(onceki_mesafe)
+    bugun_mesafe_float = horse_today.bugun_mesafe_m if horse_today else None
+    if onceki_mesafe_float is None or bugun_mesafe_float is None:
+        onceki_mesafe_float = VARSAYILAN_MESAFE
+        bugun_mesafe_float = VARSAYILAN_MESAFE
+
+    derece_saniye = time_to_seconds(kazanan_derece)
+    if derece_saniye <= 0:
+        return ''
+
+    uzun_faktor, kisa_faktor, kilo_faktor = skor_faktorleri()
+    try:
+        mesafe_farki = bugun_mesafe_float - onceki_mesafe_float
+        if mesafe_farki != 0:
+            mevcut_100m_sure = derece_saniye / (onceki_mesafe_float / 100)
+            mesafe_faktoru = uzun_faktor if mesafe_farki > 0 else kisa_faktor
+            yeni_100m_sure = mevcut_100m_sure + (abs(mesafe_farki) / 100) * mesafe_faktoru
+            toplam_sure = yeni_100m_sure * (bugun_mesafe_float / 100)
+        else:
+            toplam_sure = derece_saniye
+        if not (toplam_sure and toplam_sure > 0):
+            return ''
+
+        ort_100m_sure = calculate_time_per_100m(toplam_sure, bugun_mesafe_float)
+    except ZeroDivisionError:
+        return ''
+
+    # Birincinin şehri kazanan verisinde yoksa aynı şehir varsayılır
+    gecmis_sehir = kazanan_info.get('sehir', city_name)
+    kadapt = calculate_kadapt(gecmis_sehir, onceki_pist, city_name, bugun_pist)
+
+    kilo_fark = _safe_float(item.get('Kilo')) - _safe_float(item.get('Son Kilo'))
+    calc_score = ort_100m_sure * kadapt - kilo_fark * kilo_faktor
+
+    if calc_score and not (math.isnan(calc_score) or math.isinf(calc_score)):
+        return f"{calc_score:.2f}"
+    return ''
+
+
+def _sayi(deger):
+    """'12.34' / '12,34' -> float; geçersiz veya boşsa None"""
+    deger = str(deger).strip()
+    if not deger or deger == 'geçersiz':
+        return None
+    try:
+        return float(deger.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def combined_score(cikti, birinci_derece):
+    """(Çıktı + Birinci Derece) / 2; ikisinden biri yoksa None"""
+    cikti_val = _sayi(cikti)
+    birinci_val = _sayi(birinci_derece)
+    if cikti_val is None or birinci_val is None:
+        return None
+    skor = (cikti_val + birinci_val) / 2
+    return None if math.isnan(skor) else skor
+
+
+def score_saved_card(horses, calculated_data, kazanan_data, city_name):
+    """
+    Hesaplanmış satırları tek geçişte skorlar
+
+    calculated_data satırlarına CSV için 'Birinci Derece' ve 'Skor' alanlarını
+    yazar, aynı değerlerden JSON yanıtının koşu listesini oluşturur.
+
+    Args:
+        horses: Kaydedilmiş ham at listesi (bugünkü mesafe/pist için)
+        calculated_data: process_calculation_for_city çıktısı
+        kazanan_data: get_kazanan_data_for_city çıktısı ({at ismi: kazanan bilgisi})
+        city_name: Bugünkü koşu şehri
+
+    Returns:
+        list: [{'race_number': '1', 'horses': [...]}, ...] koşu numarasına göre sıralı
+    """
+    kosu_indeksi, isim_indeksi = index_horses(horses)
+    races = {}
+    kosu_atlari = None
+    kosu_no = None
+
+    for item in calculated_data:
+        kosu = item.get('Koşu')
+        at_ismi = item.get('At İsmi')
+        if kosu and KOSU_SONEKI in kosu:  # Koşu başlığı
+            kosu_no = kosu.replace(KOSU_SONEKI, '').strip()
+            if kosu_no:
+                kosu_atlari = races[kosu_no] = []
+            item['Birinci Derece'] = ''
+            item['Skor'] = ''
+            continue
+        if not at_ismi:
+            continue
+
+        kazanan_info = kazanan_data.get(at_ismi, {})
+        horse_today = kosu_indeksi.get((kosu_no, at_ismi)) or isim_indeksi.get(at_ismi)
+        birinci_derece = winner_adjusted_score(item, horse_today, kazanan_info, city_name)
+        cikti = item.get('Çıktı', '')
+        skor = combined_score(cikti, birinci_derece)
+
+        item['Birinci Derece'] = birinci_derece
+        item['Skor'] = f"{skor:.2f}" if skor is not None else ''
+
+        if kosu_atlari is None:
+            continue
+        # JSON'da skor yoksa yalnızca Çıktı kullanılır
+        if skor is None:
+            skor = _sayi(cikti)
+        kosu_atlari.append({
+            'at_adi': at_ismi,
+            'skor': skor if skor is not None and not math.isnan(skor) else 'Veri yok',
+            'cikti_degeri': cikti,  # Ham çıktı değeri
+            'jokey': '',  # Bu veri yok ama uyumlu olması için
+            'yas': '',
+            'agirlik': item.get('Kilo', ''),
+            'son_mesafe': item.get('Son Mesafe', ''),
+            'son_pist': item.get('Son Pist', ''),
+            'son_kilo': item.get('Son Kilo', ''),
+            'son_hipodrom': item.get('Son Hipodrom', ''),
+            'son_derece': item.get('Son Derece', ''),
+            # Birincinin hesaplanmış derecesi (sadece hesaplananlar)
+            'kazanan_ismi': birinci_derece,
+            'kazanan_derece': kazanan_info.get('kazanan_derece', ''),
+            'kazanan_ganyan': kazanan_info.get('kazanan_ganyan', '')
+        })
+
+    return [{'race_number': no, 'horses': races[no]}
+            for no in sorted(races, key=lambda x: int(x) if x.isdigit() else 0)]
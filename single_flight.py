@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TEK UÇUŞ (SINGLE-FLIGHT) KOORDİNASYONU
+Aynı anahtarla (ör. şehir + tarih + işlem) eşzamanlı gelen istekleri
+birleştirir: ilk gelen işi çalıştırır, diğerleri onun sonucunu bekler.
+
+- Aynı süreç içinde: bekleyenler ilk çağrının Future'ına bağlanır.
+- Süreçler arasında (gunicorn worker'ları): SQLite üzerinde süreli bir
+  kira (lease) tutulur. Kirayı alamayan süreç, kira bırakılana kadar
+  bekler ve sonucu sonuc_oku ile (ör. kaydedilmiş dosyadan) okur.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+KIRA_DB = os.environ.get('SINGLE_FLIGHT_DB', os.path.join('cache', 'single_flight.db'))
+# Kira süresi: sahibi çökerse bu süre sonunda başka süreç işi devralır
+KIRA_SURESI = int(os.environ.get('SINGLE_FLIGHT_LEASE_SECONDS', '600'))
+# Başka sürecin kirasını bekleme aralığı
+BEKLEME_ARALIGI = float(os.environ.get('SINGLE_FLIGHT_POLL_SECONDS', '1'))
+
+_SAHIP = f"{socket.gethostname()}:{os.getpid()}"
+
+_ucustakiler = {}
+_lock = threading.Lock()
+
+
+def _baglan():
+    dizin = os.path.dirname(KIRA_DB)
+    if dizin:
+        os.makedirs(dizin, exist_ok=True)
+    conn = sqlite3.connect(KIRA_DB, timeout=30, isolation_level=None)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kiralar (
+            anahtar TEXT PRIMARY KEY,
+            sahip TEXT NOT NULL,
+            bitis REAL NOT NULL
+        )
+    ''')
+    return conn
+
+
+def kira_al(anahtar, sure=KIRA_SURESI):
+    """
+    Kirayı almaya çalışır
+
+    Returns:
+        str | None: Kira alındıysa kira kimliği, başka sahipte ise None
+    """
+    kira_id = f"{_SAHIP}:{uuid.uuid4().hex}"
+    simdi = time.time()
+    conn = _baglan()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        satir = conn.execute('SELECT bitis FROM kiralar WHERE anahtar = ?', (anahtar,)).fetchone()
+        if satir and satir[0] > simdi:
+            conn.execute('ROLLBACK')
+            return None
+        conn.execute('INSERT OR REPLACE INTO kiralar (anahtar, sahip, bitis) VALUES (?, ?, ?)',
+                     (anahtar, kira_id, simdi + sure))
+        conn.execute('COMMIT')
+        return kira_id
+    finally:
+        conn.close()
+
+
+def kira_birak(anahtar, kira_id):
+    """Kira hâlâ bizdeyse sil"""
+    conn = _baglan()
+    try:
+        conn.execute('DELETE FROM kiralar WHERE anahtar = ? AND sahip = ?', (anahtar, kira_id))
+    finally:
+        conn.close()
+
+
+def kira_aktif_mi(anahtar):
+    conn = _baglan()
+    try:
+        satir = conn.execute('SELECT bitis FROM kiralar WHERE anahtar = ?', (anahtar,)).fetchone()
+        return bool(satir and satir[0] > time.time())
+    finally:
+        conn.close()
+
+
+def _surecler_arasi(anahtar, func, args, kwargs, sonuc_oku):
+    """Kirayı alıp işi çalıştır; başka süreçteyse bitmesini bekleyip sonucunu oku"""
+    bekledi = False
+    while True:
+        try:
+            kira_id = kira_al(anahtar)
+        except sqlite3.Error as e:
+            # Kira veritabanı kullanılamıyorsa yalnızca süreç içi birleştirme yapılır
+            print(f"[UYARI] Single-flight kira alınamadı ({anahtar}): {e}")
+            return func(*args, **kwargs)
+
+        if kira_id:
+            try:
+                # Başka süreç az önce bitirdiyse onun sonucunu kullan
+                if bekledi and sonuc_oku:
+                    sonuc = sonuc_oku()
+                    if sonuc:
+                        return sonuc
+                return func(*args, **kwargs)
+            finally:
+                kira_birak(anahtar, kira_id)
+
+        print(f"[BEKLE] {anahtar} başka bir süreçte çalışıyor, sonucu bekleniyor...")
+        bekledi = True
+        while kira_aktif_mi(anahtar):
+            time.sleep(BEKLEME_ARALIGI)
+
+
+def run(anahtar, func, *args, sonuc_oku=None, **kwargs):
+    """
+    func'ı anahtar başına tek seferde çalıştırır
+
+    Args:
+        anahtar: İşi tanımlayan string (ör. 'scrape:istanbul:20250919')
+        func: Çalıştırılacak fonksiyon
+        sonuc_oku: Başka bir süreç işi bitirdiğinde sonucu okuyan fonksiyon;
+                   boş/None dönerse iş yeniden çalıştırılır
+
+    Returns:
+        func'ın (veya birleştirilen çağrının) sonucu
+    """
+    with _lock:
+        future = _ucustakiler.get(anahtar)
+        lider = future is None
+        if lider:
+            future = Future()
+            _ucustakiler[anahtar] = future
+
+    if not lider:
+        print(f"[BEKLE] {anahtar} zaten çalışıyor, sonucu bekleniyor...")
+        return future.result()
+
+    try:
+        sonuc = _surecler_arasi(anahtar, func, args, kwargs, sonuc_oku)
+        future.set_result(sonuc)
+        return sonuc
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _ucustakiler.pop(anahtar, None)
@@ -1,3 +1,44 @@
+// Uzun süren işleri arka planda başlat ve bitene kadar durumunu sorgula
+window.runJob = async function(url, body, onProgress) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({}, body, { async: true }))
+    });
+    const accepted = await response.json();
+    if (response.status !== 202) {
+        return { ok: response.ok, status: response.status, result: accepted };
+    }
+    return pollJob(accepted.status_url, onProgress);
+};
+
+// Kuyruğa alınmış işin durumunu bitene kadar sorgula
+window.pollJob = async function(statusUrl, onProgress) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const jobResponse = await fetch(statusUrl);
+        const job = await jobResponse.json();
+        if (!jobResponse.ok) {
+            return { ok: false, status: jobResponse.status, result: job };
+        }
+        if (job.durum === 'tamamlandi' || job.durum === 'hata') {
+            const result = job.sonuc || { status: 'error', message: job.hata, error: job.hata };
+            return { ok: job.durum === 'tamamlandi', status: job.http_status, result: result };
+        }
+        if (onProgress) {
+            onProgress(job.ilerleme);
+        }
+    }
+};
+
+// İlerleme bilgisini kısa metne çevir
+window.formatJobProgress = function(ilerleme) {
+    if (!ilerleme || !ilerleme.at_toplam) {
+        return '';
+    }
+    return ` (${ilerleme.kosu_tamam}/${ilerleme.kosu_toplam} koşu, ${ilerleme.at_tamam}/${ilerleme.at_toplam} at)`;
+};
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log('🏇 At Yarışı Analizi başlatılıyor...');
 
@@ -495,13 +536,11 @@ document.addEventListener('DOMContentLoaded', function() {
         showLoading(true, 'Veriler çekiliyor ve kaydediliyor...');
 
         try {
-            const response = await fetch('/api/scrape_and_save', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ city: city, debug: false })
+            const response = await runJob('/api/scrape_and_save', { city: city, debug: false }, ilerleme => {
+                showLoading(true, 'Veriler çekiliyor ve kaydediliyor...' + formatJobProgress(ilerleme));
             });
 
-            const result = await response.json();
+            const result = response.result;
 
             if (response.ok) {
                 showStatus(`
@@ -615,13 +654,11 @@ document.addEventListener('DOMContentLoaded', function() {
         showLoading(true, 'Veriler çekiliyor ve analiz yapılıyor...');
 
         try {
-            const response = await fetch('/api/scrape_and_calculate', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ city: city, debug: false })
+            const response = await runJob('/api/scrape_and_calculate', { city: city, debug: false }, ilerleme => {
+                showLoading(true, 'Veriler çekiliyor ve analiz yapılıyor...' + formatJobProgress(ilerleme));
             });
 
-            const result = await response.json();
+            const result = response.result;
 
             if (response.ok) {
                 currentData = result;
@@ -0,0 +1,134 @@
+"""
+İndirme Dosyası Yetki Testi
+Kullanıcıların artifact deposundaki analiz dosyalarına yalnızca kendi
+kayıtları üzerinden erişebildiğini (başkasının dosyasına 403) ve aynı
+içeriğin depoda tek kopya tutulduğunu test eder.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import pytest
+
+_DB_DIZINI = tempfile.mkdtemp(prefix='artifact_test_')
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(_DB_DIZINI, 'test.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as app_modulu
+
+import artifact_store
+from models import db, DownloadRecord, User
+
+CSV = 'Koşu,At İsmi,Skor\n1,KARABAŞ,12.34\n'
+
+
+@pytest.fixture
+def ortam(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, 'ARTIFACT_DIZINI', str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(artifact_store, 'DOWNLOADS_DIZINI', str(tmp_path / 'downloads'))
+    os.makedirs(tmp_path / 'downloads')
+    flask_app = app_modulu.app
+    with flask_app.app_context():
+        db.create_all()
+        kullanicilar = []
+        for ad in ('ali', 'ayse'):
+            user = User(username=ad, email=f'{ad}@example.com')
+            user.set_password('gizli-parola-123')
+            db.session.add(user)
+            kullanicilar.append(user)
+        db.session.commit()
+        yield flask_app, [u.id for u in kullanicilar], tmp_path
+        db.session.remove()
+        db.drop_all()
+
+
+def _istemci(flask_app, user_id=None):
+    istemci = flask_app.test_client()
+    if user_id is not None:
+        with istemci.session_transaction() as oturum:
+            oturum['_user_id'] = str(user_id)
+            oturum['_fresh'] = True
+    return istemci
+
+
+def test_kullanici_kendi_dosyasini_indirir(ortam):
+    flask_app, (ali, _), _ = ortam
+    artifact_store.register_download(ali, f'istanbul_analiz_20261012_user{ali}.csv', CSV, city='İstanbul')
+
+    yanit = _istemci(flask_app, ali).get(f'/download/istanbul_analiz_20261012_user{ali}.csv')
+
+    assert yanit.status_code == 200
+    assert yanit.data == CSV.encode(artifact_store.CSV_ENCODING)
+
+
+def test_baskasinin_dosyasi_403(ortam):
+    flask_app, (ali, ayse), tmp_path = ortam
+    dosya = f'istanbul_analiz_20261012_user{ayse}.csv'
+    artifact_store.register_download(ayse, dosya, CSV)
+    # Depo öncesi static/downloads altında kalmış dosya da korunur
+    eski = f'ankara_analiz_20250101_user{ayse}.csv'
+    (tmp_path / 'downloads' / eski).write_bytes(b'eski')
+
+    istemci = _istemci(flask_app, ali)
+    for yol in (f'/download/{dosya}', f'/api/view_analysis_file/{dosya}',
+                f'/download/{eski}', f'/api/view_analysis_file/{eski}'):
+        assert istemci.get(yol).status_code == 403, yol
+
+
+def test_dosya_adi_uyduran_kullanici_baskasinin_kaydini_okuyamaz(ortam):
+    """Kayıt başka kullanıcıya aitse kendi son ekiyle istenen ad da açılmaz"""
+    flask_app, (ali, ayse), _ = ortam
+    dosya = f'istanbul_analiz_20261012_user{ali}.csv'
+    artifact_store.register_download(ayse, dosya, CSV)
+
+    assert artifact_store.open_download(ali, dosya) is None
+    assert _istemci(flask_app, ali).get(f'/download/{dosya}').status_code == 404
+
+
+def test_giris_yapmamis_kullanici_yonlendirilir(ortam):
+    flask_app, (ali, _), _ = ortam
+    dosya = f'istanbul_analiz_20261012_user{ali}.csv'
+    artifact_store.register_download(ali, dosya, CSV)
+
+    assert _istemci(flask_app).get(f'/download/{dosya}').status_code == 302
+
+
+def test_ayni_icerik_tek_kopya(ortam):
+    _, (ali, ayse), tmp_path = ortam
+    birinci = artifact_store.register_download(ali, f'a_user{ali}.csv', CSV)
+    ikinci = artifact_store.register_download(ayse, f'a_user{ayse}.csv', CSV)
+
+    assert birinci.artifact_hash == ikinci.artifact_hash
+    assert len(list((tmp_path / 'artifacts').rglob('*.gz'))) == 1
+    assert DownloadRecord.query.count() == 2
+    assert artifact_store.open_download(ayse, f'a_user{ayse}.csv') == CSV.encode(artifact_store.CSV_ENCODING)
+
+
+def test_yeni_dosya_temizlikte_silinmez(ortam):
+    """Kaydı henüz commit edilmemiş (yeni yazılmış) dosya bekleme süresince korunur"""
+    _, _, tmp_path = ortam
+    ozet = artifact_store.put_bytes(b'sahipsiz')
+    yol = artifact_store.artifact_path(ozet)
+
+    assert artifact_store.remove_unreferenced() == 0
+    assert os.path.exists(yol)
+
+    eski = os.path.getmtime(yol) - artifact_store.SILME_BEKLEMESI - 1
+    os.utime(yol, (eski, eski))
+    assert artifact_store.remove_unreferenced() == 1
+    assert not os.path.exists(yol)
+
+
+def test_yeniden_verilen_indirme_zamani_guncellenir(ortam):
+    _, (ali, _), _ = ortam
+    dosya = f'istanbul_analiz_20261012_user{ali}.csv'
+    kayit = artifact_store.register_download(ali, dosya, CSV)
+    kayit.created_at = kayit.created_at.replace(year=2000)
+    db.session.commit()
+
+    kayit = artifact_store.register_download(ali, dosya, CSV)
+
+    assert kayit.created_at.year != 2000
+    assert DownloadRecord.query.count() == 1
@@ -0,0 +1,91 @@
+"""
+Artımlı Kart Yenileme Testi
+Kayıtlı kart ile yeni parse edilen kart arasındaki farkın (kart_farki)
+eklenen, çıkan, güncellenen atları ve yeniden hesaplanacak koşuları
+doğru bulduğunu test eder.
+"""
+
+from delta_refresh import kart_farki
+
+
+def _at(kosu, isim, link, jokey='J', kilo='57', mesafe='1400', pist='Kum', **diger):
+    return {'Koşu': kosu, 'At İsmi': isim, 'Profil Linki': link, 'Jokey': jokey,
+            'Son Kilo': kilo, 'Bugünkü Mesafe': mesafe, 'Bugünkü Pist': pist,
+            'Son Derece': '1.32.10', **diger}
+
+
+def _satir(kosu, isim, link, jokey='J', kilo='57', mesafe='1400', pist='Kum'):
+    return (kosu, isim, link, jokey, kilo, mesafe, pist)
+
+
+ESKI = [
+    _at('1', 'ALFA', '/at/1/alfa'),
+    _at('1', 'BETA', '/at/2/beta'),
+    _at('2', 'GAMA', '/at/3/gama', mesafe='1600', pist='Çim'),
+    _at('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim'),
+]
+
+
+def test_degisiklik_yoksa_bos_fark():
+    yeni = [_satir('1', 'ALFA', '/at/1/alfa'), _satir('1', 'BETA', '/at/2/beta'),
+            _satir('2', 'GAMA', '/at/3/gama', mesafe='1600', pist='Çim'),
+            _satir('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim')]
+
+    fark = kart_farki(ESKI, yeni)
+
+    assert fark['atlar'] == ESKI
+    assert fark['eklenenler'] == [] and fark['cikanlar'] == [] and fark['guncellenenler'] == []
+    assert fark['degisen_kosular'] == set()
+
+
+def test_jokey_degisikligi_yalnizca_o_kosuyu_etkiler():
+    yeni = [_satir('1', 'ALFA', '/at/1/alfa'), _satir('1', 'BETA', '/at/2/beta'),
+            _satir('2', 'GAMA', '/at/3/gama', jokey='K', mesafe='1600', pist='Çim'),
+            _satir('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim')]
+
+    fark = kart_farki(ESKI, yeni)
+
+    assert fark['guncellenenler'] == [('2', 'GAMA')]
+    assert fark['degisen_kosular'] == {'2'}
+    assert fark['atlar'][2]['Jokey'] == 'K'
+    # Profilden gelen alanlar korunur, kayıtlı dict değiştirilmez
+    assert fark['atlar'][2]['Son Derece'] == '1.32.10'
+    assert ESKI[2]['Jokey'] == 'J'
+
+
+def test_eklenen_ve_cikan_atlar():
+    yeni = [_satir('1', 'ALFA', '/at/1/alfa'),
+            _satir('2', 'GAMA', '/at/3/gama', mesafe='1600', pist='Çim'),
+            _satir('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim'),
+            _satir('2', 'EPSILON', '/at/5/epsilon', mesafe='1600', pist='Çim')]
+
+    fark = kart_farki(ESKI, yeni)
+
+    assert fark['cikanlar'] == [('1', 'BETA')]
+    assert fark['eklenenler'] == [yeni[3]]
+    # Yeni atın yeri profil çekilene kadar boş kalır
+    assert fark['atlar'][3] is None
+    assert fark['degisen_kosular'] == {'1', '2'}
+
+
+def test_profil_linki_degisen_at_yeni_sayilir():
+    """Aynı isimle farklı at (profil linki değişmiş) yeniden çekilir"""
+    yeni = [_satir('1', 'ALFA', '/at/99/alfa'), _satir('1', 'BETA', '/at/2/beta'),
+            _satir('2', 'GAMA', '/at/3/gama', mesafe='1600', pist='Çim'),
+            _satir('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim')]
+
+    fark = kart_farki(ESKI, yeni)
+
+    assert fark['eklenenler'] == [yeni[0]]
+    assert fark['degisen_kosular'] == {'1'}
+
+
+def test_kosu_ici_sira_degisikligi():
+    yeni = [_satir('1', 'BETA', '/at/2/beta'), _satir('1', 'ALFA', '/at/1/alfa'),
+            _satir('2', 'GAMA', '/at/3/gama', mesafe='1600', pist='Çim'),
+            _satir('2', 'DELTA', '/at/4/delta', mesafe='1600', pist='Çim')]
+
+    fark = kart_farki(ESKI, yeni)
+
+    assert fark['guncellenenler'] == []
+    assert fark['degisen_kosular'] == {'1'}
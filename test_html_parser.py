@@ -0,0 +1,81 @@
+"""
+HTML Ayrıştırma Testi
+html_parser.make_soup (lxml + SecimliStrainer) ile ayrıştırılan örnek
+sayfaların, tam belgeyi html.parser ile ayrıştırmakla aynı sonucu verdiğini
+test eder. Örnek sayfalar test_fixtures/sayfalar altındadır.
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+from bs4 import BeautifulSoup
+
+import html_parser
+from horse_scraper import parse_race_card
+from profile_parser import parse_horse_profile
+from race_results import parse_race_result_page
+from results_scraper import parse_results_page
+
+ORNEK_DIZINI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_fixtures', 'sayfalar')
+BUGUN = datetime(2026, 10, 12, 15, 0)
+
+TURLER = {
+    'kart': (html_parser.KART_SECICI, parse_race_card),
+    'profil': (html_parser.PROFIL_SECICI, lambda soup: parse_horse_profile(soup, bugun=BUGUN)),
+    'kosu_sonucu': (html_parser.SONUC_SECICI, parse_race_result_page),
+    'gunluk_sonuc': (html_parser.TABLO_SECICI, parse_results_page),
+}
+
+
+def _oku(tur):
+    with open(os.path.join(ORNEK_DIZINI, f'{tur}.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('tur', sorted(TURLER))
+def test_make_soup_html_parser_ile_ayni(tur):
+    """make_soup sonucu tam belge html.parser sonucuyla birebir aynı olmalı"""
+    secici, ayristir = TURLER[tur]
+    html = _oku(tur)
+
+    beklenen = ayristir(BeautifulSoup(html, 'html.parser'))
+    assert beklenen, f'{tur} örneği boş sonuç veriyor'
+    assert ayristir(html_parser.make_soup(html, secici)) == beklenen
+    # bytes girdisi de aynı sonucu vermeli (önbellekten gelen içerik)
+    assert ayristir(html_parser.make_soup(html.encode('utf-8'), secici)) == beklenen
+
+
+@pytest.mark.skipif(not (html_parser.LXML_AVAILABLE and html_parser.STRAINER_DESTEKLI),
+                    reason='lxml veya bs4 4.13+ yok')
+@pytest.mark.parametrize('tur', sorted(TURLER))
+def test_secimli_strainer_html_parser_ile_ayni(tur):
+    """Alt ağaç filtresi doğrudan kullanıldığında da sonuç değişmemeli"""
+    secici, ayristir = TURLER[tur]
+    html = _oku(tur)
+
+    suzulmus = BeautifulSoup(html, 'lxml', parse_only=html_parser.SecimliStrainer(*secici))
+    assert ayristir(suzulmus) == ayristir(BeautifulSoup(html, 'html.parser'))
+    # Filtre gerçekten devrede: sayfa başlığı gibi alakasız etiketler atılır
+    assert suzulmus.find('title') is None
+
+
+def test_ornek_sayfa_icerikleri():
+    """Örnek sayfalar beklenen kayıtları üretmeli"""
+    kart = parse_race_card(_oku('kart'))
+    assert len(kart) == 7
+    assert kart[0] == ('1', 'KARABAŞ', '/at/10231/karabas', 'H.KARATAŞ', '58.5', '1400', 'Kum')
+    assert kart[-1][5:] == ('1200', 'Sentetik')
+
+    profil = parse_horse_profile(_oku('profil'), bugun=BUGUN)
+    assert profil['son_kosu']['derece'] == '1.38.42'
+    assert profil['son_kosu_url'].endswith('/26-09-2026/ankara/4/sonuclar?at=10231')
+
+    sonuc = parse_race_result_page(_oku('kosu_sonucu'))
+    assert sonuc['hata'] is None
+    assert (sonuc['mesafe'], sonuc['pist']) == ('1600', 'Çim')
+    assert [s['sira'] for s in sonuc['siralama']] == ['1', '2', '3', '4']
+
+    gunluk = parse_results_page(BeautifulSoup(_oku('gunluk_sonuc'), 'html.parser'))
+    assert sorted(gunluk) == [1, 2]
+    assert gunluk[1][1]['at_ismi'] == 'GÖKÇE'
@@ -0,0 +1,67 @@
+"""
+Profil Deposu Testi
+Kayıtlı bir profilin kart günü için yeniden kullanılabilme kuralını
+(yeniden_kullanilabilir) ve depo üzerinden kaydet/oku döngüsünü test eder.
+"""
+
+import os
+from datetime import date, datetime
+
+import pytest
+
+import profile_store
+from profile_parser import parse_horse_profile
+
+KART = date(2026, 10, 12)
+ORNEK_PROFIL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_fixtures', 'sayfalar', 'profil.html')
+
+
+def test_ayni_gun_indirilen_profil_kullanilir():
+    assert profile_store.yeniden_kullanilabilir({date(2026, 9, 26), KART}, KART, KART)
+
+
+def test_arada_kosu_yoksa_eski_profil_kullanilir():
+    """Profil kart gününden önce indirildi, o günden beri koşmadı"""
+    tarihler = {date(2026, 9, 26), KART}
+    assert profile_store.yeniden_kullanilabilir(tarihler, date(2026, 10, 1), KART)
+
+
+def test_indirmeden_sonra_kosmussa_kullanilmaz():
+    """İndirmeden sonra koşulan yarışın sonucu profilde yok"""
+    tarihler = {date(2026, 9, 26), date(2026, 10, 5), KART}
+    assert not profile_store.yeniden_kullanilabilir(tarihler, date(2026, 10, 1), KART)
+    # İndirme günü koşulan yarışın sonucu da henüz girilmemiş olabilir
+    assert not profile_store.yeniden_kullanilabilir({date(2026, 10, 1), KART}, date(2026, 10, 1), KART)
+
+
+def test_kart_satiri_olmayan_profil_kullanilmaz():
+    """Bugünkü koşu satırı profilde yoksa (eski indirme) yeniden indirilir"""
+    assert not profile_store.yeniden_kullanilabilir({date(2026, 9, 26)}, date(2026, 10, 1), KART)
+
+
+def test_gelecek_tarihli_indirme_kullanilmaz():
+    assert not profile_store.yeniden_kullanilabilir({KART}, date(2026, 10, 13), KART)
+
+
+@pytest.fixture
+def depo(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_store, 'DEPO_DB', str(tmp_path / 'profiles.db'))
+    monkeypatch.setattr(profile_store, 'DEPO_AKTIF', True)
+    monkeypatch.setattr(profile_store, '_conn', None)
+    yield
+    if profile_store._conn is not None:
+        profile_store._conn.close()
+
+
+def test_kaydedilen_profil_geri_okunur(depo):
+    with open(ORNEK_PROFIL, encoding='utf-8') as f:
+        profil = parse_horse_profile(f.read(), bugun=datetime(2026, 10, 12, 15, 0))
+    link = '/at/10231/karabas'
+
+    assert profile_store.save_many({link: profil, '/at/1/bos': None}, profil_tarihi=KART) == 1
+
+    okunan = profile_store.load_fresh([link, '/at/77/yok', 'gecersiz'], KART)
+    assert list(okunan) == [link]
+    assert okunan[link] == profil
+    # Ertesi günün kartında bugünkü koşunun sonucu gerekir
+    assert profile_store.load_fresh([link], date(2026, 10, 13)) == {}
@@ -0,0 +1,54 @@
+"""
+Kart Satırı Modeli Testi
+RaceEntry'nin kart JSON'undaki dict'i birebir geri verdiğini (to_dict) ve
+sayısal alanları doğru ayrıştırdığını test eder.
+"""
+
+import glob
+import json
+import os
+
+from race_entry import Pist, RaceEntry, from_dicts
+
+DATA_DIZINI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+ORNEK = {
+    'Koşu': '3', 'At İsmi': 'KARABAŞ', 'Profil Linki': '/at/10231/karabas', 'Jokey': 'H.KARATAŞ',
+    'Son Kilo': '57', 'Son Mesafe': '1600', 'Son Pist': 'Çim', 'Son Derece': '1.38.42',
+    'Kilo': '58,5', 'Bugünkü Mesafe': '1400', 'Bugünkü Pist': 'Kum*', 'Şehir': 'İstanbul',
+    'Son Hipodrom': 'Ankara',
+}
+
+
+def test_to_dict_birebir_doner():
+    assert RaceEntry.from_dict(ORNEK).to_dict() == ORNEK
+
+
+def test_eksik_ve_ekstra_alanlar_korunur():
+    horse = {'Koşu': '1', 'At İsmi': 'ALFA', 'Son Derece': '', 'Çıktı': '12.34'}
+    entry = RaceEntry.from_dict(horse)
+
+    assert entry.to_dict() == horse
+    assert 'Jokey' not in entry.to_dict()
+    assert entry['Çıktı'] == '12.34'
+    assert entry.get('Jokey', 'yok') == 'yok'
+
+
+def test_sayisal_alanlar():
+    entry = RaceEntry.from_dict(ORNEK)
+
+    assert entry.kosu_no == 3
+    assert entry.son_derece_sn == 98.42
+    assert (entry.son_mesafe_m, entry.bugun_mesafe_m) == (1600.0, 1400.0)
+    assert entry.kilo_kg == 58.5
+    assert (entry.son_pist_turu, entry.bugun_pist_turu) == (Pist.CIM, Pist.KUM)
+
+
+def test_kayitli_kartlar_birebir_doner():
+    """data altındaki kayıtlı kartların tamamı değişmeden geri yazılabilmeli"""
+    yollar = sorted(glob.glob(os.path.join(DATA_DIZINI, '*_atlari_*.json')))[:5]
+    assert yollar
+    for yol in yollar:
+        with open(yol, encoding='utf-8') as f:
+            atlar = json.load(f)
+        assert [h.to_dict() for h in from_dicts(atlar)] == atlar, yol
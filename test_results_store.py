@@ -0,0 +1,63 @@
+"""
+Sonuç Deposu Testi
+Sonuç sayfasının tamamlanmış sayılma kuralını (tamamlanmis_mi) ve yalnızca
+kesinleşmiş sonuçların kaydedildiğini test eder.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import results_store
+
+
+def _kosu(*siralar):
+    return [{'sira': sira, 'at_ismi': f'AT{sira}', 'derece': '1.30.00', 'at_ismi_full': f'AT{sira}'}
+            for sira in siralar]
+
+
+def test_bos_sonuc_tamamlanmamis():
+    assert not results_store.tamamlanmis_mi({})
+    assert not results_store.tamamlanmis_mi(None, kart_kosu_sayisi=3)
+
+
+def test_kart_yoksa_her_kosuda_birinci_aranir():
+    assert results_store.tamamlanmis_mi({1: _kosu(1, 2, 3), 2: _kosu(1, 2)})
+    # Sonucu yarım girilmiş koşu (birinci yok)
+    assert not results_store.tamamlanmis_mi({1: _kosu(1, 2, 3), 2: _kosu(2, 3)})
+
+
+def test_kart_kosu_sayisina_ulasilmali():
+    """Sayfada henüz girilmemiş koşular hiç tablo olarak görünmeyebilir"""
+    sonuclar = {1: _kosu(1, 2), 2: _kosu(1, 2)}
+    assert not results_store.tamamlanmis_mi(sonuclar, kart_kosu_sayisi=3)
+    assert results_store.tamamlanmis_mi({**sonuclar, 3: _kosu(1)}, kart_kosu_sayisi=3)
+
+
+def test_bugunun_sonuclari_kesin_degil():
+    sonuclar = {1: _kosu(1, 2)}
+    assert not results_store.kesin_mi(date.today(), sonuclar)
+    assert results_store.kesin_mi(date.today() - timedelta(days=1), sonuclar)
+
+
+@pytest.fixture
+def depo(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, 'SONUC_DB', str(tmp_path / 'results.db'))
+    monkeypatch.setattr(results_store, 'SONUC_AKTIF', True)
+    monkeypatch.setattr(results_store, '_conn', None)
+    yield
+    if results_store._conn is not None:
+        results_store._conn.close()
+
+
+def test_yalnizca_kesin_sonuclar_kaydedilir(depo):
+    dun = date.today() - timedelta(days=1)
+    eksik = {1: _kosu(1, 2), 2: _kosu(1, 2)}
+
+    assert not results_store.save('istanbul', dun, eksik, kart_kosu_sayisi=3)
+    assert not results_store.save('istanbul', date.today(), {**eksik, 3: _kosu(1)}, kart_kosu_sayisi=3)
+    assert results_store.load('istanbul', dun) is None
+
+    tam = {**eksik, 3: _kosu(1)}
+    assert results_store.save('istanbul', dun, tam, kart_kosu_sayisi=3)
+    assert results_store.load('istanbul', dun) == tam
@@ -0,0 +1,147 @@
+"""
+Kaydedilmiş Kart Skor Hattı Testi
+score_saved_card'ın 'Birinci Derece' ve 'Skor' alanlarını, /api/calculate_from_saved
+içindeki eski CSV geçişiyle (aşağıda _eski_csv_gecisi olarak aynen korunmuştur)
+birebir aynı ürettiğini kayıtlı bir kart üzerinde test eder.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import math
+import os
+
+from horse_scraper import (calculate_kadapt, calculate_time_per_100m, process_calculation_for_city,
+                           time_to_seconds)
+from scoring_pipeline import score_saved_card
+
+KART = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'istanbul_atlari_20251008.json')
+SEHIR = 'İstanbul'
+
+
+def _eski_birinci_derece(item, horses, kazanan_info, city_name):
+    """Eski CSV geçişindeki hesap (None: satır atlanır, alan yazılmazdı)"""
+    horse_today = next((h for h in horses if h.get('At İsmi') == item['At İsmi']), {})
+    bugun_mesafe = horse_today.get('Bugünkü Mesafe', '')
+    bugun_pist = horse_today.get('Bugünkü Pist', '')
+
+    onceki_mesafe = str(kazanan_info.get('onceki_mesafe', '')).strip()
+    onceki_pist = str(kazanan_info.get('onceki_pist', '')).strip()
+    if not onceki_mesafe or onceki_mesafe == 'nan':
+        onceki_mesafe = item.get('Son Mesafe', '')
+    if not onceki_pist or onceki_pist == 'nan':
+        onceki_pist = item.get('Son Pist', '')
+
+    if not (kazanan_info.get('kazanan_derece') and onceki_mesafe and onceki_pist and
+            str(onceki_mesafe) != 'nan' and str(onceki_pist) != 'nan' and
+            str(kazanan_info.get('kazanan_derece')) != 'nan'):
+        return ''
+    try:
+        onceki_mesafe_float = float(str(onceki_mesafe).replace(',', '.'))
+        bugun_mesafe_float = float(str(bugun_mesafe).replace(',', '.'))
+    except Exception:
+        onceki_mesafe_float = 1200
+        bugun_mesafe_float = 1200
+
+    derece_saniye = time_to_seconds(kazanan_info.get('kazanan_derece'))
+    if derece_saniye <= 0:
+        return None
+
+    mesafe_farki = bugun_mesafe_float - onceki_mesafe_float
+    if mesafe_farki != 0:
+        mevcut_100m_sure = derece_saniye / (onceki_mesafe_float / 100)
+        mesafe_faktoru = 0.04 if mesafe_farki > 0 else -0.03
+        yeni_100m_sure = mevcut_100m_sure + (abs(mesafe_farki) / 100) * mesafe_faktoru
+        toplam_sure = yeni_100m_sure * (bugun_mesafe_float / 100)
+    else:
+        toplam_sure = derece_saniye
+
+    calc_score = None
+    if toplam_sure and toplam_sure > 0:
+        ort_100m_sure = calculate_time_per_100m(toplam_sure, bugun_mesafe_float)
+        kadapt = calculate_kadapt(kazanan_info.get('sehir', city_name), onceki_pist, city_name, bugun_pist)
+
+        def safe_float(value, default=50.5):
+            if value is None or str(value).strip() == '':
+                return default
+            try:
+                return float(str(value).replace(',', '.'))
+            except (ValueError, TypeError):
+                return default
+
+        kilo_fark = safe_float(item.get('Kilo')) - safe_float(item.get('Son Kilo'))
+        calc_score = ort_100m_sure * kadapt - (kilo_fark * 0.02)
+    if calc_score and not (math.isnan(calc_score) or math.isinf(calc_score)):
+        return f"{calc_score:.2f}"
+    return ''
+
+
+def _eski_skor(cikti, birinci_derece):
+    def sayisal(s):
+        try:
+            float(s.replace(',', '.'))
+            return True
+        except ValueError:
+            return False
+
+    cikti, birinci_derece = str(cikti).strip(), str(birinci_derece).strip()
+    if (cikti and cikti != 'geçersiz' and sayisal(cikti) and
+            birinci_derece and birinci_derece != 'geçersiz' and sayisal(birinci_derece)):
+        return f"{(float(cikti.replace(',', '.')) + float(birinci_derece.replace(',', '.'))) / 2:.2f}"
+    return ''
+
+
+def _eski_csv_gecisi(horses, calculated_data, kazanan_data, city_name):
+    """[(Birinci Derece, Skor), ...] - yazılmayan alan CSV'de boş hücre olurdu"""
+    satirlar = []
+    for item in calculated_data:
+        birinci = ''
+        if item['At İsmi']:
+            birinci = _eski_birinci_derece(item, horses, kazanan_data.get(item['At İsmi'], {}), city_name)
+            birinci = '' if birinci is None else birinci
+        satirlar.append((birinci, _eski_skor(item.get('Çıktı', ''), birinci)))
+    return satirlar
+
+
+def _kazanan_verisi(horses):
+    """Geçerli, eksik ve bozuk değerleri karışık içeren sentetik kazanan verisi"""
+    dereceler = ['1.32.45', '1.25.10', '', float('nan'), '0', '2.01.80', 'geçersiz', '1.40.00']
+    mesafeler = ['1400', '', float('nan'), '1200', '2000', 'abc', 1600, '1800']
+    pistler = ['Kum', 'Çim', '', float('nan'), 'Sentetik', 'Kum*', 'Çim', 'Kum']
+    sehirler = [None, 'Ankara', 'İzmir', None, 'Bursa', 'Adana', None, 'Kocaeli']
+    veri = {}
+    for i, horse in enumerate(horses):
+        if i % 9 == 8:
+            continue  # kazanan verisi olmayan at
+        bilgi = {'kazanan_derece': dereceler[i % 8], 'kazanan_ganyan': '3,45',
+                 'onceki_mesafe': mesafeler[(i // 2) % 8], 'onceki_pist': pistler[(i // 3) % 8]}
+        if sehirler[(i // 5) % 8]:
+            bilgi['sehir'] = sehirler[(i // 5) % 8]
+        veri[horse['At İsmi']] = bilgi
+    return veri
+
+
+def test_eski_csv_ciktisiyla_ayni():
+    with open(KART, encoding='utf-8') as f:
+        horses = json.load(f)
+    kazanan_data = _kazanan_verisi(horses)
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculated_data = process_calculation_for_city(horses, SEHIR)
+
+    beklenen = _eski_csv_gecisi(horses, copy.deepcopy(calculated_data), kazanan_data, SEHIR)
+    races = score_saved_card(horses, calculated_data, kazanan_data, SEHIR)
+
+    assert [(item['Birinci Derece'], item['Skor']) for item in calculated_data] == beklenen
+    hesaplanan = sum(1 for birinci, _ in beklenen if birinci)
+    assert 0 < hesaplanan < len(horses)
+
+    # JSON koşu listesi aynı değerleri taşır
+    atlar = [at for race in races for at in race['horses']]
+    assert [at['at_adi'] for at in atlar] == [item['At İsmi'] for item in calculated_data if item['At İsmi']]
+    satirlar = {item['At İsmi']: item for item in calculated_data if item['At İsmi']}
+    for at in atlar:
+        item = satirlar[at['at_adi']]
+        assert at['kazanan_ismi'] == item['Birinci Derece']
+        if item['Skor']:
+            assert f"{at['skor']:.2f}" == item['Skor']
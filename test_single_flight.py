@@ -0,0 +1,127 @@
+"""
+Single-Flight Testi
+Aynı anahtarla eşzamanlı gelen çağrıların tek çalıştırmada birleştiğini ve
+süresi dolmuş (sahibi çökmüş) bir kiranın başka süreç tarafından
+devralındığını test eder.
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import single_flight
+
+
+@pytest.fixture(autouse=True)
+def kira_db(tmp_path, monkeypatch):
+    yol = str(tmp_path / 'single_flight.db')
+    monkeypatch.setattr(single_flight, 'KIRA_DB', yol)
+    monkeypatch.setattr(single_flight, 'BEKLEME_ARALIGI', 0.05)
+    return yol
+
+
+def _baska_surecin_kirasi(yol, anahtar, kalan):
+    """Başka bir sürecin (ör. çökmüş worker) tuttuğu kirayı taklit et"""
+    single_flight._baglan().close()
+    conn = sqlite3.connect(yol, isolation_level=None)
+    conn.execute('INSERT OR REPLACE INTO kiralar (anahtar, sahip, bitis) VALUES (?, ?, ?)',
+                 (anahtar, 'baska-host:999:x', time.time() + kalan))
+    conn.close()
+
+
+def test_eszamanli_cagrilar_tek_calisir():
+    """Lider çalışırken gelen çağrılar onun sonucunu paylaşır"""
+    basladi = threading.Event()
+    birak = threading.Event()
+    cagrilar = []
+
+    def is_(deger):
+        cagrilar.append(deger)
+        basladi.set()
+        birak.wait(5)
+        return {'sonuc': deger}
+
+    sonuclar = []
+
+    def cagir(deger):
+        sonuclar.append(single_flight.run('scrape:istanbul:20261012', is_, deger))
+
+    lider = threading.Thread(target=cagir, args=(1,))
+    lider.start()
+    assert basladi.wait(5)
+    digerleri = [threading.Thread(target=cagir, args=(i,)) for i in range(2, 6)]
+    for t in digerleri:
+        t.start()
+    time.sleep(0.2)
+    birak.set()
+    for t in [lider] + digerleri:
+        t.join(5)
+
+    assert cagrilar == [1]
+    assert sonuclar == [{'sonuc': 1}] * 5
+    assert 'scrape:istanbul:20261012' not in single_flight._ucustakiler
+    assert not single_flight.kira_aktif_mi('scrape:istanbul:20261012')
+
+
+def test_hata_bekleyenlere_iletilir():
+    """Liderin hatası birleşen çağrılara da yükseltilir"""
+    basladi = threading.Event()
+    birak = threading.Event()
+
+    def hatali():
+        basladi.set()
+        birak.wait(5)
+        raise ValueError('kart alınamadı')
+
+    hatalar = []
+
+    def cagir():
+        try:
+            single_flight.run('scrape:ankara:20261012', hatali)
+        except ValueError as e:
+            hatalar.append(str(e))
+
+    lider = threading.Thread(target=cagir)
+    lider.start()
+    assert basladi.wait(5)
+    bekleyen = threading.Thread(target=cagir)
+    bekleyen.start()
+    time.sleep(0.2)
+    birak.set()
+    lider.join(5)
+    bekleyen.join(5)
+
+    assert hatalar == ['kart alınamadı'] * 2
+
+
+def test_suresi_dolmus_kira_devralinir(kira_db):
+    """Sahibi bırakmadan süresi dolan kira beklemeden devralınır"""
+    _baska_surecin_kirasi(kira_db, 'scrape:izmir:20261012', -1)
+
+    assert single_flight.run('scrape:izmir:20261012', lambda: 'yeni') == 'yeni'
+    assert not single_flight.kira_aktif_mi('scrape:izmir:20261012')
+
+
+def test_aktif_kira_bitince_sonuc_okunur(kira_db):
+    """Başka süreç kirayı tutarken beklenir; süre dolunca sonucu okunur"""
+    _baska_surecin_kirasi(kira_db, 'scrape:bursa:20261012', 0.3)
+    calisti = []
+
+    baslangic = time.monotonic()
+    sonuc = single_flight.run('scrape:bursa:20261012', lambda: calisti.append(1) or 'yeni',
+                              sonuc_oku=lambda: 'kaydedilmis')
+
+    assert sonuc == 'kaydedilmis'
+    assert calisti == []
+    assert time.monotonic() - baslangic >= 0.25
+
+
+def test_aktif_kira_bitince_sonuc_yoksa_calisir(kira_db):
+    """Kira dolduğunda okunacak sonuç yoksa iş devralınıp çalıştırılır"""
+    _baska_surecin_kirasi(kira_db, 'scrape:adana:20261012', 0.2)
+
+    sonuc = single_flight.run('scrape:adana:20261012', lambda: 'yeni', sonuc_oku=lambda: None)
+
+    assert sonuc == 'yeni'
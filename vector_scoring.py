@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+VEKTÖREL SKOR MOTORU
+process_calculation_for_city hesaplamasını bir kartın (veya çok şehirli,
+çok günlü bir kart listesinin) tüm atları için sütun dizileri üzerinde
+numpy ile yapar: mesafe düzeltmesi, k_adapt, kilo düzeltmesi ve
+'geçersiz' maskeleri dizi işlemleri, koşu içi sıralama grup bazlı
+lexsort ile yapılır. Çıktı satırları Python motoruyla birebir aynıdır.
+
+String alanlar (derece, mesafe, kilo) her benzersiz değer için bir kez
+ayrıştırılır; aynı kartta tekrar eden değerler yeniden işlenmez.
+"""
+
+import re
+from itertools import compress
+
+import numpy as np
+
+from horse_scraper import _clean_float, _clean_kilo, calculate_kadapt_batch, skor_faktorleri, time_to_seconds
+
+GECERSIZ = 'geçersiz'
+GECERSIZ_DERECELER = ('-', '0', '0.0', '0,0')
+
+
+def _benzersiz_uygula(degerler, fonksiyon, maske=None):
+    """
+    fonksiyon'u her benzersiz string değere bir kez uygular; None dönenler NaN olur.
+    maske verilirse yalnızca True olan satırlar ayrıştırılır (diğerleri NaN).
+    """
+    if maske is None:
+        tablo = dict.fromkeys(degerler)
+    else:
+        maske = maske.tolist()
+        tablo = dict.fromkeys(compress(degerler, maske))
+    for deger in tablo:
+        sayi = fonksiyon(deger)
+        tablo[deger] = np.nan if sayi is None else sayi
+
+    if maske is None:
+        return np.array([tablo[d] for d in degerler], dtype=float)
+    return np.array([tablo[d] if m else np.nan for d, m in zip(degerler, maske)], dtype=float)
+
+
+def _benzersiz_maske(degerler, kosul):
+    """kosul'u her benzersiz string değere bir kez uygulayan boolean maske"""
+    tablo = dict.fromkeys(degerler)
+    for deger in tablo:
+        tablo[deger] = bool(kosul(deger))
+    return np.array([tablo[d] for d in degerler], dtype=bool)
+
+
+# M.SS.HH / SS.HH biçimli dereceler için hızlı yol; diğerleri time_to_seconds'a gider
+_DERECE_UC_PARCA = re.compile(r'([0-9]{1,9})\.([0-9]{1,9})\.([0-9]{1,9})')
+_DERECE_IKI_PARCA = re.compile(r'([0-9]{1,2})\.([0-9]{1,2})')
+
+
+def _derece_saniye(derece):
+    """time_to_seconds ile aynı sonuç; yaygın biçimlerde split/try maliyeti olmadan"""
+    eslesme = _DERECE_UC_PARCA.fullmatch(derece)
+    if eslesme:
+        return int(eslesme[1]) * 60 + int(eslesme[2]) + int(eslesme[3]) / 100.0
+    eslesme = _DERECE_IKI_PARCA.fullmatch(derece)
+    if eslesme:
+        return int(eslesme[1]) + int(eslesme[2]) / 100.0
+    return time_to_seconds(derece)
+
+
+def build_columns(cards):
+    """
+    Kart listesini sütun dizilerine çevirir
+
+    Args:
+        cards: [(horses_list, city_name), ...]
+
+    Returns:
+        dict: satır başına diziler + 'kart' (kart indeksi) ve 'atlar' (orijinal dict'ler)
+    """
+    atlar = []
+    satirlar = []
+    for kart_no, (horses_list, city_name) in enumerate(cards):
+        atlar.extend(horses_list)
+        for h in horses_list:
+            get = h.get
+            satirlar.append((
+                kart_no, city_name, h['Koşu'],
+                str(get('Son Derece', '')).strip(),
+                str(get('Son Mesafe', '')), str(get('Bugünkü Mesafe', '')),
+                str(get('Son Pist', '')).strip(), str(get('Bugünkü Pist', '')).strip(),
+                str(get('Son Kilo', '')), str(get('Kilo', '')),
+                get('Son Hipodrom', city_name)
+            ))
+
+    adlar = ('kart', 'sehir', 'kosu', 'derece', 'son_mesafe', 'bugun_mesafe',
+             'son_pist', 'bugun_pist', 'son_kilo', 'kilo', 'gecmis_sehir')
+    sutunlar = {ad: list(sutun) for ad, sutun in zip(adlar, zip(*satirlar))} if satirlar else {ad: [] for ad in adlar}
+    sutunlar['kart'] = np.array(sutunlar['kart'], dtype=np.int64)
+    sutunlar['kosu'] = np.array(sutunlar['kosu'], dtype=object)
+    sutunlar['atlar'] = atlar
+    return sutunlar
+
+
+def parse_columns(sutunlar):
+    """
+    Skor sabitlerinden bağımsız kısım: string alanları bir kez ayrıştırır
+
+    Returns:
+        dict: son_mesafe, bugun_mesafe, derece_saniye, kilo_onceki, kilo_bugun
+              dizileri, 'hesap' (skoru hesaplanacak satırlar), 'atla' (derece
+              saniyeye çevrilemedi) maskeleri ve k_adapt için 'kosullar'
+    """
+    derece = sutunlar['derece']
+
+    drcsiz = _benzersiz_maske(derece, lambda d: d.lower().replace('.', '').replace(' ', '') == 'drcsiz')
+    # Mesafeler yalnızca drcsiz olmayan atlar için ayrıştırılır (Python motoruyla aynı hata davranışı)
+    son_mesafe = _benzersiz_uygula(sutunlar['son_mesafe'], _clean_float, ~drcsiz)
+    bugun_mesafe = _benzersiz_uygula(sutunlar['bugun_mesafe'], _clean_float, ~drcsiz)
+
+    bos_derece = _benzersiz_maske(derece, lambda d: not d or d in GECERSIZ_DERECELER)
+    with np.errstate(invalid='ignore'):
+        aday = (~drcsiz & ~bos_derece & ~np.isnan(son_mesafe) & ~np.isnan(bugun_mesafe)
+                & (son_mesafe > 0) & (bugun_mesafe > 0))
+
+    derece_saniye = _benzersiz_uygula(derece, _derece_saniye, aday)
+    atla = aday & (derece_saniye <= 0)
+    hesap = aday & ~atla
+
+    return {
+        'son_mesafe': son_mesafe,
+        'bugun_mesafe': bugun_mesafe,
+        'derece_saniye': derece_saniye,
+        'kilo_onceki': _benzersiz_uygula(sutunlar['son_kilo'], _clean_kilo, hesap),
+        'kilo_bugun': _benzersiz_uygula(sutunlar['kilo'], _clean_kilo, hesap),
+        'hesap': hesap,
+        'atla': atla,
+        # (geçmiş şehir, geçmiş pist, hedef şehir, hedef pist)
+        'kosullar': list(zip(sutunlar['gecmis_sehir'], sutunlar['son_pist'], sutunlar['sehir'], sutunlar['bugun_pist'])),
+    }
+
+
+def compute_scores(ayrik, kadapt, uzun=None, kisa=None, kilo=None):
+    """
+    Ayrıştırılmış sütunlardan skorlar
+
+    Sabitler verilmezse horse_scraper.skor_faktorleri() kullanılır. Parametre taraması için
+    sabitler (K, 1) ve kadapt (K, n) biçiminde verilerek K parametre seti
+    tek seferde skorlanabilir.
+
+    Returns:
+        tuple: (kesilmiş (2 hane) skor, geçersizlerde NaN; geçerli maskesi)
+    """
+    varsayilan_uzun, varsayilan_kisa, varsayilan_kilo = skor_faktorleri()
+    uzun = varsayilan_uzun if uzun is None else uzun
+    kisa = varsayilan_kisa if kisa is None else kisa
+    kilo = varsayilan_kilo if kilo is None else kilo
+    son_mesafe, bugun_mesafe, derece_saniye = ayrik['son_mesafe'], ayrik['bugun_mesafe'], ayrik['derece_saniye']
+    kilo_onceki, kilo_bugun = ayrik['kilo_onceki'], ayrik['kilo_bugun']
+
+    with np.errstate(all='ignore'):
+        mesafe_farki = bugun_mesafe - son_mesafe
+        mevcut_100m_sure = derece_saniye / (son_mesafe / 100)
+        mesafe_faktoru = np.where(mesafe_farki > 0, uzun, kisa)
+        yeni_100m_sure = mevcut_100m_sure + (np.abs(mesafe_farki) / 100) * mesafe_faktoru
+        toplam_sure = np.where(mesafe_farki != 0, yeni_100m_sure * (bugun_mesafe / 100), derece_saniye)
+        ort_100m_sure = toplam_sure / (bugun_mesafe / 100)
+
+        cikti = ort_100m_sure * kadapt
+        kilo_var = ~np.isnan(kilo_onceki) & ~np.isnan(kilo_bugun)
+        cikti = np.where(kilo_var, cikti - (kilo_bugun - kilo_onceki) * kilo, cikti)
+
+        yuzluk = cikti * 100
+        gecerli = ayrik['hesap'] & np.isfinite(yuzluk) & (cikti > 0)
+        kesik = np.where(gecerli, np.trunc(np.where(gecerli, yuzluk, 0)) / 100, np.nan)
+
+    return kesik, gecerli
+
+
+def score_columns(sutunlar):
+    """
+    Sütunlar üzerinde skorları hesaplar
+
+    Returns:
+        dict: {
+            'cikti': kesilmiş (2 hane) skor, geçersizlerde NaN,
+            'gecerli': skoru olan satırlar,
+            'atla': çıktıya hiç yazılmayan satırlar (derece saniyeye çevrilemedi)
+        }
+    """
+    if not len(sutunlar['derece']):
+        bos = np.zeros(0, dtype=bool)
+        return {'cikti': np.zeros(0), 'gecerli': bos, 'atla': bos}
+
+    ayrik = parse_columns(sutunlar)
+
+    # k_adapt her benzersiz (geçmiş şehir, geçmiş pist, hedef şehir, hedef pist) için bir kez
+    kosullar = ayrik['kosullar']
+    try:
+        tablo = dict.fromkeys(kosullar)
+    except TypeError:
+        kadapt = np.array(calculate_kadapt_batch(kosullar), dtype=float)
+    else:
+        tablo.update(zip(tablo, calculate_kadapt_batch(tablo)))
+        kadapt = np.array([tablo[k] for k in kosullar], dtype=float)
+
+    kesik, gecerli = compute_scores(ayrik, kadapt)
+    return {'cikti': kesik, 'gecerli': gecerli, 'atla': ayrik['atla']}
+
+
+def _gruplar(sutunlar):
+    """
+    Her kartta ardışık aynı 'Koşu' değerli atlara grup numarası ver
+
+    Returns:
+        tuple: (satır başına grup numarası, her grubun ilk satırının indeksi)
+    """
+    kosu = sutunlar['kosu']
+    kart = sutunlar['kart']
+    yeni = np.ones(len(kosu), dtype=bool)
+    if len(kosu) > 1:
+        yeni[1:] = (kart[1:] != kart[:-1]) | (kosu[1:] != kosu[:-1]).astype(bool)
+    return np.cumsum(yeni) - 1, np.flatnonzero(yeni)
+
+
+def score_cards(cards):
+    """
+    Kartları tek seferde skorlar
+
+    Args:
+        cards: [(horses_list, city_name), ...]
+
+    Returns:
+        list: Her kart için process_calculation_for_city ile aynı satır listesi
+    """
+    sutunlar = build_columns(cards)
+    skor = score_columns(sutunlar)
+    atlar = sutunlar['atlar']
+    kart = sutunlar['kart']
+    grup, grup_ilk = _gruplar(sutunlar)
+
+    # Koşu içinde: geçerliler skora göre (eşitlikte orijinal sıra), sonra geçersizler orijinal sırada
+    dahil = np.flatnonzero(~skor['atla'])
+    anahtar = np.where(skor['gecerli'], skor['cikti'], 0.0)
+    sira = dahil[np.lexsort((dahil, anahtar[dahil], ~skor['gecerli'][dahil], grup[dahil]))]
+
+    # Kart bazında (Koşu, At İsmi) -> Son Hipodrom (aynı anahtarda son kayıt geçerli)
+    hipodrom_haritalari = []
+    for horses_list, _ in cards:
+        harita = {}
+        for horse in horses_list:
+            harita[(str(horse['Koşu']), str(horse['At İsmi']))] = horse.get('Son Hipodrom', '')
+        hipodrom_haritalari.append(harita)
+
+    sonuclar = [[] for _ in cards]
+    cikti_listesi = skor['cikti'].tolist()
+    gecerli_listesi = skor['gecerli'].tolist()
+    kart_listesi = kart.tolist()
+    grup_listesi = grup.tolist()
+    grup_ilk_listesi = grup_ilk.tolist()
+    onceki_grup = None
+    for i in sira.tolist():
+        data = sonuclar[kart_listesi[i]]
+        horse = atlar[i]
+        g = grup_listesi[i]
+        if g != onceki_grup:
+            onceki_grup = g
+            # Başlık ve hipodrom anahtarı için koşunun ilk atındaki değer kullanılır
+            kosu = atlar[grup_ilk_listesi[g]]['Koşu']
+            kosu_str = str(kosu)
+            harita = hipodrom_haritalari[kart_listesi[i]]
+            data.append({'At İsmi': '', 'Koşu': f"{kosu}. Koşu", 'Çıktı': '', 'Son Mesafe': '', 'Son Pist': '', 'Son Kilo': '', 'Kilo': '', 'Son Hipodrom': ''})
+        get = horse.get
+        at_adi = get('At İsmi', '')
+        data.append({
+            'At İsmi': at_adi,
+            'Koşu': '',
+            'Çıktı': f"{cikti_listesi[i]:.2f}" if gecerli_listesi[i] else GECERSIZ,
+            'Son Mesafe': get('Son Mesafe', ''),
+            'Son Pist': get('Son Pist', ''),
+            'Son Kilo': get('Son Kilo', ''),
+            'Kilo': get('Kilo', ''),
+            'Son Hipodrom': harita.get((kosu_str, str(at_adi)), '')
+        })
+    return sonuclar
+
+
+def process_calculation_vectorized(horses_list, city_name):
+    """Tek kart için process_calculation_for_city karşılığı"""
+    return score_cards([(horses_list, city_name)])[0]